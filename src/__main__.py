@@ -1,43 +1,104 @@
 # src/__main__.py
+"""
+prompt-lab 命令行入口
+
+子命令在首次调用时才导入对应模块（langchain、pandas 等依赖较重），
+--version、--help 等不需要子命令的调用无需加载它们。
+"""
+import importlib
+from typing import Dict, List, NamedTuple, Optional
+
+import click
 import typer
-from rich.console import Console
-from .run_batch import run as batch_run
-from .run_compare import app as compare_app
-from .run_agents import app as agents_app
-from .run_eval import app as eval_app
-from .baseline_cli import app as baseline_app
-from .regression_cli import app as regression_app
-from .compatibility import ensure_compatibility
-
-console = Console()
-app = typer.Typer()
+from typer.core import TyperGroup
+
+
+class LazyCommand(NamedTuple):
+    """延迟加载的子命令"""
+    module: str                # 所在模块（相对于 src）
+    attr: str                  # Typer 应用或命令函数
+    help: str                  # 顶层 --help 中显示的简介
+    is_app: bool = True        # attr 是 Typer 应用（False 表示命令函数）
+
+
+# 子命令按此顺序显示
+LAZY_COMMANDS: Dict[str, LazyCommand] = {
+    "batch": LazyCommand("run_batch", "run", "批量跑测试集：读取 JSONL -> 调用模型 -> 写入 CSV", is_app=False),
+    "compare": LazyCommand("run_compare", "app", "用同一批测试样本，对比多个 flow 的输出。"),
+    "agents": LazyCommand("run_agents", "app", ""),
+    "eval": LazyCommand("run_eval", "app", "统一的评估执行工具：支持 Agent 和 Pipeline 两种模式"),
+    "baseline": LazyCommand("baseline_cli", "app", "Baseline 管理工具"),
+    "regression": LazyCommand("regression_cli", "app", "回归测试工具"),
+}
+
+
+def load_command(name: str) -> click.Command:
+    """导入子命令所在模块并生成 click 命令，结构与 add_typer / command 注册一致"""
+    spec = LAZY_COMMANDS[name]
+    target = getattr(importlib.import_module(f"{__package__ or 'src'}.{spec.module}"), spec.attr)
+
+    wrapper = typer.Typer()
+    wrapper.callback()(lambda: None)
+    if spec.is_app:
+        wrapper.add_typer(target, name=name)
+    else:
+        wrapper.command(name)(target)
+    return typer.main.get_command(wrapper).commands[name]
+
+
+class LazyGroup(TyperGroup):
+    """在解析到子命令时才加载它；顶层帮助只使用静态简介"""
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        names = super().list_commands(ctx)
+        return names + [name for name in LAZY_COMMANDS if name not in names]
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        command = super().get_command(ctx, cmd_name)
+        if command is None and cmd_name in LAZY_COMMANDS:
+            # 仅用于帮助列表的占位命令；执行时由 resolve_command 加载真实命令
+            return click.Command(cmd_name, help=LAZY_COMMANDS[cmd_name].help)
+        return command
+
+    def resolve_command(self, ctx: click.Context, args: List[str]):
+        if args and args[0] in LAZY_COMMANDS and args[0] not in self.commands:
+            self.add_command(load_command(args[0]), args[0])
+        return super().resolve_command(ctx, args)
+
+
+app = typer.Typer(cls=LazyGroup)
 
 @app.callback(invoke_without_command=True)
 def main(
     ctx: typer.Context,
     check_compatibility: bool = typer.Option(
-        False, 
-        "--check-compatibility", 
+        False,
+        "--check-compatibility",
         help="检查系统兼容性"
     ),
     version: bool = typer.Option(
-        False, 
-        "--version", 
+        False,
+        "--version",
         help="显示版本信息"
     )
 ):
     """
     Prompt Lab - 智能提示工程平台
-    
+
     支持单 Agent/Flow 评估和多步骤 Pipeline 工作流程。
     新旧系统可以并存使用，提供平滑的迁移路径。
     """
+    from rich.console import Console
+    console = Console()
+
     if version:
         console.print("[bold blue]Prompt Lab v2.0[/] - Pipeline 增强版")
         console.print("支持 Agent/Flow 评估和 Pipeline 工作流程")
         return
-    
+
     if check_compatibility:
+        from .compatibility import ensure_compatibility
+
         console.rule("[bold blue]系统兼容性检查[/]")
         compat_result = ensure_compatibility()
         if compat_result["compatible"]:
@@ -45,17 +106,9 @@ def main(
         else:
             console.print("[red]✗ 发现兼容性问题，请查看上述详情[/]")
         return
-    
+
     if ctx.invoked_subcommand is None:
         console.print(ctx.get_help())
 
-# 添加子命令
-app.command("batch")(batch_run)
-app.add_typer(compare_app, name="compare")
-app.add_typer(agents_app, name="agents")
-app.add_typer(eval_app, name="eval")
-app.add_typer(baseline_app, name="baseline")
-app.add_typer(regression_app, name="regression")
-
 if __name__ == "__main__":
-    app()
\ No newline at end of file
+    app()
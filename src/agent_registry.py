@@ -10,9 +10,11 @@ For new code, consider using agent_registry_v2.AgentRegistry directly.
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
+import os
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple
 
 import yaml
 
@@ -41,6 +43,7 @@ def _get_registry() -> AgentRegistryV2:
     if _registry_instance is None:
         try:
             _registry_instance = AgentRegistryV2()
+            _registry_instance.add_reload_callback(_on_registry_reload)
             logger.info("Initialized AgentRegistry v2")
         except Exception as e:
             logger.warning(f"Failed to initialize AgentRegistry v2: {e}. Falling back to filesystem-only mode.")
@@ -80,6 +83,19 @@ class AgentConfig:
     version: str | None = None       # 版本号
     tags: List[str] | None = None    # 标签
     deprecated: bool = False         # 是否废弃
+    
+    _flow_names: FrozenSet[str] | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def flow_names(self) -> FrozenSet[str]:
+        """所有 flow 名称（首次访问时计算）"""
+        if self._flow_names is None:
+            self._flow_names = frozenset(flow.name for flow in self.flows)
+        return self._flow_names
+    
+    def has_flow(self, flow_name: str) -> bool:
+        """判断 agent 是否包含指定 flow"""
+        return flow_name in self.flow_names
 
     @property
     def all_testsets(self) -> List[str]:
@@ -93,26 +109,37 @@ class AgentConfig:
         
         # 验证 baseline_flow 引用
         if self.baseline_flow:
-            flow_names = {flow.name for flow in self.flows}
-            if self.baseline_flow not in flow_names:
+            if not self.has_flow(self.baseline_flow):
                 errors.append(f"baseline_flow '{self.baseline_flow}' 不存在于 flows 列表中")
         
         return errors
 
 
-def _find_agent_dir(agent_id: str) -> Optional[Path]:
-    """在多个目录中查找 Agent 目录"""
-    # First try to get from registry v2
+def _get_agent_metadata(agent_id: str) -> Optional[AgentMetadata]:
+    """从 registry v2 获取 agent 元数据，不存在时返回 None"""
     registry = _get_registry()
     if registry:
         try:
-            metadata = registry.get_agent(agent_id)
-            agent_dir = ROOT_DIR / metadata.location
-            if agent_dir.exists() and agent_dir.is_dir():
-                return agent_dir
+            return registry.get_agent(agent_id)
         except KeyError:
-            # Agent not in registry, fall back to filesystem search
-            pass
+            return None
+    return None
+
+
+def _find_agent_dir(agent_id: str, agent_metadata: Optional[AgentMetadata] = None) -> Optional[Path]:
+    """
+    在多个目录中查找 Agent 目录
+    
+    Args:
+        agent_id: Agent ID
+        agent_metadata: 已查询到的 registry 元数据（可选，避免重复查询）
+    """
+    # First try to get from registry v2
+    metadata = agent_metadata or _get_agent_metadata(agent_id)
+    if metadata:
+        agent_dir = ROOT_DIR / metadata.location
+        if agent_dir.exists() and agent_dir.is_dir():
+            return agent_dir
     
     # Fall back to filesystem search
     for base_dir in AGENT_DIRS:
@@ -128,40 +155,137 @@ def _find_agent_dir(agent_id: str) -> Optional[Path]:
     return None
 
 
+@dataclass
+class _AgentCacheEntry:
+    config: AgentConfig
+    path: Path
+    stat_key: Tuple[int, int]
+    metadata: Optional[AgentMetadata]
+
+
+_agent_cache: Dict[str, _AgentCacheEntry] = {}
+_agent_cache_lock = threading.Lock()
+_agent_load_locks: Dict[str, threading.Lock] = {}
+_agent_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def invalidate_agent_cache(agent_id: Optional[str] = None) -> None:
+    """
+    清除 load_agent 的配置缓存
+    
+    Args:
+        agent_id: 只清除指定 agent；为空时清除全部
+    """
+    with _agent_cache_lock:
+        if agent_id is None:
+            _agent_cache.clear()
+        else:
+            _agent_cache.pop(agent_id, None)
+
+
+def _invalidate_agents(agent_ids) -> None:
+    """registry 重新加载后，只失效发生变化的 agent 的缓存"""
+    if not agent_ids:
+        return
+    from .chains import get_compiled_flow_cache
+    
+    flow_cache = get_compiled_flow_cache()
+    for agent_id in agent_ids:
+        invalidate_agent_cache(agent_id)
+        flow_cache.invalidate(agent_id=agent_id)
+
+
+def _on_registry_reload(event) -> None:
+    if event.success:
+        _invalidate_agents(event.changed_ids)
+
+
+def get_agent_cache_stats() -> Dict[str, Any]:
+    """获取 load_agent 配置缓存的统计信息"""
+    with _agent_cache_lock:
+        hits, misses = _agent_cache_stats["hits"], _agent_cache_stats["misses"]
+        return {
+            "size": len(_agent_cache),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+
 def load_agent(agent_id: str) -> AgentConfig:
     """
     加载指定 agent 的配置（支持多目录）
     
     This function now uses AgentRegistry v2 internally for metadata lookup,
     but maintains backward compatibility with the AgentConfig interface.
+    
+    解析结果按 agent_id 缓存：agent.yaml 的 mtime/大小变化、registry 元数据更新
+    或 registry 重新加载改动了该 agent 后自动失效。返回的配置对象在调用方之间共享，应视为只读。
     """
-    # Try to get metadata from registry v2 first
-    registry = _get_registry()
-    agent_metadata: Optional[AgentMetadata] = None
+    agent_metadata = _get_agent_metadata(agent_id)
     
-    if registry:
-        try:
-            agent_metadata = registry.get_agent(agent_id)
-            logger.debug(f"Found agent '{agent_id}' in registry v2")
-        except KeyError:
-            logger.debug(f"Agent '{agent_id}' not in registry v2, falling back to filesystem")
+    with _agent_cache_lock:
+        entry = _agent_cache.get(agent_id)
+        load_lock = _agent_load_locks.setdefault(agent_id, threading.Lock())
+    
+    if entry and entry.metadata is agent_metadata and entry.stat_key == _stat_key(entry.path):
+        with _agent_cache_lock:
+            _agent_cache_stats["hits"] += 1
+        return entry.config
+    
+    # 同一 agent 只由一个线程解析，其余线程等待后复用结果
+    with load_lock:
+        with _agent_cache_lock:
+            entry = _agent_cache.get(agent_id)
+        if entry and entry.metadata is agent_metadata and entry.stat_key == _stat_key(entry.path):
+            with _agent_cache_lock:
+                _agent_cache_stats["hits"] += 1
+            return entry.config
+        
+        path = _resolve_agent_config_path(agent_id, agent_metadata)
+        stat_key = _stat_key(path)
+        agent_config = _parse_agent_config(path, agent_metadata)
+        
+        with _agent_cache_lock:
+            _agent_cache_stats["misses"] += 1
+            if stat_key is not None:
+                _agent_cache[agent_id] = _AgentCacheEntry(agent_config, path, stat_key, agent_metadata)
+        return agent_config
+
+
+def _resolve_agent_config_path(agent_id: str, agent_metadata: Optional[AgentMetadata]) -> Path:
+    """确定 agent 配置文件路径"""
+    if agent_metadata:
+        logger.debug(f"Found agent '{agent_id}' in registry v2")
+    else:
+        logger.debug(f"Agent '{agent_id}' not in registry v2, falling back to filesystem")
     
     # 查找 agent 目录
-    agent_dir = _find_agent_dir(agent_id)
+    agent_dir = _find_agent_dir(agent_id, agent_metadata)
     
     if agent_dir:
-        path = agent_dir / "agent.yaml"
-    else:
-        # 兼容旧结构：agents/{agent_id}.yaml
-        old_path = AGENT_DIRS[0] / f"{agent_id}.yaml"
-        if old_path.exists():
-            path = old_path
-        else:
-            raise FileNotFoundError(
-                f"Agent config not found: {agent_id}\n"
-                f"Searched in: {', '.join(str(d) for d in AGENT_DIRS)}"
-            )
+        return agent_dir / "agent.yaml"
     
+    # 兼容旧结构：agents/{agent_id}.yaml
+    old_path = AGENT_DIRS[0] / f"{agent_id}.yaml"
+    if old_path.exists():
+        return old_path
+    raise FileNotFoundError(
+        f"Agent config not found: {agent_id}\n"
+        f"Searched in: {', '.join(str(d) for d in AGENT_DIRS)}"
+    )
+
+
+def _parse_agent_config(path: Path, agent_metadata: Optional[AgentMetadata]) -> AgentConfig:
+    """解析并验证 agent 配置文件"""
     with open(path, "r", encoding="utf-8") as f:
         cfg = yaml.safe_load(f)
 
@@ -397,7 +521,8 @@ def reload_registry() -> None:
     """
     registry = _get_registry()
     if registry:
-        registry.reload_registry()
+        diff = registry.reload_registry()
+        _invalidate_agents(diff.changed_ids)
         logger.info("Agent registry reloaded")
     else:
         logger.warning("Registry v2 not available, cannot reload")
@@ -14,13 +14,15 @@ For detailed documentation, see: docs/reference/agent-registry-guide.md
 
 from __future__ import annotations
 
+import copy
+import hashlib
 import logging
 import threading
 import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Set, Callable
+from typing import Dict, Iterable, List, Optional, Any, Set, Callable
 
 import yaml
 from watchdog.observers import Observer
@@ -258,12 +260,21 @@ class ReloadEvent:
     error: Optional[str] = None
     agents_count: int = 0
     previous_count: int = 0
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    
+    @property
+    def changed_ids(self) -> Set[str]:
+        """IDs of all agents that were added, removed or modified by this reload"""
+        return set(self.added) | set(self.removed) | set(self.changed)
     
     def __str__(self) -> str:
         if self.success:
             return (
                 f"Registry reloaded successfully at {self.timestamp.isoformat()}: "
-                f"{self.agents_count} agents (was {self.previous_count})"
+                f"{self.agents_count} agents (was {self.previous_count}; "
+                f"+{len(self.added)} ~{len(self.changed)} -{len(self.removed)})"
             )
         else:
             return (
@@ -272,42 +283,178 @@ class ReloadEvent:
             )
 
 
+@dataclass
+class RegistryDiff:
+    """Agent IDs affected by a registry (re)load"""
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    
+    @property
+    def changed_ids(self) -> Set[str]:
+        """IDs of all added, removed or modified agents"""
+        return set(self.added) | set(self.removed) | set(self.changed)
+    
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+# Fields covered by the search index
+INDEXED_SEARCH_FIELDS = ("id", "name", "description", "tags")
+
+# Substring queries shorter than this cannot use the n-gram index
+NGRAM_SIZE = 3
+
+
+def _ngrams(text: str) -> Set[str]:
+    """Return all n-grams of a (lowercased) string"""
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class AgentIndex:
+    """
+    Immutable inverted indexes over a snapshot of registry agents.
+    
+    Built once per registry load/change and swapped in atomically, so readers
+    never observe a partially updated index. Provides:
+    - exact-match maps for tag, owner, category, environment and status
+    - an n-gram index over the lowercased id/name/description/tags, used to
+      narrow substring search candidates before verification
+    - a precomputed (name, insertion order) ranking for sorted results
+    """
+    
+    def __init__(self, agents: Dict[str, AgentMetadata]):
+        self.agents = dict(agents)
+        self.by_tag: Dict[str, Set[str]] = {}
+        self.by_owner: Dict[str, Set[str]] = {}
+        self.by_category: Dict[str, Set[str]] = {}
+        self.by_environment: Dict[str, Set[str]] = {}
+        self.by_status: Dict[str, Set[str]] = {}
+        self.deprecated: Set[str] = set()
+        self.ngrams: Dict[str, Set[str]] = {}
+        # Lowercased searchable values per agent: field -> list of strings
+        self.search_text: Dict[str, Dict[str, List[str]]] = {}
+        
+        for agent_id, agent in self.agents.items():
+            for tag in agent.tags:
+                self.by_tag.setdefault(tag, set()).add(agent_id)
+            self.by_owner.setdefault(agent.owner, set()).add(agent_id)
+            self.by_category.setdefault(agent.category, set()).add(agent_id)
+            self.by_environment.setdefault(agent.environment, set()).add(agent_id)
+            self.by_status.setdefault(agent.status, set()).add(agent_id)
+            if agent.deprecated:
+                self.deprecated.add(agent_id)
+            
+            texts: Dict[str, List[str]] = {}
+            for field_name in INDEXED_SEARCH_FIELDS:
+                value = getattr(agent, field_name, None)
+                if value is None:
+                    continue
+                values = value if isinstance(value, list) else [value]
+                texts[field_name] = [str(v).lower() for v in values]
+                for text in texts[field_name]:
+                    for gram in _ngrams(text):
+                        self.ngrams.setdefault(gram, set()).add(agent_id)
+            self.search_text[agent_id] = texts
+        
+        # Same ordering as sorting by name with a stable sort over registry order
+        ordered = sorted(self.agents, key=lambda agent_id: self.agents[agent_id].name)
+        self.rank: Dict[str, int] = {agent_id: i for i, agent_id in enumerate(ordered)}
+    
+    def sorted_ids(self, ids: Iterable[str]) -> List[str]:
+        """Return agent ids sorted by name (ties keep registry order)"""
+        return sorted(ids, key=self.rank.__getitem__)
+    
+    def search_candidates(self, query: str) -> Optional[Set[str]]:
+        """
+        Narrow down agents that may contain ``query`` (lowercased).
+        
+        Returns None when the query is too short to use the n-gram index.
+        """
+        if len(query) < NGRAM_SIZE:
+            return None
+        candidates: Optional[Set[str]] = None
+        for gram in sorted(_ngrams(query), key=lambda g: len(self.ngrams.get(g, ()))):
+            postings = self.ngrams.get(gram)
+            if not postings:
+                return set()
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                break
+        return candidates
+    
+    def matches_text(self, agent_id: str, query: str, search_fields: Iterable[str]) -> bool:
+        """Check whether any lowercased value of the given fields contains ``query``"""
+        texts = self.search_text[agent_id]
+        return any(query in text for field_name in search_fields for text in texts.get(field_name, ()))
+
+
 class RegistryFileHandler(FileSystemEventHandler):
-    """File system event handler for registry config file changes"""
+    """
+    File system event handler for registry config file changes.
+    
+    Editors typically emit several events per save (truncate, write, rename).
+    Events are coalesced: each one restarts a short timer and the registry is
+    reloaded once, after the file has been quiet for ``debounce`` seconds.
+    """
     
-    def __init__(self, registry: 'AgentRegistry', config_path: Path):
+    def __init__(self, registry: 'AgentRegistry', config_path: Path, debounce: float = 0.3):
         """
         Initialize the file handler.
         
         Args:
             registry: The AgentRegistry instance to reload
             config_path: Path to the config file to watch
+            debounce: Quiet period (seconds) before a reload is triggered
         """
         self.registry = registry
         self.config_path = config_path.resolve()
-        self._last_reload_time = 0.0
-        self._reload_debounce = 1.0  # Debounce reload for 1 second
-        
-    def on_modified(self, event):
-        """Handle file modification events"""
+        self._reload_debounce = debounce
+        self._timer: Optional[threading.Timer] = None
+        self._timer_lock = threading.Lock()
+    
+    def _is_config_event(self, event) -> bool:
         if event.is_directory:
-            return
-        
-        # Check if the modified file is our config file
-        event_path = Path(event.src_path).resolve()
-        if event_path != self.config_path:
-            return
-        
-        # Debounce: ignore if we just reloaded recently
-        current_time = time.time()
-        if current_time - self._last_reload_time < self._reload_debounce:
-            return
-        
-        self._last_reload_time = current_time
-        
-        # Trigger reload
-        logger.info(f"Config file modified: {self.config_path}")
+            return False
+        paths = [event.src_path, getattr(event, "dest_path", None)]
+        return any(path and Path(path).resolve() == self.config_path for path in paths)
+    
+    def _schedule_reload(self) -> None:
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self._reload_debounce, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def _fire(self) -> None:
+        with self._timer_lock:
+            self._timer = None
         self.registry._trigger_reload()
+    
+    def cancel(self) -> None:
+        """Cancel a pending reload"""
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+    
+    def on_modified(self, event):
+        """Handle file modification events"""
+        if self._is_config_event(event):
+            logger.debug(f"Config file modified: {self.config_path}")
+            self._schedule_reload()
+    
+    def on_created(self, event):
+        """Handle the config file being (re)created"""
+        if self._is_config_event(event):
+            self._schedule_reload()
+    
+    def on_moved(self, event):
+        """Handle atomic saves that rename a temp file over the config file"""
+        if self._is_config_event(event):
+            self._schedule_reload()
 
 
 class AgentRegistry:
@@ -337,14 +484,24 @@ class AgentRegistry:
         """
         self.config_path = config_path or DEFAULT_REGISTRY_PATH
         self._agents: Dict[str, AgentMetadata] = {}
+        self._index: Optional[AgentIndex] = None
         self._registry_config: Dict[str, Any] = {}
         self._last_loaded: Optional[datetime] = None
         
+        # Raw config entry per agent as of the last load; entries edited in memory are dropped
+        self._raw_agents: Dict[str, Dict[str, Any]] = {}
+        self._config_digest: Optional[str] = None
+        self._edited_in_memory = False
+        self._last_diff = RegistryDiff()
+        # Bumped whenever the agent map is swapped (reload or in-memory edit)
+        self._generation = 0
+        
         # Hot reload support
         self._hot_reload_enabled = enable_hot_reload
         self._file_observer: Optional[Observer] = None
+        self._file_handler: Optional[RegistryFileHandler] = None
         self._reload_callbacks: List[Callable[[ReloadEvent], None]] = []
-        self._reload_lock = threading.Lock()
+        self._reload_lock = threading.RLock()
         
         # Load registry on initialization
         if self.config_path.exists():
@@ -360,6 +517,11 @@ class AgentRegistry:
         """
         Load the agent registry from the configuration file.
         
+        Only agents whose config entry changed since the last load are rebuilt;
+        unchanged AgentMetadata objects are reused. The new agent map is swapped
+        in at once, so readers never see a partially loaded registry, and a
+        failed load leaves the previous registry untouched.
+        
         Returns:
             Dictionary mapping agent IDs to AgentMetadata
             
@@ -371,9 +533,19 @@ class AgentRegistry:
         if not self.config_path.exists():
             raise FileNotFoundError(f"Registry config not found: {self.config_path}")
         
-        try:
-            with open(self.config_path, "r", encoding="utf-8") as f:
-                config = yaml.safe_load(f)
+        with self._reload_lock:
+            content = self.config_path.read_bytes()
+            digest = hashlib.sha256(content).hexdigest()
+            if digest == self._config_digest and not self._edited_in_memory:
+                # File unchanged and no in-memory edits since the last load
+                self._last_diff = RegistryDiff()
+                self._last_loaded = datetime.now()
+                return self._agents
+            
+            try:
+                config = yaml.safe_load(content)
+            except yaml.YAMLError as e:
+                raise yaml.YAMLError(f"Invalid YAML in registry config: {e}")
             
             # Validate config structure
             if not isinstance(config, dict):
@@ -382,40 +554,60 @@ class AgentRegistry:
             if "agents" not in config:
                 raise ValueError("Registry config must contain 'agents' key")
             
-            # Store registry config
-            self._registry_config = config
-            
             # Parse agents
             agents_data = config["agents"]
             if not isinstance(agents_data, dict):
                 raise ValueError("'agents' must be a dictionary")
             
-            # Load each agent
-            self._agents = {}
+            # Rebuild only changed entries
+            old_agents = self._agents
+            agents: Dict[str, AgentMetadata] = {}
+            raw_agents: Dict[str, Dict[str, Any]] = {}
+            diff = RegistryDiff()
             for agent_id, agent_data in agents_data.items():
+                previous = self._raw_agents.get(agent_id)
+                if previous is not None and previous == agent_data and agent_id in old_agents:
+                    agents[agent_id] = old_agents[agent_id]
+                    raw_agents[agent_id] = previous
+                    continue
                 try:
-                    metadata = AgentMetadata.from_dict(agent_id, agent_data)
-                    self._agents[agent_id] = metadata
+                    agents[agent_id] = AgentMetadata.from_dict(agent_id, agent_data)
                 except Exception as e:
                     logger.error(f"Failed to load agent '{agent_id}': {e}")
                     raise ValueError(f"Invalid agent metadata for '{agent_id}': {e}")
+                raw_agents[agent_id] = copy.deepcopy(agent_data)
+                (diff.changed if agent_id in old_agents else diff.added).append(agent_id)
+            diff.removed = [agent_id for agent_id in old_agents if agent_id not in agents]
             
+            # Swap everything in at once
+            self._registry_config = config
+            self._raw_agents = raw_agents
+            self._config_digest = digest
+            self._edited_in_memory = False
+            self._index = AgentIndex(agents)
+            self._agents = agents
+            self._generation += 1
+            self._last_diff = diff
             self._last_loaded = datetime.now()
-            logger.info(f"Loaded {len(self._agents)} agents from registry")
+            logger.info(
+                f"Loaded {len(agents)} agents from registry "
+                f"(+{len(diff.added)} ~{len(diff.changed)} -{len(diff.removed)})"
+            )
             
             return self._agents
-            
-        except yaml.YAMLError as e:
-            raise yaml.YAMLError(f"Invalid YAML in registry config: {e}")
     
-    def reload_registry(self) -> None:
+    def reload_registry(self) -> RegistryDiff:
         """
         Reload the registry from the configuration file.
         
         This is useful for hot reloading when the config file changes.
+        
+        Returns:
+            RegistryDiff with the IDs of added, removed and modified agents
         """
         logger.info("Reloading agent registry...")
         self.load_registry()
+        return self._last_diff
     
     def get_agent(self, agent_id: str) -> AgentMetadata:
         """
@@ -439,6 +631,130 @@ class AgentRegistry:
         
         return self._agents[agent_id]
     
+    @property
+    def generation(self) -> int:
+        """Monotonically increasing counter, bumped each time the agent map changes"""
+        return self._generation
+    
+    @property
+    def index(self) -> AgentIndex:
+        """Current search index, rebuilt lazily after in-memory changes"""
+        index = self._index
+        if index is None:
+            index = self._index = AgentIndex(self._agents)
+        return index
+    
+    def _replace_agent(self, agent_id: str, metadata: Optional[AgentMetadata]) -> None:
+        """Copy-on-write update of a single agent (None removes it)"""
+        with self._reload_lock:
+            agents = dict(self._agents)
+            if metadata is None:
+                agents.pop(agent_id, None)
+            else:
+                agents[agent_id] = metadata
+            # The entry no longer reflects the config file; rebuild it on the next load
+            self._raw_agents.pop(agent_id, None)
+            self._edited_in_memory = True
+            self._agents = agents
+            self._generation += 1
+            self._index = None
+    
+    def query_agents(
+        self,
+        query: Optional[str] = None,
+        category: Optional[str] = None,
+        environment: Optional[str] = None,
+        status: Optional[str] = None,
+        owner: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        include_deprecated: bool = True,
+        search_fields: Optional[List[str]] = None,
+        case_sensitive: bool = False,
+    ) -> List[AgentMetadata]:
+        """
+        Query agents with AND-combined filters using the registry indexes.
+        
+        Args:
+            query: Substring to search for in ``search_fields``
+            category: Filter by category
+            environment: Filter by environment
+            status: Filter by status
+            owner: Filter by owner
+            tags: Filter by tags (agent must have ALL specified tags)
+            include_deprecated: Whether to include deprecated agents
+            search_fields: Fields to search in. Defaults to ["id", "name", "description", "tags"]
+            case_sensitive: Whether search is case-sensitive
+            
+        Returns:
+            List of matching AgentMetadata sorted by name
+        """
+        index = self.index
+        
+        # Intersect the exact-match postings, smallest first
+        postings: List[Set[str]] = []
+        for value, mapping in (
+            (category, index.by_category),
+            (environment, index.by_environment),
+            (status, index.by_status),
+            (owner, index.by_owner),
+        ):
+            if value:
+                postings.append(mapping.get(value, set()))
+        for tag in tags or []:
+            postings.append(index.by_tag.get(tag, set()))
+        
+        ids: Optional[Set[str]] = None
+        for posting in sorted(postings, key=len):
+            ids = set(posting) if ids is None else ids & posting
+            if not ids:
+                return []
+        
+        if query:
+            fields = list(search_fields or INDEXED_SEARCH_FIELDS)
+            lowered = query.lower()
+            if set(fields) <= set(INDEXED_SEARCH_FIELDS):
+                candidates = index.search_candidates(lowered)
+                if candidates is not None:
+                    ids = candidates if ids is None else ids & candidates
+                pool = index.agents if ids is None else ids
+                ids = {
+                    agent_id for agent_id in pool
+                    if index.matches_text(agent_id, lowered, fields)
+                }
+                if case_sensitive:
+                    ids = {
+                        agent_id for agent_id in ids
+                        if self._matches_raw(index.agents[agent_id], query, fields, case_sensitive)
+                    }
+            else:
+                pool = index.agents if ids is None else ids
+                ids = {
+                    agent_id for agent_id in pool
+                    if self._matches_raw(index.agents[agent_id], query, fields, case_sensitive)
+                }
+        
+        if ids is None:
+            ids = set(index.agents)
+        if not include_deprecated:
+            ids -= index.deprecated
+        
+        return [index.agents[agent_id] for agent_id in index.sorted_ids(ids)]
+    
+    @staticmethod
+    def _matches_raw(agent: AgentMetadata, query: str, fields: List[str], case_sensitive: bool) -> bool:
+        """Substring match against the raw field values (for non-indexed fields / case-sensitive search)"""
+        search_query = query if case_sensitive else query.lower()
+        for field_name in fields:
+            value = getattr(agent, field_name, None)
+            if value is None:
+                continue
+            values = value if isinstance(value, list) else [value]
+            for v in values:
+                text = str(v) if case_sensitive else str(v).lower()
+                if search_query in text:
+                    return True
+        return False
+    
     def list_agents(
         self,
         category: Optional[str] = None,
@@ -458,40 +774,15 @@ class AgentRegistry:
             status: Filter by status ("active", "deprecated", "experimental", "archived")
             
         Returns:
-            List of AgentMetadata matching the filters
+            List of AgentMetadata matching the filters, sorted by name
         """
-        results = []
-        
-        for agent in self._agents.values():
-            # Filter by deprecated
-            if not include_deprecated and agent.deprecated:
-                continue
-            
-            # Filter by category
-            if category and agent.category != category:
-                continue
-            
-            # Filter by environment
-            if environment and agent.environment != environment:
-                continue
-            
-            # Filter by status
-            if status and agent.status != status:
-                continue
-            
-            # Filter by tags (agent must have ALL specified tags)
-            if tags:
-                agent_tags = set(agent.tags)
-                required_tags = set(tags)
-                if not required_tags.issubset(agent_tags):
-                    continue
-            
-            results.append(agent)
-        
-        # Sort by name
-        results.sort(key=lambda a: a.name)
-        
-        return results
+        return self.query_agents(
+            category=category,
+            environment=environment,
+            tags=tags,
+            include_deprecated=include_deprecated,
+            status=status,
+        )
     
     def search_agents(
         self,
@@ -504,44 +795,17 @@ class AgentRegistry:
         
         Args:
             query: Search query string
-            search_fields: Fields to search in. Defaults to ["id", "name", "description"]
+            search_fields: Fields to search in. Defaults to ["id", "name", "description", "tags"]
             case_sensitive: Whether search is case-sensitive
             
         Returns:
-            List of AgentMetadata matching the query
+            List of AgentMetadata matching the query, sorted by name
         """
-        if not query:
-            return list(self._agents.values())
-        
-        if search_fields is None:
-            search_fields = ["id", "name", "description", "tags"]
-        
-        # Prepare query
-        search_query = query if case_sensitive else query.lower()
-        
-        results = []
-        for agent in self._agents.values():
-            # Check each search field
-            for field in search_fields:
-                value = getattr(agent, field, None)
-                if value is None:
-                    continue
-                
-                # Handle different field types
-                if isinstance(value, list):
-                    # For lists (like tags), check if any item matches
-                    search_values = value if case_sensitive else [str(v).lower() for v in value]
-                    if any(search_query in str(v) for v in search_values):
-                        results.append(agent)
-                        break
-                else:
-                    # For strings, check if query is in value
-                    search_value = str(value) if case_sensitive else str(value).lower()
-                    if search_query in search_value:
-                        results.append(agent)
-                        break
-        
-        return results
+        return self.query_agents(
+            query=query,
+            search_fields=search_fields,
+            case_sensitive=case_sensitive,
+        )
     
     def get_agents_by_tag(self, tag: str) -> List[AgentMetadata]:
         """
@@ -551,9 +815,10 @@ class AgentRegistry:
             tag: The tag to filter by
             
         Returns:
-            List of AgentMetadata with the specified tag
+            List of AgentMetadata with the specified tag, sorted by name
         """
-        return [agent for agent in self._agents.values() if tag in agent.tags]
+        index = self.index
+        return [index.agents[agent_id] for agent_id in index.sorted_ids(index.by_tag.get(tag, ()))]
     
     def get_agents_by_owner(self, owner: str) -> List[AgentMetadata]:
         """
@@ -563,9 +828,10 @@ class AgentRegistry:
             owner: The owner to filter by
             
         Returns:
-            List of AgentMetadata owned by the specified owner
+            List of AgentMetadata owned by the specified owner, sorted by name
         """
-        return [agent for agent in self._agents.values() if agent.owner == owner]
+        index = self.index
+        return [index.agents[agent_id] for agent_id in index.sorted_ids(index.by_owner.get(owner, ()))]
     
     def register_agent(self, agent_id: str, metadata: AgentMetadata) -> None:
         """
@@ -586,7 +852,7 @@ class AgentRegistry:
                 f"Agent ID mismatch: {agent_id} != {metadata.id}"
             )
         
-        self._agents[agent_id] = metadata
+        self._replace_agent(agent_id, metadata)
         logger.info(f"Registered agent: {agent_id}")
     
     def update_agent(self, agent_id: str, metadata: AgentMetadata) -> None:
@@ -612,7 +878,7 @@ class AgentRegistry:
                 f"Agent ID mismatch: {agent_id} != {metadata.id}"
             )
         
-        self._agents[agent_id] = metadata
+        self._replace_agent(agent_id, metadata)
         logger.info(f"Updated agent: {agent_id}")
     
     def remove_agent(self, agent_id: str) -> None:
@@ -631,7 +897,7 @@ class AgentRegistry:
         if agent_id not in self._agents:
             raise KeyError(f"Agent '{agent_id}' not found in registry")
         
-        del self._agents[agent_id]
+        self._replace_agent(agent_id, None)
         logger.info(f"Removed agent: {agent_id}")
     
     def sync_from_filesystem(
@@ -740,20 +1006,17 @@ class AgentRegistry:
     @property
     def categories(self) -> Set[str]:
         """Get all unique categories in the registry"""
-        return {agent.category for agent in self._agents.values()}
+        return set(self.index.by_category)
     
     @property
     def environments(self) -> Set[str]:
         """Get all unique environments in the registry"""
-        return {agent.environment for agent in self._agents.values()}
+        return set(self.index.by_environment)
     
     @property
     def all_tags(self) -> Set[str]:
         """Get all unique tags in the registry"""
-        tags = set()
-        for agent in self._agents.values():
-            tags.update(agent.tags)
-        return tags
+        return set(self.index.by_tag)
     
     def start_hot_reload(self) -> None:
         """
@@ -776,6 +1039,7 @@ class AgentRegistry:
         
         # Create file handler
         handler = RegistryFileHandler(self, self.config_path)
+        self._file_handler = handler
         
         # Create and start observer
         self._file_observer = Observer()
@@ -798,6 +1062,9 @@ class AgentRegistry:
         self._file_observer.stop()
         self._file_observer.join(timeout=5.0)
         self._file_observer = None
+        if self._file_handler is not None:
+            self._file_handler.cancel()
+            self._file_handler = None
         self._hot_reload_enabled = False
         
         logger.info("Hot reload stopped")
@@ -840,7 +1107,7 @@ class AgentRegistry:
             
             try:
                 # Attempt to reload
-                self.reload_registry()
+                diff = self.reload_registry()
                 
                 # Create success event
                 event = ReloadEvent(
@@ -848,6 +1115,9 @@ class AgentRegistry:
                     success=True,
                     agents_count=self.agent_count,
                     previous_count=previous_count,
+                    added=list(diff.added),
+                    removed=list(diff.removed),
+                    changed=list(diff.changed),
                 )
                 
                 logger.info(str(event))
@@ -896,27 +1166,11 @@ class AgentRegistry:
             "hot_reload_enabled": self._hot_reload_enabled,
         }
         
-        # Count by category
-        for category in self.categories:
-            stats["by_category"][category] = len(
-                [a for a in self._agents.values() if a.category == category]
-            )
-        
-        # Count by environment
-        for environment in self.environments:
-            stats["by_environment"][environment] = len(
-                [a for a in self._agents.values() if a.environment == environment]
-            )
-        
-        # Count by status
-        for agent in self._agents.values():
-            status = agent.status
-            stats["by_status"][status] = stats["by_status"].get(status, 0) + 1
-        
-        # Count deprecated
-        stats["deprecated_count"] = len(
-            [a for a in self._agents.values() if a.deprecated]
-        )
+        index = self.index
+        stats["by_category"] = {category: len(ids) for category, ids in index.by_category.items()}
+        stats["by_environment"] = {environment: len(ids) for environment, ids in index.by_environment.items()}
+        stats["by_status"] = {status: len(ids) for status, ids in index.by_status.items()}
+        stats["deprecated_count"] = len(index.deprecated)
         
         return stats
 
@@ -46,6 +46,18 @@ class APISettings(BaseSettings):
     # Logging
     log_level: str = "INFO"
     
+    # Execution scheduler (background executions)
+    agent_workers: int = 4  # Worker threads for agent executions
+    pipeline_workers: int = 2  # Worker threads for pipeline executions
+    agent_queue_size: int = 100  # Max queued agent executions before returning 429
+    pipeline_queue_size: int = 50  # Max queued pipeline executions before returning 429
+    execution_backend: str = "threads"  # "threads" (scheduler worker pools) or "asyncio" (native on the event loop)
+    
+    # Execution store (async execution records)
+    execution_store: str = "memory"  # "memory" (single worker) or "sqlite" (shared by all workers)
+    execution_db_path: Optional[Path] = None  # SQLite file, default data/executions.db
+    execution_ttl_seconds: int = 86400  # Keep finished executions for this long (0 = forever)
+    
     # Rate limiting (future)
     rate_limit_enabled: bool = False
     rate_limit_requests: int = 100
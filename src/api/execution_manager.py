@@ -3,87 +3,91 @@ Execution Manager
 
 This module manages asynchronous execution of agents and pipelines.
 It provides:
-- Task queue management
+- Task queue management (bounded, prioritized queues per execution type, see scheduler.py)
 - Background task execution
 - Execution status tracking
-- Result storage
+- Result storage (pluggable, see execution_store.py)
+- Progress events for streaming clients (see progress_stream.py)
+- Cooperative cancellation of running executions (see ..cancellation)
+- Native asyncio execution on the API event loop (API_EXECUTION_BACKEND=asyncio)
 
 Requirements: 8.5
 """
 
 import asyncio
+import functools
 import logging
-from typing import Dict, Any, Optional, List
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, List, Set, Tuple
 from datetime import datetime
-from dataclasses import dataclass, field
 from pathlib import Path
-import threading
-from enum import Enum
 
 from .models import (
+    ExecutionPriority,
     ExecutionStatus,
     ExecutionType,
     ExecutionStatusResponse,
     ProgressInfo,
-    ExecutionError
+    ExecutionError,
+    QueueInfo
 )
-from ..pipeline_runner import PipelineRunner
+from .execution_store import (
+    ACTIVE_STATUSES,
+    ExecutionRecord,
+    ExecutionStore,
+    InMemoryExecutionStore,
+    create_execution_store
+)
+from .progress_stream import ProgressBroker
+from .scheduler import ExecutionScheduler, QueueFullError
+from ..async_pipeline_runner import AsyncPipelineRunner
+from ..pipeline_runner import PipelineExecutionError, PipelineResult, PipelineRunner
 from ..pipeline_config import PipelineConfig
 from ..agent_registry import load_agent
-from ..chains import run_flow_with_tokens
+from ..cancellation import CancellationToken, ExecutionCancelled
+from ..chains import arun_flow_with_tokens, run_flow_with_tokens
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class ExecutionRecord:
-    """Record of an execution."""
-    execution_id: str
-    type: ExecutionType
-    target_id: str
-    status: ExecutionStatus
-    inputs: Dict[str, Any]
-    config: Dict[str, Any]
-    callback_url: Optional[str] = None
-    outputs: Optional[Dict[str, Any]] = None
-    error: Optional[ExecutionError] = None
-    progress: Optional[ProgressInfo] = None
-    started_at: Optional[datetime] = None
-    completed_at: Optional[datetime] = None
-    failed_at: Optional[datetime] = None
-    created_at: datetime = field(default_factory=datetime.now)
-    
-    def to_status_response(self) -> ExecutionStatusResponse:
-        """Convert to API response model."""
-        return ExecutionStatusResponse(
-            execution_id=self.execution_id,
-            type=self.type,
-            target_id=self.target_id,
-            status=self.status,
-            progress=self.progress,
-            outputs=self.outputs,
-            error=self.error,
-            started_at=self.started_at or self.created_at,
-            completed_at=self.completed_at,
-            failed_at=self.failed_at
-        )
-
-
 class ExecutionManager:
     """
     Manages asynchronous execution of agents and pipelines.
     
     This class provides:
     - Execution record management
-    - Background task execution
+    - Background task execution on a dedicated scheduler
     - Status tracking and querying
     - Result storage
+    - Progress event publishing
+    - Cancellation tokens for executions queued or running in this process
+    - Native asyncio executions (execute_*_async / start_async) that await
+      LLM calls on the event loop instead of occupying worker threads
     """
     
-    def __init__(self):
-        """Initialize the execution manager."""
-        self.executions: Dict[str, ExecutionRecord] = {}
-        self.lock = threading.Lock()
+    def __init__(
+        self,
+        scheduler: Optional[ExecutionScheduler] = None,
+        store: Optional[ExecutionStore] = None,
+        native_async: bool = False
+    ):
+        """
+        Initialize the execution manager.
+        
+        Args:
+            scheduler: Scheduler for background executions (default: sized from API settings)
+            store: Execution record store (default: in-memory, no eviction)
+            native_async: Run API-started executions on the event loop (start_async)
+                instead of queueing them on the scheduler
+        """
+        self.executions: ExecutionStore = store if store is not None else InMemoryExecutionStore()
+        self.events = ProgressBroker()
+        self.scheduler = scheduler or ExecutionScheduler.from_settings()
+        self._cancel_tokens: Dict[str, CancellationToken] = {}
+        self._tokens_lock = threading.Lock()
+        self.native_async = native_async
+        self._tasks: Set[asyncio.Task] = set()
         logger.info("ExecutionManager initialized")
     
     def create_execution(
@@ -93,7 +97,8 @@ class ExecutionManager:
         target_id: str,
         inputs: Dict[str, Any],
         config: Dict[str, Any],
-        callback_url: Optional[str] = None
+        callback_url: Optional[str] = None,
+        priority: ExecutionPriority = ExecutionPriority.NORMAL
     ) -> ExecutionRecord:
         """
         Create a new execution record.
@@ -105,27 +110,40 @@ class ExecutionManager:
             inputs: Input parameters
             config: Configuration overrides
             callback_url: Optional webhook URL
+            priority: Queue priority
             
         Returns:
             ExecutionRecord: Created execution record
         """
-        with self.lock:
-            if execution_id in self.executions:
-                raise ValueError(f"Execution '{execution_id}' already exists")
-            
-            record = ExecutionRecord(
-                execution_id=execution_id,
-                type=execution_type,
-                target_id=target_id,
-                status=ExecutionStatus.PENDING,
-                inputs=inputs,
-                config=config,
-                callback_url=callback_url
-            )
+        record = ExecutionRecord(
+            execution_id=execution_id,
+            type=execution_type,
+            target_id=target_id,
+            status=ExecutionStatus.PENDING,
+            inputs=inputs,
+            config=config,
+            callback_url=callback_url,
+            priority=priority
+        )
+        
+        self.executions.create(record)
+        self.events.open(execution_id)
+        logger.info(f"Created execution record: {execution_id}")
+        return record
+    
+    def remove_execution(self, execution_id: str) -> bool:
+        """
+        Remove an execution record (e.g. one that was rejected by the scheduler).
+        
+        Args:
+            execution_id: Execution identifier
             
-            self.executions[execution_id] = record
-            logger.info(f"Created execution record: {execution_id}")
-            return record
+        Returns:
+            True if the record existed
+        """
+        self.events.discard(execution_id)
+        self._release_token(execution_id)
+        return self.executions.delete(execution_id)
     
     def get_execution_status(self, execution_id: str) -> Optional[ExecutionStatusResponse]:
         """
@@ -137,11 +155,21 @@ class ExecutionManager:
         Returns:
             ExecutionStatusResponse or None if not found
         """
-        with self.lock:
-            record = self.executions.get(execution_id)
-            if record is None:
-                return None
-            return record.to_status_response()
+        record = self.executions.get(execution_id)
+        if record is None:
+            return None
+        return record.to_status_response(queue=self._queue_info(record))
+    
+    def _queue_info(self, record: ExecutionRecord) -> Optional[QueueInfo]:
+        """Queue metrics for a record that has been submitted to the scheduler."""
+        if record.queued_at is None:
+            return None
+        
+        info = self.scheduler.queue_info(record.type, record.execution_id)
+        if info is None:
+            # No longer queued: report the lane's current load and the final wait time
+            info = dict(self.scheduler.load(record.type), position=None, wait_time_ms=record.queue_wait_ms)
+        return QueueInfo(priority=record.priority, queued_at=record.queued_at, **info)
     
     def list_executions(
         self,
@@ -162,34 +190,25 @@ class ExecutionManager:
             sort_order: Sort order (asc/desc)
             
         Returns:
-            List of execution records
-        """
-        with self.lock:
-            executions = list(self.executions.values())
-        
-        # Apply filters
-        if status is not None:
-            executions = [e for e in executions if e.status == status]
-        if execution_type is not None:
-            executions = [e for e in executions if e.type == execution_type]
-        if target_id is not None:
-            executions = [e for e in executions if e.target_id == target_id]
-        
-        # Sort
-        reverse = sort_order.lower() == "desc"
-        if sort_by == "created_at":
-            executions.sort(key=lambda e: e.created_at, reverse=reverse)
-        elif sort_by == "started_at":
-            executions.sort(key=lambda e: e.started_at or e.created_at, reverse=reverse)
-        elif sort_by == "completed_at":
-            executions.sort(key=lambda e: e.completed_at or datetime.max, reverse=reverse)
-        
-        return executions
+            List of execution records (outputs may be omitted, depending on the store)
+        """
+        return self.executions.list(
+            status=status,
+            execution_type=execution_type,
+            target_id=target_id,
+            sort_by=sort_by,
+            sort_order=sort_order
+        )
     
     def cancel_execution(self, execution_id: str) -> datetime:
         """
         Cancel an execution.
         
+        A queued execution is removed from its queue. A running one is
+        signalled through its cancellation token: pending pipeline steps are
+        skipped, running code nodes are killed and LLM calls stop waiting.
+        The time until the work stops is recorded as cancellation_latency_ms.
+        
         Args:
             execution_id: Execution identifier
             
@@ -199,19 +218,158 @@ class ExecutionManager:
         Raises:
             ValueError: If execution not found or cannot be cancelled
         """
-        with self.lock:
+        cancelled_at = datetime.now()
+        if not self.executions.update(
+            execution_id,
+            only_if=ACTIVE_STATUSES,
+            status=ExecutionStatus.CANCELLED,
+            completed_at=cancelled_at
+        ):
             record = self.executions.get(execution_id)
             if record is None:
                 raise ValueError(f"Execution '{execution_id}' not found")
+            raise ValueError(f"Cannot cancel execution with status '{record.status.value}'")
+        
+        # Free the queue slot if it has not started yet (and was queued by this process)
+        record = self.executions.get(execution_id)
+        if record is not None and self.scheduler.cancel(record.type, execution_id):
+            self._release_token(execution_id)
+            self.executions.update(execution_id, cancellation_latency_ms=0.0)
+        else:
+            # Running (or about to run) in this process: stop its work
+            with self._tokens_lock:
+                token = self._cancel_tokens.get(execution_id)
+            if token is not None:
+                token.cancel("cancelled via API")
+        self.events.publish(execution_id, "cancelled", status=ExecutionStatus.CANCELLED.value)
+        
+        logger.info(f"Cancelled execution: {execution_id}")
+        return cancelled_at
+    
+    def submit_agent(
+        self,
+        execution_id: str,
+        agent_id: str,
+        inputs: Dict[str, Any],
+        config: Dict[str, Any]
+    ) -> Future:
+        """
+        Queue an agent execution on the scheduler.
+        
+        Args:
+            execution_id: Execution identifier
+            agent_id: Agent identifier
+            inputs: Input parameters
+            config: Configuration overrides
             
-            if record.status not in [ExecutionStatus.PENDING, ExecutionStatus.RUNNING]:
-                raise ValueError(f"Cannot cancel execution with status '{record.status.value}'")
+        Returns:
+            Future resolved when the execution finishes
             
-            record.status = ExecutionStatus.CANCELLED
-            record.completed_at = datetime.now()
+        Raises:
+            ValueError: If the execution record does not exist
+            QueueFullError: If the agent queue is full
+        """
+        return self._submit(execution_id, ExecutionType.AGENT, self._run_agent, agent_id, inputs, config)
+    
+    def submit_pipeline(
+        self,
+        execution_id: str,
+        pipeline_id: str,
+        inputs: Dict[str, Any],
+        config: Dict[str, Any]
+    ) -> Future:
+        """
+        Queue a pipeline execution on the scheduler.
+        
+        Args:
+            execution_id: Execution identifier
+            pipeline_id: Pipeline identifier
+            inputs: Input parameters
+            config: Configuration overrides
+            
+        Returns:
+            Future resolved when the execution finishes
             
-            logger.info(f"Cancelled execution: {execution_id}")
-            return record.completed_at
+        Raises:
+            ValueError: If the execution record does not exist
+            QueueFullError: If the pipeline queue is full
+        """
+        return self._submit(execution_id, ExecutionType.PIPELINE, self._run_pipeline, pipeline_id, inputs, config)
+    
+    def _submit(self, execution_id: str, execution_type: ExecutionType, fn, *args) -> Future:
+        """Queue fn(execution_id, *args) on the lane for execution_type."""
+        record = self.executions.get(execution_id)
+        if record is None:
+            raise ValueError(f"Execution '{execution_id}' not found")
+        self.executions.update(execution_id, queued_at=datetime.now())
+        
+        # Created before queueing so a cancel arriving as the job starts is not missed
+        with self._tokens_lock:
+            self._cancel_tokens[execution_id] = CancellationToken()
+        try:
+            return self.scheduler.submit(execution_type, execution_id, fn, execution_id, *args, priority=record.priority)
+        except QueueFullError:
+            self._release_token(execution_id)
+            self.executions.update(execution_id, queued_at=None)
+            raise
+    
+    def _cancel_token(self, execution_id: str) -> CancellationToken:
+        """Token of a submitted execution (a fresh one if it was submitted elsewhere)."""
+        with self._tokens_lock:
+            return self._cancel_tokens.setdefault(execution_id, CancellationToken())
+    
+    def _release_token(self, execution_id: str) -> None:
+        with self._tokens_lock:
+            self._cancel_tokens.pop(execution_id, None)
+    
+    async def wait_for_execution(self, execution_id: str, job: Future):
+        """
+        Wait for a queued execution to finish and send its callback.
+        
+        Args:
+            execution_id: Execution identifier
+            job: Future returned by submit_agent / submit_pipeline
+        """
+        await asyncio.wait({asyncio.wrap_future(job)})
+        await self._callback_if_finished(execution_id)
+    
+    async def _callback_if_finished(self, execution_id: str):
+        """Send the webhook callback of a completed or failed execution, if configured."""
+        record = self.executions.get(execution_id)
+        if record and record.callback_url and record.status in (ExecutionStatus.COMPLETED, ExecutionStatus.FAILED):
+            await self._send_callback(record)
+    
+    def start_async(
+        self,
+        execution_id: str,
+        execution_type: ExecutionType,
+        target_id: str,
+        inputs: Dict[str, Any],
+        config: Dict[str, Any]
+    ) -> asyncio.Task:
+        """
+        Start an execution natively on the running event loop (asyncio backend).
+        
+        The execution runs as a task on the caller's loop instead of being
+        queued on the scheduler; its callback is sent when it finishes.
+        
+        Args:
+            execution_id: Execution identifier
+            execution_type: Type of execution (agent or pipeline)
+            target_id: Agent ID or Pipeline ID
+            inputs: Input parameters
+            config: Configuration overrides
+            
+        Returns:
+            The task running the execution
+        """
+        # Created before the task starts so a cancel arriving meanwhile is not missed
+        self._cancel_token(execution_id)
+        execute = self.execute_agent_async if execution_type == ExecutionType.AGENT else self.execute_pipeline_async
+        task = asyncio.get_running_loop().create_task(execute(execution_id, target_id, inputs, config))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
     
     async def execute_agent_async(
         self,
@@ -221,7 +379,10 @@ class ExecutionManager:
         config: Dict[str, Any]
     ):
         """
-        Execute an agent asynchronously.
+        Execute an agent on the running event loop.
+        
+        The LLM call is awaited directly instead of occupying a worker thread.
+        Cancelling the execution cancels the awaiting task.
         
         Args:
             execution_id: Execution identifier
@@ -229,94 +390,245 @@ class ExecutionManager:
             inputs: Input parameters
             config: Configuration overrides
         """
+        token = self._cancel_token(execution_id)
         try:
-            # Update status to running
-            with self.lock:
-                record = self.executions.get(execution_id)
-                if record is None:
-                    logger.error(f"Execution record not found: {execution_id}")
-                    return
-                
-                if record.status == ExecutionStatus.CANCELLED:
-                    logger.info(f"Execution cancelled before start: {execution_id}")
-                    return
-                
-                record.status = ExecutionStatus.RUNNING
-                record.started_at = datetime.now()
-                record.progress = ProgressInfo(
-                    current_step=0,
-                    total_steps=1,
-                    percentage=0.0
+            if not self._mark_running(execution_id, ProgressInfo(current_step=0, total_steps=1, percentage=0.0)):
+                return
+            
+            logger.info(f"Starting native agent execution: {execution_id} (agent={agent_id})")
+            try:
+                result = await self._await_cancellable(token, self._aexecute_agent(
+                    agent_id, config.get("flow_id", "default"), inputs, config.get("model_override")
+                ))
+            except ExecutionCancelled:
+                logger.info(f"Agent execution stopped after cancellation: {execution_id}")
+                self._publish_cancelled(execution_id)
+                return
+            except Exception as e:
+                logger.error(f"Agent execution failed: {execution_id} - {e}", exc_info=True)
+                self._mark_failed(execution_id, e, {"agent_id": agent_id})
+            else:
+                self._complete_agent(execution_id, result)
+        finally:
+            self._release_token(execution_id)
+        
+        await self._callback_if_finished(execution_id)
+    
+    async def execute_pipeline_async(
+        self,
+        execution_id: str,
+        pipeline_id: str,
+        inputs: Dict[str, Any],
+        config: Dict[str, Any]
+    ):
+        """
+        Execute a pipeline on the running event loop with AsyncPipelineRunner.
+        
+        Agent steps await their LLM calls directly; code and aggregation steps
+        still run on threads. Cancelling the execution stops running steps and
+        skips pending ones.
+        
+        Args:
+            execution_id: Execution identifier
+            pipeline_id: Pipeline identifier
+            inputs: Input parameters
+            config: Configuration overrides
+        """
+        token = self._cancel_token(execution_id)
+        try:
+            if not self._mark_running(execution_id):
+                return
+            
+            logger.info(f"Starting native pipeline execution: {execution_id} (pipeline={pipeline_id})")
+            try:
+                # Loading the pipeline reads YAML; keep it off the event loop
+                pipeline_config = await asyncio.get_running_loop().run_in_executor(
+                    None, functools.partial(self._load_pipeline, pipeline_id)
                 )
-            
-            logger.info(f"Starting agent execution: {execution_id} (agent={agent_id})")
-            
+                runner = AsyncPipelineRunner(pipeline_config)
+                runner.set_cancel_token(token)
+                pipeline_result = await runner.aexecute_sample(
+                    sample={"inputs": inputs},
+                    variant="baseline",
+                    on_progress=self._progress_callback(execution_id)
+                )
+                result = self._pipeline_outputs(pipeline_result, token)
+            except ExecutionCancelled:
+                logger.info(f"Pipeline execution stopped after cancellation: {execution_id}")
+                self._publish_cancelled(execution_id)
+                return
+            except Exception as e:
+                logger.error(f"Pipeline execution failed: {execution_id} - {e}", exc_info=True)
+                self._mark_failed(execution_id, e, {"pipeline_id": pipeline_id})
+            else:
+                self._complete_pipeline(execution_id, result)
+        finally:
+            self._release_token(execution_id)
+        
+        await self._callback_if_finished(execution_id)
+    
+    @staticmethod
+    async def _await_cancellable(token: CancellationToken, coro) -> Any:
+        """Await coro, cancelling it when the token is cancelled (raises ExecutionCancelled)."""
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(coro)
+        unregister = token.register(lambda: loop.call_soon_threadsafe(task.cancel))
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if task.cancelled() and token.is_cancelled:
+                raise ExecutionCancelled(token.reason)
+            raise
+        finally:
+            unregister()
+    
+    def _mark_running(self, execution_id: str, progress: Optional[ProgressInfo] = None) -> bool:
+        """Move a dequeued execution to running. Returns False if it was cancelled or removed."""
+        record = self.executions.get(execution_id)
+        if record is None:
+            logger.error(f"Execution record not found: {execution_id}")
+            return False
+        
+        started_at = datetime.now()
+        changes: Dict[str, Any] = {"status": ExecutionStatus.RUNNING, "started_at": started_at}
+        if record.queued_at is not None:
+            changes["queue_wait_ms"] = (started_at - record.queued_at).total_seconds() * 1000
+        if progress is not None:
+            changes["progress"] = progress
+        
+        if not self.executions.update(execution_id, only_if=(ExecutionStatus.PENDING,), **changes):
+            logger.info(f"Execution cancelled before start: {execution_id}")
+            self._publish_cancelled(execution_id)
+            return False
+        
+        self.events.publish(execution_id, "started", status=ExecutionStatus.RUNNING.value)
+        if progress is not None:
+            self._publish_progress(execution_id, progress)
+        return True
+    
+    def _publish_progress(self, execution_id: str, progress: ProgressInfo):
+        self.events.publish(
+            execution_id, "progress",
+            status=ExecutionStatus.RUNNING.value,
+            progress=progress.dict()
+        )
+    
+    def _publish_cancelled(self, execution_id: str):
+        """
+        Record that a worker stopped a cancelled execution and publish the cancellation
+        (the cancel may have come from another process).
+        """
+        record = self.executions.get(execution_id)
+        if record is None or record.status != ExecutionStatus.CANCELLED:
+            return
+        
+        if record.cancellation_latency_ms is None and record.completed_at is not None:
+            latency_ms = max(0.0, (datetime.now() - record.completed_at).total_seconds() * 1000)
+            self.executions.update(
+                execution_id,
+                only_if=(ExecutionStatus.CANCELLED,),
+                cancellation_latency_ms=latency_ms
+            )
+            logger.info(f"Execution stopped {latency_ms:.0f}ms after cancellation: {execution_id}")
+        self.events.publish(execution_id, "cancelled", status=ExecutionStatus.CANCELLED.value)
+    
+    def _mark_failed(self, execution_id: str, error: Exception, details: Dict[str, Any]) -> Optional[ExecutionRecord]:
+        """Record an execution failure (unless it was cancelled meanwhile)."""
+        execution_error = ExecutionError(
+            type=type(error).__name__,
+            message=str(error),
+            details=details
+        )
+        if self.executions.update(
+            execution_id,
+            only_if=ACTIVE_STATUSES,
+            status=ExecutionStatus.FAILED,
+            failed_at=datetime.now(),
+            error=execution_error
+        ):
+            self.events.publish(
+                execution_id, "failed",
+                status=ExecutionStatus.FAILED.value,
+                error=execution_error.dict()
+            )
+        else:
+            self._publish_cancelled(execution_id)
+        return self.executions.get(execution_id)
+    
+    def _run_agent(
+        self,
+        execution_id: str,
+        agent_id: str,
+        inputs: Dict[str, Any],
+        config: Dict[str, Any]
+    ):
+        """Run a queued agent execution (runs on an agent worker thread)."""
+        try:
+            self._run_agent_job(execution_id, agent_id, inputs, config)
+        finally:
+            self._release_token(execution_id)
+    
+    def _run_agent_job(
+        self,
+        execution_id: str,
+        agent_id: str,
+        inputs: Dict[str, Any],
+        config: Dict[str, Any]
+    ):
+        if not self._mark_running(execution_id, ProgressInfo(current_step=0, total_steps=1, percentage=0.0)):
+            return
+        
+        logger.info(f"Starting agent execution: {execution_id} (agent={agent_id})")
+        
+        try:
             # Extract flow_id from config or use default
             flow_id = config.get("flow_id", "default")
             model_override = config.get("model_override")
             
-            # Execute agent in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                self._execute_agent_sync,
-                agent_id,
-                flow_id,
-                inputs,
-                model_override
+            result = self._execute_agent_sync(
+                agent_id, flow_id, inputs, model_override, self._cancel_token(execution_id)
             )
-            
-            # Check if cancelled during execution
-            with self.lock:
-                record = self.executions.get(execution_id)
-                if record and record.status == ExecutionStatus.CANCELLED:
-                    logger.info(f"Execution cancelled during execution: {execution_id}")
-                    return
-            
-            # Update status to completed
-            with self.lock:
-                record = self.executions.get(execution_id)
-                if record:
-                    record.status = ExecutionStatus.COMPLETED
-                    record.outputs = result
-                    record.completed_at = datetime.now()
-                    record.progress = ProgressInfo(
-                        current_step=1,
-                        total_steps=1,
-                        percentage=100.0
-                    )
-            
-            logger.info(f"Agent execution completed: {execution_id}")
-            
-            # Send callback if configured
-            if record and record.callback_url:
-                await self._send_callback(record)
-                
+        except ExecutionCancelled:
+            logger.info(f"Agent execution stopped after cancellation: {execution_id}")
+            self._publish_cancelled(execution_id)
+            return
         except Exception as e:
             logger.error(f"Agent execution failed: {execution_id} - {e}", exc_info=True)
-            
-            # Update status to failed
-            with self.lock:
-                record = self.executions.get(execution_id)
-                if record:
-                    record.status = ExecutionStatus.FAILED
-                    record.failed_at = datetime.now()
-                    record.error = ExecutionError(
-                        type=type(e).__name__,
-                        message=str(e),
-                        details={"agent_id": agent_id}
-                    )
-            
-            # Send callback if configured
-            if record and record.callback_url:
-                await self._send_callback(record)
+            self._mark_failed(execution_id, e, {"agent_id": agent_id})
+            return
+        
+        self._complete_agent(execution_id, result)
+    
+    def _complete_agent(self, execution_id: str, result: Dict[str, Any]):
+        """Store an agent's outputs, unless it was cancelled during execution."""
+        progress = ProgressInfo(
+            current_step=1,
+            total_steps=1,
+            percentage=100.0
+        )
+        if not self.executions.update(
+            execution_id,
+            only_if=(ExecutionStatus.RUNNING,),
+            status=ExecutionStatus.COMPLETED,
+            outputs=result,
+            completed_at=datetime.now(),
+            progress=progress
+        ):
+            logger.info(f"Execution cancelled during execution: {execution_id}")
+            self._publish_cancelled(execution_id)
+            return
+        
+        self._publish_progress(execution_id, progress)
+        self.events.publish(execution_id, "completed", status=ExecutionStatus.COMPLETED.value, outputs=result)
+        logger.info(f"Agent execution completed: {execution_id}")
     
     def _execute_agent_sync(
         self,
         agent_id: str,
         flow_id: str,
         inputs: Dict[str, Any],
-        model_override: Optional[str] = None
+        model_override: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> Dict[str, Any]:
         """
         Execute agent synchronously (runs in thread pool).
@@ -326,10 +638,38 @@ class ExecutionManager:
             flow_id: Flow identifier
             inputs: Input parameters
             model_override: Optional model override
+            cancel_token: Stops waiting for the LLM once cancelled
             
         Returns:
             Execution outputs
         """
+        flow, flow_kwargs = self._agent_flow_call(agent_id, flow_id, inputs, model_override)
+        output, token_usage, parser_stats = run_flow_with_tokens(cancel_token=cancel_token, **flow_kwargs)
+        return self._agent_outputs(flow, model_override, output, token_usage, parser_stats)
+    
+    async def _aexecute_agent(
+        self,
+        agent_id: str,
+        flow_id: str,
+        inputs: Dict[str, Any],
+        model_override: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Execute an agent on the event loop (same arguments and outputs as _execute_agent_sync)."""
+        # The agent lookup may load its config from disk; keep it off the event loop
+        flow, flow_kwargs = await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self._agent_flow_call, agent_id, flow_id, inputs, model_override)
+        )
+        output, token_usage, parser_stats = await arun_flow_with_tokens(**flow_kwargs)
+        return self._agent_outputs(flow, model_override, output, token_usage, parser_stats)
+    
+    def _agent_flow_call(
+        self,
+        agent_id: str,
+        flow_id: str,
+        inputs: Dict[str, Any],
+        model_override: Optional[str]
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """Resolve an agent's flow and build the run_flow_with_tokens arguments."""
         # Load agent configuration
         agent = load_agent(agent_id)
         
@@ -348,15 +688,25 @@ class ExecutionManager:
         if not input_text and "input" in inputs:
             input_text = inputs["input"]
         
-        # Execute flow
-        output, token_usage, parser_stats = run_flow_with_tokens(
-            flow_name=flow.name,
-            input_text=input_text,
-            agent_id=agent_id,
-            model_override=model_override,
-            **inputs
-        )
+        extra_vars = dict(inputs)
+        if model_override:
+            extra_vars["_model_override"] = model_override
         
+        return flow, {
+            "flow_name": flow.name,
+            "input_text": input_text,
+            "extra_vars": extra_vars,
+            "agent_id": agent_id
+        }
+    
+    @staticmethod
+    def _agent_outputs(
+        flow: Any,
+        model_override: Optional[str],
+        output: Any,
+        token_usage: Optional[Dict[str, int]],
+        parser_stats: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
         return {
             "output": output,
             "metadata": {
@@ -366,117 +716,100 @@ class ExecutionManager:
             }
         }
     
-    async def execute_pipeline_async(
+    def _run_pipeline(
         self,
         execution_id: str,
         pipeline_id: str,
         inputs: Dict[str, Any],
         config: Dict[str, Any]
     ):
-        """
-        Execute a pipeline asynchronously.
+        """Run a queued pipeline execution (runs on a pipeline worker thread)."""
+        try:
+            self._run_pipeline_job(execution_id, pipeline_id, inputs, config)
+        finally:
+            self._release_token(execution_id)
+    
+    def _run_pipeline_job(
+        self,
+        execution_id: str,
+        pipeline_id: str,
+        inputs: Dict[str, Any],
+        config: Dict[str, Any]
+    ):
+        if not self._mark_running(execution_id):
+            return
+        
+        logger.info(f"Starting pipeline execution: {execution_id} (pipeline={pipeline_id})")
         
-        Args:
-            execution_id: Execution identifier
-            pipeline_id: Pipeline identifier
-            inputs: Input parameters
-            config: Configuration overrides
-        """
         try:
-            # Update status to running
-            with self.lock:
-                record = self.executions.get(execution_id)
-                if record is None:
-                    logger.error(f"Execution record not found: {execution_id}")
-                    return
-                
-                if record.status == ExecutionStatus.CANCELLED:
-                    logger.info(f"Execution cancelled before start: {execution_id}")
-                    return
-                
-                record.status = ExecutionStatus.RUNNING
-                record.started_at = datetime.now()
-            
-            logger.info(f"Starting pipeline execution: {execution_id} (pipeline={pipeline_id})")
-            
-            # Load pipeline configuration
-            pipeline_path = Path(f"pipelines/{pipeline_id}.yaml")
-            if not pipeline_path.exists():
-                raise FileNotFoundError(f"Pipeline '{pipeline_id}' not found")
-            
-            pipeline_config = PipelineConfig.from_yaml(pipeline_path)
-            
-            # Create progress callback
-            def progress_callback(current: int, total: int, step_name: Optional[str] = None):
-                with self.lock:
-                    record = self.executions.get(execution_id)
-                    if record:
-                        record.progress = ProgressInfo(
-                            current_step=current,
-                            total_steps=total,
-                            percentage=(current / total * 100) if total > 0 else 0,
-                            current_step_name=step_name
-                        )
-            
-            # Execute pipeline in thread pool
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                self._execute_pipeline_sync,
-                pipeline_config,
-                inputs,
-                config,
-                progress_callback
+            result = self._execute_pipeline_sync(
+                self._load_pipeline(pipeline_id), inputs, config,
+                self._progress_callback(execution_id), self._cancel_token(execution_id)
             )
-            
-            # Check if cancelled during execution
-            with self.lock:
-                record = self.executions.get(execution_id)
-                if record and record.status == ExecutionStatus.CANCELLED:
-                    logger.info(f"Execution cancelled during execution: {execution_id}")
-                    return
-            
-            # Update status to completed
-            with self.lock:
-                record = self.executions.get(execution_id)
-                if record:
-                    record.status = ExecutionStatus.COMPLETED
-                    record.outputs = result.get("outputs")
-                    record.completed_at = datetime.now()
-                    if record.progress:
-                        record.progress.percentage = 100.0
-            
-            logger.info(f"Pipeline execution completed: {execution_id}")
-            
-            # Send callback if configured
-            if record and record.callback_url:
-                await self._send_callback(record)
-                
+        except ExecutionCancelled:
+            logger.info(f"Pipeline execution stopped after cancellation: {execution_id}")
+            self._publish_cancelled(execution_id)
+            return
         except Exception as e:
             logger.error(f"Pipeline execution failed: {execution_id} - {e}", exc_info=True)
-            
-            # Update status to failed
-            with self.lock:
-                record = self.executions.get(execution_id)
-                if record:
-                    record.status = ExecutionStatus.FAILED
-                    record.failed_at = datetime.now()
-                    record.error = ExecutionError(
-                        type=type(e).__name__,
-                        message=str(e),
-                        details={"pipeline_id": pipeline_id}
-                    )
-            
-            # Send callback if configured
-            if record and record.callback_url:
-                await self._send_callback(record)
+            self._mark_failed(execution_id, e, {"pipeline_id": pipeline_id})
+            return
+        
+        self._complete_pipeline(execution_id, result)
+    
+    @staticmethod
+    def _load_pipeline(pipeline_id: str) -> PipelineConfig:
+        pipeline_path = Path(f"pipelines/{pipeline_id}.yaml")
+        if not pipeline_path.exists():
+            raise FileNotFoundError(f"Pipeline '{pipeline_id}' not found")
+        return PipelineConfig.from_yaml(pipeline_path)
+    
+    def _progress_callback(self, execution_id: str):
+        """Progress callback that stores and publishes step progress of a running execution."""
+        def progress_callback(current: int, total: int, step_name: Optional[str] = None):
+            progress = ProgressInfo(
+                current_step=current,
+                total_steps=total,
+                percentage=(current / total * 100) if total > 0 else 0,
+                current_step_name=step_name
+            )
+            if self.executions.update(execution_id, only_if=(ExecutionStatus.RUNNING,), progress=progress):
+                self._publish_progress(execution_id, progress)
+        
+        return progress_callback
+    
+    def _complete_pipeline(self, execution_id: str, result: Dict[str, Any]):
+        """Store a pipeline's outputs, unless it was cancelled during execution."""
+        record = self.executions.get(execution_id)
+        progress = record.progress.copy(update={"percentage": 100.0}) if record and record.progress else None
+        if not self.executions.update(
+            execution_id,
+            only_if=(ExecutionStatus.RUNNING,),
+            status=ExecutionStatus.COMPLETED,
+            outputs=result.get("outputs"),
+            completed_at=datetime.now(),
+            progress=progress
+        ):
+            logger.info(f"Execution cancelled during execution: {execution_id}")
+            self._publish_cancelled(execution_id)
+            return
+        
+        if progress is not None:
+            self._publish_progress(execution_id, progress)
+        self.events.publish(
+            execution_id, "completed",
+            status=ExecutionStatus.COMPLETED.value,
+            outputs=result.get("outputs")
+        )
+        logger.info(f"Pipeline execution completed: {execution_id}")
     
     def _execute_pipeline_sync(
         self,
         pipeline_config: PipelineConfig,
         inputs: Dict[str, Any],
         config: Dict[str, Any],
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> Dict[str, Any]:
         """
         Execute pipeline synchronously (runs in thread pool).
@@ -486,6 +819,7 @@ class ExecutionManager:
             inputs: Input parameters
             config: Configuration overrides
             progress_callback: Progress callback function
+            cancel_token: Skips pending steps and aborts running ones once cancelled
             
         Returns:
             Execution outputs
@@ -496,6 +830,7 @@ class ExecutionManager:
         # Set progress callback
         if progress_callback:
             runner.set_progress_callback(progress_callback)
+        runner.set_cancel_token(cancel_token)
         
         # Create sample with inputs
         sample = {"inputs": inputs}
@@ -508,19 +843,35 @@ class ExecutionManager:
             sample_index=0
         )
         
+        return self._pipeline_outputs(result, cancel_token)
+    
+    @staticmethod
+    def _pipeline_outputs(result: PipelineResult, cancel_token: Optional[CancellationToken] = None) -> Dict[str, Any]:
+        """
+        Convert a pipeline result into execution outputs.
+        
+        Raises:
+            ExecutionCancelled: If the execution was cancelled
+            PipelineExecutionError: If the pipeline failed
+        """
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        if result.error:
+            raise PipelineExecutionError(result.error)
+        
         return {
-            "outputs": result.outputs,
+            "outputs": result.final_outputs,
             "step_results": [
                 {
                     "step_id": step_result.step_id,
                     "status": "completed" if step_result.success else "failed",
-                    "output": step_result.output,
+                    "output": step_result.output_value,
                     "execution_time_ms": step_result.execution_time * 1000
                 }
                 for step_result in result.step_results
             ],
             "metadata": {
-                "total_execution_time_ms": result.total_time * 1000,
+                "total_execution_time_ms": result.total_execution_time * 1000,
                 "steps_executed": len([s for s in result.step_results if s.success]),
                 "steps_failed": len([s for s in result.step_results if not s.success])
             }
@@ -567,5 +918,24 @@ def get_execution_manager() -> ExecutionManager:
     """Get or create the global execution manager instance."""
     global _execution_manager
     if _execution_manager is None:
-        _execution_manager = ExecutionManager()
+        from .config import get_settings
+        
+        settings = get_settings()
+        if settings.workers > 1 and settings.execution_store == "memory":
+            logger.warning(
+                "In-memory execution store with multiple API workers: status lookups only see "
+                "executions started by the same worker. Set API_EXECUTION_STORE=sqlite to share them."
+            )
+        if settings.execution_backend not in ("threads", "asyncio"):
+            raise ValueError(
+                f"Unknown execution backend '{settings.execution_backend}' (expected 'threads' or 'asyncio')"
+            )
+        _execution_manager = ExecutionManager(
+            store=create_execution_store(
+                settings.execution_store,
+                path=settings.execution_db_path,
+                ttl_seconds=settings.execution_ttl_seconds
+            ),
+            native_async=settings.execution_backend == "asyncio"
+        )
     return _execution_manager
@@ -0,0 +1,568 @@
+"""
+Execution Store
+
+This module stores async execution records for the ExecutionManager.
+It provides:
+- ExecutionStore: the storage interface used by the manager
+- InMemoryExecutionStore: process-local store (default, single API worker)
+- SQLiteExecutionStore: SQLite (WAL) store shared by several API worker processes
+- TTL-based eviction of finished (completed / failed / cancelled) records
+
+Status updates go through ExecutionStore.update with an optional status
+precondition, so a cancellation and a worker finishing the same execution
+cannot overwrite each other, even across processes.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .models import (
+    ExecutionError,
+    ExecutionPriority,
+    ExecutionStatus,
+    ExecutionStatusResponse,
+    ExecutionType,
+    ProgressInfo,
+    QueueInfo
+)
+
+logger = logging.getLogger(__name__)
+
+
+ACTIVE_STATUSES = (ExecutionStatus.PENDING, ExecutionStatus.RUNNING)
+
+
+@dataclass
+class ExecutionRecord:
+    """Record of an execution."""
+    execution_id: str
+    type: ExecutionType
+    target_id: str
+    status: ExecutionStatus
+    inputs: Dict[str, Any]
+    config: Dict[str, Any]
+    callback_url: Optional[str] = None
+    outputs: Optional[Dict[str, Any]] = None
+    error: Optional[ExecutionError] = None
+    progress: Optional[ProgressInfo] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    failed_at: Optional[datetime] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    priority: ExecutionPriority = ExecutionPriority.NORMAL
+    queued_at: Optional[datetime] = None
+    queue_wait_ms: Optional[float] = None
+    # Time from the cancel request until the execution's work actually stopped
+    cancellation_latency_ms: Optional[float] = None
+
+    @property
+    def finished_at(self) -> Optional[datetime]:
+        """When the execution reached a final status (None while active)."""
+        if self.status in ACTIVE_STATUSES:
+            return None
+        return self.completed_at or self.failed_at
+
+    def to_status_response(self, queue: Optional[QueueInfo] = None) -> ExecutionStatusResponse:
+        """Convert to API response model."""
+        return ExecutionStatusResponse(
+            execution_id=self.execution_id,
+            type=self.type,
+            target_id=self.target_id,
+            status=self.status,
+            progress=self.progress,
+            outputs=self.outputs,
+            error=self.error,
+            started_at=self.started_at or self.created_at,
+            completed_at=self.completed_at,
+            failed_at=self.failed_at,
+            queue=queue,
+            cancellation_latency_ms=self.cancellation_latency_ms
+        )
+
+
+class ExecutionStore(ABC):
+    """
+    Storage interface for execution records.
+
+    Finished records are evicted once they are older than ttl_seconds
+    (None disables eviction). Eviction runs opportunistically on writes,
+    at most once per sweep interval, or explicitly via evict_expired.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds or None
+        self._sweep_interval = min(60.0, self.ttl_seconds / 10) if self.ttl_seconds else None
+        self._next_sweep = 0.0
+
+    @abstractmethod
+    def create(self, record: ExecutionRecord) -> None:
+        """Add a record. Raises ValueError if the execution ID already exists."""
+
+    @abstractmethod
+    def get(self, execution_id: str) -> Optional[ExecutionRecord]:
+        """Get a record, including its outputs, or None if not found."""
+
+    @abstractmethod
+    def update(
+        self,
+        execution_id: str,
+        only_if: Optional[Iterable[ExecutionStatus]] = None,
+        **changes: Any
+    ) -> bool:
+        """
+        Update record fields.
+
+        Args:
+            execution_id: Execution identifier
+            only_if: Apply the update only if the current status is one of these
+            **changes: ExecutionRecord fields to set
+
+        Returns:
+            True if the record exists and the update was applied
+        """
+
+    @abstractmethod
+    def delete(self, execution_id: str) -> bool:
+        """Remove a record. Returns True if it existed."""
+
+    @abstractmethod
+    def list(
+        self,
+        status: Optional[ExecutionStatus] = None,
+        execution_type: Optional[ExecutionType] = None,
+        target_id: Optional[str] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc"
+    ) -> List[ExecutionRecord]:
+        """
+        List records with optional filtering.
+
+        Listed records may omit outputs (use get for the full record).
+        """
+
+    @abstractmethod
+    def evict_expired(self, now: Optional[datetime] = None) -> int:
+        """Remove finished records older than the TTL. Returns the number removed."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all records."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored records."""
+
+    def __contains__(self, execution_id: str) -> bool:
+        return self.get(execution_id) is not None
+
+    def _maybe_evict(self) -> None:
+        if self._sweep_interval is None:
+            return
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self._sweep_interval
+        removed = self.evict_expired()
+        if removed:
+            logger.info(f"Evicted {removed} expired execution records")
+
+    def _cutoff(self, now: Optional[datetime]) -> Optional[datetime]:
+        if self.ttl_seconds is None:
+            return None
+        return (now or datetime.now()) - timedelta(seconds=self.ttl_seconds)
+
+
+def _sort_key(sort_by: str):
+    if sort_by == "started_at":
+        return lambda e: e.started_at or e.created_at
+    if sort_by == "completed_at":
+        return lambda e: e.completed_at or datetime.max
+    return lambda e: e.created_at
+
+
+class InMemoryExecutionStore(ExecutionStore):
+    """
+    Process-local execution store.
+
+    Records are kept as live objects: get returns the stored record itself.
+    Only suitable for a single API worker process.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        super().__init__(ttl_seconds)
+        self._records: Dict[str, ExecutionRecord] = {}
+        self._lock = threading.RLock()
+
+    def create(self, record: ExecutionRecord) -> None:
+        self._maybe_evict()
+        with self._lock:
+            if record.execution_id in self._records:
+                raise ValueError(f"Execution '{record.execution_id}' already exists")
+            self._records[record.execution_id] = record
+
+    def get(self, execution_id: str) -> Optional[ExecutionRecord]:
+        with self._lock:
+            return self._records.get(execution_id)
+
+    def update(
+        self,
+        execution_id: str,
+        only_if: Optional[Iterable[ExecutionStatus]] = None,
+        **changes: Any
+    ) -> bool:
+        with self._lock:
+            record = self._records.get(execution_id)
+            if record is None:
+                return False
+            if only_if is not None and record.status not in tuple(only_if):
+                return False
+            for name, value in changes.items():
+                setattr(record, name, value)
+            return True
+
+    def delete(self, execution_id: str) -> bool:
+        with self._lock:
+            return self._records.pop(execution_id, None) is not None
+
+    def list(
+        self,
+        status: Optional[ExecutionStatus] = None,
+        execution_type: Optional[ExecutionType] = None,
+        target_id: Optional[str] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc"
+    ) -> List[ExecutionRecord]:
+        with self._lock:
+            executions = list(self._records.values())
+
+        if status is not None:
+            executions = [e for e in executions if e.status == status]
+        if execution_type is not None:
+            executions = [e for e in executions if e.type == execution_type]
+        if target_id is not None:
+            executions = [e for e in executions if e.target_id == target_id]
+
+        executions.sort(key=_sort_key(sort_by), reverse=sort_order.lower() == "desc")
+        return executions
+
+    def evict_expired(self, now: Optional[datetime] = None) -> int:
+        cutoff = self._cutoff(now)
+        if cutoff is None:
+            return 0
+        with self._lock:
+            expired = [
+                execution_id for execution_id, record in self._records.items()
+                if record.finished_at is not None and record.finished_at < cutoff
+            ]
+            for execution_id in expired:
+                del self._records[execution_id]
+        return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+
+# Columns of the executions table, in ExecutionRecord field order
+_COLUMNS = (
+    "execution_id", "type", "target_id", "status", "inputs", "config", "callback_url",
+    "error", "progress", "started_at", "completed_at", "failed_at", "created_at",
+    "priority", "queued_at", "queue_wait_ms", "cancellation_latency_ms",
+)
+_JSON_FIELDS = {"inputs", "config"}
+_MODEL_FIELDS = {"error": ExecutionError, "progress": ProgressInfo}
+_DATETIME_FIELDS = {"started_at", "completed_at", "failed_at", "created_at", "queued_at"}
+_ENUM_FIELDS = {"type": ExecutionType, "status": ExecutionStatus, "priority": ExecutionPriority}
+
+_SORT_COLUMNS = {
+    "created_at": "created_at",
+    "started_at": "COALESCE(started_at, created_at)",
+    "completed_at": "COALESCE(completed_at, '9999-12-31T23:59:59.999999')",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS executions (
+    execution_id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    target_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    inputs TEXT,
+    config TEXT,
+    callback_url TEXT,
+    error TEXT,
+    progress TEXT,
+    started_at TEXT,
+    completed_at TEXT,
+    failed_at TEXT,
+    created_at TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    queued_at TEXT,
+    queue_wait_ms REAL,
+    cancellation_latency_ms REAL,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_executions_status ON executions (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_executions_type ON executions (type, created_at);
+CREATE INDEX IF NOT EXISTS idx_executions_target ON executions (target_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_executions_created ON executions (created_at);
+CREATE INDEX IF NOT EXISTS idx_executions_finished ON executions (finished_at);
+CREATE TABLE IF NOT EXISTS execution_outputs (
+    execution_id TEXT PRIMARY KEY REFERENCES executions (execution_id) ON DELETE CASCADE,
+    outputs TEXT NOT NULL
+);
+"""
+
+# Columns added after the first schema version, for databases created before them
+_ADDED_COLUMNS = {
+    "cancellation_latency_ms": "REAL",
+}
+
+
+def _encode(name: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if name in _JSON_FIELDS:
+        return json.dumps(value, ensure_ascii=False, default=str)
+    if name in _MODEL_FIELDS:
+        return json.dumps(value.dict(), ensure_ascii=False, default=str)
+    if name in _DATETIME_FIELDS:
+        return value.isoformat(timespec="microseconds")
+    if name in _ENUM_FIELDS:
+        return value.value
+    return value
+
+
+def _decode(name: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if name in _JSON_FIELDS:
+        return json.loads(value)
+    if name in _MODEL_FIELDS:
+        return _MODEL_FIELDS[name](**json.loads(value))
+    if name in _DATETIME_FIELDS:
+        return datetime.fromisoformat(value)
+    if name in _ENUM_FIELDS:
+        return _ENUM_FIELDS[name](value)
+    return value
+
+
+class SQLiteExecutionStore(ExecutionStore):
+    """
+    SQLite-backed execution store.
+
+    The database runs in WAL mode so several API worker processes can share
+    one file: status lookups, listings and cancellations see every worker's
+    executions. List filters use indexed columns. Outputs live in a separate
+    table and are only read by get, so listings never load large results.
+    """
+
+    def __init__(self, path: Path, ttl_seconds: Optional[float] = None):
+        """
+        Initialize the store.
+
+        Args:
+            path: Database file (created if missing)
+            ttl_seconds: Keep finished records for this long (None keeps them forever)
+        """
+        super().__init__(ttl_seconds)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._add_missing_columns()
+
+    def _add_missing_columns(self) -> None:
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(executions)")}
+        for name, column_type in _ADDED_COLUMNS.items():
+            if name not in existing:
+                try:
+                    self._conn.execute(f"ALTER TABLE executions ADD COLUMN {name} {column_type}")
+                except sqlite3.OperationalError:
+                    # Another worker process added it first
+                    pass
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; BEGIN IMMEDIATE takes the write lock up front."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def create(self, record: ExecutionRecord) -> None:
+        self._maybe_evict()
+        values = [_encode(name, getattr(record, name)) for name in _COLUMNS]
+        finished_at = _encode("completed_at", record.finished_at)
+        with self._lock:
+            try:
+                with self._transaction() as conn:
+                    conn.execute(
+                        f"INSERT INTO executions ({', '.join(_COLUMNS)}, finished_at) "
+                        f"VALUES ({', '.join('?' * (len(_COLUMNS) + 1))})",
+                        values + [finished_at],
+                    )
+                    if record.outputs is not None:
+                        conn.execute(
+                            "INSERT INTO execution_outputs (execution_id, outputs) VALUES (?, ?)",
+                            (record.execution_id, _encode("inputs", record.outputs)),
+                        )
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Execution '{record.execution_id}' already exists")
+
+    def get(self, execution_id: str) -> Optional[ExecutionRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join('e.' + c for c in _COLUMNS)}, o.outputs FROM executions e "
+                "LEFT JOIN execution_outputs o ON o.execution_id = e.execution_id "
+                "WHERE e.execution_id = ?",
+                (execution_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        record = self._from_row(row)
+        if row["outputs"] is not None:
+            record.outputs = json.loads(row["outputs"])
+        return record
+
+    def update(
+        self,
+        execution_id: str,
+        only_if: Optional[Iterable[ExecutionStatus]] = None,
+        **changes: Any
+    ) -> bool:
+        outputs = changes.pop("outputs", None)
+        assignments = [f"{name} = ?" for name in changes]
+        values = [_encode(name, value) for name, value in changes.items()]
+
+        status = changes.get("status")
+        if status is not None:
+            finished = None if status in ACTIVE_STATUSES else (changes.get("completed_at") or changes.get("failed_at"))
+            assignments.append("finished_at = ?")
+            values.append(_encode("completed_at", finished))
+
+        where = "execution_id = ?"
+        params = [execution_id]
+        if only_if is not None:
+            statuses = [s.value for s in only_if]
+            where += f" AND status IN ({', '.join('?' * len(statuses))})"
+            params += statuses
+
+        with self._lock, self._transaction() as conn:
+            if assignments:
+                cursor = conn.execute(f"UPDATE executions SET {', '.join(assignments)} WHERE {where}", values + params)
+            else:
+                cursor = conn.execute(f"SELECT 1 FROM executions WHERE {where}", params)
+            applied = (cursor.rowcount if assignments else len(cursor.fetchall())) > 0
+            if applied and outputs is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO execution_outputs (execution_id, outputs) VALUES (?, ?)",
+                    (execution_id, _encode("inputs", outputs)),
+                )
+        return applied
+
+    def delete(self, execution_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM executions WHERE execution_id = ?", (execution_id,))
+        return cursor.rowcount > 0
+
+    def list(
+        self,
+        status: Optional[ExecutionStatus] = None,
+        execution_type: Optional[ExecutionType] = None,
+        target_id: Optional[str] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc"
+    ) -> List[ExecutionRecord]:
+        conditions = []
+        params: List[Any] = []
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status.value)
+        if execution_type is not None:
+            conditions.append("type = ?")
+            params.append(execution_type.value)
+        if target_id is not None:
+            conditions.append("target_id = ?")
+            params.append(target_id)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = _SORT_COLUMNS.get(sort_by, "created_at")
+        direction = "DESC" if sort_order.lower() == "desc" else "ASC"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM executions {where} ORDER BY {order} {direction}",
+                params,
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def evict_expired(self, now: Optional[datetime] = None) -> int:
+        cutoff = self._cutoff(now)
+        if cutoff is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM executions WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (_encode("completed_at", cutoff),),
+            )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM executions")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM executions").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> ExecutionRecord:
+        return ExecutionRecord(**{name: _decode(name, row[name]) for name in _COLUMNS})
+
+
+def create_execution_store(
+    backend: str = "memory",
+    path: Optional[Path] = None,
+    ttl_seconds: Optional[float] = None
+) -> ExecutionStore:
+    """
+    Create an execution store.
+
+    Args:
+        backend: "memory" or "sqlite"
+        path: Database file for the sqlite backend (default: data/executions.db)
+        ttl_seconds: Keep finished records for this long (None keeps them forever)
+
+    Returns:
+        ExecutionStore: The store
+    """
+    if backend == "memory":
+        return InMemoryExecutionStore(ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteExecutionStore(path or Path("data/executions.db"), ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown execution store backend: '{backend}'")
@@ -349,6 +349,13 @@ class ExecutionStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+class ExecutionPriority(str, Enum):
+    """Scheduling priority within an execution type's queue."""
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
+
+
 class ProgressInfo(BaseModel):
     """Execution progress information."""
     current_step: int
@@ -364,6 +371,7 @@ class AsyncExecutionRequest(BaseModel):
     inputs: Dict[str, Any]
     config: Optional[Dict[str, Any]] = Field(default_factory=dict)
     callback_url: Optional[str] = None
+    priority: ExecutionPriority = Field(ExecutionPriority.NORMAL, description="Queue priority")
 
 
 class AsyncExecutionResponse(BaseModel):
@@ -382,6 +390,17 @@ class ExecutionError(BaseModel):
     details: Optional[Dict[str, Any]] = None
 
 
+class QueueInfo(BaseModel):
+    """Scheduler queue information for an execution."""
+    priority: ExecutionPriority
+    position: Optional[int] = Field(None, description="1-based position in the queue while pending")
+    depth: int = Field(..., description="Jobs currently queued for this execution type")
+    running: int = Field(..., description="Jobs currently running for this execution type")
+    workers: int = Field(..., description="Worker pool size for this execution type")
+    queued_at: Optional[datetime] = None
+    wait_time_ms: Optional[float] = Field(None, description="Time spent queued (so far, if still pending)")
+
+
 class ExecutionStatusResponse(BaseModel):
     """Response model for execution status."""
     execution_id: str
@@ -394,6 +413,10 @@ class ExecutionStatusResponse(BaseModel):
     started_at: datetime
     completed_at: Optional[datetime] = None
     failed_at: Optional[datetime] = None
+    queue: Optional[QueueInfo] = None
+    cancellation_latency_ms: Optional[float] = Field(
+        None, description="Time from the cancel request until running work stopped"
+    )
 
 
 class ExecutionListItem(BaseModel):
@@ -0,0 +1,218 @@
+"""
+Progress Streaming
+
+This module provides in-process publish/subscribe channels for execution progress.
+It provides:
+- One channel per execution; the ExecutionManager publishes status and progress changes
+- Sequence-numbered events with a bounded history, so reconnecting clients can resume
+- Subscriptions that deliver events to an asyncio consumer without polling
+
+Publishing is thread-safe (executions run on scheduler worker threads);
+subscribers are woken on their own event loop.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+# Event types that end a channel
+TERMINAL_EVENTS = frozenset({"completed", "failed", "cancelled"})
+
+
+@dataclass
+class ProgressEvent:
+    """A single published change."""
+    seq: int
+    type: str
+    data: Dict[str, Any]
+    timestamp: datetime = field(default_factory=datetime.now)
+
+
+class Subscription:
+    """A consumer's view of a channel: backlog events first, then live events."""
+
+    def __init__(self, channel: "_Channel", backlog: List[ProgressEvent], snapshot_seq: int,
+                 needs_snapshot: bool, live: bool):
+        self.snapshot_seq = snapshot_seq
+        self.needs_snapshot = needs_snapshot
+        self._channel = channel
+        self._backlog: Deque[ProgressEvent] = deque(backlog)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
+        self._live = live
+        self._ended = False
+
+    @property
+    def done(self) -> bool:
+        """True once the terminal event has been delivered, or nothing more can arrive."""
+        return self._ended or (not self._live and not self._backlog)
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[ProgressEvent]:
+        """
+        Wait for the next event.
+
+        Args:
+            timeout: Seconds to wait (None waits indefinitely)
+
+        Returns:
+            The next event, or None on timeout
+        """
+        if self._backlog:
+            event = self._backlog.popleft()
+        else:
+            try:
+                event = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if event.type in TERMINAL_EVENTS:
+            self._ended = True
+        return event
+
+    def _deliver(self, event: ProgressEvent) -> bool:
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+            return True
+        except RuntimeError:
+            # Subscriber's event loop is closed
+            return False
+
+    def close(self) -> None:
+        """Stop receiving events."""
+        self._channel.unsubscribe(self)
+
+
+class _Channel:
+    """Event history and subscribers of one execution."""
+
+    def __init__(self, history_size: int):
+        self._lock = threading.Lock()
+        self._history: Deque[ProgressEvent] = deque(maxlen=history_size)
+        self._subscribers: Set[Subscription] = set()
+        self.last_seq = 0
+        self.closed = False
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> Optional[ProgressEvent]:
+        with self._lock:
+            if self.closed:
+                return None
+            self.last_seq += 1
+            event = ProgressEvent(seq=self.last_seq, type=event_type, data=data)
+            self._history.append(event)
+            if event_type in TERMINAL_EVENTS:
+                self.closed = True
+            self._subscribers = {s for s in self._subscribers if s._deliver(event)}
+            return event
+
+    def subscribe(self, after: Optional[int]) -> Subscription:
+        with self._lock:
+            first_seq = self._history[0].seq if self._history else self.last_seq + 1
+            if after is None or after < first_seq - 1:
+                # No resume point, or it has fallen out of the history: start from a snapshot
+                subscription = Subscription(self, [], self.last_seq, needs_snapshot=True, live=not self.closed)
+            else:
+                backlog = [event for event in self._history if event.seq > after]
+                subscription = Subscription(self, backlog, after, needs_snapshot=False, live=not self.closed)
+            if not self.closed:
+                self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+class ProgressBroker:
+    """
+    Registry of per-execution progress channels.
+
+    Channels of finished executions are kept (most recent retain_closed of
+    them) so clients can still resume or read the final event.
+    """
+
+    def __init__(self, history_size: int = 256, retain_closed: int = 1024):
+        """
+        Initialize the broker.
+
+        Args:
+            history_size: Events kept per channel for resuming clients
+            retain_closed: Finished channels kept before the oldest are dropped
+        """
+        self.history_size = history_size
+        self.retain_closed = retain_closed
+        self._lock = threading.Lock()
+        self._channels: Dict[str, _Channel] = {}
+        self._closed: "OrderedDict[str, None]" = OrderedDict()
+
+    def open(self, execution_id: str) -> None:
+        """Create the channel for an execution (no-op if it exists)."""
+        with self._lock:
+            self._channels.setdefault(execution_id, _Channel(self.history_size))
+
+    def has_channel(self, execution_id: str) -> bool:
+        """Whether this process publishes events for the execution."""
+        with self._lock:
+            return execution_id in self._channels
+
+    def publish(self, execution_id: str, event_type: str, **data: Any) -> Optional[ProgressEvent]:
+        """
+        Publish an event.
+
+        Args:
+            execution_id: Execution identifier
+            event_type: Event type (started, progress, completed, failed, cancelled)
+            **data: Event payload (JSON-serializable)
+
+        Returns:
+            The published event, or None if there is no open channel
+        """
+        with self._lock:
+            channel = self._channels.get(execution_id)
+        if channel is None:
+            return None
+
+        event = channel.publish(event_type, data)
+        if event is not None and event.type in TERMINAL_EVENTS:
+            self._retire(execution_id)
+        return event
+
+    def subscribe(self, execution_id: str, after: Optional[int] = None) -> Optional[Subscription]:
+        """
+        Subscribe to an execution's events (must be called from a running event loop).
+
+        Args:
+            execution_id: Execution identifier
+            after: Resume after this sequence number (None starts from a status snapshot)
+
+        Returns:
+            Subscription, or None if this process has no channel for the execution
+        """
+        with self._lock:
+            channel = self._channels.get(execution_id)
+        if channel is None:
+            return None
+        return channel.subscribe(after)
+
+    def discard(self, execution_id: str) -> None:
+        """Drop an execution's channel."""
+        with self._lock:
+            self._channels.pop(execution_id, None)
+            self._closed.pop(execution_id, None)
+
+    def _retire(self, execution_id: str) -> None:
+        with self._lock:
+            self._closed[execution_id] = None
+            while len(self._closed) > self.retain_closed:
+                oldest, _ = self._closed.popitem(last=False)
+                self._channels.pop(oldest, None)
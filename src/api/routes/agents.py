@@ -146,31 +146,15 @@ async def list_agents(
         if tags:
             tag_list = [t.strip() for t in tags.split(",") if t.strip()]
         
-        # Get filtered agents
-        if search:
-            # Use search if query provided
-            agents = registry.search_agents(query=search, case_sensitive=False)
-            
-            # Apply additional filters
-            if category:
-                agents = [a for a in agents if a.category == category.value]
-            if environment:
-                agents = [a for a in agents if a.environment == environment.value]
-            if status:
-                agents = [a for a in agents if a.status == status.value]
-            if not include_deprecated:
-                agents = [a for a in agents if not a.deprecated]
-            if tag_list:
-                agents = [a for a in agents if all(tag in a.tags for tag in tag_list)]
-        else:
-            # Use list_agents with filters
-            agents = registry.list_agents(
-                category=category.value if category else None,
-                environment=environment.value if environment else None,
-                tags=tag_list,
-                include_deprecated=include_deprecated,
-                status=status.value if status else None,
-            )
+        # Get filtered agents (all filters are AND-combined over the registry indexes)
+        agents = registry.query_agents(
+            query=search,
+            category=category.value if category else None,
+            environment=environment.value if environment else None,
+            status=status.value if status else None,
+            tags=tag_list,
+            include_deprecated=include_deprecated,
+        )
         
         # Paginate results
         paginated_agents, pagination = paginate(agents, page, page_size)
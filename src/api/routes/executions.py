@@ -7,17 +7,21 @@ It provides:
 - GET /executions/{execution_id} - Get execution status
 - GET /executions - List executions
 - POST /executions/{execution_id}/cancel - Cancel execution
+- WS /executions/{execution_id}/progress/ws - Progress stream (WebSocket)
+- GET /executions/{execution_id}/events - Progress stream (Server-Sent Events)
 
 Requirements: 8.5
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, WebSocket, WebSocketDisconnect
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Header, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, Optional, List
 import uuid
 from datetime import datetime
 import logging
 import asyncio
 import json
+from contextlib import suppress
 
 from ..models import (
     AsyncExecutionRequest,
@@ -32,6 +36,8 @@ from ..models import (
     ProgressInfo
 )
 from ..dependencies import get_execution_manager
+from ..progress_stream import ProgressEvent
+from ..scheduler import QueueFullError
 
 logger = logging.getLogger(__name__)
 
@@ -55,13 +61,20 @@ async def start_async_execution(
     - `inputs`: Input parameters for the execution
     - `config`: Optional configuration overrides
     - `callback_url`: Optional webhook URL for completion notification
+    - `priority`: Optional queue priority ("high", "normal" or "low"; default "normal")
     
     **Returns:**
     - `execution_id`: Unique identifier for this execution
-    - `status`: Initial status ("pending")
+    - `status`: Initial status ("pending" while queued)
     - `status_url`: URL to query execution status
     - `created_at`: Timestamp when execution was created
     
+    **Status Codes:**
+    - `202`: Execution queued
+    - `429`: The queue for this execution type is full; retry later
+      (not returned with `API_EXECUTION_BACKEND=asyncio`, where executions
+      start immediately on the event loop and LLM calls are throttled by the governor)
+    
     **Example:**
     ```json
     {
@@ -90,26 +103,32 @@ async def start_async_execution(
             target_id=request.target_id,
             inputs=request.inputs,
             config=request.config,
-            callback_url=request.callback_url
+            callback_url=request.callback_url,
+            priority=request.priority
         )
         
-        # Schedule background execution
-        if request.type == ExecutionType.AGENT:
-            background_tasks.add_task(
-                execution_manager.execute_agent_async,
-                execution_id=execution_id,
-                agent_id=request.target_id,
-                inputs=request.inputs,
-                config=request.config
+        if execution_manager.native_async:
+            # Run on this event loop; the execution sends its own callback
+            execution_manager.start_async(
+                execution_id, request.type, request.target_id, request.inputs, request.config
             )
-        elif request.type == ExecutionType.PIPELINE:
-            background_tasks.add_task(
-                execution_manager.execute_pipeline_async,
-                execution_id=execution_id,
-                pipeline_id=request.target_id,
-                inputs=request.inputs,
-                config=request.config
+        else:
+            # Queue the execution; reject immediately if the queue is full
+            submit = (
+                execution_manager.submit_agent
+                if request.type == ExecutionType.AGENT
+                else execution_manager.submit_pipeline
             )
+            try:
+                job = submit(execution_id, request.target_id, request.inputs, request.config)
+            except QueueFullError as e:
+                execution_manager.remove_execution(execution_id)
+                logger.warning(f"Rejected async execution: {e}")
+                raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+            
+            # Send the completion callback once the execution finishes
+            if request.callback_url:
+                background_tasks.add_task(execution_manager.wait_for_execution, execution_id, job)
         
         logger.info(f"Started async execution: {execution_id} (type={request.type}, target={request.target_id})")
         
@@ -121,6 +140,8 @@ async def start_async_execution(
             created_at=datetime.now()
         )
         
+    except HTTPException:
+        raise
     except ValueError as e:
         logger.error(f"Validation error in async execution: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -425,18 +446,177 @@ async def cancel_execution(execution_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to cancel execution: {str(e)}")
 
 
+# Heartbeat interval for the SSE stream (keeps proxies from closing idle connections)
+SSE_HEARTBEAT_SECONDS = 15.0
+
+# Polling interval when the execution runs in another API worker process
+POLL_INTERVAL_SECONDS = 0.5
+
+FINAL_STATUSES = (ExecutionStatus.COMPLETED, ExecutionStatus.FAILED, ExecutionStatus.CANCELLED)
+
+
+def _error_message(message: str) -> Dict[str, Any]:
+    return {"type": "error", "message": message, "timestamp": datetime.now().isoformat()}
+
+
+def _status_message(status: ExecutionStatusResponse, seq: Optional[int] = None) -> Dict[str, Any]:
+    """Snapshot of the current status."""
+    return {
+        "type": "status",
+        "seq": seq,
+        "execution_id": status.execution_id,
+        "status": status.status.value,
+        "progress": status.progress.dict() if status.progress else None,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def _final_message(status: ExecutionStatusResponse, seq: Optional[int] = None) -> Dict[str, Any]:
+    """Completed / failed / cancelled message built from a status snapshot."""
+    return {
+        "type": status.status.value,
+        "seq": seq,
+        "execution_id": status.execution_id,
+        "status": status.status.value,
+        "outputs": status.outputs,
+        "error": status.error.dict() if status.error else None,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def _event_message(execution_id: str, event: ProgressEvent) -> Dict[str, Any]:
+    """Message for a published progress event."""
+    return {
+        "type": event.type,
+        "seq": event.seq,
+        "execution_id": execution_id,
+        **event.data,
+        "timestamp": event.timestamp.isoformat()
+    }
+
+
+async def _execution_updates(
+    execution_manager,
+    execution_id: str,
+    after: Optional[int] = None,
+    heartbeat: Optional[float] = None
+) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Stream messages for an execution until it finishes.
+    
+    Starts with a status snapshot (or, when resuming, the events after `after`),
+    then yields events as the execution manager publishes them. Yields None
+    when nothing happened for `heartbeat` seconds.
+    """
+    subscription = execution_manager.events.subscribe(execution_id, after=after)
+    if subscription is None:
+        # Not published by this process (e.g. started by another API worker): poll the store
+        async for message in _poll_updates(execution_manager, execution_id, heartbeat):
+            yield message
+        return
+    
+    try:
+        if subscription.needs_snapshot:
+            status = execution_manager.get_execution_status(execution_id)
+            if status is None:
+                yield _error_message(f"Execution '{execution_id}' not found")
+                return
+            yield _status_message(status, subscription.snapshot_seq)
+            if status.status in FINAL_STATUSES:
+                yield _final_message(status, subscription.snapshot_seq)
+                return
+        
+        while not subscription.done:
+            event = await subscription.next(timeout=heartbeat)
+            yield _event_message(execution_id, event) if event is not None else None
+    finally:
+        subscription.close()
+
+
+async def _poll_updates(
+    execution_manager,
+    execution_id: str,
+    heartbeat: Optional[float] = None
+) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """Polling fallback for executions this process does not publish events for."""
+    status = execution_manager.get_execution_status(execution_id)
+    if status is None:
+        yield _error_message(f"Execution '{execution_id}' not found")
+        return
+    
+    yield _status_message(status)
+    if status.status in FINAL_STATUSES:
+        yield _final_message(status)
+        return
+    
+    last_status = status.status
+    last_progress = None
+    idle = 0.0
+    while True:
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+        idle += POLL_INTERVAL_SECONDS
+        
+        current_status = execution_manager.get_execution_status(execution_id)
+        if current_status is None:
+            yield _error_message("Execution no longer exists")
+            return
+        
+        if current_status.status != last_status:
+            last_status = current_status.status
+            idle = 0.0
+            if current_status.status in FINAL_STATUSES:
+                yield _final_message(current_status)
+                return
+            if current_status.status == ExecutionStatus.RUNNING:
+                yield {
+                    "type": "started",
+                    "seq": None,
+                    "execution_id": execution_id,
+                    "status": "running",
+                    "timestamp": datetime.now().isoformat()
+                }
+        
+        if current_status.progress != last_progress:
+            last_progress = current_status.progress
+            idle = 0.0
+            if current_status.progress:
+                yield {
+                    "type": "progress",
+                    "seq": None,
+                    "execution_id": execution_id,
+                    "status": current_status.status.value,
+                    "progress": current_status.progress.dict(),
+                    "timestamp": datetime.now().isoformat()
+                }
+        
+        if heartbeat is not None and idle >= heartbeat:
+            idle = 0.0
+            yield None
+
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    """Return when the WebSocket client disconnects (client messages are ignored)."""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
 @router.websocket("/{execution_id}/progress/ws")
-async def websocket_execution_progress(websocket: WebSocket, execution_id: str):
+async def websocket_execution_progress(websocket: WebSocket, execution_id: str, after: Optional[int] = None):
     """
     WebSocket endpoint for real-time execution progress updates.
     
     This endpoint provides a persistent connection for streaming progress updates
-    as the execution progresses. The client receives JSON messages with progress
-    information whenever the execution state changes.
+    as the execution progresses. Updates are pushed as soon as the execution
+    publishes them (no polling).
     
     **Path Parameters:**
     - `execution_id`: Unique execution identifier
     
+    **Query Parameters:**
+    - `after`: Resume after this sequence number (use the `seq` of the last message received)
+    
     **Connection:**
     ```javascript
     const ws = new WebSocket('ws://localhost:8000/api/v1/executions/exec_123456/progress/ws');
@@ -451,6 +631,7 @@ async def websocket_execution_progress(websocket: WebSocket, execution_id: str):
     ```json
     {
       "type": "progress",
+      "seq": 3,
       "execution_id": "exec_123456",
       "status": "running",
       "progress": {
@@ -464,48 +645,24 @@ async def websocket_execution_progress(websocket: WebSocket, execution_id: str):
     ```
     
     **Message Types:**
+    - `status`: Initial status snapshot (not sent when resuming with `after`)
+    - `started`: Execution started running
     - `progress`: Progress update during execution
     - `completed`: Execution completed successfully
     - `failed`: Execution failed with error
     - `cancelled`: Execution was cancelled
     - `error`: WebSocket error occurred
     
-    **Completion Message:**
-    ```json
-    {
-      "type": "completed",
-      "execution_id": "exec_123456",
-      "status": "completed",
-      "outputs": {...},
-      "timestamp": "2024-12-17T10:30:10Z"
-    }
-    ```
-    
-    **Error Message:**
-    ```json
-    {
-      "type": "failed",
-      "execution_id": "exec_123456",
-      "status": "failed",
-      "error": {
-        "type": "ValueError",
-        "message": "Invalid input"
-      },
-      "timestamp": "2024-12-17T10:30:10Z"
-    }
-    ```
-    
     **Connection Lifecycle:**
     1. Client connects to WebSocket
-    2. Server sends initial status message
-    3. Server sends progress updates as execution progresses
+    2. Server sends initial status message (or the missed messages when resuming)
+    3. Server pushes progress updates as execution progresses
     4. Server sends final status message (completed/failed/cancelled)
     5. Connection closes automatically after completion
     
-    **Polling Interval:**
-    - Progress updates are sent every 500ms while execution is running
-    - No updates are sent if progress hasn't changed
-    - Connection closes after execution completes or fails
+    **Resuming:**
+    - Every message carries a `seq`; reconnect with `?after=<seq>` to receive only newer messages
+    - If the requested messages are no longer retained, a fresh `status` snapshot is sent instead
     
     **Error Handling:**
     - If execution doesn't exist, connection closes with error message
@@ -515,114 +672,28 @@ async def websocket_execution_progress(websocket: WebSocket, execution_id: str):
     await websocket.accept()
     logger.info(f"WebSocket connection established for execution: {execution_id}")
     
+    execution_manager = get_execution_manager()
+    updates = _execution_updates(execution_manager, execution_id, after=after)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(websocket))
+    next_message = None
+    
     try:
-        execution_manager = get_execution_manager()
-        
-        # Check if execution exists
-        status = execution_manager.get_execution_status(execution_id)
-        if status is None:
-            await websocket.send_json({
-                "type": "error",
-                "message": f"Execution '{execution_id}' not found",
-                "timestamp": datetime.now().isoformat()
-            })
-            await websocket.close(code=1008, reason="Execution not found")
-            return
-        
-        # Send initial status
-        await websocket.send_json({
-            "type": "status",
-            "execution_id": execution_id,
-            "status": status.status.value,
-            "progress": status.progress.dict() if status.progress else None,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        # If execution is already completed, send final status and close
-        if status.status in [ExecutionStatus.COMPLETED, ExecutionStatus.FAILED, ExecutionStatus.CANCELLED]:
-            await websocket.send_json({
-                "type": status.status.value,
-                "execution_id": execution_id,
-                "status": status.status.value,
-                "outputs": status.outputs,
-                "error": status.error.dict() if status.error else None,
-                "timestamp": datetime.now().isoformat()
-            })
-            await websocket.close(code=1000, reason="Execution already completed")
-            return
-        
-        # Poll for progress updates
-        last_progress = None
-        last_status = status.status
-        
         while True:
-            # Get current status
-            current_status = execution_manager.get_execution_status(execution_id)
+            next_message = asyncio.ensure_future(updates.__anext__())
+            await asyncio.wait({next_message, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_message.done():
+                logger.info(f"WebSocket client disconnected: {execution_id}")
+                return
             
-            if current_status is None:
-                # Execution was deleted
-                await websocket.send_json({
-                    "type": "error",
-                    "message": "Execution no longer exists",
-                    "timestamp": datetime.now().isoformat()
-                })
+            try:
+                message = next_message.result()
+            except StopAsyncIteration:
                 break
             
-            # Check if status changed
-            if current_status.status != last_status:
-                last_status = current_status.status
-                
-                # Send status change message
-                if current_status.status == ExecutionStatus.RUNNING:
-                    await websocket.send_json({
-                        "type": "started",
-                        "execution_id": execution_id,
-                        "status": "running",
-                        "timestamp": datetime.now().isoformat()
-                    })
-                elif current_status.status == ExecutionStatus.COMPLETED:
-                    await websocket.send_json({
-                        "type": "completed",
-                        "execution_id": execution_id,
-                        "status": "completed",
-                        "outputs": current_status.outputs,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    break
-                elif current_status.status == ExecutionStatus.FAILED:
-                    await websocket.send_json({
-                        "type": "failed",
-                        "execution_id": execution_id,
-                        "status": "failed",
-                        "error": current_status.error.dict() if current_status.error else None,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    break
-                elif current_status.status == ExecutionStatus.CANCELLED:
-                    await websocket.send_json({
-                        "type": "cancelled",
-                        "execution_id": execution_id,
-                        "status": "cancelled",
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    break
-            
-            # Check if progress changed
-            if current_status.progress != last_progress:
-                last_progress = current_status.progress
-                
-                # Send progress update
-                if current_status.progress:
-                    await websocket.send_json({
-                        "type": "progress",
-                        "execution_id": execution_id,
-                        "status": current_status.status.value,
-                        "progress": current_status.progress.dict(),
-                        "timestamp": datetime.now().isoformat()
-                    })
-            
-            # Wait before next poll
-            await asyncio.sleep(0.5)
+            await websocket.send_json(message)
+            if message["type"] == "error":
+                await websocket.close(code=1008, reason=message["message"])
+                return
         
         # Close connection
         await websocket.close(code=1000, reason="Execution completed")
@@ -633,11 +704,76 @@ async def websocket_execution_progress(websocket: WebSocket, execution_id: str):
     except Exception as e:
         logger.error(f"WebSocket error for execution {execution_id}: {e}", exc_info=True)
         try:
-            await websocket.send_json({
-                "type": "error",
-                "message": str(e),
-                "timestamp": datetime.now().isoformat()
-            })
+            await websocket.send_json(_error_message(str(e)))
             await websocket.close(code=1011, reason="Internal error")
         except:
             pass
+    finally:
+        disconnected.cancel()
+        if next_message is not None and not next_message.done():
+            next_message.cancel()
+            with suppress(asyncio.CancelledError, StopAsyncIteration):
+                await next_message
+        await updates.aclose()
+
+
+def _format_sse(message: Dict[str, Any]) -> str:
+    lines = []
+    if message.get("seq") is not None:
+        lines.append(f"id: {message['seq']}")
+    lines.append(f"event: {message['type']}")
+    lines.append(f"data: {json.dumps(message, ensure_ascii=False, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@router.get("/{execution_id}/events")
+async def stream_execution_events(
+    execution_id: str,
+    after: Optional[int] = Query(None, description="Resume after this sequence number"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Server-Sent Events stream of execution progress.
+    
+    Sends the same messages as the WebSocket endpoint, as SSE events named
+    after the message type. The stream ends after the final
+    completed/failed/cancelled event.
+    
+    **Path Parameters:**
+    - `execution_id`: Unique execution identifier
+    
+    **Query Parameters:**
+    - `after`: Resume after this sequence number
+    
+    **Headers:**
+    - `Last-Event-ID`: Sent automatically by EventSource on reconnect; used like `after`
+    
+    **Example:**
+    ```javascript
+    const source = new EventSource('/api/v1/executions/exec_123456/events');
+    source.addEventListener('progress', (e) => console.log(JSON.parse(e.data)));
+    source.addEventListener('completed', () => source.close());
+    ```
+    
+    **Status Codes:**
+    - `200`: Event stream
+    - `404`: Execution not found
+    """
+    execution_manager = get_execution_manager()
+    if execution_manager.get_execution_status(execution_id) is None:
+        raise HTTPException(status_code=404, detail=f"Execution '{execution_id}' not found")
+    
+    if after is None and last_event_id and last_event_id.isdigit():
+        after = int(last_event_id)
+    
+    async def event_stream():
+        async for message in _execution_updates(
+            execution_manager, execution_id, after=after, heartbeat=SSE_HEARTBEAT_SECONDS
+        ):
+            yield ": keep-alive\n\n" if message is None else _format_sse(message)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -32,11 +32,11 @@ from ..models import (
 )
 from ...pipeline_config import (
     load_pipeline_config,
-    list_available_pipelines,
     save_pipeline_config,
     PIPELINE_DIRS,
 )
 from ...models import PipelineConfig as InternalPipelineConfig
+from ...pipeline_catalog import get_pipeline_catalog
 
 router = APIRouter(prefix="/pipelines", tags=["Pipelines"])
 
@@ -104,50 +104,6 @@ def find_pipeline_file(pipeline_id: str) -> Optional[Path]:
     return None
 
 
-def get_pipeline_metadata(pipeline_id: str, config_path: Path) -> dict:
-    """
-    Get metadata for a pipeline from its configuration file.
-    
-    Args:
-        pipeline_id: Pipeline identifier
-        config_path: Path to the configuration file
-        
-    Returns:
-        Dictionary with pipeline metadata
-    """
-    try:
-        stat = config_path.stat()
-        created_at = datetime.fromtimestamp(stat.st_ctime)
-        updated_at = datetime.fromtimestamp(stat.st_mtime)
-        
-        # Load config to get details
-        with open(config_path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-        
-        return {
-            "id": pipeline_id,
-            "name": data.get("name", pipeline_id),
-            "description": data.get("description", ""),
-            "version": data.get("version", "1.0.0"),
-            "status": PipelineStatus.ACTIVE,  # Default status
-            "steps_count": len(data.get("steps", [])),
-            "created_at": created_at,
-            "updated_at": updated_at,
-        }
-    except Exception as e:
-        # Return minimal metadata if we can't read the file
-        return {
-            "id": pipeline_id,
-            "name": pipeline_id,
-            "description": "",
-            "version": "1.0.0",
-            "status": PipelineStatus.ACTIVE,
-            "steps_count": 0,
-            "created_at": None,
-            "updated_at": None,
-        }
-
-
 def internal_to_api_step(step) -> StepConfig:
     """
     Convert internal StepConfig to API StepConfig.
@@ -288,37 +244,19 @@ async def list_pipelines(
     ```
     """
     try:
-        # Get all available pipelines
-        pipeline_ids = list_available_pipelines()
+        # Filter against the in-memory catalog (only changed files are re-read)
+        entries = get_pipeline_catalog().list(search=search)
         
-        # Build pipeline list with metadata
-        pipelines = []
-        for pipeline_id in pipeline_ids:
-            config_path = find_pipeline_file(pipeline_id)
-            if config_path:
-                metadata = get_pipeline_metadata(pipeline_id, config_path)
-                
-                # Apply status filter
-                if status and metadata["status"] != status:
-                    continue
-                
-                # Apply search filter
-                if search:
-                    search_lower = search.lower()
-                    if not (
-                        search_lower in metadata["id"].lower() or
-                        search_lower in metadata["name"].lower() or
-                        search_lower in metadata["description"].lower()
-                    ):
-                        continue
-                
-                pipelines.append(PipelineListItem(**metadata))
+        # All pipelines currently report the default status
+        if status and status != PipelineStatus.ACTIVE:
+            entries = []
         
-        # Sort by ID
-        pipelines.sort(key=lambda p: p.id)
-        
-        # Paginate results
-        paginated_pipelines, pagination = paginate(pipelines, page, page_size)
+        # Paginate before building response items
+        paginated_entries, pagination = paginate(entries, page, page_size)
+        paginated_pipelines = [
+            PipelineListItem(**entry.summary(), status=PipelineStatus.ACTIVE)
+            for entry in paginated_entries
+        ]
         
         return PipelineListResponse(
             pipelines=paginated_pipelines,
@@ -401,13 +339,14 @@ async def get_pipeline(pipeline_id: str):
         error_msg = str(e)
         if "找不到" in error_msg or "not found" in error_msg.lower() or isinstance(e, FileNotFoundError):
             # Pipeline not found
-            available_pipelines = ", ".join(sorted(list_available_pipelines())[:10])
+            pipeline_ids = get_pipeline_catalog().ids()
+            available_pipelines = ", ".join(pipeline_ids[:10])
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail={
                     "error": "NotFound",
                     "message": f"Pipeline '{pipeline_id}' not found",
-                    "available_pipelines": available_pipelines + ("..." if len(list_available_pipelines()) > 10 else "")
+                    "available_pipelines": available_pipelines + ("..." if len(pipeline_ids) > 10 else "")
                 }
             )
         else:
@@ -0,0 +1,298 @@
+"""
+Execution Scheduler
+
+This module schedules background executions on dedicated worker pools.
+It provides:
+- One worker pool per execution type, so long pipelines cannot starve agent calls
+- Bounded queues with admission control (QueueFullError when a lane is full)
+- Priority ordering within a lane (high before normal before low, FIFO within a priority)
+- Queue depth and wait time metrics
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .models import ExecutionPriority, ExecutionType
+
+logger = logging.getLogger(__name__)
+
+
+PRIORITY_RANK: Dict[ExecutionPriority, int] = {
+    ExecutionPriority.HIGH: 0,
+    ExecutionPriority.NORMAL: 1,
+    ExecutionPriority.LOW: 2,
+}
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a lane's queue is at capacity."""
+
+    def __init__(self, lane: ExecutionType, capacity: int):
+        super().__init__(f"Execution queue for '{lane.value}' is full ({capacity} queued)")
+        self.lane = lane
+        self.capacity = capacity
+
+
+@dataclass(order=True)
+class ScheduledJob:
+    """A job waiting in (or taken from) a lane queue."""
+    sort_key: Tuple[int, int]
+    execution_id: str = field(compare=False)
+    priority: ExecutionPriority = field(compare=False)
+    fn: Callable[..., Any] = field(compare=False, repr=False)
+    args: Tuple[Any, ...] = field(compare=False, repr=False)
+    future: Future = field(compare=False, repr=False)
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+
+
+@dataclass
+class LaneStats:
+    """Snapshot of a lane's metrics."""
+    lane: ExecutionType
+    workers: int
+    capacity: int
+    queued: int
+    running: int
+    submitted: int
+    rejected: int
+    completed: int
+    avg_wait_ms: float
+    max_wait_ms: float
+
+
+class _Lane:
+    """Bounded priority queue served by a fixed number of worker threads."""
+
+    def __init__(self, lane: ExecutionType, workers: int, capacity: int):
+        self.lane = lane
+        self.workers = max(1, workers)
+        self.capacity = max(1, capacity)
+        self._heap: List[ScheduledJob] = []
+        self._queued: Dict[str, ScheduledJob] = {}
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._running = 0
+        self._shutdown = False
+        self._submitted = 0
+        self._rejected = 0
+        self._started = 0
+        self._completed = 0
+        self._total_wait_ms = 0.0
+        self._max_wait_ms = 0.0
+
+    def submit(self, execution_id: str, priority: ExecutionPriority,
+               fn: Callable[..., Any], args: Tuple[Any, ...]) -> Future:
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Scheduler has been shut down")
+            if len(self._heap) >= self.capacity:
+                self._rejected += 1
+                raise QueueFullError(self.lane, self.capacity)
+
+            job = ScheduledJob(
+                sort_key=(PRIORITY_RANK[priority], next(self._seq)),
+                execution_id=execution_id,
+                priority=priority,
+                fn=fn,
+                args=args,
+                future=Future(),
+            )
+            heapq.heappush(self._heap, job)
+            self._queued[execution_id] = job
+            self._submitted += 1
+            self._ensure_workers()
+            self._cond.notify()
+            return job.future
+
+    def _ensure_workers(self) -> None:
+        # Workers are started on first use so idle managers don't hold threads
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work,
+                name=f"execution-{self.lane.value}-{len(self._threads)}",
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap and not self._shutdown:
+                    self._cond.wait()
+                if not self._heap:
+                    return
+                job = heapq.heappop(self._heap)
+                self._queued.pop(job.execution_id, None)
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                wait_ms = (time.monotonic() - job.enqueued_at) * 1000
+                self._started += 1
+                self._total_wait_ms += wait_ms
+                self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+                self._running += 1
+
+            try:
+                job.future.set_result(job.fn(*job.args))
+            except BaseException as e:
+                job.future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._completed += 1
+
+    def cancel(self, execution_id: str) -> bool:
+        with self._cond:
+            job = self._queued.pop(execution_id, None)
+            if job is None:
+                return False
+            self._heap.remove(job)
+            heapq.heapify(self._heap)
+            job.future.cancel()
+            return True
+
+    def queue_info(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            job = self._queued.get(execution_id)
+            if job is None:
+                return None
+            position = 1 + sum(1 for other in self._heap if other.sort_key < job.sort_key)
+            return {
+                "position": position,
+                "depth": len(self._heap),
+                "running": self._running,
+                "workers": self.workers,
+                "wait_time_ms": (time.monotonic() - job.enqueued_at) * 1000,
+            }
+
+    def load(self) -> Dict[str, int]:
+        with self._cond:
+            return {"depth": len(self._heap), "running": self._running, "workers": self.workers}
+
+    def stats(self) -> LaneStats:
+        with self._cond:
+            return LaneStats(
+                lane=self.lane,
+                workers=self.workers,
+                capacity=self.capacity,
+                queued=len(self._heap),
+                running=self._running,
+                submitted=self._submitted,
+                rejected=self._rejected,
+                completed=self._completed,
+                avg_wait_ms=self._total_wait_ms / self._started if self._started else 0.0,
+                max_wait_ms=self._max_wait_ms,
+            )
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._cond:
+            self._shutdown = True
+            for job in self._heap:
+                job.future.cancel()
+            self._heap.clear()
+            self._queued.clear()
+            self._cond.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+class ExecutionScheduler:
+    """
+    Schedules executions on per-type worker pools.
+
+    Each execution type gets its own lane: a bounded priority queue and a
+    fixed set of worker threads. Submitting to a full lane raises
+    QueueFullError instead of queueing without limit.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[Dict[ExecutionType, int]] = None,
+        queue_sizes: Optional[Dict[ExecutionType, int]] = None
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            workers: Worker threads per execution type (default 4 for agents, 2 for pipelines)
+            queue_sizes: Maximum queued (not yet running) jobs per execution type
+        """
+        workers = {ExecutionType.AGENT: 4, ExecutionType.PIPELINE: 2, **(workers or {})}
+        queue_sizes = {ExecutionType.AGENT: 100, ExecutionType.PIPELINE: 50, **(queue_sizes or {})}
+        self._lanes: Dict[ExecutionType, _Lane] = {
+            execution_type: _Lane(execution_type, workers[execution_type], queue_sizes[execution_type])
+            for execution_type in ExecutionType
+        }
+
+    @classmethod
+    def from_settings(cls) -> "ExecutionScheduler":
+        """Create a scheduler sized from the API settings."""
+        from .config import get_settings
+
+        settings = get_settings()
+        return cls(
+            workers={
+                ExecutionType.AGENT: settings.agent_workers,
+                ExecutionType.PIPELINE: settings.pipeline_workers,
+            },
+            queue_sizes={
+                ExecutionType.AGENT: settings.agent_queue_size,
+                ExecutionType.PIPELINE: settings.pipeline_queue_size,
+            },
+        )
+
+    def submit(
+        self,
+        execution_type: ExecutionType,
+        execution_id: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority: ExecutionPriority = ExecutionPriority.NORMAL
+    ) -> Future:
+        """
+        Queue a job on the lane for its execution type.
+
+        Args:
+            execution_type: Lane to queue on
+            execution_id: Execution identifier (used for cancellation and queue info)
+            fn: Callable run on a worker thread
+            *args: Arguments for fn
+            priority: Priority within the lane
+
+        Returns:
+            Future resolved with fn's result
+
+        Raises:
+            QueueFullError: If the lane's queue is at capacity
+        """
+        return self._lanes[execution_type].submit(execution_id, priority, fn, args)
+
+    def cancel(self, execution_type: ExecutionType, execution_id: str) -> bool:
+        """Remove a queued job. Returns False if it is not queued (already running or done)."""
+        return self._lanes[execution_type].cancel(execution_id)
+
+    def queue_info(self, execution_type: ExecutionType, execution_id: str) -> Optional[Dict[str, Any]]:
+        """Queue position, depth and wait so far for a queued job, or None if not queued."""
+        return self._lanes[execution_type].queue_info(execution_id)
+
+    def load(self, execution_type: ExecutionType) -> Dict[str, int]:
+        """Current queue depth, running jobs and worker count for a lane."""
+        return self._lanes[execution_type].load()
+
+    def stats(self) -> Dict[ExecutionType, LaneStats]:
+        """Metrics for every lane."""
+        return {execution_type: lane.stats() for execution_type, lane in self._lanes.items()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop all workers. Queued jobs are cancelled; running jobs finish."""
+        for lane in self._lanes.values():
+            lane.shutdown(wait=wait)
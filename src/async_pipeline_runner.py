@@ -0,0 +1,457 @@
+# src/async_pipeline_runner.py
+"""
+基于 asyncio 的 Pipeline 执行引擎
+
+AsyncPipelineRunner 复用 PipelineRunner 的配置校验、执行计划和结果汇总，
+但把调度放在事件循环上：
+- 每个步骤是一个 asyncio 任务，等待其依赖任务完成后执行，并发数由信号量控制
+- Agent/Flow 步骤（包括批量模式的每个 item）通过 arun_flow_with_tokens
+  直接 await 模型调用，不占用线程
+- 代码节点和批量聚合是 CPU/子进程工作，在事件循环的默认线程池中执行；
+  Agent 配置查找等会读文件的准备工作同样放在线程池中
+
+适用于在同一个事件循环中驱动大量并发模型调用的场景（如 API 服务）。
+断点续跑和 PipelineProgressTracker 只在同步的 PipelineRunner 中提供。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .models import PipelineConfig, StepConfig, VariantConfig
+from .cancellation import ExecutionCancelled
+from .chains import arun_flow_with_tokens
+from .execution_plan import ExecutionPlan, StepPlan
+from .error_handler import create_execution_error
+from .pipeline_runner import PipelineResult, PipelineRunner, StepResult
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPipelineRunner(PipelineRunner):
+    """
+    基于 asyncio 的 Pipeline 执行器
+
+    步骤和样本的并发上限分别由 max_workers 和 sample_concurrency 控制。
+    设置取消令牌时，取消后未开始的步骤被跳过，正在执行的步骤任务被取消；
+    直接取消调用方的 Task 同样会停止所有步骤，并向上传递 CancelledError。
+    """
+
+    def __init__(self, config: PipelineConfig, max_workers: int = 4, sample_concurrency: int = 1):
+        """
+        初始化异步 Pipeline 执行器
+
+        Args:
+            config: Pipeline 配置对象
+            max_workers: 每个样本同时执行的步骤数上限（默认4）
+            sample_concurrency: 同时执行的样本数（默认1）
+        """
+        super().__init__(config, enable_concurrent=True, max_workers=max_workers,
+                         sample_concurrency=sample_concurrency)
+
+    async def aexecute(self, samples: List[Dict[str, Any]], variant: str = "baseline",
+                       sample_concurrency: Optional[int] = None) -> List[PipelineResult]:
+        """
+        执行多个样本
+
+        Args:
+            samples: 测试样本列表
+            variant: 变体名称
+            sample_concurrency: 同时执行的样本数（默认使用初始化时的设置）
+
+        Returns:
+            与 samples 顺序一致的执行结果列表
+
+        Raises:
+            ExecutionCancelled: 执行被取消
+        """
+        total_samples = len(samples)
+        semaphore = asyncio.Semaphore(max(1, sample_concurrency or self.sample_concurrency))
+        completed = 0
+
+        logger.info(f"异步执行 Pipeline '{self.config.id}'，变体 '{variant}'，{total_samples} 个样本")
+
+        async def run_sample(index: int, sample: Dict[str, Any]) -> PipelineResult:
+            nonlocal completed
+            async with semaphore:
+                result = await self.aexecute_sample(sample, variant, sample_index=index)
+            completed += 1
+            if self.progress_callback:
+                self.progress_callback(completed, total_samples, f"样本完成: {result.sample_id}")
+            return result
+
+        results = await asyncio.gather(*(run_sample(i, sample) for i, sample in enumerate(samples)))
+
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+        return list(results)
+
+    async def aexecute_sample(
+        self,
+        sample: Dict[str, Any],
+        variant: str = "baseline",
+        sample_index: int = 0,
+        on_progress: Optional[Callable[[int, int, Optional[str]], None]] = None
+    ) -> PipelineResult:
+        """
+        执行单个样本的 Pipeline 流程
+
+        Args:
+            sample: 测试样本数据
+            variant: 变体名称
+            sample_index: 样本索引
+            on_progress: 步骤进度回调，接收 (已完成步骤数, 总步骤数, 刚完成的步骤ID)
+
+        Returns:
+            Pipeline 执行结果
+        """
+        sample_id = sample.get("id", "unknown")
+        start_time = time.time()
+        context = self._create_sample_context(sample, variant)
+        self.context = context
+
+        result = PipelineResult(
+            sample_id=sample_id,
+            variant=variant
+        )
+
+        try:
+            if self.cancel_token is not None:
+                self.cancel_token.raise_if_cancelled()
+
+            variant_config = self._get_variant_config(variant)
+            plan = self.get_execution_plan(variant)
+
+            logger.info(f"Pipeline 以 asyncio 任务调度 {len(plan.steps)} 个步骤（最大并发数: {self.max_workers}）")
+
+            completed_steps, step_timings = await self._aschedule_steps(
+                plan=plan,
+                variant_config=variant_config,
+                context=context,
+                start_time=start_time,
+                on_progress=on_progress
+            )
+
+            self._finish_scheduled_sample(
+                result, plan, completed_steps, step_timings, context, start_time
+            )
+
+            logger.info(
+                f"样本 {sample_id} 异步执行完成，总耗时 {result.total_execution_time:.2f}秒，"
+                f"关键路径 {' -> '.join(result.critical_path)} ({result.critical_path_time:.2f}秒)"
+            )
+
+        except Exception as e:
+            result.error = str(e)
+            result.total_execution_time = time.time() - start_time
+            logger.error(f"样本 {sample_id} 异步执行失败: {e}")
+
+        return result
+
+    async def _aschedule_steps(
+        self,
+        plan: ExecutionPlan,
+        variant_config: Optional[VariantConfig],
+        context: Dict[str, Any],
+        start_time: float,
+        on_progress: Optional[Callable[[int, int, Optional[str]], None]] = None
+    ) -> Tuple[Dict[str, StepResult], Dict[str, Dict[str, float]]]:
+        """
+        为每个步骤创建 asyncio 任务，步骤在其依赖任务完成后执行
+
+        跳过规则与 PipelineRunner._schedule_steps 相同：依赖被跳过或必需依赖失败
+        的步骤被跳过；必需步骤失败后或取消后，尚未开始的步骤被跳过。步骤输出只在事件循环线程中
+        写入上下文。取消令牌只中止正在执行的步骤，等待中的步骤醒来后按取消跳过。
+
+        Returns:
+            (步骤结果字典, 步骤时间线 {step_id: {"start": 秒, "end": 秒}})，时间相对于样本开始
+        """
+        semaphore = asyncio.Semaphore(self.max_workers)
+        completed_steps: Dict[str, StepResult] = {}
+        step_timings: Dict[str, Dict[str, float]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        running: Set[asyncio.Future] = set()
+        total_steps = len(plan.steps)
+        failed_required: Optional[str] = None
+
+        def finish(step_id: str, step_result: StepResult) -> StepResult:
+            nonlocal failed_required
+            completed_steps[step_id] = step_result
+            if step_result.success:
+                # 将步骤输出添加到上下文
+                context[step_result.output_key] = step_result.output_value
+                logger.debug(f"步骤 '{step_id}' 执行成功")
+            else:
+                if failed_required is None and self._is_required_failure(plan.steps[step_id].step, step_result):
+                    failed_required = step_id
+                logger.warning(f"步骤 '{step_id}' 执行失败: {step_result.error}")
+            if on_progress:
+                on_progress(len(completed_steps), total_steps, step_id)
+            return step_result
+
+        def skip(step_id: str, step_result: StepResult) -> StepResult:
+            offset = time.time() - start_time
+            step_timings[step_id] = {"start": offset, "end": offset}
+            return finish(step_id, step_result)
+
+        async def run_step(step_id: str) -> StepResult:
+            step_plan = plan.steps[step_id]
+            step = step_plan.step
+
+            # 所有任务在第一次让出事件循环之前已经创建
+            dependencies = [tasks[dep_id] for dep_id in step_plan.dependencies]
+            if dependencies:
+                await asyncio.wait(dependencies)
+
+            if self._is_cancelled():
+                return skip(step_id, self._cancelled_step_result(step))
+
+            skip_reason = self._skip_reason(plan, step_plan, completed_steps, failed_required)
+            if skip_reason:
+                return skip(step_id, self._skipped_step_result(step, skip_reason))
+
+            async with semaphore:
+                # 等待信号量期间可能已被取消或有必需步骤失败
+                if self._is_cancelled():
+                    return skip(step_id, self._cancelled_step_result(step))
+                if failed_required:
+                    return skip(step_id, self._skipped_step_result(
+                        step, f"必需步骤 '{failed_required}' 失败，跳过执行"
+                    ))
+
+                step_timings[step_id] = {"start": time.time() - start_time}
+                step_task = asyncio.ensure_future(self.aexecute_step(step, variant_config, context, step_plan))
+                running.add(step_task)
+                try:
+                    step_result = await step_task
+                except asyncio.CancelledError:
+                    # 只有被取消令牌中止的步骤转为取消结果，调用方取消时继续向上传递
+                    if not (step_task.cancelled() and self._is_cancelled()):
+                        raise
+                    step_result = self._cancelled_step_result(
+                        step, time.time() - start_time - step_timings[step_id]["start"], started=True
+                    )
+                finally:
+                    running.discard(step_task)
+                step_timings[step_id]["end"] = time.time() - start_time
+
+            return finish(step_id, step_result)
+
+        loop = asyncio.get_running_loop()
+
+        def cancel_running():
+            for step_task in list(running):
+                step_task.cancel()
+
+        unregister = None
+        if self.cancel_token is not None:
+            unregister = self.cancel_token.register(lambda: loop.call_soon_threadsafe(cancel_running))
+
+        for step_id in plan.topological_order:
+            tasks[step_id] = asyncio.create_task(run_step(step_id))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        finally:
+            if unregister is not None:
+                unregister()
+
+        return completed_steps, step_timings
+
+    async def aexecute_step(self, step: StepConfig, variant_config: Optional[VariantConfig] = None,
+                            context: Optional[Dict[str, Any]] = None,
+                            step_plan: Optional[StepPlan] = None) -> StepResult:
+        """
+        执行单个步骤
+
+        Agent/Flow 步骤在事件循环上执行，其他步骤类型交给 execute_step 在线程中执行。
+
+        Args:
+            step: 步骤配置
+            variant_config: 变体配置（可选）
+            context: 样本执行上下文（可选，默认使用 self.context）
+            step_plan: 步骤执行计划（可选）
+
+        Returns:
+            步骤执行结果
+        """
+        if step.type != "agent_flow":
+            return await self._run_in_executor(self.execute_step, step, variant_config, context, step_plan)
+
+        step_start_time = time.time()
+
+        if self._is_cancelled():
+            return self._cancelled_step_result(step)
+
+        try:
+            # 解析输入映射
+            if step_plan is not None:
+                step_inputs = step_plan.resolve_inputs(context if context is not None else self.context)
+            else:
+                step_inputs = self._resolve_input_mapping(step.input_mapping, context)
+
+            if step.batch_mode:
+                logger.debug(f"执行批量 Agent/Flow 步骤 '{step.id}'")
+                output_content, token_usage, parser_stats, execution_time = await self._aexecute_batch_agent_flow(
+                    step=step,
+                    inputs=step_inputs,
+                    variant_config=variant_config,
+                    start_time=step_start_time,
+                    step_plan=step_plan
+                )
+            else:
+                if step_plan is not None:
+                    flow_name, model_override = step_plan.flow_name, step_plan.model_override
+                else:
+                    flow_name, model_override = self._resolve_step_config(step, variant_config)
+
+                logger.debug(f"执行步骤 '{step.id}': agent={step.agent}, flow={flow_name}")
+
+                output_content, token_usage, parser_stats = await self._aexecute_agent_flow(
+                    agent_id=step.agent,
+                    flow_name=flow_name,
+                    inputs=step_inputs,
+                    model_override=model_override
+                )
+                execution_time = time.time() - step_start_time
+
+            return StepResult(
+                step_id=step.id,
+                output_key=step.output_key,
+                output_value=output_content,
+                execution_time=execution_time,
+                token_usage=token_usage,
+                parser_stats=parser_stats,
+                success=True
+            )
+
+        except ExecutionCancelled:
+            logger.info(f"步骤 '{step.id}' 已取消")
+            return self._cancelled_step_result(step, time.time() - step_start_time, started=True)
+
+        except Exception as e:
+            return StepResult(
+                step_id=step.id,
+                output_key=step.output_key,
+                output_value="",
+                execution_time=time.time() - step_start_time,
+                error=f"步骤执行失败: {str(e)}",
+                success=False
+            )
+
+    @staticmethod
+    async def _run_in_executor(func: Callable[..., Any], *args: Any) -> Any:
+        """在事件循环的默认线程池中执行阻塞函数"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args))
+
+    async def _aexecute_agent_flow(
+        self,
+        agent_id: str,
+        flow_name: str,
+        inputs: Dict[str, Any],
+        model_override: Optional[str] = None
+    ) -> Tuple[Any, Dict[str, int], Optional[Dict[str, Any]]]:
+        """
+        执行 Agent/Flow 组合（_execute_agent_flow 的异步版本）
+
+        Returns:
+            (输出内容, token使用统计, parser统计) 元组
+        """
+        try:
+            # load_agent 可能读取配置文件
+            extra_vars = await self._run_in_executor(
+                self._prepare_flow_vars, agent_id, flow_name, inputs, model_override
+            )
+            return await arun_flow_with_tokens(
+                flow_name=flow_name,
+                extra_vars=extra_vars,
+                agent_id=agent_id
+            )
+
+        except Exception as e:
+            raise create_execution_error(
+                message=f"执行 Agent/Flow 失败: {str(e)}",
+                suggestion="请检查 Agent 配置、Flow 定义和网络连接"
+            ) from e
+
+    async def _aexecute_batch_agent_flow(
+        self,
+        step: StepConfig,
+        inputs: Dict[str, Any],
+        variant_config: Optional[VariantConfig],
+        start_time: float,
+        step_plan: Optional[StepPlan] = None
+    ) -> Tuple[List[Any], Dict[str, int], Optional[Dict[str, Any]], float]:
+        """
+        执行批量 Agent/Flow 步骤（_execute_batch_agent_flow 的异步版本）
+
+        批次依次执行；concurrent 为 True 时批次内的 items 以最多 max_workers
+        个并发的协程执行，否则逐个执行。单个 item 失败时记录错误并继续。
+
+        Returns:
+            (批量输出列表, 总token使用量, 聚合parser统计, 执行时间) 元组
+        """
+        if step_plan is not None:
+            flow_name, model_override = step_plan.flow_name, step_plan.model_override
+        else:
+            flow_name, model_override = self._resolve_step_config(step, variant_config)
+        batch_data = self._split_batch_inputs(inputs)
+        batch_size = step.batch_size or 10
+        batches = [batch_data[i:i + batch_size] for i in range(0, len(batch_data), batch_size)]
+        semaphore = asyncio.Semaphore((step.max_workers or 4) if step.concurrent else 1)
+
+        logger.info(
+            f"批量执行步骤 '{step.id}': {len(batch_data)} 个items, {len(batches)} 个批次, "
+            f"concurrent={step.concurrent}"
+        )
+
+        async def run_item(index: int, item_inputs: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    output_content, token_usage, parser_stats = await self._aexecute_agent_flow(
+                        agent_id=step.agent,
+                        flow_name=flow_name,
+                        inputs=item_inputs,
+                        model_override=model_override
+                    )
+                except Exception as e:
+                    # 批量执行中的单个item失败，记录错误但继续
+                    logger.warning(f"批量item {index} 执行失败: {str(e)}")
+                    return {
+                        "output": "",
+                        "token_usage": {},
+                        "parser_stats": None,
+                        "error": str(e)
+                    }
+            return {
+                "output": output_content,
+                "token_usage": token_usage,
+                "parser_stats": parser_stats
+            }
+
+        item_results = []
+        for batch_index, batch in enumerate(batches):
+            if self.cancel_token is not None:
+                self.cancel_token.raise_if_cancelled()
+
+            logger.debug(f"处理批次 {batch_index + 1}/{len(batches)}, 包含 {len(batch)} 个items")
+            offset = batch_index * batch_size
+            item_results.extend(await asyncio.gather(
+                *(run_item(offset + i, item_inputs) for i, item_inputs in enumerate(batch))
+            ))
+
+        all_results, total_token_usage, aggregated_parser_stats = self._merge_batch_results(item_results)
+
+        execution_time = time.time() - start_time
+        logger.info(f"批量执行步骤 '{step.id}' 完成，处理了 {len(all_results)} 个items，耗时 {execution_time:.2f}秒")
+
+        return all_results, total_token_usage, aggregated_parser_stats, execution_time
@@ -0,0 +1,165 @@
+# src/cancellation.py
+"""
+协作式取消 - 在执行链路中传递取消信号
+
+CancellationToken 由发起方（如 API 的 ExecutionManager）创建，沿着
+PipelineRunner → ConcurrentExecutor / CodeExecutor / chains 逐层传递：
+- 各层在步骤、任务、模型调用的边界检查令牌，未开始的工作直接跳过
+- 正在进行的工作通过注册回调中止（如终止代码节点的子进程树）
+- 阻塞在模型调用上的线程可以通过 run() 立即返回，不必等待响应；被放弃的调用
+  在有界的共享线程池中结束，不会为每次调用新建线程
+
+令牌是线程安全的，cancel() 可以在任意线程调用。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# run() 未指定线程池时使用的共享线程池大小
+RUN_MAX_WORKERS = 32
+
+_run_executor: Optional[ThreadPoolExecutor] = None
+_run_executor_lock = threading.Lock()
+
+
+class ExecutionCancelled(Exception):
+    """执行已被取消"""
+
+    def __init__(self, reason: Optional[str] = None):
+        self.reason = reason
+        super().__init__(f"执行已取消: {reason}" if reason else "执行已取消")
+
+
+class CancellationToken:
+    """
+    取消令牌
+
+    cancel() 只生效一次：记录取消时间和原因，并依次调用已注册的回调。
+    在取消之后注册的回调会被立即调用。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._next_id = 0
+        self.reason: Optional[str] = None
+        self.cancelled_at: Optional[float] = None  # time.monotonic()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: Optional[str] = None) -> bool:
+        """
+        请求取消
+
+        Args:
+            reason: 取消原因（可选）
+
+        Returns:
+            本次调用是否触发了取消（已取消时返回 False）
+        """
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self.cancelled_at = time.monotonic()
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+
+        for callback in callbacks:
+            _run_callback(callback)
+        return True
+
+    def raise_if_cancelled(self) -> None:
+        """已取消时抛出 ExecutionCancelled"""
+        if self._event.is_set():
+            raise ExecutionCancelled(self.reason)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待取消，返回是否已取消"""
+        return self._event.wait(timeout)
+
+    def register(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        注册取消回调（在调用 cancel() 的线程中执行，应尽快返回）
+
+        Args:
+            callback: 无参回调
+
+        Returns:
+            注销回调的函数；工作正常结束后应调用它
+        """
+        with self._lock:
+            if not self._event.is_set():
+                callback_id = self._next_id
+                self._next_id += 1
+                self._callbacks[callback_id] = callback
+                return lambda: self._unregister(callback_id)
+
+        _run_callback(callback)
+        return lambda: None
+
+    def _unregister(self, callback_id: int) -> None:
+        with self._lock:
+            self._callbacks.pop(callback_id, None)
+
+    def run(self, func: Callable[[], Any], executor: Optional[Executor] = None) -> Any:
+        """
+        在线程池中执行 func，取消时立即返回
+
+        用于无法中断的阻塞调用（如模型 HTTP 请求）：取消后调用方立即得到
+        ExecutionCancelled；尚未开始的 func 不再执行，已开始的 func 在线程池中
+        结束，其结果被丢弃。func 自身应在开始新的工作前检查令牌，避免取消后
+        继续发起请求。
+
+        Args:
+            func: 无参函数
+            executor: 执行 func 的线程池（默认使用进程内共享的有界线程池）
+
+        Returns:
+            func 的返回值
+
+        Raises:
+            ExecutionCancelled: 在 func 完成前被取消
+        """
+        self.raise_if_cancelled()
+
+        future = (executor or _get_run_executor()).submit(func)
+        finished = threading.Event()
+        future.add_done_callback(lambda _: finished.set())
+        unregister = self.register(finished.set)
+        try:
+            finished.wait()
+        finally:
+            unregister()
+
+        if future.done():
+            return future.result()
+        future.cancel()
+        raise ExecutionCancelled(self.reason)
+
+
+def _get_run_executor() -> ThreadPoolExecutor:
+    """获取 run() 共享的线程池（首次使用时创建）"""
+    global _run_executor
+    with _run_executor_lock:
+        if _run_executor is None:
+            _run_executor = ThreadPoolExecutor(
+                max_workers=RUN_MAX_WORKERS, thread_name_prefix="cancellable"
+            )
+        return _run_executor
+
+
+def _run_callback(callback: Callable[[], None]) -> None:
+    try:
+        callback()
+    except Exception:
+        # 回调失败不影响取消本身和其他回调
+        pass
@@ -1,22 +1,37 @@
 # src/chains.py
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, Mapping, Optional, Tuple, Union
+import asyncio
+import functools
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple, Union
 
 import yaml
 from langchain_core.messages import BaseMessage
+from langchain_core.output_parsers import BaseOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableSerializable
 from langchain_openai import ChatOpenAI
 
-from .config import get_openai_model_name, get_openai_temperature
+from .cancellation import CancellationToken
+from .config import get_llm_max_prompt_tokens, get_openai_model_name, get_openai_temperature
+from .llm_cache import get_llm_cache, make_cache_key
+from .llm_governor import get_llm_governor
+from .tokenizer import count_tokens
 from .paths import PROMPT_DIR
 from .models import OutputParserConfig
 from .output_parser import OutputParserFactory
 
 
-def load_flow_config(flow_name: str, agent_id: str = None) -> Dict[str, Any]:
-    """加载 YAML 配置，支持新旧结构"""
+class PromptTooLongError(ValueError):
+    """渲染后的 Prompt 超过 token 上限，在发送请求前抛出"""
+
+
+def _resolve_flow_path(flow_name: str, agent_id: str = None) -> Path:
+    """解析 flow 配置文件路径，支持新旧结构"""
     if agent_id:
         # 如果提供了agent_id，使用新的查找逻辑
         from .agent_registry import find_prompt_file
@@ -32,6 +47,13 @@ def load_flow_config(flow_name: str, agent_id: str = None) -> Dict[str, Any]:
     if not path.exists():
         raise FileNotFoundError(f"Prompt config not found: {path}")
     
+    return path
+
+
+def load_flow_config(flow_name: str, agent_id: str = None) -> Dict[str, Any]:
+    """加载 YAML 配置，支持新旧结构"""
+    path = _resolve_flow_path(flow_name, agent_id)
+    
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
@@ -50,21 +72,32 @@ def build_prompt(flow_cfg: Mapping[str, Any]) -> ChatPromptTemplate:
     )
 
 
-def build_chain(prompt: ChatPromptTemplate, flow_cfg: Mapping[str, Any], model_override: str = None) -> RunnableSerializable:
-    """根据 Prompt 构建一个 LCEL Chain，并允许配置模型参数。
+def build_llm(flow_cfg: Mapping[str, Any], model_override: str = None) -> ChatOpenAI:
+    """根据 flow 配置构建 LLM 客户端。
     
-    如果 flow_cfg 中配置了 output_parser，则构建 prompt | llm | parser chain。
-    否则保持原有行为 prompt | llm（向后兼容）。
+    模型优先级：model_override > flow_cfg.model > 全局默认
+    
+    关闭 SDK 自带的重试：限流与超时的重试和退避由 LLMGovernor 负责，
+    这样 AIMD 能在第一次 429 时就降低并发。
     """
-
-    # 支持模型覆盖，优先级：model_override > flow_cfg.model > 全局默认
     model_name = model_override or flow_cfg.get("model", get_openai_model_name())
     
-    llm = ChatOpenAI(
+    return ChatOpenAI(
         model=model_name,
         temperature=flow_cfg.get("temperature", get_openai_temperature()),
+        max_retries=0,
     )
 
+
+def build_chain(prompt: ChatPromptTemplate, flow_cfg: Mapping[str, Any], model_override: str = None) -> RunnableSerializable:
+    """根据 Prompt 构建一个 LCEL Chain，并允许配置模型参数。
+    
+    如果 flow_cfg 中配置了 output_parser，则构建 prompt | llm | parser chain。
+    否则保持原有行为 prompt | llm（向后兼容）。
+    """
+
+    llm = build_llm(flow_cfg, model_override)
+
     # 检查是否配置了 output_parser
     parser_config_dict = flow_cfg.get("output_parser")
     if parser_config_dict:
@@ -81,6 +114,231 @@ def build_chain(prompt: ChatPromptTemplate, flow_cfg: Mapping[str, Any], model_o
         return prompt | llm
 
 
+@dataclass
+class CompiledFlow:
+    """
+    编译后的 flow
+    
+    缓存一次 flow 编译的全部产物：解析后的配置、Prompt 模板及其变量列表、
+    LLM 客户端和可直接 invoke 的 chain，避免每次调用都重新读取 YAML 和构建客户端。
+    """
+    flow_name: str
+    agent_id: Optional[str]
+    path: Path
+    mtime_ns: int
+    flow_cfg: Dict[str, Any]
+    prompt: ChatPromptTemplate
+    input_variables: List[str]
+    llm: ChatOpenAI
+    llm_chain: RunnableSerializable  # prompt | llm
+    chain: RunnableSerializable  # prompt | llm [| parser]
+    parser_config: Optional[OutputParserConfig] = None
+    model_name: str = "default"  # LLM 调度器的限流键
+    
+    @property
+    def has_parser(self) -> bool:
+        """是否配置了 output_parser"""
+        return self.parser_config is not None
+    
+    def create_parser(self) -> Any:
+        """
+        为单次调用创建新的 parser 实例
+        
+        RetryOutputParser 会累计统计信息，每次调用使用独立实例
+        才能让 parser_stats 只反映本次调用。
+        """
+        if self.parser_config is None:
+            return None
+        return OutputParserFactory.create_parser_from_config(self.parser_config)
+
+
+def compile_flow(
+    flow_name: str,
+    agent_id: str = None,
+    model_override: str = None,
+    path: Optional[Path] = None,
+) -> CompiledFlow:
+    """读取 flow 配置并编译为 CompiledFlow（不经过缓存）"""
+    if path is None:
+        path = _resolve_flow_path(flow_name, agent_id)
+    mtime_ns = path.stat().st_mtime_ns
+    
+    with open(path, "r", encoding="utf-8") as f:
+        flow_cfg = yaml.safe_load(f)
+    
+    prompt = build_prompt(flow_cfg)
+    llm = build_llm(flow_cfg, model_override)
+    llm_chain = prompt | llm
+    
+    parser_config = None
+    chain = llm_chain
+    parser_config_dict = flow_cfg.get("output_parser")
+    if parser_config_dict:
+        parser_config = OutputParserConfig.from_dict(parser_config_dict)
+        chain = llm_chain | OutputParserFactory.create_parser_from_config(parser_config)
+    
+    return CompiledFlow(
+        flow_name=flow_name,
+        agent_id=agent_id,
+        path=path,
+        mtime_ns=mtime_ns,
+        flow_cfg=flow_cfg,
+        prompt=prompt,
+        input_variables=list(prompt.input_variables),
+        llm=llm,
+        llm_chain=llm_chain,
+        chain=chain,
+        parser_config=parser_config,
+        model_name=getattr(llm, "model_name", None) or "default",
+    )
+
+
+class CompiledFlowCache:
+    """
+    进程级 compiled flow 缓存
+    
+    - 键：(agent_id, flow_name, model_override, temperature)，条目记录 flow 文件的 mtime
+    - flow 文件 mtime 变化时自动重新编译
+    - 超过 max_size 时按 LRU 淘汰
+    - 线程安全，提供命中/未命中统计
+    """
+    
+    def __init__(self, max_size: int = 128):
+        """
+        初始化缓存
+        
+        Args:
+            max_size: 最多缓存的 compiled flow 数量
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[Hashable, ...], CompiledFlow]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+    
+    def get(self, flow_name: str, agent_id: str = None, model_override: str = None) -> CompiledFlow:
+        """
+        获取 compiled flow，缓存未命中或文件已修改时重新编译
+        
+        Args:
+            flow_name: Flow 名称
+            agent_id: Agent ID（可选）
+            model_override: 模型覆盖（可选）
+            
+        Returns:
+            CompiledFlow 对象
+        """
+        path = _resolve_flow_path(flow_name, agent_id)
+        mtime_ns = path.stat().st_mtime_ns
+        key = (agent_id, flow_name, model_override, get_openai_temperature())
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.path == path and entry.mtime_ns == mtime_ns:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry
+                # 文件已修改或路径变化，丢弃旧条目
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+        
+        # 在锁外编译，避免阻塞其他 flow 的读取
+        compiled = compile_flow(flow_name, agent_id, model_override, path=path)
+        
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        
+        return compiled
+    
+    def invalidate(self, agent_id: Optional[str] = None, flow_name: Optional[str] = None) -> int:
+        """
+        使缓存条目失效
+        
+        Args:
+            agent_id: 只失效该 agent 的条目（None 表示不限）
+            flow_name: 只失效该 flow 的条目（None 表示不限）
+            
+        Returns:
+            失效的条目数量
+        """
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if (agent_id is None or key[0] == agent_id)
+                and (flow_name is None or key[1] == flow_name)
+            ]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+            return len(keys)
+    
+    def clear(self) -> None:
+        """清空缓存和统计信息"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+            self.evictions = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total > 0 else 0.0,
+            }
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_compiled_flow_cache = CompiledFlowCache()
+
+
+def get_compiled_flow_cache() -> CompiledFlowCache:
+    """获取全局 compiled flow 缓存"""
+    return _compiled_flow_cache
+
+
+def _pop_model_override(extra_vars: Dict[str, Any] | None) -> Optional[str]:
+    """从变量表中取出模型覆盖（_model_override）"""
+    if extra_vars and "_model_override" in extra_vars:
+        return extra_vars.pop("_model_override")
+    return None
+
+
+def _build_provided_vars(
+    input_text: str,
+    context: str,
+    extra_vars: Dict[str, Any] | None,
+) -> Dict[str, Any]:
+    """合并 extra_vars 与兼容旧用法的 input/context"""
+    provided_vars: Dict[str, Any] = {}
+    if extra_vars:
+        provided_vars.update(extra_vars)
+    if input_text:
+        provided_vars.setdefault("input", input_text)
+    if context:
+        provided_vars.setdefault("context", context)
+    return provided_vars
+
+
 def _merge_variables(
     required_vars: Iterable[str],
     provided_vars: Mapping[str, Any],
@@ -103,18 +361,42 @@ def _merge_variables(
     return merged
 
 
+def _prepare_flow(
+    flow_name: str,
+    input_text: str,
+    context: str,
+    extra_vars: Dict[str, Any] | None,
+    agent_id: str,
+) -> Tuple[CompiledFlow, Dict[str, Any]]:
+    """获取编译后的 flow 并解析模板变量（run_flow 系列接口共用）"""
+    # 检查是否有模型覆盖
+    model_override = _pop_model_override(extra_vars)
+
+    compiled = _compiled_flow_cache.get(flow_name, agent_id, model_override)
+    provided_vars = _build_provided_vars(input_text, context, extra_vars)
+
+    resolved_vars = _merge_variables(
+        compiled.input_variables,
+        provided_vars,
+        fallback=compiled.flow_cfg.get("defaults", {}),
+    )
+    return compiled, resolved_vars
+
+
 def run_flow(
     flow_name: str,
     input_text: str = "",
     context: str = "",
     extra_vars: Dict[str, Any] | None = None,
     agent_id: str = None,
+    cancel_token: Optional[CancellationToken] = None,
 ) -> Union[str, Dict[str, Any], Any]:
     """
     对外暴露的核心接口：
     - flow_name: 对应 prompts/{flow_name}.yaml
     - input_text/context: 为了兼容旧用法，自动补充到变量表
     - extra_vars: 任意变量字典，允许多于或少于 Prompt 模板需要的变量
+    - cancel_token: 取消令牌（可选），取消后抛出 ExecutionCancelled，不再等待模型响应
 
     提示词中的占位符（无论位于 system 还是 user）都会从同一份变量表中解析，
     缺失值依次使用 defaults 或空字符串兜底。
@@ -124,38 +406,19 @@ def run_flow(
     - 如果未配置 output_parser，返回字符串（向后兼容）
     """
 
-    flow_cfg = load_flow_config(flow_name, agent_id)
-    prompt = build_prompt(flow_cfg)
-    
-    # 检查是否有模型覆盖
-    model_override = None
-    if extra_vars and "_model_override" in extra_vars:
-        model_override = extra_vars.pop("_model_override")
-    
-    chain = build_chain(prompt, flow_cfg, model_override)
-
-    provided_vars: Dict[str, Any] = {}
-    if extra_vars:
-        provided_vars.update(extra_vars)
-    if input_text:
-        provided_vars.setdefault("input", input_text)
-    if context:
-        provided_vars.setdefault("context", context)
-
-    required_vars = prompt.input_variables
-    resolved_vars = _merge_variables(
-        required_vars,
-        provided_vars,
-        fallback=flow_cfg.get("defaults", {}),
-    )
+    compiled, resolved_vars = _prepare_flow(flow_name, input_text, context, extra_vars, agent_id)
 
-    result = chain.invoke(resolved_vars)
-    
-    # 如果配置了 output_parser，result 已经是解析后的对象
+    # 如果配置了 output_parser，返回解析后的对象
     # 否则 result 是 BaseMessage，需要提取 content
-    if flow_cfg.get("output_parser"):
-        return result
+    if compiled.has_parser:
+        parser = compiled.create_parser()
+        _, parsed_result = _invoke_llm(
+            compiled, resolved_vars, parse=lambda message: _apply_parser(parser, message),
+            cancel_token=cancel_token,
+        )
+        return parsed_result
     else:
+        result, _ = _invoke_llm(compiled, resolved_vars, cancel_token=cancel_token)
         return result.content
 
 
@@ -165,11 +428,14 @@ def run_flow_with_tokens(
     context: str = "",
     extra_vars: Dict[str, Any] | None = None,
     agent_id: str = None,
+    cancel_token: Optional[CancellationToken] = None,
 ) -> Tuple[Union[str, Dict[str, Any], Any], Dict[str, int], Optional[Dict[str, Any]]]:
     """
     带token统计和parser统计的flow运行接口
     返回: (输出内容, token统计信息, parser统计信息)
     
+    cancel_token 的含义与 run_flow 相同。
+    
     输出内容：
     - 如果配置了 output_parser，返回解析后的结构化对象（dict, list 等）
     - 如果未配置 output_parser，返回字符串（向后兼容）
@@ -179,69 +445,219 @@ def run_flow_with_tokens(
     - 否则返回 None
     """
     
-    flow_cfg = load_flow_config(flow_name, agent_id)
-    prompt = build_prompt(flow_cfg)
-    
-    # 检查是否有模型覆盖
-    model_override = None
-    if extra_vars and "_model_override" in extra_vars:
-        model_override = extra_vars.pop("_model_override")
-    
-    chain = build_chain(prompt, flow_cfg, model_override)
-
-    provided_vars: Dict[str, Any] = {}
-    if extra_vars:
-        provided_vars.update(extra_vars)
-    if input_text:
-        provided_vars.setdefault("input", input_text)
-    if context:
-        provided_vars.setdefault("context", context)
-
-    required_vars = prompt.input_variables
-    resolved_vars = _merge_variables(
-        required_vars,
-        provided_vars,
-        fallback=flow_cfg.get("defaults", {}),
-    )
+    compiled, resolved_vars = _prepare_flow(flow_name, input_text, context, extra_vars, agent_id)
 
     # 使用 chain.invoke 获取结果
     # 注意：当使用 output_parser 时，我们需要从 LLM 的响应中提取 token 信息
     # 但 parser 会转换输出，所以我们需要特殊处理
     
-    has_parser = flow_cfg.get("output_parser") is not None
+    has_parser = compiled.has_parser
     
     if has_parser:
-        # 如果有 parser，我们需要先获取 LLM 的原始响应来提取 token 信息
-        # 然后再通过完整的 chain 获取解析后的结果
-        
-        # 构建不带 parser 的 chain 来获取 token 信息
-        model_name = model_override or flow_cfg.get("model", get_openai_model_name())
-        llm = ChatOpenAI(
-            model=model_name,
-            temperature=flow_cfg.get("temperature", get_openai_temperature()),
+        # 只调用一次 LLM：从原始响应中提取 token 信息，
+        # 再把同一个响应交给本次调用独立的 parser 解析
+        parser = compiled.create_parser()
+        llm_result, parsed_result = _invoke_llm(
+            compiled, resolved_vars, parse=lambda message: _apply_parser(parser, message),
+            cancel_token=cancel_token,
         )
-        llm_chain = prompt | llm
-        llm_result = llm_chain.invoke(resolved_vars)
         
         # 提取 token 信息
         token_info = _extract_token_info(llm_result)
         
-        # 使用完整的 chain（带 parser）获取解析后的结果
-        parsed_result = chain.invoke(resolved_vars)
-        
         # 提取 parser 统计信息
-        parser_stats = _extract_parser_stats(chain)
+        parser_stats = _extract_parser_stats(parser)
         
         return parsed_result, token_info, parser_stats
     else:
         # 没有 parser，使用原有逻辑
-        result = chain.invoke(resolved_vars)
+        result, _ = _invoke_llm(compiled, resolved_vars, cancel_token=cancel_token)
         token_info = _extract_token_info(result)
         return result.content, token_info, None
 
 
+async def arun_flow_with_tokens(
+    flow_name: str,
+    input_text: str = "",
+    context: str = "",
+    extra_vars: Dict[str, Any] | None = None,
+    agent_id: str = None,
+) -> Tuple[Union[str, Dict[str, Any], Any], Dict[str, int], Optional[Dict[str, Any]]]:
+    """
+    run_flow_with_tokens 的异步版本，返回值相同
+
+    模型请求通过 llm.ainvoke 在当前事件循环上发出，调度器排队也以协程方式等待，
+    不占用线程。会阻塞的本地工作（flow 编译与 Agent 查找、响应缓存读写、token 计数）
+    在默认线程池中执行，每次调用只占用线程很短的时间。取消使用 asyncio 自身的机制：
+    取消所在的 Task 即可，尚未发出的请求不再发送，已占用的调度器槽位会被归还。
+    """
+    def prepare() -> Tuple[CompiledFlow, _PreparedCall]:
+        compiled, resolved_vars = _prepare_flow(flow_name, input_text, context, extra_vars, agent_id)
+        return compiled, _prepare_llm_call(compiled, resolved_vars)
+
+    compiled, call = await _run_in_executor(prepare)
+
+    if compiled.has_parser:
+        parser = compiled.create_parser()
+        llm_result, parsed_result = await _ainvoke_llm(
+            compiled, call, parse=lambda message: _apply_parser(parser, message),
+        )
+        return parsed_result, _extract_token_info(llm_result), _extract_parser_stats(parser)
+
+    result, _ = await _ainvoke_llm(compiled, call)
+    return result.content, _extract_token_info(result), None
+
+
+async def _run_in_executor(func: Callable[..., Any], *args: Any) -> Any:
+    """在事件循环的默认线程池中执行阻塞函数"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args))
+
+
+@dataclass
+class _PreparedCall:
+    """渲染后的一次模型调用（缓存查找与 token 估算结果）"""
+    prompt_value: Any
+    cache: Any = None
+    cache_key: Optional[str] = None
+    cached: Optional[BaseMessage] = None
+    estimated_tokens: int = 0
+
+
+def _prepare_llm_call(compiled: CompiledFlow, resolved_vars: Dict[str, Any]) -> _PreparedCall:
+    """
+    渲染 Prompt，查找响应缓存，并在需要时检查 Prompt 长度、估算 token 数
+
+    Raises:
+        PromptTooLongError: Prompt 超过配置的 token 上限
+    """
+    call = _PreparedCall(prompt_value=compiled.prompt.invoke(resolved_vars))
+    
+    call.cache = get_llm_cache()
+    if call.cache is not None:
+        call.cache_key = make_cache_key(
+            call.prompt_value.to_messages(),
+            compiled.model_name,
+            getattr(compiled.llm, "temperature", None),
+            compiled.flow_cfg.get("output_parser"),
+        )
+        call.cached = call.cache.get(call.cache_key)
+        if call.cached is not None:
+            return call
+    
+    governor = get_llm_governor()
+    
+    # 发送前检查 Prompt 长度；TPM 限流需要的估算复用同一次计数
+    max_prompt_tokens = int(compiled.flow_cfg.get("max_prompt_tokens") or get_llm_max_prompt_tokens())
+    needs_estimate = governor.needs_token_estimate(compiled.model_name)
+    prompt_tokens = 0
+    if max_prompt_tokens or needs_estimate:
+        prompt_tokens = count_tokens(call.prompt_value.to_string(), compiled.model_name)
+    if max_prompt_tokens and prompt_tokens > max_prompt_tokens:
+        raise PromptTooLongError(
+            f"Prompt 长度 {prompt_tokens} tokens 超过上限 {max_prompt_tokens}"
+            f"（模型 {compiled.model_name}），请求未发送"
+        )
+    
+    if needs_estimate:
+        call.estimated_tokens = prompt_tokens + int(compiled.flow_cfg.get("max_tokens") or 0)
+    return call
+
+
+def _finish_llm_call(
+    compiled: CompiledFlow,
+    call: _PreparedCall,
+    result: BaseMessage,
+    parse: Optional[Callable[[BaseMessage], Any]],
+) -> Tuple[BaseMessage, Any]:
+    """解析响应；解析成功后写入缓存"""
+    parsed = parse(result) if parse else None
+    if call.cache_key is not None:
+        call.cache.put(call.cache_key, result, compiled.model_name)
+    return result, parsed
+
+
+def _usage_tokens(message: BaseMessage) -> Optional[int]:
+    return _extract_token_info(message).get("total_tokens")
+
+
+def _invoke_llm(
+    compiled: CompiledFlow,
+    resolved_vars: Dict[str, Any],
+    parse: Optional[Callable[[BaseMessage], Any]] = None,
+    cancel_token: Optional[CancellationToken] = None,
+) -> Tuple[BaseMessage, Any]:
+    """
+    通过响应缓存和全局 LLM 调度器调用模型
+    
+    先渲染 Prompt；启用了响应缓存时按渲染后的消息查找缓存，未命中才在
+    调度器分配的槽位内调用 LLM。配置了 Prompt token 上限（flow 的 max_prompt_tokens
+    或环境变量 LLM_MAX_PROMPT_TOKENS）时，超长的 Prompt 在发送前抛出 PromptTooLongError；
+    只有设置了上限或模型配置了 TPM 限制时才计算 token 数。
+    
+    提供取消令牌时，排队和模型请求均可被取消：取消后立即抛出 ExecutionCancelled
+    并归还调度器槽位；已发出的请求在调度器的有界线程池中结束且响应被丢弃，
+    尚未发出的请求不再发送。
+    
+    Args:
+        compiled: 编译后的 flow
+        resolved_vars: 模板变量
+        parse: 解析响应的函数（可选）；解析成功后才写入缓存
+        cancel_token: 取消令牌（可选）
+        
+    Returns:
+        (LLM 响应, 解析结果)，未提供 parse 时解析结果为 None
+        
+    Raises:
+        ExecutionCancelled: 调用完成前被取消
+    """
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    
+    call = _prepare_llm_call(compiled, resolved_vars)
+    if call.cached is not None:
+        return call.cached, parse(call.cached) if parse else None
+    
+    result = get_llm_governor().invoke(
+        compiled.model_name,
+        lambda: compiled.llm.invoke(call.prompt_value),
+        estimated_tokens=call.estimated_tokens,
+        usage=_usage_tokens,
+        cancel_token=cancel_token,
+    )
+    return _finish_llm_call(compiled, call, result, parse)
+
+
+async def _ainvoke_llm(
+    compiled: CompiledFlow,
+    call: _PreparedCall,
+    parse: Optional[Callable[[BaseMessage], Any]] = None,
+) -> Tuple[BaseMessage, Any]:
+    """
+    _invoke_llm 的异步版本：在调度器槽位内 await llm.ainvoke
+
+    call 由 _prepare_llm_call 在线程池中准备；启用响应缓存时，写入缓存同样在线程池中进行。
+    """
+    if call.cached is not None:
+        return call.cached, parse(call.cached) if parse else None
+    
+    result = await get_llm_governor().ainvoke(
+        compiled.model_name,
+        lambda: compiled.llm.ainvoke(call.prompt_value),
+        estimated_tokens=call.estimated_tokens,
+        usage=_usage_tokens,
+    )
+    if call.cache_key is not None:
+        return await _run_in_executor(_finish_llm_call, compiled, call, result, parse)
+    return _finish_llm_call(compiled, call, result, parse)
+
+
 def _extract_token_info(result: BaseMessage) -> Dict[str, int]:
-    """从 LLM 响应中提取 token 使用信息"""
+    """
+    从 LLM 响应中提取 token 使用信息
+    
+    响应来自缓存时额外包含 cache_hit=1（token 数为首次调用时的用量）。
+    """
     token_info = {}
     
     if hasattr(result, 'usage_metadata') and result.usage_metadata:
@@ -261,13 +677,32 @@ def _extract_token_info(result: BaseMessage) -> Dict[str, int]:
                 'total_tokens': usage.get('total_tokens', 0)
             }
     
+    if getattr(result, 'response_metadata', None) and result.response_metadata.get('cache_hit'):
+        token_info['cache_hit'] = 1
+    
     return token_info
 
 
-def _extract_parser_stats(chain: RunnableSerializable) -> Optional[Dict[str, Any]]:
-    """从 chain 中提取 parser 统计信息"""
+def _apply_parser(parser: Any, message: BaseMessage) -> Any:
+    """
+    用 parser 解析 LLM 响应
+    
+    LangChain parser 通过 invoke 处理 BaseMessage（与 llm | parser 行为一致）；
+    RetryOutputParser 是包装器，直接调用 parse（它会自行提取 content）。
+    """
+    if isinstance(parser, BaseOutputParser):
+        return parser.invoke(message)
+    return parser.parse(message)
+
+
+def _extract_parser_stats(chain: Any) -> Optional[Dict[str, Any]]:
+    """从 parser 或 chain 中提取 parser 统计信息"""
     from .output_parser import RetryOutputParser
     
+    # 直接传入 parser 的情况
+    if isinstance(chain, RetryOutputParser):
+        return chain.get_statistics().to_dict()
+    
     # 尝试从 chain 的最后一个步骤获取 parser
     # LCEL chain 的结构是 prompt | llm | parser
     if hasattr(chain, 'last'):
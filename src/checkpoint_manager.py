@@ -400,7 +400,8 @@ class ResumableExecutor:
                            samples: List[Dict[str, Any]], 
                            variant: str = "baseline",
                            auto_resume: bool = True,
-                           max_retries: int = 3) -> List[Any]:
+                           max_retries: int = 3,
+                           sample_concurrency: int = 1) -> List[Any]:
         """
         执行 Pipeline 并支持断点续传
         
@@ -409,6 +410,7 @@ class ResumableExecutor:
             variant: 变体名称
             auto_resume: 是否自动恢复
             max_retries: 最大重试次数
+            sample_concurrency: 同时执行的样本数（检查点始终按样本顺序更新）
             
         Returns:
             Pipeline 执行结果列表
@@ -420,69 +422,88 @@ class ResumableExecutor:
         
         if resumable_checkpoint_id:
             print(f"发现可恢复的检查点: {resumable_checkpoint_id}")
-            return self._resume_execution(samples, resumable_checkpoint_id, max_retries)
+            return self._resume_execution(samples, resumable_checkpoint_id, max_retries, sample_concurrency)
         else:
             print("开始新的执行")
-            return self._start_new_execution(samples, variant, max_retries)
+            return self._start_new_execution(samples, variant, max_retries, sample_concurrency)
+    
+    def _execute_sample_with_retry(self,
+                                   sample: Dict[str, Any],
+                                   sample_index: int,
+                                   variant: str,
+                                   max_retries: int) -> Any:
+        """执行单个样本，失败时重试，重试耗尽后返回错误结果"""
+        sample_id = sample.get("id", f"sample_{sample_index}")
+        retry_count = 0
+        
+        while True:
+            try:
+                return self.pipeline_runner.execute_sample(sample, variant)
+            
+            except Exception as e:
+                retry_count += 1
+                error_msg = f"样本 {sample_id} 执行失败 (重试 {retry_count}/{max_retries}): {str(e)}"
+                print(error_msg)
+                
+                if retry_count >= max_retries:
+                    # 创建错误结果
+                    from .pipeline_runner import PipelineResult
+                    return PipelineResult(
+                        sample_id=sample_id,
+                        variant=variant,
+                        error=error_msg
+                    )
+    
+    def _execute_samples(self,
+                         samples: List[Dict[str, Any]],
+                         indices: List[int],
+                         variant: str,
+                         max_retries: int,
+                         sample_concurrency: int,
+                         results: List[Any]):
+        """
+        执行指定索引的样本并按样本顺序更新检查点
+        
+        检查点恢复依赖"前 N 个样本已完成"的约定，因此并发执行时
+        结果也按索引顺序提交。
+        """
+        def commit(sample_index: int, result: Any):
+            # 更新检查点
+            self.checkpoint_manager.update_checkpoint(
+                completed_sample_index=sample_index,
+                result=result,
+                failed=bool(result.error),
+                error_message=result.error
+            )
+            results.append(result)
+        
+        if sample_concurrency > 1:
+            self.pipeline_runner.execute_samples_concurrently(
+                indexed_samples=[(i, samples[i]) for i in indices],
+                sample_fn=lambda i, sample: self._execute_sample_with_retry(sample, i, variant, max_retries),
+                on_result=lambda i, sample, result: commit(i, result),
+                sample_concurrency=sample_concurrency
+            )
+        else:
+            for i in indices:
+                commit(i, self._execute_sample_with_retry(samples[i], i, variant, max_retries))
     
     def _start_new_execution(self, 
                            samples: List[Dict[str, Any]], 
                            variant: str,
-                           max_retries: int) -> List[Any]:
+                           max_retries: int,
+                           sample_concurrency: int = 1) -> List[Any]:
         """开始新的执行"""
         # 创建检查点
         checkpoint_id = self.checkpoint_manager.create_checkpoint(samples)
         print(f"创建检查点: {checkpoint_id}")
         
         results = []
-        retry_count = 0
         
         try:
-            for i, sample in enumerate(samples):
-                sample_id = sample.get("id", f"sample_{i}")
-                
-                # 执行样本，支持重试
-                while retry_count < max_retries:
-                    try:
-                        result = self.pipeline_runner.execute_sample(sample, variant)
-                        
-                        # 更新检查点
-                        failed = bool(result.error)
-                        self.checkpoint_manager.update_checkpoint(
-                            completed_sample_index=i,
-                            result=result,
-                            failed=failed,
-                            error_message=result.error
-                        )
-                        
-                        results.append(result)
-                        retry_count = 0  # 重置重试计数
-                        break
-                        
-                    except Exception as e:
-                        retry_count += 1
-                        error_msg = f"样本 {sample_id} 执行失败 (重试 {retry_count}/{max_retries}): {str(e)}"
-                        print(error_msg)
-                        
-                        if retry_count >= max_retries:
-                            # 创建错误结果
-                            from .pipeline_runner import PipelineResult
-                            error_result = PipelineResult(
-                                sample_id=sample_id,
-                                variant=variant,
-                                error=error_msg
-                            )
-                            
-                            # 更新检查点
-                            self.checkpoint_manager.update_checkpoint(
-                                completed_sample_index=i,
-                                result=error_result,
-                                failed=True,
-                                error_message=error_msg
-                            )
-                            
-                            results.append(error_result)
-                            retry_count = 0  # 重置重试计数
+            self._execute_samples(
+                samples, list(range(len(samples))), variant, max_retries, sample_concurrency, results
+            )
             
             # 完成检查点
             self.checkpoint_manager.complete_checkpoint(success=True)
@@ -497,7 +518,8 @@ class ResumableExecutor:
     def _resume_execution(self, 
                          samples: List[Dict[str, Any]], 
                          checkpoint_id: str,
-                         max_retries: int) -> List[Any]:
+                         max_retries: int,
+                         sample_concurrency: int = 1) -> List[Any]:
         """恢复执行"""
         # 加载检查点
         checkpoint = self.checkpoint_manager.load_checkpoint(checkpoint_id)
@@ -507,7 +529,7 @@ class ResumableExecutor:
         # 验证样本是否匹配
         if not self.checkpoint_manager.validate_samples(samples):
             print("警告: 当前样本与检查点中的样本不匹配，将开始新的执行")
-            return self._start_new_execution(samples, checkpoint.variant, max_retries)
+            return self._start_new_execution(samples, checkpoint.variant, max_retries, sample_concurrency)
         
         # 获取恢复信息
         resume_info = self.checkpoint_manager.get_resume_info()
@@ -548,55 +570,11 @@ class ResumableExecutor:
             results.append(result)
         
         # 继续执行剩余的样本
-        retry_count = 0
-        
         try:
-            for i in resume_info["remaining_indices"]:
-                sample = samples[i]
-                sample_id = sample.get("id", f"sample_{i}")
-                
-                # 执行样本，支持重试
-                while retry_count < max_retries:
-                    try:
-                        result = self.pipeline_runner.execute_sample(sample, checkpoint.variant)
-                        
-                        # 更新检查点
-                        failed = bool(result.error)
-                        self.checkpoint_manager.update_checkpoint(
-                            completed_sample_index=i,
-                            result=result,
-                            failed=failed,
-                            error_message=result.error
-                        )
-                        
-                        results.append(result)
-                        retry_count = 0  # 重置重试计数
-                        break
-                        
-                    except Exception as e:
-                        retry_count += 1
-                        error_msg = f"样本 {sample_id} 执行失败 (重试 {retry_count}/{max_retries}): {str(e)}"
-                        print(error_msg)
-                        
-                        if retry_count >= max_retries:
-                            # 创建错误结果
-                            from .pipeline_runner import PipelineResult
-                            error_result = PipelineResult(
-                                sample_id=sample_id,
-                                variant=checkpoint.variant,
-                                error=error_msg
-                            )
-                            
-                            # 更新检查点
-                            self.checkpoint_manager.update_checkpoint(
-                                completed_sample_index=i,
-                                result=error_result,
-                                failed=True,
-                                error_message=error_msg
-                            )
-                            
-                            results.append(error_result)
-                            retry_count = 0  # 重置重试计数
+            self._execute_samples(
+                samples, resume_info["remaining_indices"], checkpoint.variant,
+                max_retries, sample_concurrency, results
+            )
             
             # 完成检查点
             self.checkpoint_manager.complete_checkpoint(success=True)
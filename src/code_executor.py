@@ -4,7 +4,11 @@ Code Node Executor
 Provides execution capabilities for code nodes in pipelines.
 Supports JavaScript (Node.js) and Python code execution with:
 - Input/output handling
+- A pool of warm interpreter workers (with a one-process-per-call fallback)
+- Inputs and outputs passed as length-prefixed JSON frames, never spliced
+  into the generated program
 - Timeout control with process tree termination
+- Cooperative cancellation (a cancelled call kills its process tree)
 - Detailed error capture and stack trace reporting
 - Comprehensive resource cleanup
 - Detailed logging
@@ -12,13 +16,20 @@ Supports JavaScript (Node.js) and Python code execution with:
 
 from __future__ import annotations
 
+import atexit
+import hashlib
+import shutil
 import json
+import queue
+import struct
 import subprocess
 import tempfile
+import threading
 import time
 import logging
 import traceback
 import sys
+from collections import deque
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, Optional, List
@@ -31,6 +42,9 @@ try:
 except ImportError:
     PSUTIL_AVAILABLE = False
 
+from .cancellation import CancellationToken
+from .config import get_code_worker_pool_size
+
 # Configure logging
 logger = logging.getLogger(__name__)
 if not logger.handlers:
@@ -57,6 +71,7 @@ class ExecutionResult:
         timeout: Whether execution was terminated due to timeout
         stack_trace: Detailed stack trace for errors (if available)
         exit_code: Process exit code (if available)
+        cancelled: Whether execution was stopped by a cancellation token
     """
     success: bool
     output: Any
@@ -66,6 +81,7 @@ class ExecutionResult:
     timeout: bool = False
     stack_trace: Optional[str] = None
     exit_code: Optional[int] = None
+    cancelled: bool = False
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary format"""
@@ -77,7 +93,8 @@ class ExecutionResult:
             "execution_time": self.execution_time,
             "timeout": self.timeout,
             "stack_trace": self.stack_trace,
-            "exit_code": self.exit_code
+            "exit_code": self.exit_code,
+            "cancelled": self.cancelled
         }
     
     @classmethod
@@ -91,8 +108,723 @@ class ExecutionResult:
             execution_time=data.get("execution_time", 0.0),
             timeout=data.get("timeout", False),
             stack_trace=data.get("stack_trace"),
-            exit_code=data.get("exit_code")
+            exit_code=data.get("exit_code"),
+            cancelled=data.get("cancelled", False)
+        )
+
+
+# ---------------------------------------------------------------------------
+# Warm worker pool
+#
+# Spawning a fresh interpreter for every code node costs tens of milliseconds of
+# startup plus a temp-file write. Workers are long-lived interpreter processes
+# that receive requests as length-prefixed (4-byte big-endian) UTF-8 JSON frames
+# on stdin and answer the same way on a private copy of stdout. Each worker keeps
+# the compiled user code keyed by its SHA-256 hash, so the code text is only sent
+# the first time a worker sees it.
+#
+# Isolation between requests served by the same worker:
+# - Python code runs in a fresh namespace with a private copy of the builtins
+#   dict; the working directory, os.environ and sys.path are restored after
+#   every request.
+# - Node.js code runs in a fresh function scope; the working directory and
+#   process.env are restored after every request.
+# - A worker is recycled after a request that leaves threads running (Python),
+#   rebinds attributes of builtins or of the modules the worker itself uses
+#   (Python), or adds globals (Node.js), so such changes never reach later
+#   requests.
+# Other process state is shared: changes inside third-party modules, open file
+# descriptors, signal handlers and the like persist until the worker is
+# recycled. Code that needs a pristine interpreter should run with
+# use_worker_pool=False.
+# ---------------------------------------------------------------------------
+
+_PYTHON_WORKER_SOURCE = r'''
+import ast, builtins, collections, contextlib, io, json, linecache, os, struct, sys, threading, traceback
+
+# Keep private handles for the protocol; stray writes to fd 1 go to stderr and
+# user code reading stdin sees EOF instead of protocol frames.
+_proto_in = os.fdopen(os.dup(0), "rb")
+_proto_out = os.fdopen(os.dup(1), "wb")
+_devnull = os.open(os.devnull, os.O_RDONLY)
+os.dup2(_devnull, 0)
+os.dup2(2, 1)
+sys.stdin = open(os.devnull, "r")
+
+_MAX_COMPILED = 256
+_compiled = collections.OrderedDict()
+
+# Attributes of the modules the worker relies on, as they were at startup
+_WATCHED_MODULES = (builtins, os, sys, json, struct, io, traceback, contextlib)
+_module_baseline = [(m, dict(vars(m))) for m in _WATCHED_MODULES]
+_builtins_names = set(vars(builtins))
+_sys_path = sys.path
+_MISSING = object()
+
+
+def _snapshot():
+    return os.getcwd(), dict(os.environ), list(sys.path), set(threading.enumerate())
+
+
+def _restore(snapshot):
+    """Undo per-request process changes; return True if the worker must be recycled."""
+    cwd, environ, path, threads = snapshot
+    if os.getcwd() != cwd:
+        os.chdir(cwd)
+    if os.environ != environ:
+        os.environ.clear()
+        os.environ.update(environ)
+    _sys_path[:] = path
+
+    # Put back rebound attributes so the worker can still answer this request
+    dirty = False
+    for name in set(vars(builtins)) - _builtins_names:
+        delattr(builtins, name)
+        dirty = True
+    for module, baseline in _module_baseline:
+        current = vars(module)
+        for name, value in baseline.items():
+            if current.get(name, _MISSING) is not value:
+                setattr(module, name, value)
+                dirty = True
+    return dirty or any(t.is_alive() for t in set(threading.enumerate()) - threads)
+
+
+def _read_exact(size):
+    data = _proto_in.read(size)
+    if data is None or len(data) < size:
+        return None
+    return data
+
+
+def _send(message):
+    data = message.encode("utf-8")
+    _proto_out.write(struct.pack(">I", len(data)) + data)
+    _proto_out.flush()
+
+
+def _filename(key):
+    return "<code_node:%s>" % key[:12]
+
+
+def _load_inputs(request):
+    if "inputs_file" in request:
+        with open(request["inputs_file"], "r", encoding="utf-8") as f:
+            return json.load(f)
+    if "inputs_repr" in request:
+        return ast.literal_eval(request["inputs_repr"])
+    return request["inputs"]
+
+
+def _compile(key, source):
+    filename = _filename(key)
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    code_obj = compile(source, filename, "exec")
+    _compiled[key] = code_obj
+    if len(_compiled) > _MAX_COMPILED:
+        old_key, _ = _compiled.popitem(last=False)
+        linecache.cache.pop(_filename(old_key), None)
+    return code_obj
+
+
+def _print_user_traceback(exc_type, exc, tb):
+    if isinstance(exc, SyntaxError):
+        tb = None
+    while tb is not None and tb.tb_frame.f_code.co_filename == _WORKER_FILENAME:
+        tb = tb.tb_next
+    traceback.print_exception(exc_type, exc, tb)
+
+
+def _handle(request):
+    key = request["key"]
+    buffer = io.StringIO()
+    status, exit_code, output_json = "error", 1, "null"
+    snapshot = _snapshot()
+
+    with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+        try:
+            code_obj = _compiled.get(key)
+            if code_obj is None:
+                if "code" not in request:
+                    return '{"status": "missing_code"}'
+                code_obj = _compile(key, request["code"])
+            else:
+                _compiled.move_to_end(key)
+
+            namespace = {
+                "__name__": "__main__",
+                "__builtins__": dict(vars(builtins)),
+                "json": json,
+                "sys": sys,
+                "traceback": traceback,
+                "inputs": _load_inputs(request),
+            }
+            exec(code_obj, namespace)
+
+            inputs = namespace["inputs"]
+            if "aggregate" in namespace:
+                result = namespace["aggregate"](inputs.get("items", inputs))
+            elif "transform" in namespace:
+                result = namespace["transform"](inputs)
+            elif "process_data" in namespace:
+                result = namespace["process_data"](inputs)
+            elif "main" in namespace:
+                result = namespace["main"](inputs)
+            else:
+                result = inputs
+
+            output_json = json.dumps(result)
+            status, exit_code = "ok", 0
+        except SystemExit as e:
+            if e.code is None or e.code == 0:
+                status, exit_code = "no_output", 0
+            elif isinstance(e.code, int):
+                exit_code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+        except Exception:
+            _print_user_traceback(*sys.exc_info())
+
+    recycle = "true" if _restore(snapshot) else "false"
+    return '{"status": %s, "exit_code": %d, "stderr": %s, "output": %s, "recycle": %s}' % (
+        json.dumps(status), exit_code, json.dumps(buffer.getvalue()), output_json, recycle
+    )
+
+
+_WORKER_FILENAME = _handle.__code__.co_filename
+
+
+def _main():
+    while True:
+        header = _read_exact(4)
+        if header is None:
+            return
+        body = _read_exact(struct.unpack(">I", header)[0])
+        if body is None:
+            return
+        _send(_handle(json.loads(body.decode("utf-8"))))
+
+
+_main()
+'''
+
+_NODE_WORKER_SOURCE = r'''
+const path = require('path');
+const { createRequire } = require('module');
+
+const MAX_COMPILED = 256;
+const compiled = new Map();
+// Directory the one-process-per-call path runs programs from, so __dirname,
+// __filename and relative require() resolve the same way in both modes
+const programDir = process.argv[1];
+const baselineGlobals = new Set(Object.getOwnPropertyNames(globalThis));
+
+function snapshot() {
+    return { cwd: process.cwd(), env: Object.assign({}, process.env) };
+}
+
+// Undo per-request process changes; returns true if the worker must be recycled.
+function restore(saved) {
+    if (process.cwd() !== saved.cwd) {
+        process.chdir(saved.cwd);
+    }
+    for (const name of Object.keys(process.env)) {
+        if (!(name in saved.env)) {
+            delete process.env[name];
+        }
+    }
+    for (const [name, value] of Object.entries(saved.env)) {
+        if (process.env[name] !== value) {
+            process.env[name] = value;
+        }
+    }
+    return Object.getOwnPropertyNames(globalThis).some((name) => !baselineGlobals.has(name));
+}
+
+// The protocol uses the real stdout; everything user code writes is captured
+// for the current request (or forwarded to stderr between requests).
+const rawStdoutWrite = process.stdout.write.bind(process.stdout);
+const rawStderrWrite = process.stderr.write.bind(process.stderr);
+let capture = null;
+
+function capturingWrite(chunk, encoding, callback) {
+    if (capture === null) {
+        return rawStderrWrite(chunk, encoding, callback);
+    }
+    capture.push(typeof chunk === 'string' ? chunk : Buffer.from(chunk).toString('utf8'));
+    const done = typeof encoding === 'function' ? encoding : callback;
+    if (typeof done === 'function') {
+        done();
+    }
+    return true;
+}
+process.stdout.write = capturingWrite;
+process.stderr.write = capturingWrite;
+
+function send(message) {
+    const body = Buffer.from(message, 'utf8');
+    const header = Buffer.alloc(4);
+    header.writeUInt32BE(body.length, 0);
+    rawStdoutWrite(Buffer.concat([header, body]));
+}
+
+async function handle(request) {
+    const captured = [];
+    let status = 'error';
+    let exitCode = 1;
+    let outputJson = 'null';
+    const saved = snapshot();
+    capture = captured;
+
+    try {
+        let fn = compiled.get(request.key);
+        if (fn === undefined) {
+            if (request.code === undefined) {
+                return '{"status": "missing_code"}';
+            }
+            fn = new Function('module', 'exports', 'require', '__filename', '__dirname', 'inputs', request.code);
+            compiled.set(request.key, fn);
+            if (compiled.size > MAX_COMPILED) {
+                compiled.delete(compiled.keys().next().value);
+            }
+        } else {
+            compiled.delete(request.key);
+            compiled.set(request.key, fn);
+        }
+
+        const inputs = request.inputs_file !== undefined
+            ? JSON.parse(require('fs').readFileSync(request.inputs_file, 'utf8'))
+            : request.inputs;
+        const filename = path.join(programDir, request.key + '.js');
+        const module = { exports: {} };
+        const exports = module.exports;
+        fn(module, exports, createRequire(filename), filename, programDir, inputs);
+
+        let result;
+        if (module.exports) {
+            result = typeof module.exports === 'function' ? await module.exports(inputs) : module.exports;
+        } else {
+            result = typeof exports === 'function' ? await exports(inputs) : exports;
+        }
+
+        const serialized = JSON.stringify(result);
+        if (serialized === undefined) {
+            status = 'no_output';
+            exitCode = 0;
+        } else {
+            outputJson = serialized;
+            status = 'ok';
+            exitCode = 0;
+        }
+    } catch (error) {
+        captured.push((error && error.stack) ? error.stack + '\n' : String(error) + '\n');
+    } finally {
+        capture = null;
+    }
+
+    const recycle = restore(saved);
+    return '{"status": ' + JSON.stringify(status) + ', "exit_code": ' + exitCode +
+        ', "stderr": ' + JSON.stringify(captured.join('')) + ', "output": ' + outputJson +
+        ', "recycle": ' + recycle + '}';
+}
+
+let pending = Buffer.alloc(0);
+let queue = Promise.resolve();
+
+process.stdin.on('data', (chunk) => {
+    pending = Buffer.concat([pending, chunk]);
+    while (pending.length >= 4) {
+        const length = pending.readUInt32BE(0);
+        if (pending.length < 4 + length) {
+            break;
+        }
+        const request = JSON.parse(pending.subarray(4, 4 + length).toString('utf8'));
+        pending = pending.subarray(4 + length);
+        queue = queue.then(() => handle(request)).then(send);
+    }
+});
+process.stdin.on('end', () => process.exit(0));
+'''
+
+_WORKER_COMMANDS = {
+    "python": ["python", "-u", "-c", _PYTHON_WORKER_SOURCE],
+    "javascript": ["node", "-e", _NODE_WORKER_SOURCE],
+}
+
+
+# Serialized inputs at least this large are handed to the child through a
+# temp file instead of being written into the request frame.
+LARGE_INPUT_BYTES = 4 * 1024 * 1024
+
+_scratch_dir: Optional[Path] = None
+_scratch_dir_lock = threading.Lock()
+
+
+def _encode_frame(payload: str) -> bytes:
+    """Encode a JSON payload as a length-prefixed frame."""
+    data = payload.encode("utf-8")
+    return struct.pack(">I", len(data)) + data
+
+
+def _decode_frame(data: bytes) -> Optional[str]:
+    """Decode a length-prefixed frame, or None if the data holds no complete frame."""
+    if len(data) < 4:
+        return None
+    size = struct.unpack(">I", data[:4])[0]
+    if len(data) < 4 + size:
+        return None
+    return data[4:4 + size].decode("utf-8")
+
+
+def _worker_command(language: str) -> List[str]:
+    """Command line that starts a worker (Node.js workers get the program directory)."""
+    command = list(_WORKER_COMMANDS[language])
+    if language == "javascript":
+        command.append(str(_get_scratch_dir()))
+    return command
+
+
+def _get_scratch_dir() -> Path:
+    """Get the private directory for cached programs and large input files."""
+    global _scratch_dir
+    with _scratch_dir_lock:
+        if _scratch_dir is None or not _scratch_dir.exists():
+            _scratch_dir = Path(tempfile.mkdtemp(prefix="prompt_lab_code_"))
+        return _scratch_dir
+
+
+def _cleanup_scratch_dir() -> None:
+    """Remove the scratch directory at interpreter exit."""
+    if _scratch_dir is not None:
+        shutil.rmtree(_scratch_dir, ignore_errors=True)
+
+
+def _is_json_native(value: Any) -> bool:
+    """Whether a value survives a JSON round trip unchanged (no tuples, sets or non-str keys)."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return True
+    if isinstance(value, list):
+        return all(_is_json_native(item) for item in value)
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and _is_json_native(v) for k, v in value.items())
+    return False
+
+
+def _inputs_field(inputs: Dict[str, Any], language: str) -> tuple:
+    """
+    Build the inputs member of a request frame.
+    
+    Python inputs that JSON would change (tuples, sets, non-str keys) are sent
+    as a Python literal that the child reads with ast.literal_eval.
+    
+    Args:
+        inputs: Input data
+        language: "python" or "javascript"
+        
+    Returns:
+        Tuple of (JSON member text, temp file to delete afterwards or None)
+    
+    Raises:
+        TypeError, ValueError: If the inputs cannot be encoded
+    """
+    if language == "python" and not _is_json_native(inputs):
+        return '"inputs_repr": %s' % json.dumps(repr(inputs)), None
+    
+    inputs_json = json.dumps(inputs)
+    if len(inputs_json) < LARGE_INPUT_BYTES:
+        return '"inputs": %s' % inputs_json, None
+    
+    with tempfile.NamedTemporaryFile(
+        mode='w',
+        suffix='.json',
+        dir=_get_scratch_dir(),
+        delete=False,
+        encoding='utf-8'
+    ) as f:
+        f.write(inputs_json)
+    logger.debug(f"Handing {len(inputs_json)} bytes of inputs over via {f.name}")
+    return '"inputs_file": %s' % json.dumps(f.name), Path(f.name)
+
+
+class WorkerCrashedError(Exception):
+    """Raised when a worker process exits while handling a request."""
+
+
+class CodeWorker:
+    """
+    A long-lived interpreter process that executes code node requests.
+    
+    Requests are handled one at a time. Responses are read by a background
+    thread so callers can wait with a timeout; worker stderr is drained in the
+    background and kept for crash reports.
+    """
+    
+    def __init__(self, language: str, command: List[str]):
+        self.language = language
+        self.process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
         )
+        self.compiled_keys: set = set()
+        self.tasks_completed = 0
+        # Set when a request changed process state that cannot be restored
+        self.needs_recycle = False
+        self._responses: queue.Queue = queue.Queue()
+        self._stderr_tail: deque = deque(maxlen=200)
+        
+        threading.Thread(target=self._read_responses, daemon=True).start()
+        threading.Thread(target=self._drain_stderr, daemon=True).start()
+        logger.debug(f"Started {language} worker (PID: {self.process.pid})")
+    
+    def _read_responses(self) -> None:
+        stdout = self.process.stdout
+        try:
+            while True:
+                header = stdout.read(4)
+                if len(header) < 4:
+                    break
+                body = stdout.read(struct.unpack(">I", header)[0])
+                self._responses.put(json.loads(body.decode("utf-8")))
+        except Exception as e:
+            logger.debug(f"Worker {self.process.pid} response reader stopped: {e}")
+        self._responses.put(None)
+    
+    def _drain_stderr(self) -> None:
+        try:
+            for line in self.process.stderr:
+                self._stderr_tail.append(line.decode("utf-8", errors="replace"))
+        except Exception:
+            pass
+    
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+    
+    def request(self, key: str, code: str, inputs_field: str, timeout: float) -> Dict[str, Any]:
+        """
+        Execute code in the worker.
+        
+        Args:
+            key: Hash of the code, used as the worker's compile cache key
+            code: Code to execute (only sent if the worker has not seen it)
+            inputs_field: Inputs member of the request frame (see _inputs_field)
+            timeout: Timeout in seconds
+        
+        Raises:
+            queue.Empty: If no response arrives within the timeout
+            WorkerCrashedError: If the worker exits before responding
+        """
+        deadline = time.time() + timeout
+        send_code = key not in self.compiled_keys
+        
+        while True:
+            payload = '{"key": %s, %s%s}' % (
+                json.dumps(key),
+                inputs_field,
+                ', "code": %s' % json.dumps(code) if send_code else ""
+            )
+            try:
+                self.process.stdin.write(_encode_frame(payload))
+                self.process.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                raise WorkerCrashedError(str(e))
+            
+            response = self._responses.get(timeout=max(deadline - time.time(), 0))
+            if response is None:
+                raise WorkerCrashedError("worker exited")
+            
+            if response.get("status") == "missing_code":
+                # The worker evicted this code from its cache; send it again
+                self.compiled_keys.discard(key)
+                send_code = True
+                continue
+            
+            self.compiled_keys.add(key)
+            self.tasks_completed += 1
+            if response.get("recycle"):
+                self.needs_recycle = True
+            return response
+    
+    def stderr_tail(self) -> str:
+        return "".join(self._stderr_tail)
+    
+    def close(self) -> None:
+        """Ask the worker to exit by closing its stdin, killing it if needed."""
+        try:
+            self.process.stdin.close()
+        except Exception:
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class CodeWorkerPool:
+    """
+    Bounded pool of warm workers for one language.
+    
+    Workers are started on demand up to max_workers and recycled after
+    max_tasks_per_worker requests, or immediately after a timeout, a crash or
+    a request that left process state behind. max_workers only grows (see
+    ensure_capacity), so callers sharing the pool never shrink it for others.
+    """
+    
+    def __init__(self, language: str, max_workers: int = 4, max_tasks_per_worker: int = 500):
+        self.language = language
+        self.max_workers = max_workers
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._idle: List[CodeWorker] = []
+        self._size = 0
+        self._spawned = 0
+        self._recycled = 0
+        self._closed = False
+        self._cond = threading.Condition()
+    
+    def ensure_capacity(self, max_workers: int) -> None:
+        """Raise max_workers to at least the given number."""
+        with self._cond:
+            if max_workers > self.max_workers:
+                self.max_workers = max_workers
+                self._cond.notify_all()
+    
+    def acquire(self, timeout: Optional[float] = None) -> Optional[CodeWorker]:
+        """
+        Get an idle worker, starting a new one if the pool has room.
+        
+        Args:
+            timeout: Seconds to wait for a busy worker to be released (None
+                waits indefinitely, 0 returns immediately)
+        
+        Returns:
+            A worker, or None if none became available within the timeout
+        
+        Raises:
+            FileNotFoundError: If the interpreter is not installed
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        stale: List[CodeWorker] = []
+        reserved = False
+        with self._cond:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.is_alive():
+                        break
+                    self._size -= 1
+                    stale.append(worker)
+                else:
+                    worker = None
+                
+                if worker is not None:
+                    break
+                if self._size < self.max_workers:
+                    self._size += 1
+                    reserved = True
+                    break
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        
+        for dead in stale:
+            dead.close()
+        if worker is not None or not reserved:
+            return worker
+        
+        try:
+            worker = CodeWorker(self.language, _worker_command(self.language))
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        
+        with self._cond:
+            self._spawned += 1
+        return worker
+    
+    def release(self, worker: CodeWorker) -> None:
+        """Return a worker after a completed request."""
+        with self._cond:
+            recycle = (
+                self._closed
+                or not worker.is_alive()
+                or worker.needs_recycle
+                or worker.tasks_completed >= self.max_tasks_per_worker
+            )
+            if recycle:
+                self._size -= 1
+                self._recycled += 1
+            else:
+                self._idle.append(worker)
+            self._cond.notify()
+        
+        if recycle:
+            worker.close()
+    
+    def discard(self, worker: CodeWorker) -> None:
+        """Drop a worker that timed out or crashed (the caller has already killed it)."""
+        with self._cond:
+            self._size -= 1
+            self._recycled += 1
+            self._cond.notify()
+        worker.close()
+    
+    def shutdown(self) -> None:
+        """Stop all idle workers; busy workers are stopped when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for worker in idle:
+            worker.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "language": self.language,
+                "workers": self._size,
+                "idle": len(self._idle),
+                "max_workers": self.max_workers,
+                "spawned": self._spawned,
+                "recycled": self._recycled
+            }
+
+
+_worker_pools: Dict[str, CodeWorkerPool] = {}
+_worker_pools_lock = threading.Lock()
+
+
+def get_worker_pool(language: str, min_workers: int = 0) -> CodeWorkerPool:
+    """
+    Get the shared worker pool for a language ("python" or "javascript").
+    
+    The pool holds up to CODE_WORKER_POOL_SIZE workers (default 4), raised to
+    min_workers when a caller needs more concurrency than that.
+    """
+    with _worker_pools_lock:
+        pool = _worker_pools.get(language)
+        if pool is None or pool._closed:
+            pool = CodeWorkerPool(language, max_workers=max(get_code_worker_pool_size(), min_workers))
+            _worker_pools[language] = pool
+    pool.ensure_capacity(min_workers)
+    return pool
+
+
+def shutdown_worker_pools() -> None:
+    """Stop all shared worker pools."""
+    with _worker_pools_lock:
+        pools = list(_worker_pools.values())
+        _worker_pools.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+atexit.register(shutdown_worker_pools)
+atexit.register(_cleanup_scratch_dir)
 
 
 class CodeExecutor:
@@ -107,16 +839,158 @@ class CodeExecutor:
     - Comprehensive resource cleanup
     """
     
-    def __init__(self, default_timeout: int = 30):
+    def __init__(self, default_timeout: int = 30, use_worker_pool: bool = True,
+                 max_workers: int = 0):
         """
         Initialize CodeExecutor.
         
         Args:
             default_timeout: Default timeout in seconds for code execution
+            use_worker_pool: Run code in shared warm workers instead of
+                spawning one interpreter per call
+            max_workers: Concurrent calls this executor expects; the shared
+                pool is grown to at least this many workers
         """
         self.default_timeout = default_timeout
+        self.use_worker_pool = use_worker_pool
+        self.max_workers = max_workers
         logger.info(f"CodeExecutor initialized with default timeout: {default_timeout}s")
     
+    def _execute_in_worker(
+        self,
+        language: str,
+        code: str,
+        inputs: Dict[str, Any],
+        timeout: int,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Optional[ExecutionResult]:
+        """
+        Execute code in a warm worker from the shared pool.
+        
+        Args:
+            language: "python" or "javascript"
+            code: Code to execute
+            inputs: Input data to pass to the code
+            timeout: Timeout in seconds
+            cancel_token: Cancelling kills the worker and discards it
+            
+        Returns:
+            ExecutionResult, or None if the call should use a fresh process
+            instead (inputs not JSON-serializable, every worker busy or the
+            worker failed to start)
+        """
+        try:
+            inputs_field, inputs_file = _inputs_field(inputs, language)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Inputs not serializable, using a fresh process: {e}")
+            return None
+        
+        # Never queue behind busy workers: a fresh process starts right away,
+        # so concurrent calls are not serialized and the timeout (which
+        # starts here) is not spent waiting for a worker
+        start_time = time.time()
+        pool = get_worker_pool(language, self.max_workers)
+        try:
+            worker = pool.acquire(timeout=0)
+        except Exception as e:
+            logger.debug(f"Could not start {language} worker, using a fresh process: {e}")
+            worker = None
+        else:
+            if worker is None:
+                logger.debug(f"All {language} workers busy, using a fresh process")
+        if worker is None:
+            if inputs_file is not None:
+                self._cleanup_temp_file(inputs_file)
+            return None
+        
+        key = hashlib.sha256(code.encode("utf-8")).hexdigest()
+        unregister = (
+            cancel_token.register(lambda: self._kill_process_tree(worker.process))
+            if cancel_token is not None else None
+        )
+        try:
+            response = worker.request(key, code, inputs_field, max(timeout - (time.time() - start_time), 0))
+        except queue.Empty:
+            execution_time = time.time() - start_time
+            logger.warning(f"{language} execution timed out after {timeout}s, recycling worker {worker.process.pid}")
+            self._terminate_process_tree(worker.process)
+            pool.discard(worker)
+            return ExecutionResult(
+                success=False,
+                output=None,
+                error=f"Execution timed out after {timeout} seconds",
+                timeout=True,
+                execution_time=execution_time,
+                exit_code=worker.process.returncode if worker.process.returncode is not None else -1
+            )
+        except WorkerCrashedError as e:
+            execution_time = time.time() - start_time
+            if cancel_token is not None and cancel_token.is_cancelled:
+                logger.info(f"{language} execution cancelled, killed worker {worker.process.pid}")
+                self._terminate_process_tree(worker.process)
+                pool.discard(worker)
+                return self._cancelled_result(worker.process, execution_time)
+            logger.error(f"{language} worker {worker.process.pid} exited during execution: {e}")
+            self._terminate_process_tree(worker.process)
+            pool.discard(worker)
+            stderr = worker.stderr_tail()
+            exit_code = worker.process.returncode if worker.process.returncode is not None else -1
+            return ExecutionResult(
+                success=False,
+                output=None,
+                error=f"Code execution failed with exit code {exit_code}",
+                stderr=stderr or None,
+                execution_time=execution_time,
+                stack_trace=self._extract_stack_trace(stderr, language),
+                exit_code=exit_code
+            )
+        except Exception:
+            pool.discard(worker)
+            raise
+        finally:
+            if unregister is not None:
+                unregister()
+            if inputs_file is not None:
+                self._cleanup_temp_file(inputs_file)
+        
+        pool.release(worker)
+        execution_time = time.time() - start_time
+        stderr = response.get("stderr") or ""
+        exit_code = response.get("exit_code", 1)
+        status = response.get("status")
+        
+        logger.info(f"{language} execution completed in {execution_time:.2f}s (exit code: {exit_code})")
+        
+        if status == "ok":
+            return ExecutionResult(
+                success=True,
+                output=response.get("output"),
+                stderr=stderr if stderr else None,
+                execution_time=execution_time,
+                exit_code=exit_code
+            )
+        if status == "no_output":
+            return ExecutionResult(
+                success=False,
+                output=None,
+                error="Failed to parse output as JSON: code exited without producing a result",
+                stderr=stderr,
+                execution_time=execution_time,
+                stack_trace=self._extract_stack_trace(stderr, language),
+                exit_code=exit_code
+            )
+        
+        logger.error(f"{language} execution failed with exit code {exit_code}")
+        return ExecutionResult(
+            success=False,
+            output=None,
+            error=f"Code execution failed with exit code {exit_code}",
+            stderr=stderr,
+            execution_time=execution_time,
+            stack_trace=self._extract_stack_trace(stderr, language),
+            exit_code=exit_code
+        )
+    
     def _terminate_process_tree(self, process: subprocess.Popen) -> None:
         """
         Terminate a process and all its child processes.
@@ -182,6 +1056,41 @@ class CodeExecutor:
             except Exception:
                 pass
     
+    def _kill_process_tree(self, process: subprocess.Popen) -> None:
+        """
+        Kill a process and its children without waiting for them to exit.
+        
+        Used as a cancellation callback, which runs on the cancelling thread;
+        the thread waiting on the process reaps it.
+        
+        Args:
+            process: The subprocess.Popen object to kill
+        """
+        try:
+            if PSUTIL_AVAILABLE:
+                try:
+                    for child in psutil.Process(process.pid).children(recursive=True):
+                        try:
+                            child.kill()
+                        except psutil.NoSuchProcess:
+                            pass
+                except psutil.NoSuchProcess:
+                    pass
+            process.kill()
+        except Exception as e:
+            logger.debug(f"Error killing process {process.pid}: {e}")
+    
+    def _cancelled_result(self, process: subprocess.Popen, execution_time: float) -> ExecutionResult:
+        """Result for a call stopped by its cancellation token."""
+        return ExecutionResult(
+            success=False,
+            output=None,
+            error="Execution cancelled",
+            execution_time=execution_time,
+            exit_code=process.returncode if process.returncode is not None else -1,
+            cancelled=True
+        )
+    
     def _cleanup_temp_file(self, temp_file: Path) -> None:
         """
         Safely clean up a temporary file.
@@ -235,7 +1144,8 @@ class CodeExecutor:
         code: str,
         language: str,
         inputs: Dict[str, Any],
-        timeout: Optional[int] = None
+        timeout: Optional[int] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> ExecutionResult:
         """
         Execute code in the specified language.
@@ -245,6 +1155,8 @@ class CodeExecutor:
             language: Programming language ("javascript" or "python")
             inputs: Input data to pass to the code
             timeout: Timeout in seconds (uses default if not specified)
+            cancel_token: Optional token; cancelling kills the running process
+                tree and returns a result with cancelled=True
             
         Returns:
             ExecutionResult with output or error information
@@ -253,9 +1165,9 @@ class CodeExecutor:
             timeout = self.default_timeout
         
         if language.lower() in ("javascript", "js", "node"):
-            return self.execute_javascript(code, inputs, timeout)
+            return self.execute_javascript(code, inputs, timeout, cancel_token)
         elif language.lower() in ("python", "py"):
-            return self.execute_python(code, inputs, timeout)
+            return self.execute_python(code, inputs, timeout, cancel_token)
         else:
             return ExecutionResult(
                 success=False,
@@ -267,7 +1179,8 @@ class CodeExecutor:
         self,
         code: str,
         inputs: Dict[str, Any],
-        timeout: int = 30
+        timeout: int = 30,
+        cancel_token: Optional[CancellationToken] = None
     ) -> ExecutionResult:
         """
         Execute JavaScript code using Node.js with comprehensive error handling.
@@ -276,115 +1189,33 @@ class CodeExecutor:
             code: JavaScript code to execute
             inputs: Input data to pass to the code
             timeout: Timeout in seconds
+            cancel_token: Optional token; cancelling kills the running process tree
             
         Returns:
             ExecutionResult with output or detailed error information
         """
-        start_time = time.time()
-        temp_file = None
-        process = None
-        
         logger.info(f"Starting JavaScript execution (timeout: {timeout}s)")
         logger.debug(f"Input data: {inputs}")
         
+        if cancel_token is not None and cancel_token.is_cancelled:
+            return ExecutionResult(success=False, output=None, error="Execution cancelled", cancelled=True)
+        
+        if self.use_worker_pool:
+            result = self._execute_in_worker("javascript", code, inputs, timeout, cancel_token)
+            if result is not None:
+                return result
+        
+        start_time = time.time()
         try:
-            # Create a temporary file for the code
-            with tempfile.NamedTemporaryFile(
-                mode='w',
-                suffix='.js',
-                delete=False,
-                encoding='utf-8'
-            ) as f:
-                temp_file = Path(f.name)
-                
-                # Wrap the code to handle input/output
-                wrapped_code = self._wrap_javascript_code(code, inputs)
-                f.write(wrapped_code)
-            
-            logger.debug(f"Created temporary file: {temp_file}")
-            
+            program = self._get_program(code, "javascript")
+            inputs_field, inputs_file = _inputs_field(inputs, "javascript")
             try:
-                # Execute the code using Node.js
-                process = subprocess.Popen(
-                    ['node', str(temp_file)],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
+                return self._execute_in_process(
+                    ['node', str(program)], "javascript", inputs_field, timeout, cancel_token
                 )
-                
-                logger.debug(f"Started Node.js process (PID: {process.pid})")
-                
-                try:
-                    stdout, stderr = process.communicate(timeout=timeout)
-                    execution_time = time.time() - start_time
-                    exit_code = process.returncode
-                    
-                    logger.info(f"JavaScript execution completed in {execution_time:.2f}s (exit code: {exit_code})")
-                    
-                    if exit_code == 0:
-                        # Parse the output
-                        try:
-                            output = json.loads(stdout.strip())
-                            logger.debug(f"Successfully parsed output: {type(output)}")
-                            return ExecutionResult(
-                                success=True,
-                                output=output,
-                                stderr=stderr if stderr else None,
-                                execution_time=execution_time,
-                                exit_code=exit_code
-                            )
-                        except json.JSONDecodeError as e:
-                            logger.error(f"Failed to parse JSON output: {e}")
-                            stack_trace = self._extract_stack_trace(stderr, "javascript")
-                            return ExecutionResult(
-                                success=False,
-                                output=None,
-                                error=f"Failed to parse output as JSON: {e}",
-                                stderr=stderr,
-                                execution_time=execution_time,
-                                stack_trace=stack_trace,
-                                exit_code=exit_code
-                            )
-                    else:
-                        logger.error(f"JavaScript execution failed with exit code {exit_code}")
-                        stack_trace = self._extract_stack_trace(stderr, "javascript")
-                        return ExecutionResult(
-                            success=False,
-                            output=None,
-                            error=f"Code execution failed with exit code {exit_code}",
-                            stderr=stderr,
-                            execution_time=execution_time,
-                            stack_trace=stack_trace,
-                            exit_code=exit_code
-                        )
-                
-                except subprocess.TimeoutExpired:
-                    execution_time = time.time() - start_time
-                    logger.warning(f"JavaScript execution timed out after {timeout}s")
-                    
-                    # Terminate the process tree
-                    self._terminate_process_tree(process)
-                    
-                    # Try to get any partial output
-                    try:
-                        stdout, stderr = process.communicate(timeout=1)
-                    except:
-                        stdout, stderr = "", ""
-                    
-                    return ExecutionResult(
-                        success=False,
-                        output=None,
-                        error=f"Execution timed out after {timeout} seconds",
-                        stderr=stderr if stderr else None,
-                        timeout=True,
-                        execution_time=execution_time,
-                        exit_code=process.returncode if process.returncode is not None else -1
-                    )
-            
             finally:
-                # Clean up temporary file
-                if temp_file:
-                    self._cleanup_temp_file(temp_file)
+                if inputs_file:
+                    self._cleanup_temp_file(inputs_file)
         
         except FileNotFoundError:
             logger.error("Node.js not found in system PATH")
@@ -413,7 +1244,8 @@ class CodeExecutor:
         self,
         code: str,
         inputs: Dict[str, Any],
-        timeout: int = 30
+        timeout: int = 30,
+        cancel_token: Optional[CancellationToken] = None
     ) -> ExecutionResult:
         """
         Execute Python code using subprocess with comprehensive error handling.
@@ -422,115 +1254,33 @@ class CodeExecutor:
             code: Python code to execute
             inputs: Input data to pass to the code
             timeout: Timeout in seconds
+            cancel_token: Optional token; cancelling kills the running process tree
             
         Returns:
             ExecutionResult with output or detailed error information
         """
-        start_time = time.time()
-        temp_file = None
-        process = None
-        
         logger.info(f"Starting Python execution (timeout: {timeout}s)")
         logger.debug(f"Input data: {inputs}")
         
+        if cancel_token is not None and cancel_token.is_cancelled:
+            return ExecutionResult(success=False, output=None, error="Execution cancelled", cancelled=True)
+        
+        if self.use_worker_pool:
+            result = self._execute_in_worker("python", code, inputs, timeout, cancel_token)
+            if result is not None:
+                return result
+        
+        start_time = time.time()
         try:
-            # Create a temporary file for the code
-            with tempfile.NamedTemporaryFile(
-                mode='w',
-                suffix='.py',
-                delete=False,
-                encoding='utf-8'
-            ) as f:
-                temp_file = Path(f.name)
-                
-                # Wrap the code to handle input/output
-                wrapped_code = self._wrap_python_code(code, inputs)
-                f.write(wrapped_code)
-            
-            logger.debug(f"Created temporary file: {temp_file}")
-            
+            program = self._get_program(code, "python")
+            inputs_field, inputs_file = _inputs_field(inputs, "python")
             try:
-                # Execute the code using Python
-                process = subprocess.Popen(
-                    ['python', str(temp_file)],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
+                return self._execute_in_process(
+                    ['python', str(program)], "python", inputs_field, timeout, cancel_token
                 )
-                
-                logger.debug(f"Started Python process (PID: {process.pid})")
-                
-                try:
-                    stdout, stderr = process.communicate(timeout=timeout)
-                    execution_time = time.time() - start_time
-                    exit_code = process.returncode
-                    
-                    logger.info(f"Python execution completed in {execution_time:.2f}s (exit code: {exit_code})")
-                    
-                    if exit_code == 0:
-                        # Parse the output
-                        try:
-                            output = json.loads(stdout.strip())
-                            logger.debug(f"Successfully parsed output: {type(output)}")
-                            return ExecutionResult(
-                                success=True,
-                                output=output,
-                                stderr=stderr if stderr else None,
-                                execution_time=execution_time,
-                                exit_code=exit_code
-                            )
-                        except json.JSONDecodeError as e:
-                            logger.error(f"Failed to parse JSON output: {e}")
-                            stack_trace = self._extract_stack_trace(stderr, "python")
-                            return ExecutionResult(
-                                success=False,
-                                output=None,
-                                error=f"Failed to parse output as JSON: {e}",
-                                stderr=stderr,
-                                execution_time=execution_time,
-                                stack_trace=stack_trace,
-                                exit_code=exit_code
-                            )
-                    else:
-                        logger.error(f"Python execution failed with exit code {exit_code}")
-                        stack_trace = self._extract_stack_trace(stderr, "python")
-                        return ExecutionResult(
-                            success=False,
-                            output=None,
-                            error=f"Code execution failed with exit code {exit_code}",
-                            stderr=stderr,
-                            execution_time=execution_time,
-                            stack_trace=stack_trace,
-                            exit_code=exit_code
-                        )
-                
-                except subprocess.TimeoutExpired:
-                    execution_time = time.time() - start_time
-                    logger.warning(f"Python execution timed out after {timeout}s")
-                    
-                    # Terminate the process tree
-                    self._terminate_process_tree(process)
-                    
-                    # Try to get any partial output
-                    try:
-                        stdout, stderr = process.communicate(timeout=1)
-                    except:
-                        stdout, stderr = "", ""
-                    
-                    return ExecutionResult(
-                        success=False,
-                        output=None,
-                        error=f"Execution timed out after {timeout} seconds",
-                        stderr=stderr if stderr else None,
-                        timeout=True,
-                        execution_time=execution_time,
-                        exit_code=process.returncode if process.returncode is not None else -1
-                    )
-            
             finally:
-                # Clean up temporary file
-                if temp_file:
-                    self._cleanup_temp_file(temp_file)
+                if inputs_file:
+                    self._cleanup_temp_file(inputs_file)
         
         except FileNotFoundError:
             logger.error("Python not found in system PATH")
@@ -555,12 +1305,175 @@ class CodeExecutor:
                 stack_trace=stack_trace
             )
     
+    def _get_program(self, code: str, language: str) -> Path:
+        """
+        Get the wrapped program file for a code string.
+        
+        The wrapped program does not depend on the inputs, so it is written
+        once per code string and reused by later calls.
+        
+        Args:
+            code: Original code
+            language: "python" or "javascript"
+            
+        Returns:
+            Path to the wrapped program
+        """
+        suffix = ".py" if language == "python" else ".js"
+        key = hashlib.sha256(code.encode("utf-8")).hexdigest()
+        program = _get_scratch_dir() / f"{key}{suffix}"
+        
+        if not program.exists():
+            if language == "python":
+                wrapped_code = self._wrap_python_code(code)
+            else:
+                wrapped_code = self._wrap_javascript_code(code)
+            
+            # Write under a unique name and rename so concurrent callers never
+            # run a partially written program
+            with tempfile.NamedTemporaryFile(
+                mode='w',
+                suffix=suffix,
+                dir=program.parent,
+                delete=False,
+                encoding='utf-8'
+            ) as f:
+                f.write(wrapped_code)
+            os.replace(f.name, program)
+            logger.debug(f"Cached wrapped program: {program}")
+        
+        return program
+    
+    def _execute_in_process(
+        self,
+        command: List[str],
+        language: str,
+        inputs_field: str,
+        timeout: int,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> ExecutionResult:
+        """
+        Run a wrapped program in a fresh process.
+        
+        The request frame is written to the child's stdin and the result frame
+        is read back from its stdout.
+        
+        Args:
+            command: Command line that runs the wrapped program
+            language: "python" or "javascript"
+            inputs_field: Inputs member of the request frame (see _inputs_field)
+            timeout: Timeout in seconds
+            cancel_token: Cancelling kills the process tree
+            
+        Returns:
+            ExecutionResult with output or detailed error information
+            
+        Raises:
+            FileNotFoundError: If the interpreter is not installed
+        """
+        start_time = time.time()
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        
+        logger.debug(f"Started {language} process (PID: {process.pid})")
+        
+        unregister = (
+            cancel_token.register(lambda: self._kill_process_tree(process))
+            if cancel_token is not None else None
+        )
+        try:
+            stdout, stderr_bytes = process.communicate(
+                input=_encode_frame('{%s}' % inputs_field),
+                timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            execution_time = time.time() - start_time
+            logger.warning(f"{language} execution timed out after {timeout}s")
+            
+            # Terminate the process tree
+            self._terminate_process_tree(process)
+            
+            # Try to get any partial output
+            try:
+                _, stderr_bytes = process.communicate(timeout=1)
+            except Exception:
+                stderr_bytes = b""
+            stderr = stderr_bytes.decode("utf-8", errors="replace") if stderr_bytes else ""
+            
+            return ExecutionResult(
+                success=False,
+                output=None,
+                error=f"Execution timed out after {timeout} seconds",
+                stderr=stderr if stderr else None,
+                timeout=True,
+                execution_time=execution_time,
+                exit_code=process.returncode if process.returncode is not None else -1
+            )
+        finally:
+            if unregister is not None:
+                unregister()
+        
+        execution_time = time.time() - start_time
+        if cancel_token is not None and cancel_token.is_cancelled:
+            logger.info(f"{language} execution cancelled after {execution_time:.2f}s")
+            self._terminate_process_tree(process)
+            return self._cancelled_result(process, execution_time)
+        
+        exit_code = process.returncode
+        stderr = stderr_bytes.decode("utf-8", errors="replace")
+        
+        logger.info(f"{language} execution completed in {execution_time:.2f}s (exit code: {exit_code})")
+        
+        if exit_code != 0:
+            logger.error(f"{language} execution failed with exit code {exit_code}")
+            return ExecutionResult(
+                success=False,
+                output=None,
+                error=f"Code execution failed with exit code {exit_code}",
+                stderr=stderr,
+                execution_time=execution_time,
+                stack_trace=self._extract_stack_trace(stderr, language),
+                exit_code=exit_code
+            )
+        
+        try:
+            body = _decode_frame(stdout)
+            if body is None:
+                raise ValueError("code exited without producing a result")
+            output = json.loads(body)
+        except ValueError as e:
+            logger.error(f"Failed to parse JSON output: {e}")
+            return ExecutionResult(
+                success=False,
+                output=None,
+                error=f"Failed to parse output as JSON: {e}",
+                stderr=stderr,
+                execution_time=execution_time,
+                stack_trace=self._extract_stack_trace(stderr, language),
+                exit_code=exit_code
+            )
+        
+        logger.debug(f"Successfully parsed output: {type(output)}")
+        return ExecutionResult(
+            success=True,
+            output=output,
+            stderr=stderr if stderr else None,
+            execution_time=execution_time,
+            exit_code=exit_code
+        )
+    
+
     def execute_from_file(
         self,
         file_path: Path,
         language: str,
         inputs: Dict[str, Any],
-        timeout: Optional[int] = None
+        timeout: Optional[int] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> ExecutionResult:
         """
         Execute code from a file with error handling.
@@ -570,6 +1483,7 @@ class CodeExecutor:
             language: Programming language ("javascript" or "python")
             inputs: Input data to pass to the code
             timeout: Timeout in seconds (uses default if not specified)
+            cancel_token: Optional token; cancelling kills the running process tree
             
         Returns:
             ExecutionResult with output or detailed error information
@@ -581,7 +1495,7 @@ class CodeExecutor:
                 code = f.read()
             
             logger.debug(f"Successfully read {len(code)} characters from {file_path}")
-            return self.execute(code, language, inputs, timeout)
+            return self.execute(code, language, inputs, timeout, cancel_token)
         
         except FileNotFoundError:
             logger.error(f"Code file not found: {file_path}")
@@ -609,22 +1523,31 @@ class CodeExecutor:
                 stack_trace=stack_trace
             )
     
-    def _wrap_javascript_code(self, code: str, inputs: Dict[str, Any]) -> str:
+    def _wrap_javascript_code(self, code: str) -> str:
         """
         Wrap JavaScript code to handle input/output.
         
+        The request frame is read from stdin and the result frame is written
+        to stdout; console output from user code is redirected to stderr.
+        
         Args:
             code: Original JavaScript code
-            inputs: Input data
             
         Returns:
             Wrapped JavaScript code
         """
-        inputs_json = json.dumps(inputs)
-        
         return f"""
 // Input data
-const inputs = {inputs_json};
+const __fs = require('fs');
+const __rawStdoutWrite = process.stdout.write.bind(process.stdout);
+process.stdout.write = process.stderr.write.bind(process.stderr);
+const __request = (() => {{
+    const data = __fs.readFileSync(0);
+    return JSON.parse(data.subarray(4, 4 + data.readUInt32BE(0)).toString('utf8'));
+}})();
+const inputs = __request.inputs_file !== undefined
+    ? JSON.parse(__fs.readFileSync(__request.inputs_file, 'utf8'))
+    : __request.inputs;
 
 // User code
 {code}
@@ -662,7 +1585,13 @@ const inputs = {inputs_json};
             result = inputs;
         }}
         
-        console.log(JSON.stringify(result));
+        const serialized = JSON.stringify(result);
+        if (serialized !== undefined) {{
+            const body = Buffer.from(serialized, 'utf8');
+            const header = Buffer.alloc(4);
+            header.writeUInt32BE(body.length, 0);
+            __rawStdoutWrite(Buffer.concat([header, body]));
+        }}
     }} catch (error) {{
         console.error(error.message);
         process.exit(1);
@@ -670,28 +1599,40 @@ const inputs = {inputs_json};
 }})();
 """
     
-    def _wrap_python_code(self, code: str, inputs: Dict[str, Any]) -> str:
+    def _wrap_python_code(self, code: str) -> str:
         """
         Wrap Python code to handle input/output.
         
+        The request frame is read from stdin and the result frame is written
+        to a private copy of stdout; anything user code prints goes to stderr.
+        
         Args:
             code: Original Python code
-            inputs: Input data
             
         Returns:
             Wrapped Python code
         """
-        # Use repr() instead of json.dumps() to get valid Python literals
-        # This ensures booleans are True/False, not true/false
-        inputs_repr = repr(inputs)
-        
         return f"""
 import json
 import sys
 import traceback
 
 # Input data
-inputs = {inputs_repr}
+def __read_inputs():
+    import ast, os, struct
+    global __proto_out
+    __proto_out = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    data = sys.stdin.buffer.read()
+    request = json.loads(data[4:4 + struct.unpack(">I", data[:4])[0]].decode("utf-8"))
+    if "inputs_file" in request:
+        with open(request["inputs_file"], "r", encoding="utf-8") as f:
+            return json.load(f)
+    if "inputs_repr" in request:
+        return ast.literal_eval(request["inputs_repr"])
+    return request["inputs"]
+
+inputs = __read_inputs()
 
 # User code
 {code}
@@ -714,7 +1655,9 @@ try:
         # If no function is defined, return the inputs as-is
         result = inputs
     
-    print(json.dumps(result))
+    __data = json.dumps(result).encode("utf-8")
+    __proto_out.write(len(__data).to_bytes(4, "big") + __data)
+    __proto_out.flush()
 except Exception as e:
     # Print full traceback to stderr
     traceback.print_exc(file=sys.stderr)
@@ -16,6 +16,8 @@ import time
 import threading
 from enum import Enum
 
+from .cancellation import CancellationToken
+
 
 class ExecutionStrategy(Enum):
     """执行策略"""
@@ -159,7 +161,7 @@ class TaskResult:
         error: 错误信息
         execution_time: 执行时间（秒）
         metadata: 结果元数据
-        skipped: 是否被跳过（因为依赖失败）
+        skipped: 是否被跳过（因为依赖失败或执行已取消）
         error_type: 错误类型（如果失败）
     """
     task_id: str
@@ -273,16 +275,19 @@ class ConcurrentExecutor:
     def execute_concurrent(
         self,
         tasks: List[Task],
-        progress_callback: Optional[Callable[[ExecutionProgress], None]] = None
+        progress_callback: Optional[Callable[[ExecutionProgress], None]] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> List[TaskResult]:
         """
         并发执行任务列表（无依赖关系）
         
         所有任务将尽可能并发执行，受 max_workers 限制。
+        取消后尚未开始的任务不再执行，结果标记为跳过。
         
         Args:
             tasks: 任务列表
             progress_callback: 进度回调函数，接收 ExecutionProgress 对象
+            cancel_token: 取消令牌（可选）
             
         Returns:
             List[TaskResult]: 任务结果列表，顺序与输入任务列表一致
@@ -316,7 +321,7 @@ class ConcurrentExecutor:
             future_to_task: Dict[Future, Task] = {}
             
             for task in tasks:
-                future = executor.submit(self._execute_task, task)
+                future = executor.submit(self._execute_task, task, cancel_token)
                 future_to_task[future] = task
             
             # 更新进度
@@ -343,6 +348,9 @@ class ConcurrentExecutor:
                     self._progress.running -= 1
                     if not task_result.success:
                         self._progress.failed += 1
+                        if task_result.skipped:
+                            self._progress.skipped += 1
+                            self._error_summary.add_skipped(task.id)
                         # 记录错误
                         error_type = task_result.error_type or "UnknownError"
                         self._error_summary.add_error(
@@ -361,18 +369,21 @@ class ConcurrentExecutor:
         self,
         tasks: List[Task],
         dependency_graph: Optional[Dict[str, List[str]]] = None,
-        progress_callback: Optional[Callable[[ExecutionProgress], None]] = None
+        progress_callback: Optional[Callable[[ExecutionProgress], None]] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> List[TaskResult]:
         """
         根据依赖关系并发执行任务
         
         任务将按照依赖关系分批执行，同一批次内的任务并发执行。
+        取消后不再启动新的批次，剩余任务标记为跳过。
         
         Args:
             tasks: 任务列表
             dependency_graph: 依赖图，格式为 {task_id: [dependency_task_ids]}
                             如果为 None，将从 Task.dependencies 构建
             progress_callback: 进度回调函数
+            cancel_token: 取消令牌（可选）
             
         Returns:
             List[TaskResult]: 任务结果列表，顺序与输入任务列表一致
@@ -430,6 +441,25 @@ class ConcurrentExecutor:
             remaining_tasks = set(task_ids)
             
             while remaining_tasks:
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    # 已取消：剩余任务全部跳过
+                    for task_id in sorted(remaining_tasks, key=task_id_to_index.get):
+                        task = task_map[task_id]
+                        results[task_id_to_index[task_id]] = self._cancelled_result(task)
+                        with self._lock:
+                            self._progress.completed += 1
+                            self._progress.failed += 1
+                            self._progress.skipped += 1
+                            self._progress.pending -= 1
+                            self._progress.current_time = time.time()
+                            self._error_summary.add_skipped(task_id)
+                            self._error_summary.add_error(task_id, "ExecutionCancelled", is_critical=task.required)
+                    remaining_tasks.clear()
+                    
+                    if progress_callback:
+                        progress_callback(self._get_progress_snapshot())
+                    break
+                
                 # 找出所有依赖已满足的任务
                 ready_tasks = []
                 skipped_tasks = []
@@ -499,7 +529,7 @@ class ConcurrentExecutor:
                 future_to_task: Dict[Future, Task] = {}
                 
                 for task in ready_tasks:
-                    future = executor.submit(self._execute_task, task)
+                    future = executor.submit(self._execute_task, task, cancel_token)
                     future_to_task[future] = task
                     remaining_tasks.remove(task.id)
                 
@@ -532,6 +562,9 @@ class ConcurrentExecutor:
                         self._progress.running -= 1
                         if not task_result.success:
                             self._progress.failed += 1
+                            if task_result.skipped:
+                                self._progress.skipped += 1
+                                self._error_summary.add_skipped(task.id)
                             # 记录错误
                             error_type = task_result.error_type or "UnknownError"
                             self._error_summary.add_error(
@@ -611,16 +644,20 @@ class ConcurrentExecutor:
             results=results
         )
     
-    def _execute_task(self, task: Task) -> TaskResult:
+    def _execute_task(self, task: Task, cancel_token: Optional[CancellationToken] = None) -> TaskResult:
         """
         执行单个任务
         
         Args:
             task: 任务对象
+            cancel_token: 取消令牌（可选），已取消时不执行任务
             
         Returns:
             TaskResult: 任务执行结果
         """
+        if cancel_token is not None and cancel_token.is_cancelled:
+            return self._cancelled_result(task)
+        
         start_time = time.time()
         
         try:
@@ -653,6 +690,18 @@ class ConcurrentExecutor:
                 error_type=error_type
             )
     
+    def _cancelled_result(self, task: Task) -> TaskResult:
+        """因执行取消而跳过的任务结果"""
+        return TaskResult(
+            task_id=task.id,
+            success=False,
+            error="执行已取消，任务未执行",
+            execution_time=0.0,
+            metadata=task.metadata.copy(),
+            skipped=True,
+            error_type="ExecutionCancelled"
+        )
+    
     def _get_progress_snapshot(self) -> ExecutionProgress:
         """获取进度信息的线程安全快照"""
         with self._lock:
@@ -20,3 +20,29 @@ def get_openai_temperature() -> float:
         return float(os.getenv("OPENAI_TEMPERATURE", "0.3"))
     except ValueError:
         return 0.3
+
+def _get_int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+def get_llm_max_in_flight() -> int:
+    """进程内同时进行的 LLM 请求上限"""
+    return max(1, _get_int_env("LLM_MAX_IN_FLIGHT", 16))
+
+def get_llm_rpm_limit() -> int:
+    """每个模型的默认每分钟请求数上限（0 表示不限）"""
+    return max(0, _get_int_env("LLM_RPM_LIMIT", 0))
+
+def get_llm_tpm_limit() -> int:
+    """每个模型的默认每分钟 token 数上限（0 表示不限）"""
+    return max(0, _get_int_env("LLM_TPM_LIMIT", 0))
+
+def get_llm_max_prompt_tokens() -> int:
+    """发送前检查的 Prompt token 上限（0 表示不检查），可被 flow 的 max_prompt_tokens 覆盖"""
+    return max(0, _get_int_env("LLM_MAX_PROMPT_TOKENS", 0))
+
+def get_code_worker_pool_size() -> int:
+    """每种语言常驻代码执行 worker 的默认上限（可被 pipeline 的 max_workers 调高）"""
+    return max(1, _get_int_env("CODE_WORKER_POOL_SIZE", 4))
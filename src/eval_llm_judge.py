@@ -4,7 +4,7 @@ import csv
 import json
 import logging
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 import typer
 from rich.console import Console
@@ -135,6 +135,27 @@ def build_judge_chain(task_agent_cfg, judge_agent_cfg, judge_flow_name: str):
     }
 
 
+def build_judge_static_vars(task_agent_cfg, judge_config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    构建 judge 提示词中与样本无关的变量（业务目标、约束、评分区间等）
+    
+    这些变量对同一个 TaskAgent 的所有 judge 调用都相同，在 judge 提示词里位于
+    样本和输出之前，构成稳定的前缀，便于模型服务端的 prompt cache 命中。
+    """
+    expectations = task_agent_cfg.expectations or {}
+    return {
+        "agent_id": task_agent_cfg.id,
+        "agent_name": task_agent_cfg.name,
+        "description": task_agent_cfg.description,
+        "business_goal": task_agent_cfg.business_goal,
+        "must_have": "\n".join(expectations.get("must_have", [])),
+        "nice_to_have": "\n".join(expectations.get("nice_to_have", [])),
+        "min_score": judge_config["min_score"],
+        "max_score": judge_config["max_score"],
+        "_model_override": judge_config["model_name"],
+    }
+
+
 def judge_one(
     task_agent_cfg,
     flow_name: str,
@@ -142,31 +163,28 @@ def judge_one(
     output: str,
     judge_config: Dict[str, Any],
     judge_flow_name: str,
+    static_vars: Optional[Dict[str, Any]] = None,
+    case_rendered: Optional[str] = None,
 ) -> tuple[Dict[str, Any], Dict[str, int]]:
     """
     对单个 (case, flow) 调用一次 Judge 模型，返回评估结果和token统计
     
     使用 Output Parser 自动解析 JSON 输出，并在解析失败时提供降级处理。
+    static_vars / case_rendered 可由调用方预先构建并在多次调用间复用。
     """
     
-    expectations = task_agent_cfg.expectations or {}
-    must_have = "\n".join(expectations.get("must_have", []))
-    nice_to_have = "\n".join(expectations.get("nice_to_have", []))
+    if static_vars is None:
+        static_vars = build_judge_static_vars(task_agent_cfg, judge_config)
     
     # 使用新的 case 渲染功能
-    case_rendered = render_case_for_judge(task_agent_cfg, case)
+    if case_rendered is None:
+        case_rendered = render_case_for_judge(task_agent_cfg, case)
     
-    # 格式化 min_score 和 max_score
-    min_score = judge_config["min_score"]
-    max_score = judge_config["max_score"]
+    min_score = static_vars["min_score"]
+    max_score = static_vars["max_score"]
     
     variables = {
-        "agent_id": task_agent_cfg.id,
-        "agent_name": task_agent_cfg.name,
-        "description": task_agent_cfg.description,
-        "business_goal": task_agent_cfg.business_goal,
-        "must_have": must_have,
-        "nice_to_have": nice_to_have,
+        **static_vars,
         "case_rendered": case_rendered,
         # 保留传统字段以兼容旧的 judge 提示词
         "input": case.get("input", ""),
@@ -174,9 +192,6 @@ def judge_one(
         "expected": case.get("expected", ""),
         "output": output,
         "flow_name": flow_name,
-        "min_score": min_score,
-        "max_score": max_score,
-        "_model_override": judge_config["model_name"],
     }
     
     try:
@@ -223,6 +238,104 @@ def judge_one(
         return fallback_data, token_info
 
 
+def render_outputs_for_compare(outputs: Dict[str, str]) -> str:
+    """把多个 flow 的输出按顺序渲染为对比评估的输入文本"""
+    parts = []
+    for flow_name, output in outputs.items():
+        parts.append(f"----- flow: {flow_name} -----\n{output}\n")
+    return "\n".join(parts)
+
+
+def judge_compare(
+    task_agent_cfg,
+    case: Dict[str, Any],
+    outputs: Dict[str, str],
+    judge_config: Dict[str, Any],
+    compare_flow_name: str,
+    static_vars: Optional[Dict[str, Any]] = None,
+    case_rendered: Optional[str] = None,
+) -> tuple[Optional[Dict[str, Dict[str, Any]]], Dict[str, int]]:
+    """
+    对同一个 case 的多个 flow 输出进行一次对比评估
+    
+    样本和上下文只发送一次，返回每个 flow 的评估结果（结构与 judge_one 相同）。
+    
+    Returns:
+        ({flow_name: 评估结果}, 本次调用的 token 统计)；
+        调用失败、输出无法解析或缺少某个 flow 时评估结果为 None，由调用方回退到逐个 flow 评估，
+        token 统计仍是这次调用已经消耗的用量（请求本身失败时为空）
+    """
+    if static_vars is None:
+        static_vars = build_judge_static_vars(task_agent_cfg, judge_config)
+    if case_rendered is None:
+        case_rendered = render_case_for_judge(task_agent_cfg, case)
+    
+    variables = {
+        **static_vars,
+        "case_rendered": case_rendered,
+        "input": case.get("input", ""),
+        "context": case.get("context", ""),
+        "expected": case.get("expected", ""),
+        "flow_count": len(outputs),
+        "outputs_rendered": render_outputs_for_compare(outputs),
+    }
+    
+    token_info: Dict[str, int] = {}
+    try:
+        result, token_info, _parser_stats = run_flow_with_tokens(
+            flow_name=compare_flow_name,
+            extra_vars=variables,
+            agent_id="judge_default"
+        )
+        data = result if isinstance(result, dict) else json.loads(result)
+        
+        by_flow: Dict[str, Dict[str, Any]] = {}
+        for item in data.get("results", []):
+            if isinstance(item, dict) and item.get("flow") in outputs:
+                _validate_judge_output(item)
+                by_flow[item["flow"]] = {
+                    "derived_criteria": data.get("derived_criteria", []),
+                    **{k: v for k, v in item.items() if k != "flow"},
+                }
+        
+        missing = [flow_name for flow_name in outputs if flow_name not in by_flow]
+        if missing:
+            raise ValueError(f"对比评估结果缺少 flow: {', '.join(missing)}")
+        
+        return by_flow, token_info
+    
+    except Exception as e:
+        logger.warning(f"对比评估失败，回退到逐个 flow 评估: {e}")
+        return None, token_info
+
+
+def split_token_info(token_info: Dict[str, int], parts: int) -> List[Dict[str, int]]:
+    """
+    把一次调用的 token 统计平均分摊到多个结果上
+    
+    *_tokens 字段分摊后的总和与原值一致；cache_hit 等标记字段原样复制到每一份。
+    """
+    shares: List[Dict[str, int]] = [{} for _ in range(parts)]
+    for key, value in token_info.items():
+        if not key.endswith("_tokens"):
+            for share in shares:
+                share[key] = value
+            continue
+        base, remainder = divmod(int(value or 0), parts)
+        for i in range(parts):
+            shares[i][key] = base + (1 if i < remainder else 0)
+    return shares
+
+
+def add_token_info(token_info: Dict[str, int], extra: Dict[str, int]) -> Dict[str, int]:
+    """把另一次调用的 *_tokens 用量累加到 token 统计上（返回新字典，标记字段保持原值）"""
+    merged = dict(token_info)
+    for key, value in extra.items():
+        if key.endswith("_tokens"):
+            merged[key] = merged.get(key, 0) + int(value or 0)
+    return merged
+
+
 def _validate_judge_output(data: Dict[str, Any]) -> None:
     """
     验证 Judge 输出包含必需字段
@@ -280,6 +393,65 @@ def _create_fallback_result(
     }
 
 
+def flatten_judge_result(
+    case_id: Any,
+    flow_name: str,
+    judge_data: Dict[str, Any],
+    token_info: Dict[str, int],
+    include_diagnostics: bool = True,
+) -> Dict[str, Any]:
+    """
+    把 Judge 输出的 JSON 展平为一行，方便 CSV 存储
+    
+    Args:
+        case_id: 样本 id
+        flow_name: 被评估的 flow
+        judge_data: judge_one 返回的评估结果
+        token_info: judge_one 返回的 token 统计
+        include_diagnostics: 是否包含 parse_error / error_message / derived_criteria 列
+    """
+    flat: Dict[str, Any] = {
+        "id": case_id,
+        "flow": flow_name,
+        "overall_score": judge_data.get("overall_score"),
+        "overall_comment": judge_data.get("overall_comment", ""),
+    }
+    if include_diagnostics:
+        flat["parse_error"] = judge_data.get("parse_error", False)
+        flat["error_message"] = judge_data.get("error_message", "")
+    flat["judge_input_tokens"] = token_info.get("input_tokens", 0)
+    flat["judge_output_tokens"] = token_info.get("output_tokens", 0)
+    flat["judge_total_tokens"] = token_info.get("total_tokens", 0)
+    
+    # must_have 检查结果展开
+    for idx, check in enumerate(judge_data.get("must_have_check", [])):
+        flat[f"must_have_{idx+1}__satisfied"] = check.get("satisfied")
+        flat[f"must_have_{idx+1}__score"] = check.get("score")
+        flat[f"must_have_{idx+1}__comment"] = check.get("comment", "")
+    
+    # nice_to_have 检查结果展开
+    for idx, check in enumerate(judge_data.get("nice_to_have_check", [])):
+        flat[f"nice_to_have_{idx+1}__satisfied"] = check.get("satisfied")
+        flat[f"nice_to_have_{idx+1}__score"] = check.get("score")
+        flat[f"nice_to_have_{idx+1}__comment"] = check.get("comment", "")
+    
+    # summary_quality_check 检查结果展开（如果存在）
+    for idx, check in enumerate(judge_data.get("summary_quality_check", [])):
+        aspect = check.get("aspect", f"quality_{idx+1}")
+        flat[f"quality__{aspect}__satisfied"] = check.get("satisfied")
+        flat[f"quality__{aspect}__score"] = check.get("score")
+        flat[f"quality__{aspect}__comment"] = check.get("comment", "")
+    
+    if include_diagnostics:
+        # derived_criteria 展开（用于分析评估模型的推理过程）
+        for idx, criteria in enumerate(judge_data.get("derived_criteria", [])):
+            flat[f"derived_criteria_{idx+1}__name"] = criteria.get("name", "")
+            flat[f"derived_criteria_{idx+1}__from"] = criteria.get("from", "")
+            flat[f"derived_criteria_{idx+1}__importance"] = criteria.get("importance", "")
+    
+    return flat
+
+
 def eval_file(
     agent: str = typer.Option(..., help="agent id，对应 agents/{agent}.yaml"),
     infile: str = typer.Option(
@@ -295,6 +467,12 @@ def eval_file(
         help="可选：只评估这些 flow（逗号分隔），如: asr_clean_v1,asr_clean_v2；为空则自动从列名推断",
     ),
     limit: int = typer.Option(0, help="最多评估多少条（0=全部）"),
+    concurrency: int = typer.Option(1, "--concurrency", "-c", help="同时进行的 judge 调用数量（1=顺序执行）"),
+    pairwise: bool = typer.Option(
+        False,
+        "--pairwise",
+        help="对比评估：同一条样本的所有 flow 输出在一次 judge 调用中评估，失败时回退到逐个 flow 评估",
+    ),
 ):
     """
     对已有结果文件做 LLM 自动评估。
@@ -302,6 +480,8 @@ def eval_file(
     - id, input, context, expected
     - output__flow_name1, output__flow_name2, ...
     """
+    from .judge_engine import EvalRowWriter, JudgeEngine, JudgeResult, JudgeTask
+    
     # 加载 TaskAgent 和 JudgeAgent
     task_agent_cfg = load_agent(agent)
     console.rule(f"[bold blue]Eval · Agent {task_agent_cfg.id}[/bold blue]")
@@ -310,6 +490,7 @@ def eval_file(
     eval_cfg = task_agent_cfg.evaluation or {}
     judge_agent_id = eval_cfg.get("judge_agent_id", "judge_default")
     judge_flow = eval_cfg.get("judge_flow", "judge_v1")
+    compare_flow = eval_cfg.get("judge_compare_flow", "judge_compare_v1") if pairwise else None
     
     try:
         judge_agent_cfg = load_agent(judge_agent_id)
@@ -319,6 +500,8 @@ def eval_file(
     
     console.print(f"[bold]Judge Agent[/]: {judge_agent_cfg.name} ({judge_agent_id})")
     console.print(f"[bold]Judge Flow[/]: {judge_flow}")
+    if compare_flow:
+        console.print(f"[bold]Compare Flow[/]: {compare_flow}")
     
     in_path = DATA_DIR / infile
     out_path = DATA_DIR / outfile
@@ -359,13 +542,9 @@ def eval_file(
         judge_flow_name=judge_flow,
     )
     
-    # 输出字段：id / flow / overall_score / overall_comment / each criteria score/comment
-    eval_rows: List[Dict[str, Any]] = []
-    total_tokens = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
-    
-    for idx, row in enumerate(rows, start=1):
-        console.print(f"[{idx}/{len(rows)}] id={row.get('id')}")
-        
+    # 收集 (case, flow) 评估任务
+    tasks: List[JudgeTask] = []
+    for row in rows:
         case_base = {
             "id": row.get("id"),
             "input": row.get("input", ""),
@@ -374,78 +553,41 @@ def eval_file(
         }
         
         for col in flow_cols:
-            flow_name = col.replace("output__", "")
             output = row.get(col, "")
-            
-            if not output:
-                continue
-            
-            console.print(f"  -> judging flow: [cyan]{flow_name}[/cyan]")
-            judge_data, token_info = judge_one(
-                task_agent_cfg=task_agent_cfg,
-                flow_name=flow_name,
-                case=case_base,
-                output=output,
-                judge_config=judge_config,
-                judge_flow_name=judge_flow,
-            )
-            
+            if output:
+                tasks.append(JudgeTask(case=case_base, flow_name=col.replace("output__", ""), output=output))
+    
+    if not tasks:
+        console.print("[yellow]没有任何评估结果生成。[/]")
+        raise typer.Exit()
+    
+    # 输出字段：id / flow / overall_score / overall_comment / each criteria score/comment
+    total_tokens = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    engine = JudgeEngine(
+        task_agent_cfg, judge_config, judge_flow, max_workers=concurrency, compare_flow_name=compare_flow
+    )
+    
+    with EvalRowWriter(out_path) as writer:
+        def on_result(done: int, result: JudgeResult) -> None:
+            token_info = result.token_info
             # 累计token统计
             for key in total_tokens:
                 total_tokens[key] += token_info.get(key, 0)
             
-            console.print(f"    tokens: {token_info.get('input_tokens', 0)} input + {token_info.get('output_tokens', 0)} output = {token_info.get('total_tokens', 0)} total")
-            
-            # 展平 JSON 方便 CSV 存储
-            flat: Dict[str, Any] = {
-                "id": case_base["id"],
-                "flow": flow_name,
-                "overall_score": judge_data.get("overall_score"),
-                "overall_comment": judge_data.get("overall_comment", ""),
-                "parse_error": judge_data.get("parse_error", False),
-                "error_message": judge_data.get("error_message", ""),
-                "judge_input_tokens": token_info.get("input_tokens", 0),
-                "judge_output_tokens": token_info.get("output_tokens", 0),
-                "judge_total_tokens": token_info.get("total_tokens", 0),
-            }
-            
-            # must_have 检查结果展开
-            for idx, check in enumerate(judge_data.get("must_have_check", [])):
-                flat[f"must_have_{idx+1}__satisfied"] = check.get("satisfied")
-                flat[f"must_have_{idx+1}__score"] = check.get("score")
-                flat[f"must_have_{idx+1}__comment"] = check.get("comment", "")
-            
-            # nice_to_have 检查结果展开
-            for idx, check in enumerate(judge_data.get("nice_to_have_check", [])):
-                flat[f"nice_to_have_{idx+1}__satisfied"] = check.get("satisfied")
-                flat[f"nice_to_have_{idx+1}__score"] = check.get("score")
-                flat[f"nice_to_have_{idx+1}__comment"] = check.get("comment", "")
-            
-            # summary_quality_check 检查结果展开（如果存在）
-            for idx, check in enumerate(judge_data.get("summary_quality_check", [])):
-                aspect = check.get("aspect", f"quality_{idx+1}")
-                flat[f"quality__{aspect}__satisfied"] = check.get("satisfied")
-                flat[f"quality__{aspect}__score"] = check.get("score")
-                flat[f"quality__{aspect}__comment"] = check.get("comment", "")
-            
-            # derived_criteria 展开（用于分析评估模型的推理过程）
-            for idx, criteria in enumerate(judge_data.get("derived_criteria", [])):
-                flat[f"derived_criteria_{idx+1}__name"] = criteria.get("name", "")
-                flat[f"derived_criteria_{idx+1}__from"] = criteria.get("from", "")
-                flat[f"derived_criteria_{idx+1}__importance"] = criteria.get("importance", "")
-            
-            eval_rows.append(flat)
-    
-    if not eval_rows:
-        console.print("[yellow]没有任何评估结果生成。[/]")
-        raise typer.Exit()
+            console.print(
+                f"[{done}/{len(tasks)}] id={result.task.case.get('id')} flow=[cyan]{result.task.flow_name}[/cyan] "
+                f"tokens: {token_info.get('input_tokens', 0)} input + {token_info.get('output_tokens', 0)} output "
+                f"= {token_info.get('total_tokens', 0)} total"
+            )
+            writer.write(
+                result.index,
+                flatten_judge_result(result.task.case["id"], result.task.flow_name, result.data, token_info),
+            )
+        
+        engine.run(tasks, on_result=on_result)
     
-    # 写 CSV
-    fieldnames = sorted(eval_rows[0].keys(), key=lambda x: (x not in ["id", "flow"], x))
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(eval_rows)
+    eval_rows = writer.rows
+    fieldnames = writer.fieldnames
     
     console.print(f"[green]评估完成，结果已写入：[/] {out_path}")
     
@@ -454,6 +596,8 @@ def eval_file(
     console.print(f"  输入 tokens: {total_tokens['input_tokens']:,}")
     console.print(f"  输出 tokens: {total_tokens['output_tokens']:,}")
     console.print(f"  总计 tokens: {total_tokens['total_tokens']:,}")
+    if engine.compare_calls:
+        console.print(f"  对比评估: {engine.compare_calls} 次调用，回退 {engine.compare_fallbacks} 次")
     
     # 简单预览
     table = Table(title="Eval Results Preview", show_lines=True)
@@ -13,7 +13,7 @@ from rich.console import Console
 from rich.table import Table
 
 from .agent_registry import load_agent
-from .rule_engine import apply_rules as apply_rules_engine, get_supported_rule_types, validate_rule
+from .rule_engine import apply_rules as apply_rules_engine, compile_rules, get_supported_rule_types, validate_rule
 from .paths import (
     DATA_DIR, agent_runs_dir, agent_evals_dir, ensure_agent_dirs
 )
@@ -44,6 +44,7 @@ def run(
     infile: str = typer.Option(..., help="输入结果文件，如 2025-12-04T10-30_compare_v1_v2.csv"),
     outfile: str = typer.Option("", help="输出带规则结果的文件；为空则自动生成"),
     mode: str = typer.Option("compare", help="处理模式：compare（对比结果）或 manual（人工评审表）"),
+    workers: int = typer.Option(1, "--workers", "-w", help="规则评估使用的进程数（大文件时生效）"),
 ):
     """对结果文件应用规则评估"""
     try:
@@ -106,27 +107,21 @@ def run(
         
         console.print(f"[blue]发现 {len(flow_cols)} 个 flow 输出列[/]")
         
-        # 为每个 flow 添加规则评估结果
-        out_rows = []
-        for row in rows:
-            result = dict(row)
+        # 为每个 flow 添加规则评估结果（按列批量评估）
+        out_rows = [dict(row) for row in rows]
+        compiled = compile_rules(rules) if rules else None
+        for flow_col in flow_cols:
+            flow_name = flow_col.replace("output__", "")
             
-            # 为每个 flow 评估规则
-            for flow_col in flow_cols:
-                flow_name = flow_col.replace("output__", "")
-                
-                if rules:
-                    # 创建临时行用于规则评估
-                    temp_row = {"output": row.get(flow_col, "")}
-                    rule_result = apply_rules_to_row(agent_cfg, temp_row)
-                    
-                    result[f"rule_pass__{flow_name}"] = rule_result["rule_pass"]
-                    result[f"rule_violations__{flow_name}"] = rule_result["rule_violations"]
-                else:
-                    result[f"rule_pass__{flow_name}"] = 1
-                    result[f"rule_violations__{flow_name}"] = ""
+            if compiled:
+                values = [(row.get(flow_col) or "").strip() for row in rows]
+                rule_results = compiled.evaluate_many(values, workers=workers)
+            else:
+                rule_results = [{"rule_pass": 1, "rule_violations": ""}] * len(rows)
             
-            out_rows.append(result)
+            for result, rule_result in zip(out_rows, rule_results):
+                result[f"rule_pass__{flow_name}"] = rule_result["rule_pass"]
+                result[f"rule_violations__{flow_name}"] = rule_result["rule_violations"]
         
         # 添加新的字段名
         new_fields = []
@@ -138,15 +133,17 @@ def run(
         
     else:
         # 处理 manual 模式：直接对 output 列评估
+        if rules:
+            values = [(row.get("output") or "").strip() for row in rows]
+            rule_results = compile_rules(rules).evaluate_many(values, workers=workers)
+        else:
+            rule_results = [{"rule_pass": 1, "rule_violations": ""}] * len(rows)
+        
         out_rows = []
-        for row in rows:
-            if rules:
-                out_rows.append(apply_rules_to_row(agent_cfg, row))
-            else:
-                result = dict(row)
-                result["rule_pass"] = 1
-                result["rule_violations"] = ""
-                out_rows.append(result)
+        for row, rule_result in zip(rows, rule_results):
+            result = dict(row)
+            result.update(rule_result)
+            out_rows.append(result)
         
         fieldnames = list(rows[0].keys()) + ["rule_pass", "rule_violations"]
 
@@ -0,0 +1,179 @@
+# src/execution_plan.py
+"""
+执行计划 - Pipeline 配置的预编译结果
+
+ExecutionPlan 在 Pipeline 配置（和变体）确定后构建一次，所有样本共享：
+- 解析后的依赖边（input_mapping 推断 + depends_on 显式声明）和下游步骤
+- 拓扑顺序
+- 每个步骤在该变体下解析后的 flow 和模型
+- 输入映射的来源绑定（步骤输出或 testset 字段）
+
+执行计划构建后不可修改，构建过程也不会修改 StepConfig。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import logging
+
+from .models import PipelineConfig, StepConfig, VariantConfig
+from .dependency_analyzer import DependencyAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_step_flow(
+    config: PipelineConfig,
+    step: StepConfig,
+    variant_config: Optional[VariantConfig]
+) -> Tuple[str, Optional[str]]:
+    """
+    解析步骤在指定变体下使用的 flow 和模型
+
+    Args:
+        config: Pipeline 配置
+        step: 步骤配置
+        variant_config: 变体配置（None 表示 baseline）
+
+    Returns:
+        (flow_name, model_override) 元组
+    """
+    flow_name = step.flow
+    model_override = step.model_override
+
+    # 应用变体覆盖
+    if variant_config and step.id in variant_config.overrides:
+        override = variant_config.overrides[step.id]
+        if override.flow:
+            flow_name = override.flow
+        if override.model:
+            model_override = override.model
+
+    # 应用 baseline 配置
+    if variant_config is None and config.baseline and step.id in config.baseline.steps:
+        baseline_step = config.baseline.steps[step.id]
+        flow_name = baseline_step.flow
+        if baseline_step.model:
+            model_override = baseline_step.model
+
+    return flow_name, model_override
+
+
+@dataclass(frozen=True)
+class InputBinding:
+    """输入映射的单个绑定"""
+    param: str
+    source: str
+    producer: Optional[str] = None  # 产生该输出的步骤ID，None 表示来自 testset 字段
+
+    def resolve(self, context: Dict[str, Any]) -> Any:
+        """从样本上下文中取值，找不到时返回空字符串"""
+        if self.source in context:
+            # 从上下文中获取值（包括前序步骤输出和testset字段）
+            return context[self.source]
+
+        testset_fields = context.get("testset_fields", {})
+        if self.source in testset_fields:
+            return testset_fields[self.source]
+
+        # 如果找不到映射源，使用空字符串作为默认值
+        logger.warning(f"输入映射源 '{self.source}' 未找到，使用空字符串作为默认值")
+        return ""
+
+
+@dataclass(frozen=True)
+class StepPlan:
+    """单个步骤的执行计划"""
+    step: StepConfig
+    dependencies: Tuple[str, ...]
+    dependents: Tuple[str, ...]
+    flow_name: str
+    model_override: Optional[str]
+    input_bindings: Tuple[InputBinding, ...]
+
+    @property
+    def step_id(self) -> str:
+        return self.step.id
+
+    def resolve_inputs(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """根据输入绑定解析步骤输入"""
+        return {binding.param: binding.resolve(context) for binding in self.input_bindings}
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """
+    Pipeline 执行计划
+
+    Attributes:
+        pipeline_id: Pipeline ID
+        variant: 变体名称
+        steps: 步骤ID到步骤计划的只读映射（保持配置顺序）
+        topological_order: 拓扑顺序
+    """
+    pipeline_id: str
+    variant: str
+    steps: Mapping[str, StepPlan]
+    topological_order: Tuple[str, ...]
+
+    @classmethod
+    def build(
+        cls,
+        config: PipelineConfig,
+        variant: str = "baseline",
+        variant_config: Optional[VariantConfig] = None,
+        dependency_analyzer: Optional[DependencyAnalyzer] = None
+    ) -> "ExecutionPlan":
+        """
+        从 Pipeline 配置构建执行计划
+
+        Args:
+            config: Pipeline 配置
+            variant: 变体名称
+            variant_config: 变体配置（None 表示 baseline）
+            dependency_analyzer: 依赖分析器（可选）
+
+        Returns:
+            ExecutionPlan 实例
+
+        Raises:
+            ValueError: 如果检测到循环依赖
+        """
+        analyzer = dependency_analyzer or DependencyAnalyzer()
+        dependency_graph = analyzer.analyze_dependencies(config.steps)
+        topological_order = analyzer.topological_sort(dependency_graph)
+
+        output_to_step = {step.output_key: step.id for step in config.steps if step.output_key}
+
+        dependents: Dict[str, List[str]] = {step.id: [] for step in config.steps}
+        for step_id, deps in dependency_graph.edges.items():
+            for dep_id in deps:
+                dependents[dep_id].append(step_id)
+
+        steps: Dict[str, StepPlan] = {}
+        for step in config.steps:
+            flow_name, model_override = resolve_step_flow(config, step, variant_config)
+            steps[step.id] = StepPlan(
+                step=step,
+                dependencies=tuple(dependency_graph.edges.get(step.id, [])),
+                dependents=tuple(dependents[step.id]),
+                flow_name=flow_name,
+                model_override=model_override,
+                input_bindings=tuple(
+                    InputBinding(param=param, source=source, producer=output_to_step.get(source))
+                    for param, source in step.input_mapping.items()
+                )
+            )
+
+        return cls(
+            pipeline_id=config.id,
+            variant=variant,
+            steps=MappingProxyType(steps),
+            topological_order=tuple(topological_order)
+        )
+
+    def get_dependencies(self) -> Dict[str, List[str]]:
+        """获取依赖图 {step_id: [依赖的 step_id]}"""
+        return {step_id: list(plan.dependencies) for step_id, plan in self.steps.items()}
@@ -0,0 +1,314 @@
+# src/judge_engine.py
+"""
+Judge 评估引擎 - 并发执行 LLM judge 调用
+
+eval_file 与 run_eval 的 judge 阶段共用：
+- 与样本无关的评估前缀（业务目标、must_have / nice_to_have、评分区间）只构建一次，
+  在 judge 提示词中位于样本和输出之前，保持稳定以便 prompt cache 命中
+- 每个样本只渲染一次 case_rendered，同一样本的多个 flow 依次提交，共享更长的前缀
+- 有界线程池并发调用 judge，结果在主线程按完成顺序回调
+- 可选的对比模式：同一样本的多个 flow 输出在一次 judge 调用中评估，解析失败时回退到逐个评估
+- EvalRowWriter 边评估边写 CSV，结束时按任务顺序整理
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import string
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .chains import load_flow_config
+from .eval_llm_judge import (
+    add_token_info,
+    build_judge_static_vars,
+    judge_compare,
+    judge_one,
+    render_case_for_judge,
+    split_token_info,
+)
+
+logger = logging.getLogger(__name__)
+
+# 随样本变化的 judge 变量，应位于提示词末尾
+DYNAMIC_JUDGE_VARS = {
+    "case_rendered", "input", "context", "expected", "output", "flow_name", "flow_count", "outputs_rendered",
+}
+
+
+@dataclass
+class JudgeTask:
+    """一次 (case, flow) 评估任务"""
+    case: Dict[str, Any]
+    flow_name: str
+    output: str
+
+
+@dataclass
+class JudgeResult:
+    """评估任务的结果，index 为任务在提交列表中的位置"""
+    index: int
+    task: JudgeTask
+    data: Dict[str, Any]
+    token_info: Dict[str, int]
+    compared: bool = False  # 是否来自对比评估
+
+
+def find_prefix_breaks(flow_cfg: Dict[str, Any]) -> List[str]:
+    """
+    检查 judge 提示词中是否有静态变量出现在样本相关变量之后
+
+    Returns:
+        位于动态内容之后的静态变量名列表；为空表示前缀稳定
+    """
+    breaks: List[str] = []
+    seen_dynamic = False
+    formatter = string.Formatter()
+    for key in ("system_prompt", "user_template"):
+        try:
+            fields = [name for _, name, _, _ in formatter.parse(flow_cfg.get(key) or "") if name]
+        except ValueError:
+            continue
+        for name in fields:
+            if name in DYNAMIC_JUDGE_VARS:
+                seen_dynamic = True
+            elif seen_dynamic and name not in breaks:
+                breaks.append(name)
+    return breaks
+
+
+class JudgeEngine:
+    """
+    对一组 (case, flow) 输出执行 judge 评估
+
+    judge_one 自带降级处理，单个任务失败会返回降级结果而不是抛出异常。
+    """
+
+    def __init__(
+        self,
+        task_agent_cfg,
+        judge_config: Dict[str, Any],
+        judge_flow_name: str,
+        max_workers: int = 1,
+        compare_flow_name: Optional[str] = None,
+    ):
+        """
+        初始化引擎
+
+        Args:
+            task_agent_cfg: 被评估的 TaskAgent 配置
+            judge_config: build_judge_chain 返回的 judge 配置
+            judge_flow_name: judge 提示词名称
+            max_workers: 同时进行的 judge 调用数量
+            compare_flow_name: 对比评估提示词名称；设置后同一样本的多个 flow 合并为一次调用
+        """
+        self.task_agent_cfg = task_agent_cfg
+        self.judge_config = judge_config
+        self.judge_flow_name = judge_flow_name
+        self.max_workers = max(1, max_workers)
+        self.compare_flow_name = compare_flow_name
+        self.static_vars = build_judge_static_vars(task_agent_cfg, judge_config)
+        self.compare_calls = 0
+        self.compare_fallbacks = 0
+        self._lock = threading.Lock()
+
+        self._check_prefix(judge_flow_name, judge_config.get("flow_cfg") or {})
+        if compare_flow_name:
+            self._check_prefix(compare_flow_name, load_flow_config(compare_flow_name, agent_id="judge_default"))
+
+    @staticmethod
+    def _check_prefix(flow_name: str, flow_cfg: Dict[str, Any]) -> None:
+        breaks = find_prefix_breaks(flow_cfg)
+        if breaks:
+            logger.warning(
+                f"Judge 提示词 {flow_name} 中的静态变量 {', '.join(breaks)} 位于样本内容之后，"
+                f"无法形成稳定前缀"
+            )
+
+    def judge(
+        self,
+        task: JudgeTask,
+        case_rendered: Optional[str] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """评估单个任务，返回 (评估结果, token 统计)"""
+        return judge_one(
+            task_agent_cfg=self.task_agent_cfg,
+            flow_name=task.flow_name,
+            case=task.case,
+            output=task.output,
+            judge_config=self.judge_config,
+            judge_flow_name=self.judge_flow_name,
+            static_vars=self.static_vars,
+            case_rendered=case_rendered,
+        )
+
+    def judge_group(
+        self,
+        items: Sequence[Tuple[int, JudgeTask]],
+        case_rendered: Optional[str] = None,
+    ) -> List[JudgeResult]:
+        """
+        评估同一样本的一组任务
+
+        多于一个任务且启用对比模式时先尝试一次对比评估，失败则逐个评估；
+        失败的对比调用已消耗的 token 分摊到逐个评估的结果中。
+        """
+        spent: List[Dict[str, int]] = [{} for _ in items]
+        if self.compare_flow_name and len(items) > 1:
+            case = items[0][1].case
+            outputs = {task.flow_name: task.output for _, task in items}
+            by_flow, token_info = judge_compare(
+                task_agent_cfg=self.task_agent_cfg,
+                case=case,
+                outputs=outputs,
+                judge_config=self.judge_config,
+                compare_flow_name=self.compare_flow_name,
+                static_vars=self.static_vars,
+                case_rendered=case_rendered,
+            )
+            with self._lock:
+                self.compare_calls += 1
+                if by_flow is None:
+                    self.compare_fallbacks += 1
+            shares = split_token_info(token_info, len(items))
+            if by_flow is not None:
+                return [
+                    JudgeResult(index, task, by_flow[task.flow_name], share, compared=True)
+                    for (index, task), share in zip(items, shares)
+                ]
+            spent = shares
+
+        results = []
+        for (index, task), compare_share in zip(items, spent):
+            data, token_info = self.judge(task, case_rendered)
+            results.append(JudgeResult(index, task, data, add_token_info(token_info, compare_share)))
+        return results
+
+    def run(
+        self,
+        tasks: Sequence[JudgeTask],
+        on_result: Optional[Callable[[int, JudgeResult], None]] = None,
+    ) -> List[JudgeResult]:
+        """
+        执行所有评估任务
+
+        Args:
+            tasks: 评估任务列表，同一样本的任务应相邻
+            on_result: 每完成一个任务在调用线程中回调 (已完成数量, 结果)
+
+        Returns:
+            与 tasks 顺序一致的结果列表
+        """
+        # 每个样本只渲染一次；对比模式下同一样本的任务作为一个整体提交
+        rendered: Dict[int, str] = {}
+        groups: List[List[Tuple[int, JudgeTask]]] = []
+        group_of_case: Dict[int, List[Tuple[int, JudgeTask]]] = {}
+        for index, task in enumerate(tasks):
+            key = id(task.case)
+            if key not in rendered:
+                rendered[key] = render_case_for_judge(self.task_agent_cfg, task.case)
+            if self.compare_flow_name and key in group_of_case:
+                group_of_case[key].append((index, task))
+            else:
+                group_of_case[key] = [(index, task)]
+                groups.append(group_of_case[key])
+
+        results: List[Optional[JudgeResult]] = [None] * len(tasks)
+        done = 0
+
+        def finish(group_results: List[JudgeResult]) -> None:
+            nonlocal done
+            for result in group_results:
+                done += 1
+                results[result.index] = result
+                if on_result:
+                    on_result(done, result)
+
+        if self.max_workers == 1 or len(groups) <= 1:
+            for group in groups:
+                finish(self.judge_group(group, rendered[id(group[0][1].case)]))
+            return results
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self.judge_group, group, rendered[id(group[0][1].case)])
+                for group in groups
+            ]
+            try:
+                for future in as_completed(futures):
+                    finish(future.result())
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        return results
+
+
+class EvalRowWriter:
+    """
+    流式写入展平后的评估结果
+
+    每写入一行立即落盘；遇到新列时用扩展后的表头重写文件。
+    关闭时按任务顺序重写一次，使最终文件与顺序执行的结果一致。
+    只应在单个线程中调用。
+    """
+
+    def __init__(self, path: Path, leading_fields: Sequence[str] = ("id", "flow")):
+        self.path = Path(path)
+        self.leading_fields = list(leading_fields)
+        self.fieldnames: List[str] = []
+        self._entries: List[Tuple[int, Dict[str, Any]]] = []
+        self._file = None
+        self._writer: Optional[csv.DictWriter] = None
+
+    @property
+    def rows(self) -> List[Dict[str, Any]]:
+        """按任务顺序排列的已写入行"""
+        return [row for _, row in sorted(self._entries, key=lambda entry: entry[0])]
+
+    def write(self, index: int, row: Dict[str, Any]) -> None:
+        """写入一行，index 决定该行在最终文件中的位置"""
+        self._entries.append((index, row))
+        if self._writer is not None and set(row) <= set(self.fieldnames):
+            self._writer.writerow(row)
+            self._file.flush()
+            return
+        self._rewrite([r for _, r in self._entries], keep_open=True)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+        if self._entries:
+            self._rewrite(self.rows, keep_open=False)
+
+    def _rewrite(self, rows: List[Dict[str, Any]], keep_open: bool) -> None:
+        if self._file is not None:
+            self._file.close()
+
+        keys = {key for row in rows for key in row}
+        self.fieldnames = sorted(keys, key=lambda x: (x not in self.leading_fields, x))
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        self._writer.writeheader()
+        self._writer.writerows(rows)
+        self._file.flush()
+
+        if not keep_open:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def __enter__(self) -> "EvalRowWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
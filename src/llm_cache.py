@@ -0,0 +1,283 @@
+# src/llm_cache.py
+"""
+LLM 响应缓存 - 按内容寻址的磁盘缓存
+
+对同一 flow、同一测试集重复评估时，避免重复付费调用模型：
+- 键：渲染后的消息、模型、temperature、output_parser 配置的 SHA-256
+- 存储：data/cache/llm_responses.sqlite（SQLite，WAL 模式，支持多进程读写）
+- 读穿/写穿：命中时直接返回缓存的响应，未命中时调用模型并写入
+- TTL 过期与按条目数的 LRU 淘汰
+- 默认关闭，通过 CLI 的 --cache 或环境变量 LLM_CACHE=1 开启
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from .paths import DATA_DIR
+
+DEFAULT_CACHE_PATH = DATA_DIR / "cache" / "llm_responses.sqlite"
+
+
+def make_cache_key(
+    messages: List[BaseMessage],
+    model: str,
+    temperature: Optional[float],
+    parser_config: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    计算缓存键
+
+    Args:
+        messages: 渲染后的消息列表
+        model: 模型名称
+        temperature: 温度参数
+        parser_config: output_parser 配置（可选）
+
+    Returns:
+        SHA-256 十六进制字符串
+    """
+    payload = {
+        "messages": [[message.type, message.content] for message in messages],
+        "model": model,
+        "temperature": temperature,
+        "parser": parser_config,
+    }
+    data = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    基于 SQLite 的 LLM 响应缓存
+
+    线程安全；多个进程可以共享同一个缓存文件。
+    """
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        ttl_seconds: Optional[float] = None,
+        max_entries: int = 100_000,
+    ):
+        """
+        初始化缓存
+
+        Args:
+            path: SQLite 文件路径
+            ttl_seconds: 条目有效期（秒），None 表示永不过期
+            max_entries: 最多保留的条目数，超出时淘汰最久未访问的条目
+        """
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[AIMessage]:
+        """
+        读取缓存的响应
+
+        Returns:
+            缓存的 AIMessage，未命中或已过期时返回 None
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+
+        data = json.loads(row[0])
+        response_metadata = dict(data.get("response_metadata") or {})
+        response_metadata["cache_hit"] = True
+        return AIMessage(
+            content=data.get("content", ""),
+            usage_metadata=data.get("usage_metadata"),
+            response_metadata=response_metadata,
+        )
+
+    def put(self, key: str, message: BaseMessage, model: Optional[str] = None) -> None:
+        """写入一条响应，超出 max_entries 时淘汰最久未访问的条目"""
+        data = json.dumps(
+            {
+                "content": message.content,
+                "usage_metadata": getattr(message, "usage_metadata", None),
+                "response_metadata": getattr(message, "response_metadata", None),
+            },
+            ensure_ascii=False,
+            default=str,
+        )
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, data, now, now),
+            )
+            self.writes += 1
+
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """删除所有过期条目，返回删除数量"""
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self) -> None:
+        """清空缓存和统计信息"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+            self.writes = 0
+            self.evictions = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "path": str(self.path),
+                "size": size,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total > 0 else 0.0,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_enabled: Optional[bool] = None
+_cache_lock = threading.Lock()
+
+
+def _env_enabled() -> bool:
+    return os.getenv("LLM_CACHE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def configure_llm_cache(
+    enabled: bool,
+    path: Optional[Path] = None,
+    ttl_seconds: Optional[float] = None,
+    max_entries: Optional[int] = None,
+) -> Optional[LLMResponseCache]:
+    """
+    开启或关闭全局 LLM 响应缓存
+
+    Args:
+        enabled: 是否启用
+        path: 缓存文件路径（默认 data/cache/llm_responses.sqlite）
+        ttl_seconds: 条目有效期（秒）
+        max_entries: 最多保留的条目数
+
+    Returns:
+        启用时返回缓存实例，否则返回 None
+    """
+    global _cache, _cache_enabled
+    with _cache_lock:
+        _cache_enabled = enabled
+        if not enabled:
+            return None
+
+        kwargs: Dict[str, Any] = {"path": path or DEFAULT_CACHE_PATH, "ttl_seconds": ttl_seconds}
+        if max_entries is not None:
+            kwargs["max_entries"] = max_entries
+        if (
+            _cache is None
+            or _cache.path != Path(kwargs["path"])
+            or _cache.ttl_seconds != ttl_seconds
+            or (max_entries is not None and _cache.max_entries != max_entries)
+        ):
+            if _cache is not None:
+                _cache.close()
+            _cache = LLMResponseCache(**kwargs)
+        return _cache
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """获取全局 LLM 响应缓存；未启用时返回 None"""
+    global _cache
+    with _cache_lock:
+        enabled = _cache_enabled if _cache_enabled is not None else _env_enabled()
+        if not enabled:
+            return None
+        if _cache is None:
+            _cache = LLMResponseCache()
+        return _cache
+
+
+def describe_llm_cache() -> Optional[str]:
+    """返回缓存命中情况的一行摘要；未启用缓存时返回 None"""
+    cache = get_llm_cache()
+    if cache is None:
+        return None
+    stats = cache.get_stats()
+    return (
+        f"LLM 响应缓存: 命中 {stats['hits']} / 未命中 {stats['misses']}"
+        f"（命中率 {stats['hit_rate']:.1%}，共 {stats['size']} 条）"
+    )
@@ -0,0 +1,533 @@
+# src/llm_governor.py
+"""
+LLM 并发调度器 - 进程级的模型调用限流
+
+所有经过 chains 的模型调用都先向调度器申请执行槽位：
+- 全局 in-flight 上限，约束整个进程同时进行的模型请求数
+- 每个模型独立的令牌桶：每分钟请求数（RPM）与估算 token 数（TPM）
+- AIMD 自适应并发：成功时缓慢增加模型并发上限，遇到 429/超时时减半并退避
+- 记录排队等待时间、限流次数等指标
+
+同步调用方在线程中阻塞等待槽位（acquire/invoke）；协程调用方使用
+aacquire/ainvoke 在事件循环上等待，两者共享同一套槽位和限流状态。
+带取消令牌的同步调用在调度器自有的有界线程池中执行，取消后立即归还槽位。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .cancellation import CancellationToken, ExecutionCancelled
+from .config import get_llm_max_in_flight, get_llm_rpm_limit, get_llm_tpm_limit
+
+
+@dataclass
+class ModelLimits:
+    """
+    单个模型的限流配置
+
+    Attributes:
+        rpm: 每分钟请求数上限（None 表示不限）
+        tpm: 每分钟 token 数上限（None 表示不限）
+        max_concurrency: 该模型同时进行的请求数上限（None 表示只受全局上限约束）
+    """
+    rpm: Optional[int] = None
+    tpm: Optional[int] = None
+    max_concurrency: Optional[int] = None
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    容量为一分钟的配额，按 rate_per_minute / 60 的速度持续补充。
+    允许透支（实际 token 用量超过估算时），透支部分由后续补充偿还。
+    """
+
+    def __init__(self, rate_per_minute: Optional[float], now: Optional[float] = None):
+        """
+        初始化令牌桶
+
+        Args:
+            rate_per_minute: 每分钟配额（None 或 0 表示不限）
+            now: 当前时间（time.monotonic），默认取当前时间
+        """
+        self.capacity = float(rate_per_minute) if rate_per_minute else None
+        self.tokens = self.capacity or 0.0
+        self._updated = time.monotonic() if now is None else now
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity is None
+
+    def _refill(self, now: float) -> None:
+        if self.capacity is None:
+            return
+        elapsed = max(0.0, now - self._updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.capacity / 60.0)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """返回获得 amount 个令牌还需等待的秒数（0 表示可立即获取）"""
+        if self.capacity is None:
+            return 0.0
+        self._refill(now)
+        # 单次请求超过整桶容量时，按整桶计算，避免永远无法满足
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * 60.0 / self.capacity
+
+    def consume(self, amount: float, now: float) -> None:
+        """扣除令牌（amount 可为负数，用于按实际用量退还）"""
+        if self.capacity is None:
+            return
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+@dataclass
+class _ModelState:
+    """单个模型的运行时状态与指标"""
+    limits: ModelLimits
+    requests: TokenBucket
+    tokens: TokenBucket
+    concurrency_limit: float
+    in_flight: int = 0
+    blocked_until: float = 0.0
+    backoff_attempts: int = 0
+    total_requests: int = 0
+    throttled: int = 0
+    retries: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    wait_samples: int = 0
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """判断异常是否为限流（429）或超时，这两类错误触发 AIMD 减速与重试"""
+    if isinstance(error, TimeoutError):
+        return True
+
+    name = type(error).__name__
+    if name in ("RateLimitError", "APITimeoutError", "Timeout", "ReadTimeout"):
+        return True
+
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    # 只看状态码和异常类型：错误消息里的数字（如 token 数、请求 ID）不可靠
+    return status == 429
+
+
+class LLMGovernor:
+    """
+    进程级 LLM 调度器
+
+    线程安全。调用方通过 invoke()/ainvoke() 执行一次模型请求，或使用
+    acquire()/aacquire() 与 release() 自行管理槽位。
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 16,
+        default_limits: Optional[ModelLimits] = None,
+        decrease_factor: float = 0.5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        max_retries: int = 3,
+    ):
+        """
+        初始化调度器
+
+        Args:
+            max_in_flight: 全局同时进行的请求数上限
+            default_limits: 未单独配置的模型使用的限流配置
+            decrease_factor: 遇到限流时并发上限的乘性缩减系数
+            base_backoff: 限流后首次退避时间（秒），之后按指数增长
+            max_backoff: 退避时间上限（秒）
+            max_retries: 限流或超时后的最大重试次数
+        """
+        self.max_in_flight = max_in_flight
+        self.default_limits = default_limits or ModelLimits()
+        self.decrease_factor = decrease_factor
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._model_limits: Dict[str, ModelLimits] = {}
+        self._models: Dict[str, _ModelState] = {}
+        # 正在等待槽位的协程：Future -> 所属事件循环
+        self._async_waiters: Dict[asyncio.Future, asyncio.AbstractEventLoop] = {}
+        # 带取消令牌的调用在此执行；被取消后仍在进行的请求最多占用 max_in_flight 个线程
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="llm-call")
+
+    def configure_model(
+        self,
+        model: str,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> None:
+        """
+        为指定模型设置限流配置（重置该模型的运行时状态）
+
+        Args:
+            model: 模型名称
+            rpm: 每分钟请求数上限
+            tpm: 每分钟 token 数上限
+            max_concurrency: 模型并发上限
+        """
+        with self._cond:
+            self._model_limits[model] = ModelLimits(rpm=rpm, tpm=tpm, max_concurrency=max_concurrency)
+            self._models.pop(model, None)
+            self._notify_all()
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            limits = self._model_limits.get(model, self.default_limits)
+            now = time.monotonic()
+            state = _ModelState(
+                limits=limits,
+                requests=TokenBucket(limits.rpm, now),
+                tokens=TokenBucket(limits.tpm, now),
+                concurrency_limit=float(self._max_concurrency(limits)),
+            )
+            self._models[model] = state
+        return state
+
+    def _max_concurrency(self, limits: ModelLimits) -> int:
+        if limits.max_concurrency:
+            return min(limits.max_concurrency, self.max_in_flight)
+        return self.max_in_flight
+
+    def needs_token_estimate(self, model: str) -> bool:
+        """模型是否配置了 TPM 限制（未配置时无需估算 token）"""
+        with self._cond:
+            return not self._state(model).tokens.unlimited
+
+    def acquire(
+        self,
+        model: str,
+        estimated_tokens: int = 0,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> float:
+        """
+        阻塞直到获得执行槽位
+
+        Args:
+            model: 模型名称
+            estimated_tokens: 本次请求的估算 token 数
+            cancel_token: 取消令牌（可选），取消时停止排队
+
+        Returns:
+            排队等待时间（秒）
+
+        Raises:
+            ExecutionCancelled: 排队期间被取消
+        """
+        start = time.monotonic()
+        unregister = cancel_token.register(self._wake_waiters) if cancel_token is not None else None
+        try:
+            return self._acquire(model, estimated_tokens, cancel_token, start)
+        finally:
+            if unregister is not None:
+                unregister()
+
+    def _wake_waiters(self) -> None:
+        with self._cond:
+            self._notify_all()
+
+    def _notify_all(self) -> None:
+        """唤醒所有等待槽位的线程和协程（调用方持有 _cond）"""
+        self._cond.notify_all()
+        for waiter, loop in list(self._async_waiters.items()):
+            try:
+                loop.call_soon_threadsafe(_wake_future, waiter)
+            except RuntimeError:
+                # 等待方的事件循环已关闭
+                self._async_waiters.pop(waiter, None)
+
+    def _try_acquire(self, state: _ModelState, estimated_tokens: int, start: float) -> Tuple[bool, float]:
+        """
+        尝试占用槽位（调用方持有 _cond）
+
+        Returns:
+            (True, 排队等待时间) 或 (False, 需要等待的秒数)；
+            等待其他请求释放槽位时秒数为 math.inf
+        """
+        now = time.monotonic()
+        if (
+            self._in_flight >= self.max_in_flight
+            or state.in_flight >= max(1, int(state.concurrency_limit))
+        ):
+            return False, math.inf
+
+        wait = max(
+            state.blocked_until - now,
+            state.requests.wait_time(1, now),
+            state.tokens.wait_time(estimated_tokens, now),
+        )
+        if wait > 0:
+            return False, wait
+
+        state.requests.consume(1, now)
+        state.tokens.consume(estimated_tokens, now)
+        state.in_flight += 1
+        state.total_requests += 1
+        self._in_flight += 1
+
+        waited = now - start
+        state.total_wait += waited
+        state.max_wait = max(state.max_wait, waited)
+        state.wait_samples += 1
+        return True, waited
+
+    def _acquire(
+        self,
+        model: str,
+        estimated_tokens: int,
+        cancel_token: Optional[CancellationToken],
+        start: float,
+    ) -> float:
+        with self._cond:
+            state = self._state(model)
+            while True:
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                acquired, value = self._try_acquire(state, estimated_tokens, start)
+                if acquired:
+                    return value
+                self._cond.wait(timeout=None if value == math.inf else value)
+
+    async def aacquire(self, model: str, estimated_tokens: int = 0) -> float:
+        """
+        acquire 的协程版本：在事件循环上等待槽位，不阻塞线程
+
+        Args:
+            model: 模型名称
+            estimated_tokens: 本次请求的估算 token 数
+
+        Returns:
+            排队等待时间（秒）
+        """
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                acquired, value = self._try_acquire(self._state(model), estimated_tokens, start)
+                if acquired:
+                    return value
+                waiter = loop.create_future()
+                self._async_waiters[waiter] = loop
+            try:
+                await asyncio.wait({waiter}, timeout=None if value == math.inf else value)
+            finally:
+                with self._cond:
+                    self._async_waiters.pop(waiter, None)
+
+    def release(
+        self,
+        model: str,
+        throttled: bool = False,
+        estimated_tokens: int = 0,
+        actual_tokens: Optional[int] = None,
+        cancelled: bool = False,
+    ) -> None:
+        """
+        归还执行槽位并根据结果调整并发上限
+
+        Args:
+            model: 模型名称
+            throttled: 本次请求是否遇到限流或超时
+            estimated_tokens: acquire 时使用的估算 token 数
+            actual_tokens: 实际 token 用量（已知时用于校正 TPM 令牌桶）
+            cancelled: 请求在完成前被取消（只归还槽位，不调整并发上限）
+        """
+        with self._cond:
+            state = self._state(model)
+            now = time.monotonic()
+            state.in_flight = max(0, state.in_flight - 1)
+            self._in_flight = max(0, self._in_flight - 1)
+
+            if actual_tokens is not None:
+                state.tokens.consume(actual_tokens - estimated_tokens, now)
+
+            max_concurrency = self._max_concurrency(state.limits)
+            if cancelled:
+                # 被取消的请求不反映模型的负载情况，不调整并发上限
+                pass
+            elif throttled:
+                state.throttled += 1
+                state.concurrency_limit = max(1.0, state.concurrency_limit * self.decrease_factor)
+                backoff = min(self.max_backoff, self.base_backoff * (2 ** state.backoff_attempts))
+                backoff *= random.uniform(0.5, 1.0)
+                state.blocked_until = max(state.blocked_until, now + backoff)
+                state.backoff_attempts += 1
+            else:
+                # 加性增长：每个并发窗口的成功请求合计使上限 +1
+                state.concurrency_limit = min(
+                    float(max_concurrency),
+                    state.concurrency_limit + 1.0 / state.concurrency_limit,
+                )
+                state.backoff_attempts = 0
+
+            self._notify_all()
+
+    def invoke(
+        self,
+        model: str,
+        func: Callable[[], Any],
+        estimated_tokens: int = 0,
+        usage: Optional[Callable[[Any], Optional[int]]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Any:
+        """
+        在调度器控制下执行一次模型调用，限流或超时时自动退避重试
+
+        Args:
+            model: 模型名称
+            func: 执行模型调用的无参函数
+            estimated_tokens: 估算 token 数
+            usage: 从调用结果中提取实际 token 数的函数（可选）
+            cancel_token: 取消令牌（可选）。提供时 func 在调度器的线程池中执行，
+                取消后立即归还槽位并返回，不等待请求结束，也不再重试
+
+        Returns:
+            func 的返回值
+
+        Raises:
+            ExecutionCancelled: 请求完成前被取消
+        """
+        attempt = 0
+        while True:
+            self.acquire(model, estimated_tokens, cancel_token)
+            try:
+                result = cancel_token.run(func, self._executor) if cancel_token is not None else func()
+            except ExecutionCancelled:
+                self.release(model, estimated_tokens=estimated_tokens, cancelled=True)
+                raise
+            except Exception as e:
+                throttled = is_throttling_error(e)
+                self.release(model, throttled=throttled, estimated_tokens=estimated_tokens)
+                if not throttled or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                with self._cond:
+                    self._state(model).retries += 1
+                continue
+
+            actual_tokens = None
+            if usage is not None:
+                try:
+                    actual_tokens = usage(result)
+                except Exception:
+                    actual_tokens = None
+            self.release(model, estimated_tokens=estimated_tokens, actual_tokens=actual_tokens)
+            return result
+
+    async def ainvoke(
+        self,
+        model: str,
+        func: Callable[[], Awaitable[Any]],
+        estimated_tokens: int = 0,
+        usage: Optional[Callable[[Any], Optional[int]]] = None,
+    ) -> Any:
+        """
+        invoke 的协程版本：func 返回 awaitable（如 llm.ainvoke），退避重试规则相同
+
+        所在 Task 被取消时归还槽位并向上传递 CancelledError。
+
+        Returns:
+            await func() 的结果
+        """
+        attempt = 0
+        while True:
+            await self.aacquire(model, estimated_tokens)
+            try:
+                result = await func()
+            except asyncio.CancelledError:
+                self.release(model, estimated_tokens=estimated_tokens)
+                raise
+            except Exception as e:
+                throttled = is_throttling_error(e)
+                self.release(model, throttled=throttled, estimated_tokens=estimated_tokens)
+                if not throttled or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                with self._cond:
+                    self._state(model).retries += 1
+                continue
+
+            actual_tokens = None
+            if usage is not None:
+                try:
+                    actual_tokens = usage(result)
+                except Exception:
+                    actual_tokens = None
+            self.release(model, estimated_tokens=estimated_tokens, actual_tokens=actual_tokens)
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取调度器指标"""
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "models": {
+                    model: {
+                        "in_flight": state.in_flight,
+                        "concurrency_limit": state.concurrency_limit,
+                        "requests": state.total_requests,
+                        "throttled": state.throttled,
+                        "retries": state.retries,
+                        "avg_wait": state.total_wait / state.wait_samples if state.wait_samples else 0.0,
+                        "max_wait": state.max_wait,
+                        "total_wait": state.total_wait,
+                        "rpm": state.limits.rpm,
+                        "tpm": state.limits.tpm,
+                    }
+                    for model, state in self._models.items()
+                },
+            }
+
+
+def _wake_future(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+_governor: Optional[LLMGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_llm_governor() -> LLMGovernor:
+    """获取全局 LLM 调度器（首次调用时按环境变量配置创建）"""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = LLMGovernor(
+                max_in_flight=get_llm_max_in_flight(),
+                default_limits=ModelLimits(
+                    rpm=get_llm_rpm_limit() or None,
+                    tpm=get_llm_tpm_limit() or None,
+                ),
+            )
+        return _governor
+
+
+def set_llm_governor(governor: Optional[LLMGovernor]) -> None:
+    """替换全局 LLM 调度器（None 表示下次使用时按环境变量重新创建）"""
+    global _governor
+    with _governor_lock:
+        _governor = governor
@@ -0,0 +1,200 @@
+# src/pipeline_catalog.py
+"""
+Pipeline 目录服务 - 内存中的 pipeline 清单与摘要信息
+
+供 REST API 的 pipeline 列表、搜索和分页使用：
+- 每次访问只扫描目录项并 stat 配置文件，mtime / 大小未变化的 pipeline 不重新读取
+- 摘要（名称、描述、版本、步骤数、时间戳）在文件变化时重新解析
+- 查找规则与 find_pipeline_config_file 一致：目录按 PIPELINE_DIRS 顺序，
+  同一目录下 {id}.yaml 优先于 {id}/pipeline.yaml
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from . import pipeline_config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PipelineEntry:
+    """目录中的一个 pipeline"""
+    pipeline_id: str
+    path: Path
+    stat_key: Tuple[int, int]
+    name: str
+    description: str = ""
+    version: str = "1.0.0"
+    steps_count: int = 0
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    error: Optional[str] = None  # 配置文件无法读取时的错误信息
+    _search_text: str = field(default="", repr=False)
+
+    def matches(self, query: str) -> bool:
+        """id / 名称 / 描述是否包含 query（忽略大小写）"""
+        return query.lower() in self._search_text
+
+    def summary(self) -> Dict[str, Any]:
+        """摘要信息字典"""
+        return {
+            "id": self.pipeline_id,
+            "name": self.name,
+            "description": self.description,
+            "version": self.version,
+            "steps_count": self.steps_count,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _discover(base_dirs: List[Path]) -> Dict[str, Path]:
+    """扫描 pipeline 目录，返回 pipeline_id -> 配置文件路径"""
+    found: Dict[str, Path] = {}
+    for base_dir in base_dirs:
+        try:
+            entries = list(os.scandir(base_dir))
+        except OSError:
+            continue
+        files: Dict[str, Path] = {}
+        dirs: Dict[str, Path] = {}
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(".yaml"):
+                files[entry.name[:-len(".yaml")]] = Path(entry.path)
+            elif entry.is_dir():
+                candidate = Path(entry.path) / "pipeline.yaml"
+                if candidate.is_file():
+                    dirs[entry.name] = candidate
+        for pipeline_id, path in {**dirs, **files}.items():
+            found.setdefault(pipeline_id, path)
+    return found
+
+
+def _read_entry(pipeline_id: str, path: Path, stat_key: Tuple[int, int]) -> PipelineEntry:
+    """读取配置文件并生成摘要；文件无法解析时返回最小摘要"""
+    try:
+        st = path.stat()
+        created_at = datetime.fromtimestamp(st.st_ctime)
+        updated_at = datetime.fromtimestamp(st.st_mtime)
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f)
+        if not isinstance(data, dict):
+            raise ValueError("配置文件根节点必须是字典")
+        entry = PipelineEntry(
+            pipeline_id=pipeline_id,
+            path=path,
+            stat_key=stat_key,
+            name=data.get("name", pipeline_id),
+            description=data.get("description", ""),
+            version=data.get("version", "1.0.0"),
+            steps_count=len(data.get("steps", [])),
+            created_at=created_at,
+            updated_at=updated_at,
+        )
+    except Exception as e:
+        logger.debug(f"无法读取 pipeline {pipeline_id} 的摘要: {e}")
+        entry = PipelineEntry(pipeline_id=pipeline_id, path=path, stat_key=stat_key, name=pipeline_id, error=str(e))
+    entry._search_text = "\n".join(
+        str(value).lower() for value in (entry.pipeline_id, entry.name, entry.description)
+    )
+    return entry
+
+
+class PipelineCatalog:
+    """
+    Pipeline 清单缓存
+
+    线程安全。refresh 只重新读取新增或修改过的配置文件。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, PipelineEntry] = {}
+        self.reads = 0
+
+    def refresh(self) -> List[PipelineEntry]:
+        """与文件系统同步，返回按 id 排序的全部 pipeline"""
+        paths = _discover(list(pipeline_config.PIPELINE_DIRS))
+
+        with self._lock:
+            current = dict(self._entries)
+
+        entries: Dict[str, PipelineEntry] = {}
+        reads = 0
+        for pipeline_id, path in paths.items():
+            stat_key = _stat_key(path)
+            if stat_key is None:
+                continue
+            cached = current.get(pipeline_id)
+            if cached is not None and cached.path == path and cached.stat_key == stat_key:
+                entries[pipeline_id] = cached
+            else:
+                entries[pipeline_id] = _read_entry(pipeline_id, path, stat_key)
+                reads += 1
+
+        with self._lock:
+            self._entries = entries
+            self.reads += reads
+        return [entries[pipeline_id] for pipeline_id in sorted(entries)]
+
+    def list(self, search: Optional[str] = None) -> List[PipelineEntry]:
+        """
+        列出 pipeline
+
+        Args:
+            search: 在 id / 名称 / 描述中搜索（忽略大小写）
+
+        Returns:
+            按 id 排序的 pipeline 列表
+        """
+        entries = self.refresh()
+        if search:
+            entries = [entry for entry in entries if entry.matches(search)]
+        return entries
+
+    def get(self, pipeline_id: str) -> Optional[PipelineEntry]:
+        """获取单个 pipeline 的摘要，不存在时返回 None"""
+        for entry in self.refresh():
+            if entry.pipeline_id == pipeline_id:
+                return entry
+        return None
+
+    def ids(self) -> List[str]:
+        """所有 pipeline ID（已排序）"""
+        return [entry.pipeline_id for entry in self.refresh()]
+
+    def invalidate(self) -> None:
+        """清空缓存，下次访问时重新读取全部配置"""
+        with self._lock:
+            self._entries = {}
+
+
+_catalog: Optional[PipelineCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_pipeline_catalog() -> PipelineCatalog:
+    """获取全局 pipeline 目录"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = PipelineCatalog()
+        return _catalog
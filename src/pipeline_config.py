@@ -8,11 +8,17 @@ Pipeline YAML 配置解析器
 
 from __future__ import annotations
 
+import copy
+import hashlib
+import os
+import threading
 import yaml
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Set
+from typing import Dict, FrozenSet, Iterator, List, Any, Mapping, Optional, Set, Tuple
 import logging
 
+from . import agent_registry
 from .models import PipelineConfig
 from .agent_registry import load_agent, list_available_agents, AgentConfig
 from .error_handler import create_config_error, create_data_error, handle_error
@@ -37,13 +43,124 @@ class PipelineConfigError(Exception):
     pass
 
 
+class AgentReferenceIndex:
+    """
+    Pipeline 引用检查使用的 agent / flow 索引（进程内共享）
+    
+    - agent ID 集合在首次使用时构建，registry 代数变化（重新加载或内存编辑）或
+      agent 目录变化后重建；其他来源的变化需调用 invalidate()
+    - 每个 agent 的 flow 集合按需读取，只加载 pipeline 实际引用的 agent；
+      load_agent 自带按文件 mtime 失效的缓存，agent.yaml 修改后自动更新
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agent_ids: Optional[FrozenSet[str]] = None
+        self._signature: Optional[Tuple[Any, ...]] = None
+        self._flows: Dict[str, Tuple[Any, FrozenSet[str]]] = {}
+    
+    @staticmethod
+    def _current_signature() -> Tuple[Any, ...]:
+        """agent 列表的失效依据：registry 实例及其代数（generation）与 agent 目录 mtime"""
+        registry = agent_registry.get_registry()
+        dir_mtimes = []
+        for base_dir in agent_registry.AGENT_DIRS:
+            try:
+                dir_mtimes.append(os.stat(base_dir).st_mtime_ns)
+            except OSError:
+                dir_mtimes.append(None)
+        # 持有 registry 引用并比较其单调递增的代数，重新加载或内存编辑后必然重建
+        generation = registry.generation if registry else None
+        return (registry, generation, tuple(dir_mtimes))
+    
+    @property
+    def agent_ids(self) -> FrozenSet[str]:
+        """所有可用的 agent ID"""
+        signature = self._current_signature()
+        with self._lock:
+            if self._agent_ids is not None and signature == self._signature:
+                return self._agent_ids
+        
+        try:
+            agent_ids = frozenset(list_available_agents())
+        except Exception as e:
+            logger.warning(f"加载 agent 信息时出错: {e}")
+            agent_ids = frozenset()
+        
+        with self._lock:
+            if signature != self._signature:
+                self._flows.clear()
+            self._agent_ids = agent_ids
+            self._signature = signature
+        return agent_ids
+    
+    def flows(self, agent_id: str) -> FrozenSet[str]:
+        """agent 的 flow 名称集合，加载失败时为空"""
+        try:
+            agent = load_agent(agent_id)
+        except Exception as e:
+            logger.warning(f"无法加载 agent {agent_id} 的配置: {e}")
+            return frozenset()
+        
+        with self._lock:
+            cached = self._flows.get(agent_id)
+            if cached is not None and cached[0] is agent:
+                return cached[1]
+        
+        flow_names = frozenset(flow.name for flow in agent.flows)
+        with self._lock:
+            self._flows[agent_id] = (agent, flow_names)
+        return flow_names
+    
+    def invalidate(self) -> None:
+        """清空索引"""
+        with self._lock:
+            self._agent_ids = None
+            self._signature = None
+            self._flows.clear()
+
+
+_reference_index = AgentReferenceIndex()
+
+
+def get_agent_reference_index() -> AgentReferenceIndex:
+    """获取全局 agent / flow 引用索引"""
+    return _reference_index
+
+
+class _AgentFlowsView(Mapping[str, FrozenSet[str]]):
+    """按需从引用索引读取 flow 集合的只读映射"""
+    
+    def __init__(self, index: AgentReferenceIndex):
+        self._index = index
+    
+    def __getitem__(self, agent_id: str) -> FrozenSet[str]:
+        if agent_id not in self._index.agent_ids:
+            raise KeyError(agent_id)
+        return self._index.flows(agent_id)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(self._index.agent_ids))
+    
+    def __len__(self) -> int:
+        return len(self._index.agent_ids)
+
+
 class PipelineValidator:
     """Pipeline 配置验证器"""
     
-    def __init__(self):
-        self.available_agents: Set[str] = set()
-        self.agent_flows: Dict[str, Set[str]] = {}
-        self._load_agent_info()
+    def __init__(self, index: Optional[AgentReferenceIndex] = None):
+        """
+        Args:
+            index: agent / flow 引用索引，默认使用全局共享索引
+        """
+        self.index = index or get_agent_reference_index()
+        self.agent_flows: Mapping[str, FrozenSet[str]] = _AgentFlowsView(self.index)
+    
+    @property
+    def available_agents(self) -> FrozenSet[str]:
+        """可用的 agent ID 集合"""
+        return self.index.agent_ids
     
     def detect_circular_dependencies(self, config: PipelineConfig) -> List[str]:
         """
@@ -114,24 +231,6 @@ class PipelineValidator:
         
         return errors
     
-    def _load_agent_info(self):
-        """加载可用的 agent 和 flow 信息"""
-        try:
-            self.available_agents = set(list_available_agents())
-            
-            for agent_id in self.available_agents:
-                try:
-                    agent = load_agent(agent_id)
-                    self.agent_flows[agent_id] = {flow.name for flow in agent.flows}
-                except Exception as e:
-                    logger.warning(f"无法加载 agent {agent_id} 的配置: {e}")
-                    self.agent_flows[agent_id] = set()
-                    
-        except Exception as e:
-            logger.warning(f"加载 agent 信息时出错: {e}")
-            self.available_agents = set()
-            self.agent_flows = {}
-    
     def validate_references(self, config: PipelineConfig) -> List[str]:
         """验证配置中的引用完整性，提供详细的错误信息和修复建议"""
         errors = []
@@ -140,13 +239,15 @@ class PipelineValidator:
         cycle_errors = self.detect_circular_dependencies(config)
         errors.extend(cycle_errors)
         
+        available_agents = self.available_agents
+        
         # 验证步骤中的 agent 和 flow 引用
         for step in config.steps:
             # 只验证 agent_flow 类型的步骤
             if step.type == "agent_flow":
                 # 检查 agent 是否存在
-                if step.agent not in self.available_agents:
-                    available_list = ", ".join(sorted(self.available_agents)) if self.available_agents else "无"
+                if step.agent not in available_agents:
+                    available_list = ", ".join(sorted(available_agents)) if available_agents else "无"
                     errors.append(
                         f"步骤 '{step.id}' 引用了不存在的 agent: {step.agent}\n"
                         f"  可用的 agents: {available_list}\n"
@@ -155,7 +256,7 @@ class PipelineValidator:
                     continue
                     
                 # 检查 flow 是否存在
-                agent_flows = self.agent_flows.get(step.agent, set())
+                agent_flows = self.index.flows(step.agent)
                 if step.flow not in agent_flows:
                     available_flows = ", ".join(sorted(agent_flows)) if agent_flows else "无"
                     errors.append(
@@ -203,7 +304,7 @@ class PipelineValidator:
                         f"  修复建议: 请检查步骤 ID 的拼写，或从 baseline 中移除此步骤"
                     )
                 elif pipeline_step:
-                    agent_flows = self.agent_flows.get(pipeline_step.agent, set())
+                    agent_flows = self._step_flows(pipeline_step, available_agents)
                     if baseline_step.flow not in agent_flows:
                         available_flows = ", ".join(sorted(agent_flows)) if agent_flows else "无"
                         errors.append(
@@ -230,7 +331,7 @@ class PipelineValidator:
                         f"  修复建议: 请检查步骤 ID 的拼写，或从变体中移除此覆盖"
                     )
                 elif override.flow:
-                    agent_flows = self.agent_flows.get(pipeline_step.agent, set())
+                    agent_flows = self._step_flows(pipeline_step, available_agents)
                     if override.flow not in agent_flows:
                         available_flows = ", ".join(sorted(agent_flows)) if agent_flows else "无"
                         errors.append(
@@ -259,6 +360,12 @@ class PipelineValidator:
         
         return errors
     
+    def _step_flows(self, step, available_agents: FrozenSet[str]) -> FrozenSet[str]:
+        """步骤所引用 agent 的 flow 集合，agent 不存在时为空"""
+        if step.agent not in available_agents:
+            return frozenset()
+        return self.index.flows(step.agent)
+    
     def _resolve_testset_path(self, pipeline_id: str, testset_file: str) -> Path:
         """解析测试集文件路径"""
         # 如果是绝对路径，直接使用
@@ -635,34 +742,28 @@ def _validate_json_schema(schema: Dict[str, Any], location: str) -> List[str]:
     return errors
 
 
-def load_pipeline_config(pipeline_id: str) -> PipelineConfig:
-    """加载指定 pipeline 的配置"""
-    # 查找配置文件
-    config_path = find_pipeline_config_file(pipeline_id)
-    
+# 已通过 schema / 数据验证的配置，按文件内容哈希缓存
+PARSED_CONFIG_CACHE_SIZE = 256
+_parsed_configs: "OrderedDict[str, PipelineConfig]" = OrderedDict()
+_parsed_configs_lock = threading.Lock()
+
+
+def clear_pipeline_config_cache() -> None:
+    """清空已解析的 pipeline 配置缓存"""
+    with _parsed_configs_lock:
+        _parsed_configs.clear()
+
+
+def _parse_pipeline_config(content: str, config_path: Path) -> PipelineConfig:
+    """解析配置文件内容并完成 schema 与数据验证（不含引用验证）"""
     try:
-        with open(config_path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+        data = yaml.safe_load(content)
     except yaml.YAMLError as e:
         raise create_config_error(
             message=f"YAML 解析错误: {e}",
             suggestion="请检查 YAML 文件的语法，确保缩进和格式正确",
             file_path=str(config_path)
         )
-    except FileNotFoundError:
-        available_pipelines = list_available_pipelines()
-        suggestion = f"可用的 pipelines: {', '.join(available_pipelines)}" if available_pipelines else "请先创建 pipeline 配置文件"
-        raise create_config_error(
-            message=f"Pipeline 配置文件不存在: {config_path}",
-            suggestion=suggestion,
-            file_path=str(config_path)
-        )
-    except Exception as e:
-        raise create_config_error(
-            message=f"读取配置文件时出错: {e}",
-            suggestion="请检查文件权限和磁盘空间",
-            file_path=str(config_path)
-        )
     
     if not isinstance(data, dict):
         raise create_config_error(
@@ -712,6 +813,53 @@ def load_pipeline_config(pipeline_id: str) -> PipelineConfig:
             file_path=str(config_path)
         )
     
+    return config
+
+
+def load_pipeline_config(pipeline_id: str) -> PipelineConfig:
+    """
+    加载指定 pipeline 的配置
+    
+    解析与 schema / 数据验证的结果按文件内容哈希缓存，内容不变时不重复解析；
+    引用验证依赖 agent、flow 和测试集文件的当前状态，每次都会执行。
+    每次调用返回独立的配置对象，调用方可以修改。
+    """
+    # 查找配置文件
+    config_path = find_pipeline_config_file(pipeline_id)
+    
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except FileNotFoundError:
+        available_pipelines = list_available_pipelines()
+        suggestion = f"可用的 pipelines: {', '.join(available_pipelines)}" if available_pipelines else "请先创建 pipeline 配置文件"
+        raise create_config_error(
+            message=f"Pipeline 配置文件不存在: {config_path}",
+            suggestion=suggestion,
+            file_path=str(config_path)
+        )
+    except Exception as e:
+        raise create_config_error(
+            message=f"读取配置文件时出错: {e}",
+            suggestion="请检查文件权限和磁盘空间",
+            file_path=str(config_path)
+        )
+    
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    with _parsed_configs_lock:
+        parsed = _parsed_configs.get(digest)
+        if parsed is not None:
+            _parsed_configs.move_to_end(digest)
+    
+    if parsed is None:
+        parsed = _parse_pipeline_config(content, config_path)
+        with _parsed_configs_lock:
+            _parsed_configs[digest] = parsed
+            while len(_parsed_configs) > PARSED_CONFIG_CACHE_SIZE:
+                _parsed_configs.popitem(last=False)
+    
+    config = copy.deepcopy(parsed)
+    
     # 引用完整性验证
     validator = PipelineValidator()
     reference_errors = validator.validate_references(config)
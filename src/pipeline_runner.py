@@ -10,17 +10,22 @@ from __future__ import annotations
 
 import time
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
 from .models import PipelineConfig, StepConfig, VariantConfig, EvaluationResult, CodeNodeConfig
+from .cancellation import CancellationToken, ExecutionCancelled
 from .chains import run_flow_with_tokens
 from .agent_registry import load_agent
 from .progress_tracker import PipelineProgressTracker
 from .checkpoint_manager import CheckpointManager, ResumableExecutor
 from .code_executor import CodeExecutor, ExecutionResult as CodeExecutionResult
 from .dependency_analyzer import DependencyAnalyzer, DependencyGraph
+from .execution_plan import ExecutionPlan, InputBinding, StepPlan, resolve_step_flow
 from .concurrent_executor import ConcurrentExecutor, Task, TaskResult
 from .batch_aggregator import BatchAggregator, AggregationResult
 from .error_handler import (
@@ -42,6 +47,7 @@ class StepResult:
     parser_stats: Optional[Dict[str, Any]] = None  # 新增：Output Parser 统计信息
     error: Optional[str] = None
     success: bool = True  # 新增：明确标记步骤是否成功
+    skipped: bool = False  # 步骤未执行（依赖失败、被跳过或执行已中止）
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
@@ -56,6 +62,8 @@ class StepResult:
         }
         if self.parser_stats:
             result["parser_stats"] = self.parser_stats
+        if self.skipped:
+            result["skipped"] = True
         return result
 
 
@@ -71,6 +79,10 @@ class PipelineResult:
     final_outputs: Dict[str, Any] = field(default_factory=dict)
     error: Optional[str] = None
     created_at: datetime = field(default_factory=datetime.now)
+    # 并发调度时记录：关键路径（依赖链上耗时之和最大的步骤序列）及各步骤相对样本开始的时间线
+    critical_path: List[str] = field(default_factory=list)
+    critical_path_time: float = 0.0
+    step_timings: Dict[str, Dict[str, float]] = field(default_factory=dict)
     
     def get_step_outputs_dict(self) -> Dict[str, Any]:
         """
@@ -144,6 +156,11 @@ class PipelineResult:
         if self.total_parser_stats:
             summary["parser_stats"] = self.total_parser_stats
         
+        # 添加关键路径信息
+        if self.critical_path:
+            summary["critical_path"] = self.critical_path
+            summary["critical_path_time"] = self.critical_path_time
+        
         # 添加详细的步骤性能信息
         if detailed:
             summary["step_performance"] = [
@@ -173,6 +190,10 @@ class PipelineResult:
         }
         if self.total_parser_stats:
             result["total_parser_stats"] = self.total_parser_stats
+        if self.critical_path:
+            result["critical_path"] = self.critical_path
+            result["critical_path_time"] = self.critical_path_time
+            result["step_timings"] = self.step_timings
         return result
 
 
@@ -184,7 +205,8 @@ class PipelineExecutionError(Exception):
 class PipelineRunner:
     """Pipeline 执行器"""
     
-    def __init__(self, config: PipelineConfig, enable_concurrent: bool = True, max_workers: int = 4):
+    def __init__(self, config: PipelineConfig, enable_concurrent: bool = True, max_workers: int = 4,
+                 sample_concurrency: int = 1):
         """
         初始化 Pipeline 执行器
         
@@ -192,20 +214,28 @@ class PipelineRunner:
             config: Pipeline 配置对象
             enable_concurrent: 是否启用并发执行（默认True）
             max_workers: 最大并发工作线程数（默认4）
+            sample_concurrency: 同时执行的样本数（默认1，即逐个样本执行）
         """
         self.config = config
+        # 最近一次执行的样本上下文（每个样本使用独立的上下文，这里仅保留引用以便调试和向后兼容）
         self.context: Dict[str, Any] = {}
         self.progress_callback: Optional[callable] = None
+        self.cancel_token: Optional[CancellationToken] = None
         self.error_handler = ErrorHandler()
-        self.code_executor = CodeExecutor(default_timeout=30)  # 初始化代码执行器
+        self.code_executor = CodeExecutor(default_timeout=30, max_workers=max_workers)  # 初始化代码执行器
         self.batch_aggregator = BatchAggregator()  # 初始化批量聚合器
         
         # 并发执行相关
         self.enable_concurrent = enable_concurrent
         self.max_workers = max_workers
+        self.sample_concurrency = max(1, sample_concurrency)
         self.dependency_analyzer = DependencyAnalyzer()
         self.concurrent_executor = ConcurrentExecutor(max_workers=max_workers, strategy="thread")
         
+        # 执行计划缓存（按变体名称），所有样本共享
+        self._execution_plans: Dict[str, ExecutionPlan] = {}
+        self._plan_lock = threading.Lock()
+        
         # 验证配置
         validation_errors = config.validate()
         if validation_errors:
@@ -219,11 +249,105 @@ class PipelineRunner:
         """设置进度回调函数"""
         self.progress_callback = callback
     
+    def set_cancel_token(self, token: Optional[CancellationToken]):
+        """
+        设置取消令牌
+        
+        取消后未开始的样本和步骤被跳过，正在执行的代码节点终止子进程，
+        正在等待的模型调用立即返回，execute() 抛出 ExecutionCancelled。
+        """
+        self.cancel_token = token
+    
+    def _is_cancelled(self) -> bool:
+        return self.cancel_token is not None and self.cancel_token.is_cancelled
+    
+    def _cancelled_step_result(self, step: StepConfig, execution_time: float = 0.0,
+                               started: bool = False) -> StepResult:
+        """被取消的步骤结果（started 表示步骤已开始执行后被中止）"""
+        return StepResult(
+            step_id=step.id,
+            output_key=step.output_key,
+            output_value="",
+            execution_time=execution_time,
+            error="执行已取消，步骤被中止" if started else "执行已取消，跳过步骤",
+            success=False,
+            skipped=not started
+        )
+    
+    def _skipped_step_result(self, step: StepConfig, reason: str) -> StepResult:
+        """未执行的步骤结果"""
+        return StepResult(
+            step_id=step.id,
+            output_key=step.output_key,
+            output_value="",
+            execution_time=0.0,
+            error=reason,
+            success=False,
+            skipped=True
+        )
+    
+    def _skip_reason(self, plan: ExecutionPlan, step_plan: StepPlan,
+                     completed_steps: Dict[str, StepResult],
+                     failed_required: Optional[str]) -> Optional[str]:
+        """
+        并发调度中步骤应被跳过的原因（应执行时返回 None）
+        
+        依赖被跳过或必需依赖失败时跳过；已有必需步骤失败时样本注定失败，
+        其余尚未开始的步骤也不再执行。
+        """
+        for dep_id in step_plan.dependencies:
+            dep_result = completed_steps[dep_id]
+            if dep_result.skipped:
+                logger.warning(f"跳过步骤 '{step_plan.step.id}'，因为依赖步骤 '{dep_id}' 被跳过")
+                return "依赖的步骤被跳过，跳过执行"
+            if not dep_result.success and plan.steps[dep_id].step.required:
+                logger.warning(f"跳过步骤 '{step_plan.step.id}'，因为必需的依赖步骤 '{dep_id}' 失败了")
+                return "必需的依赖步骤失败，跳过执行"
+        if failed_required:
+            logger.warning(f"跳过步骤 '{step_plan.step.id}'，因为必需步骤 '{failed_required}' 失败了")
+            return f"必需步骤 '{failed_required}' 失败，跳过执行"
+        return None
+    
+    def _is_required_failure(self, step: StepConfig, step_result: StepResult) -> bool:
+        """步骤结果是否是必需步骤自身的失败（不含跳过和取消）"""
+        return (not step_result.success and not step_result.skipped
+                and step.required and not self._is_cancelled())
+    
+    def get_execution_plan(self, variant: str = "baseline") -> ExecutionPlan:
+        """
+        获取变体的执行计划（首次调用时构建并缓存）
+        
+        Args:
+            variant: 变体名称
+            
+        Returns:
+            ExecutionPlan 实例
+        """
+        plan = self._execution_plans.get(variant)
+        if plan is not None:
+            return plan
+        
+        variant_config = self._get_variant_config(variant)
+        with self._plan_lock:
+            plan = self._execution_plans.get(variant)
+            if plan is None:
+                plan = ExecutionPlan.build(
+                    self.config,
+                    variant=variant,
+                    variant_config=variant_config,
+                    dependency_analyzer=self.dependency_analyzer
+                )
+                self._execution_plans[variant] = plan
+                logger.debug(f"构建执行计划: {self.config.id}/{variant}，拓扑顺序 {' -> '.join(plan.topological_order)}")
+        
+        return plan
+    
     def execute(self, samples: List[Dict[str, Any]], variant: str = "baseline", 
                 use_progress_tracker: bool = True, 
                 enable_checkpoint: bool = False,
                 auto_resume: bool = True,
-                max_retries: int = 3) -> List[PipelineResult]:
+                max_retries: int = 3,
+                sample_concurrency: Optional[int] = None) -> List[PipelineResult]:
         """
         执行完整的 Pipeline 流程
         
@@ -234,10 +358,15 @@ class PipelineRunner:
             enable_checkpoint: 是否启用断点续传
             auto_resume: 是否自动恢复
             max_retries: 最大重试次数
+            sample_concurrency: 同时执行的样本数（None 时使用初始化时的配置）
             
         Returns:
-            Pipeline 执行结果列表
+            Pipeline 执行结果列表，顺序与输入样本一致
         """
+        if sample_concurrency is None:
+            sample_concurrency = self.sample_concurrency
+        sample_concurrency = max(1, sample_concurrency)
+        
         if not samples:
             logger.warning("没有提供测试样本")
             return []
@@ -245,6 +374,8 @@ class PipelineRunner:
         logger.info(f"开始执行 Pipeline: {self.config.name}")
         logger.info(f"变体: {variant}")
         logger.info(f"样本数量: {len(samples)}")
+        if sample_concurrency > 1:
+            logger.info(f"样本并发数: {sample_concurrency}")
         
         # 如果启用断点续传，使用可恢复执行器
         if enable_checkpoint:
@@ -254,7 +385,8 @@ class PipelineRunner:
                 samples=samples,
                 variant=variant,
                 auto_resume=auto_resume,
-                max_retries=max_retries
+                max_retries=max_retries,
+                sample_concurrency=sample_concurrency
             )
         
         # 常规执行流程
@@ -273,46 +405,47 @@ class PipelineRunner:
             progress_tracker.start()
         
         try:
-            for i, sample in enumerate(samples):
-                sample_id = sample.get("id", f"sample_{i}")
-                
-                # 更新进度（开始处理样本）
-                if progress_tracker:
-                    progress_tracker.update_sample(i, sample_id, 0, "开始处理")
-                elif self.progress_callback:
-                    self.progress_callback(i, total_samples, f"正在处理样本: {sample_id}")
-                
-                try:
-                    result = self.execute_sample(sample, variant, progress_tracker, i)
+            if sample_concurrency > 1:
+                # 样本级并发：结果按输入顺序回调，进度按完成数推进
+                def on_sample_done(i: int, sample: Dict[str, Any], result: PipelineResult):
                     results.append(result)
-                    logger.debug(f"样本 {sample_id} 执行完成")
-                    
-                    # 更新进度（样本完成）
+                    sample_id = result.sample_id
                     if progress_tracker:
-                        progress_tracker.complete_sample(i, sample_id, failed=bool(result.error))
+                        progress_tracker.complete_sample(
+                            i, sample_id, failed=bool(result.error), completed=len(results)
+                        )
+                    elif self.progress_callback:
+                        self.progress_callback(len(results), total_samples, f"样本完成: {sample_id}")
+                
+                self.execute_samples_concurrently(
+                    indexed_samples=list(enumerate(samples)),
+                    sample_fn=lambda i, sample: self._execute_sample_safe(sample, variant, None, i),
+                    on_result=on_sample_done,
+                    sample_concurrency=sample_concurrency
+                )
+            else:
+                for i, sample in enumerate(samples):
+                    if self._is_cancelled():
+                        break
                     
-                except Exception as e:
-                    # 使用错误处理器处理异常
-                    error_info = self.error_handler.handle_error(
-                        error=e,
-                        context={"sample_id": sample_id, "sample_index": i},
-                        reraise=False
-                    )
+                    sample_id = sample.get("id", f"sample_{i}")
                     
-                    error_msg = f"样本 {sample_id} 执行失败: {error_info.message}"
-                    logger.error(error_msg)
+                    # 更新进度（开始处理样本）
+                    if progress_tracker:
+                        progress_tracker.update_sample(i, sample_id, 0, "开始处理")
+                    elif self.progress_callback:
+                        self.progress_callback(i, total_samples, f"正在处理样本: {sample_id}")
                     
-                    # 创建错误结果
-                    error_result = PipelineResult(
-                        sample_id=sample_id,
-                        variant=variant,
-                        error=error_msg
-                    )
-                    results.append(error_result)
+                    result = self._execute_sample_safe(sample, variant, progress_tracker, i)
+                    results.append(result)
                     
-                    # 更新进度（样本失败）
+                    # 更新进度（样本完成或失败）
                     if progress_tracker:
-                        progress_tracker.complete_sample(i, sample_id, failed=True)
+                        progress_tracker.complete_sample(i, sample_id, failed=bool(result.error))
+            
+            # 已取消：不再汇总部分结果
+            if self.cancel_token is not None:
+                self.cancel_token.raise_if_cancelled()
             
             # 完成进度跟踪
             if progress_tracker:
@@ -343,6 +476,94 @@ class PipelineRunner:
         
         return results
     
+    def _execute_sample_safe(self, sample: Dict[str, Any], variant: str,
+                             progress_tracker: Optional[PipelineProgressTracker],
+                             sample_index: int) -> PipelineResult:
+        """
+        执行单个样本，并把未捕获的异常转换为错误结果
+        
+        Args:
+            sample: 测试样本数据
+            variant: 变体名称
+            progress_tracker: 进度跟踪器
+            sample_index: 样本索引
+            
+        Returns:
+            Pipeline 执行结果
+        """
+        sample_id = sample.get("id", f"sample_{sample_index}")
+        
+        try:
+            result = self.execute_sample(sample, variant, progress_tracker, sample_index)
+            logger.debug(f"样本 {sample_id} 执行完成")
+            return result
+        
+        except Exception as e:
+            # 使用错误处理器处理异常
+            error_info = self.error_handler.handle_error(
+                error=e,
+                context={"sample_id": sample_id, "sample_index": sample_index},
+                reraise=False
+            )
+            
+            error_msg = f"样本 {sample_id} 执行失败: {error_info.message}"
+            logger.error(error_msg)
+            
+            # 创建错误结果
+            return PipelineResult(
+                sample_id=sample_id,
+                variant=variant,
+                error=error_msg
+            )
+    
+    def execute_samples_concurrently(
+        self,
+        indexed_samples: List[Tuple[int, Dict[str, Any]]],
+        sample_fn: Callable[[int, Dict[str, Any]], Any],
+        on_result: Callable[[int, Dict[str, Any], Any], None],
+        sample_concurrency: int
+    ) -> None:
+        """
+        使用样本级线程池并发执行样本
+        
+        on_result 在调用线程中按 indexed_samples 的顺序依次回调，
+        因此结果收集和检查点更新的顺序与逐个执行时完全一致。
+        
+        Args:
+            indexed_samples: (样本索引, 样本) 列表
+            sample_fn: 执行单个样本的函数，接收 (样本索引, 样本)
+            on_result: 结果回调，接收 (样本索引, 样本, 结果)
+            sample_concurrency: 最大并发样本数
+        """
+        if not indexed_samples:
+            return
+        
+        pending: Dict[int, Any] = {}
+        next_position = 0
+        
+        with ThreadPoolExecutor(max_workers=sample_concurrency) as pool:
+            future_to_position = {
+                pool.submit(sample_fn, index, sample): position
+                for position, (index, sample) in enumerate(indexed_samples)
+            }
+            
+            for future in as_completed(future_to_position):
+                pending[future_to_position[future]] = future.result()
+                
+                # 按输入顺序提交已完成的连续前缀
+                while next_position in pending:
+                    index, sample = indexed_samples[next_position]
+                    on_result(index, sample, pending.pop(next_position))
+                    next_position += 1
+    
+    def _create_sample_context(self, sample: Dict[str, Any], variant: str) -> Dict[str, Any]:
+        """创建单个样本的执行上下文"""
+        return {
+            "sample": sample,
+            "variant": variant,
+            "testset_fields": sample.copy()
+        }
+    
     def execute_sample(self, sample: Dict[str, Any], variant: str = "baseline", 
                       progress_tracker: Optional[PipelineProgressTracker] = None,
                       sample_index: int = 0) -> PipelineResult:
@@ -361,12 +582,9 @@ class PipelineRunner:
         sample_id = sample.get("id", "unknown")
         start_time = time.time()
         
-        # 初始化执行上下文
-        self.context = {
-            "sample": sample,
-            "variant": variant,
-            "testset_fields": sample.copy()
-        }
+        # 初始化执行上下文（每个样本独立，支持多个样本并发执行）
+        context = self._create_sample_context(sample, variant)
+        self.context = context
         
         result = PipelineResult(
             sample_id=sample_id,
@@ -374,8 +592,12 @@ class PipelineRunner:
         )
         
         try:
-            # 获取变体配置
+            if self.cancel_token is not None:
+                self.cancel_token.raise_if_cancelled()
+            
+            # 获取变体配置和预编译的执行计划
             variant_config = self._get_variant_config(variant)
+            plan = self.get_execution_plan(variant)
             
             # 根据是否启用并发执行选择不同的执行策略
             if self.enable_concurrent:
@@ -387,7 +609,9 @@ class PipelineRunner:
                     variant_config=variant_config,
                     progress_tracker=progress_tracker,
                     sample_index=sample_index,
-                    start_time=start_time
+                    start_time=start_time,
+                    context=context,
+                    plan=plan
                 )
             else:
                 # 使用顺序执行（原有逻辑）
@@ -398,7 +622,9 @@ class PipelineRunner:
                     variant_config=variant_config,
                     progress_tracker=progress_tracker,
                     sample_index=sample_index,
-                    start_time=start_time
+                    start_time=start_time,
+                    context=context,
+                    plan=plan
                 )
             
         except Exception as e:
@@ -416,7 +642,9 @@ class PipelineRunner:
         variant_config: Optional[VariantConfig],
         progress_tracker: Optional[PipelineProgressTracker],
         sample_index: int,
-        start_time: float
+        start_time: float,
+        context: Optional[Dict[str, Any]] = None,
+        plan: Optional[ExecutionPlan] = None
     ) -> PipelineResult:
         """
         顺序执行样本的 Pipeline 流程（原有逻辑）
@@ -429,10 +657,17 @@ class PipelineRunner:
             progress_tracker: 进度跟踪器
             sample_index: 样本索引
             start_time: 开始时间
+            context: 样本执行上下文（默认使用 self.context）
+            plan: 执行计划（默认使用变体的缓存执行计划）
             
         Returns:
             Pipeline 执行结果
         """
+        if context is None:
+            context = self.context
+        if plan is None:
+            plan = self.get_execution_plan(variant)
+        
         result = PipelineResult(
             sample_id=sample_id,
             variant=variant
@@ -442,6 +677,12 @@ class PipelineRunner:
         failed_outputs = set()  # 跟踪失败步骤的输出
         
         for step_index, step in enumerate(self.config.steps):
+            if self._is_cancelled():
+                # 已取消：剩余步骤全部跳过
+                result.step_results.append(self._cancelled_step_result(step))
+                failed_outputs.add(step.output_key)
+                continue
+            
             # 更新进度（开始执行步骤）
             if progress_tracker:
                 progress_tracker.update_sample(sample_index, sample_id, step_index, step.id)
@@ -459,22 +700,23 @@ class PipelineRunner:
                     output_value="",
                     execution_time=0.0,
                     error="依赖的步骤失败，跳过执行",
-                    success=False
+                    success=False,
+                    skipped=True
                 )
                 result.step_results.append(skipped_result)
                 failed_outputs.add(step.output_key)
                 continue
             
             # 执行步骤
-            step_result = self.execute_step(step, variant_config)
+            step_result = self.execute_step(step, variant_config, context, plan.steps[step.id])
             result.step_results.append(step_result)
             
             # 如果步骤执行失败
             if not step_result.success:
                 failed_outputs.add(step_result.output_key)
                 
-                # 如果是必需步骤，停止整个 Pipeline
-                if step.required:
+                # 如果是必需步骤，停止整个 Pipeline（被取消时由下面统一处理）
+                if step.required and not self._is_cancelled():
                     raise create_execution_error(
                         message=f"必需步骤 '{step.id}' 执行失败: {step_result.error}",
                         suggestion="请检查步骤配置和输入数据",
@@ -486,10 +728,15 @@ class PipelineRunner:
                     logger.warning(f"可选步骤 '{step.id}' 执行失败: {step_result.error}")
             else:
                 # 将步骤输出添加到上下文
-                self.context[step_result.output_key] = step_result.output_value
+                context[step_result.output_key] = step_result.output_value
+        
+        if self._is_cancelled():
+            result.error = str(ExecutionCancelled(self.cancel_token.reason))
+            result.total_execution_time = time.time() - start_time
+            return result
         
         # 收集最终输出
-        result.final_outputs = self._collect_final_outputs()
+        result.final_outputs = self._collect_final_outputs(context)
         
         # 计算总执行时间、token使用量和parser统计
         result.total_execution_time = time.time() - start_time
@@ -506,12 +753,15 @@ class PipelineRunner:
         variant_config: Optional[VariantConfig],
         progress_tracker: Optional[PipelineProgressTracker],
         sample_index: int,
-        start_time: float
+        start_time: float,
+        context: Optional[Dict[str, Any]] = None,
+        plan: Optional[ExecutionPlan] = None
     ) -> PipelineResult:
         """
         并发执行样本的 Pipeline 流程
         
-        实现依赖关系分析、并发组调度、同步点等待和最大并发数控制
+        基于预编译的执行计划使用就绪队列调度：每个步骤在依赖满足后立即执行，
+        受最大并发数控制，并记录关键路径耗时
         
         Args:
             sample: 测试样本数据
@@ -521,217 +771,278 @@ class PipelineRunner:
             progress_tracker: 进度跟踪器
             sample_index: 样本索引
             start_time: 开始时间
+            context: 样本执行上下文（默认使用 self.context）
+            plan: 执行计划（默认使用变体的缓存执行计划）
             
         Returns:
             Pipeline 执行结果
         """
+        if context is None:
+            context = self.context
+        if plan is None:
+            plan = self.get_execution_plan(variant)
+        
         result = PipelineResult(
             sample_id=sample_id,
             variant=variant
         )
         
         try:
-            # 1. 分析依赖关系
-            logger.debug(f"分析 Pipeline 步骤依赖关系")
-            dependency_graph = self.dependency_analyzer.analyze_dependencies(self.config.steps)
+            logger.info(f"Pipeline 按依赖就绪顺序调度 {len(plan.steps)} 个步骤（最大并发数: {self.max_workers}）")
             
-            # 2. 识别并发组
-            logger.debug(f"识别可并发执行的步骤组")
-            concurrent_groups = self.dependency_analyzer.find_concurrent_groups(dependency_graph)
+            def step_progress_callback(completed: int, running: int):
+                """将步骤调度进度传递给 PipelineProgressTracker"""
+                progress_tracker.update_sample(
+                    sample_index=sample_index,
+                    sample_id=sample_id,
+                    step_index=completed,
+                    step_name=f"并发执行 {running} 个步骤" if running else "调度完成",
+                    failed=False
+                )
             
-            logger.info(f"Pipeline 将分 {len(concurrent_groups)} 个批次执行")
-            for i, group in enumerate(concurrent_groups):
-                logger.debug(f"  批次 {i+1}: {', '.join(group)} ({len(group)} 个步骤)")
+            completed_steps, step_timings = self._schedule_steps(
+                plan=plan,
+                variant_config=variant_config,
+                context=context,
+                start_time=start_time,
+                on_progress=step_progress_callback if progress_tracker else None
+            )
             
-            # 创建步骤ID到步骤对象的映射
-            step_map = {step.id: step for step in self.config.steps}
+            self._finish_scheduled_sample(
+                result, plan, completed_steps, step_timings, context, start_time
+            )
             
-            # 跟踪已完成和失败的步骤
-            completed_steps: Dict[str, StepResult] = {}
-            failed_outputs = set()
+            logger.info(
+                f"样本 {sample_id} 并发执行完成，总耗时 {result.total_execution_time:.2f}秒，"
+                f"关键路径 {' -> '.join(result.critical_path)} ({result.critical_path_time:.2f}秒)"
+            )
             
-            # 3. 按批次执行并发组（实现同步点等待）
-            for group_index, group_step_ids in enumerate(concurrent_groups):
-                logger.debug(f"开始执行批次 {group_index + 1}/{len(concurrent_groups)}")
-                
-                # 创建当前批次的任务列表
-                tasks = []
-                skipped_steps = []
-                
-                for step_id in group_step_ids:
-                    step = step_map[step_id]
-                    
-                    # 检查依赖是否满足
-                    dependencies = step.depends_on
-                    # 也检查 input_mapping 中的依赖
-                    for source in step.input_mapping.values():
-                        # 找到产生这个输出的步骤
-                        for other_step in self.config.steps:
-                            if other_step.output_key == source and other_step.id not in dependencies:
-                                dependencies.append(other_step.id)
+        except Exception as e:
+            result.error = str(e)
+            result.total_execution_time = time.time() - start_time
+            logger.error(f"样本 {sample_id} 并发执行失败: {e}")
+        
+        return result
+    
+    def _finish_scheduled_sample(
+        self,
+        result: PipelineResult,
+        plan: ExecutionPlan,
+        completed_steps: Dict[str, StepResult],
+        step_timings: Dict[str, Dict[str, float]],
+        context: Dict[str, Any],
+        start_time: float
+    ) -> None:
+        """
+        根据调度结果填充样本结果：步骤结果、关键路径、最终输出和统计
+        
+        Raises:
+            ExecutionCancelled: 执行已取消
+            ExecutionError: 必需步骤失败
+        """
+        # 按原始步骤顺序收集结果
+        for step in self.config.steps:
+            if step.id in completed_steps:
+                result.step_results.append(completed_steps[step.id])
+        
+        # 记录关键路径
+        result.step_timings = step_timings
+        result.critical_path, result.critical_path_time = self._compute_critical_path(
+            plan, completed_steps, step_timings
+        )
+        
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+        
+        # 检查是否有必需步骤失败（被跳过的步骤不是失败的原因）
+        for step_result in result.step_results:
+            step = plan.steps[step_result.step_id].step
+            if not step_result.success and not step_result.skipped and step.required:
+                raise create_execution_error(
+                    message=f"必需步骤 '{step_result.step_id}' 执行失败: {step_result.error}",
+                    suggestion="请检查步骤配置和输入数据",
+                    step_id=step_result.step_id,
+                    sample_id=result.sample_id
+                )
+        
+        # 收集最终输出
+        result.final_outputs = self._collect_final_outputs(context)
+        
+        # 计算总执行时间、token使用量和parser统计
+        result.total_execution_time = time.time() - start_time
+        result.total_token_usage = self._calculate_total_token_usage(result.step_results)
+        result.total_parser_stats = self._aggregate_parser_stats(result.step_results)
+    
+    def _schedule_steps(
+        self,
+        plan: ExecutionPlan,
+        variant_config: Optional[VariantConfig],
+        context: Dict[str, Any],
+        start_time: float,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> Tuple[Dict[str, StepResult], Dict[str, Dict[str, float]]]:
+        """
+        基于依赖计数的就绪队列调度
+        
+        每个步骤在其所有依赖完成后立即提交执行，不等待同层的其他步骤。
+        依赖被跳过或必需依赖失败的步骤会被跳过，并继续向下游传播。
+        必需步骤失败后样本注定失败：不再提交新的步骤，已排队未开始的步骤被撤回并跳过。
+        设置了取消令牌时，取消后就绪的步骤不再提交，正在执行的步骤由令牌中止。
+        步骤输出只在调度线程中写入上下文，下游步骤提交时上游输出已经就绪。
+        
+        Args:
+            plan: 执行计划（依赖边、下游步骤和输入绑定）
+            variant_config: 变体配置
+            context: 样本执行上下文
+            start_time: 样本开始时间
+            on_progress: 进度回调，接收 (已完成步骤数, 正在执行步骤数)
+            
+        Returns:
+            (步骤结果字典, 步骤时间线 {step_id: {"start": 秒, "end": 秒}})，时间相对于样本开始
+        """
+        pending_counts = {step_id: len(step_plan.dependencies) for step_id, step_plan in plan.steps.items()}
+        ready = deque(step_id for step_id, count in pending_counts.items() if count == 0)
+        completed_steps: Dict[str, StepResult] = {}
+        step_timings: Dict[str, Dict[str, float]] = {}
+        running: Dict[Future, str] = {}
+        failed_required: Optional[str] = None
+        
+        def finish(step_id: str, step_result: StepResult):
+            nonlocal failed_required
+            completed_steps[step_id] = step_result
+            if step_result.success:
+                # 将步骤输出添加到上下文
+                context[step_result.output_key] = step_result.output_value
+            elif failed_required is None and self._is_required_failure(plan.steps[step_id].step, step_result):
+                failed_required = step_id
+            
+            for child_id in plan.steps[step_id].dependents:
+                pending_counts[child_id] -= 1
+                if pending_counts[child_id] == 0:
+                    ready.append(child_id)
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while ready or running:
+                while ready:
+                    step_id = ready.popleft()
+                    step_plan = plan.steps[step_id]
+                    step = step_plan.step
                     
-                    # 检查是否有必需的依赖失败了
-                    has_failed_dependency = False
-                    for dep_id in dependencies:
-                        if dep_id in completed_steps:
-                            dep_result = completed_steps[dep_id]
-                            if not dep_result.success and step_map[dep_id].required:
-                                has_failed_dependency = True
-                                break
+                    if self._is_cancelled():
+                        offset = time.time() - start_time
+                        step_timings[step_id] = {"start": offset, "end": offset}
+                        finish(step_id, self._cancelled_step_result(step))
+                        continue
                     
-                    if has_failed_dependency:
-                        # 跳过此步骤
-                        logger.warning(f"跳过步骤 '{step.id}'，因为必需的依赖步骤失败了")
-                        skipped_result = StepResult(
-                            step_id=step.id,
-                            output_key=step.output_key,
-                            output_value="",
-                            execution_time=0.0,
-                            error="必需的依赖步骤失败，跳过执行",
-                            success=False
-                        )
-                        completed_steps[step.id] = skipped_result
-                        failed_outputs.add(step.output_key)
-                        skipped_steps.append(step.id)
+                    skip_reason = self._skip_reason(plan, step_plan, completed_steps, failed_required)
+                    if skip_reason:
+                        offset = time.time() - start_time
+                        step_timings[step_id] = {"start": offset, "end": offset}
+                        finish(step_id, self._skipped_step_result(step, skip_reason))
                         continue
                     
-                    # 创建任务
-                    task = Task(
-                        id=step.id,
-                        func=self._execute_step_wrapper,
-                        args=(step, variant_config),
-                        kwargs={},
-                        dependencies=[],  # 同一批次内的任务没有依赖关系
-                        required=step.required,
-                        metadata={"step": step}
-                    )
-                    tasks.append(task)
+                    step_timings[step_id] = {"start": time.time() - start_time}
+                    future = pool.submit(self._execute_step_wrapper, step, variant_config, context, step_plan)
+                    running[future] = step_id
                 
-                # 如果当前批次没有任务（都被跳过了），继续下一批次
-                if not tasks:
-                    logger.debug(f"批次 {group_index + 1} 的所有步骤都被跳过")
-                    continue
+                if not running:
+                    break
                 
-                # 4. 并发执行当前批次的任务（实现最大并发数控制）
-                logger.debug(f"并发执行批次 {group_index + 1} 的 {len(tasks)} 个任务（最大并发数: {self.max_workers}）")
+                if on_progress:
+                    on_progress(len(completed_steps), len(running))
                 
-                # 创建进度回调函数，将并发执行进度传递给 PipelineProgressTracker
-                def concurrent_progress_callback(exec_progress):
-                    """并发执行进度回调"""
-                    if progress_tracker:
-                        # 计算当前样本的整体进度
-                        # 已完成的批次数 + 当前批次的进度
-                        completed_batches = group_index
-                        current_batch_progress = exec_progress.completion_rate
-                        
-                        # 计算总体步骤进度（近似）
-                        total_batches = len(concurrent_groups)
-                        overall_progress = (completed_batches + current_batch_progress) / total_batches
-                        
-                        # 更新进度跟踪器
-                        # 使用当前批次中正在执行的任务作为当前步骤
-                        current_step_name = f"批次 {group_index + 1}/{total_batches}"
-                        if exec_progress.running > 0:
-                            current_step_name += f" (并发执行 {exec_progress.running} 个任务)"
-                        
-                        progress_tracker.update_sample(
-                            sample_index=sample_index,
-                            sample_id=sample_id,
-                            step_index=int(overall_progress * len(self.config.steps)),
-                            step_name=current_step_name,
-                            failed=False
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step_id = running.pop(future)
+                    step = plan.steps[step_id].step
+                    step_timings[step_id]["end"] = time.time() - start_time
+                    
+                    try:
+                        step_result = future.result()
+                    except Exception as e:
+                        step_result = StepResult(
+                            step_id=step_id,
+                            output_key=step.output_key,
+                            output_value="",
+                            execution_time=step_timings[step_id]["end"] - step_timings[step_id]["start"],
+                            error=str(e),
+                            success=False
                         )
-                
-                # 使用 ConcurrentExecutor 执行任务
-                task_results = self.concurrent_executor.execute_concurrent(
-                    tasks=tasks,
-                    progress_callback=concurrent_progress_callback
-                )
-                
-                # 处理任务结果
-                for task_result in task_results:
-                    step_id = task_result.task_id
-                    step = step_map[step_id]
                     
-                    if task_result.success:
-                        # 任务成功，提取 StepResult
-                        step_result = task_result.result
-                        completed_steps[step_id] = step_result
-                        
-                        # 将步骤输出添加到上下文
-                        self.context[step_result.output_key] = step_result.output_value
-                        
+                    if step_result.success:
                         logger.debug(f"步骤 '{step_id}' 执行成功")
                     else:
-                        # 任务失败
-                        logger.warning(f"步骤 '{step_id}' 执行失败: {task_result.error}")
-                        
-                        # 检查是否是 StepResult（execute_step 返回的）
-                        if isinstance(task_result.result, StepResult):
-                            step_result = task_result.result
-                        else:
-                            step_result = StepResult(
-                                step_id=step_id,
-                                output_key=step.output_key,
-                                output_value="",
-                                execution_time=task_result.execution_time,
-                                error=task_result.error,
-                                success=False
-                            )
-                        
-                        completed_steps[step_id] = step_result
-                        failed_outputs.add(step.output_key)
-                        
-                        # 如果是必需步骤，停止整个 Pipeline
-                        if step.required:
-                            # 先收集已完成的步骤结果
-                            for s in self.config.steps:
-                                if s.id in completed_steps:
-                                    result.step_results.append(completed_steps[s.id])
-                            
-                            raise create_execution_error(
-                                message=f"必需步骤 '{step_id}' 执行失败: {step_result.error}",
-                                suggestion="请检查步骤配置和输入数据",
-                                step_id=step_id,
-                                sample_id=sample_id
-                            )
+                        logger.warning(f"步骤 '{step_id}' 执行失败: {step_result.error}")
+                    
+                    finish(step_id, step_result)
                 
-                logger.debug(f"批次 {group_index + 1} 执行完成")
-            
-            # 按原始步骤顺序收集结果
-            for step in self.config.steps:
-                if step.id in completed_steps:
-                    result.step_results.append(completed_steps[step.id])
-            
-            # 检查是否有必需步骤失败
-            for step_result in result.step_results:
-                step = step_map[step_result.step_id]
-                if not step_result.success and step.required:
-                    raise create_execution_error(
-                        message=f"必需步骤 '{step_result.step_id}' 执行失败: {step_result.error}",
-                        suggestion="请检查步骤配置和输入数据",
-                        step_id=step_result.step_id,
-                        sample_id=sample_id
-                    )
-            
-            # 收集最终输出
-            result.final_outputs = self._collect_final_outputs()
-            
-            # 计算总执行时间、token使用量和parser统计
-            result.total_execution_time = time.time() - start_time
-            result.total_token_usage = self._calculate_total_token_usage(result.step_results)
-            result.total_parser_stats = self._aggregate_parser_stats(result.step_results)
-            
-            logger.info(f"样本 {sample_id} 并发执行完成，总耗时 {result.total_execution_time:.2f}秒")
-            
-        except Exception as e:
-            result.error = str(e)
-            result.total_execution_time = time.time() - start_time
-            logger.error(f"样本 {sample_id} 并发执行失败: {e}")
+                if failed_required:
+                    # 撤回已提交但尚未开始的步骤
+                    for future in [f for f in running if f.cancel()]:
+                        step_id = running.pop(future)
+                        step_timings[step_id]["end"] = step_timings[step_id]["start"]
+                        finish(step_id, self._skipped_step_result(
+                            plan.steps[step_id].step, f"必需步骤 '{failed_required}' 失败，跳过执行"
+                        ))
+        
+        if on_progress:
+            on_progress(len(completed_steps), 0)
+        
+        return completed_steps, step_timings
+    
+    def _compute_critical_path(
+        self,
+        plan: ExecutionPlan,
+        completed_steps: Dict[str, StepResult],
+        step_timings: Dict[str, Dict[str, float]]
+    ) -> Tuple[List[str], float]:
+        """
+        计算关键路径（依赖链上步骤耗时之和最大的路径）
         
-        return result
+        步骤完成的先后顺序就是一个合法的拓扑序，按完成时间递推最长路径。
+        
+        Returns:
+            (关键路径上的步骤ID列表, 关键路径耗时)
+        """
+        order = sorted(step_timings, key=lambda step_id: step_timings[step_id]["end"])
+        path_time: Dict[str, float] = {}
+        predecessor: Dict[str, Optional[str]] = {}
+        
+        for step_id in order:
+            best_dep = None
+            for dep_id in plan.steps[step_id].dependencies:
+                if dep_id in path_time and (best_dep is None or path_time[dep_id] > path_time[best_dep]):
+                    best_dep = dep_id
+            predecessor[step_id] = best_dep
+            path_time[step_id] = completed_steps[step_id].execution_time + (
+                path_time[best_dep] if best_dep else 0.0
+            )
+        
+        if not path_time:
+            return [], 0.0
+        
+        tail = max(path_time, key=path_time.get)
+        critical_path = []
+        node: Optional[str] = tail
+        while node:
+            critical_path.append(node)
+            node = predecessor[node]
+        critical_path.reverse()
+        
+        return critical_path, path_time[tail]
+    
+    def _create_step_executor(self, max_workers: Optional[int] = None) -> ConcurrentExecutor:
+        """
+        创建步骤级并发执行器
+        
+        ConcurrentExecutor 在实例上记录进度状态，多个样本并发执行或批量步骤嵌套执行时
+        共享同一个实例会互相覆盖进度，因此每次调度使用独立实例。
+        """
+        return ConcurrentExecutor(max_workers=max_workers or self.max_workers, strategy="thread")
     
-    def _execute_step_wrapper(self, step: StepConfig, variant_config: Optional[VariantConfig]) -> StepResult:
+    def _execute_step_wrapper(self, step: StepConfig, variant_config: Optional[VariantConfig],
+                              context: Optional[Dict[str, Any]] = None,
+                              step_plan: Optional[StepPlan] = None) -> StepResult:
         """
         步骤执行包装器，用于并发执行
         
@@ -740,28 +1051,40 @@ class PipelineRunner:
         Args:
             step: 步骤配置
             variant_config: 变体配置
+            context: 样本执行上下文
+            step_plan: 步骤执行计划
             
         Returns:
             StepResult: 步骤执行结果
         """
-        return self.execute_step(step, variant_config)
+        return self.execute_step(step, variant_config, context, step_plan)
     
-    def execute_step(self, step: StepConfig, variant_config: Optional[VariantConfig] = None) -> StepResult:
+    def execute_step(self, step: StepConfig, variant_config: Optional[VariantConfig] = None,
+                     context: Optional[Dict[str, Any]] = None,
+                     step_plan: Optional[StepPlan] = None) -> StepResult:
         """
         执行单个步骤
         
         Args:
             step: 步骤配置
             variant_config: 变体配置（可选）
+            context: 样本执行上下文（可选，默认使用 self.context）
+            step_plan: 步骤执行计划（可选，提供时直接使用预解析的输入绑定和 flow/模型）
             
         Returns:
             步骤执行结果
         """
         step_start_time = time.time()
         
+        if self._is_cancelled():
+            return self._cancelled_step_result(step)
+        
         try:
             # 解析输入映射
-            step_inputs = self._resolve_input_mapping(step.input_mapping)
+            if step_plan is not None:
+                step_inputs = step_plan.resolve_inputs(context if context is not None else self.context)
+            else:
+                step_inputs = self._resolve_input_mapping(step.input_mapping, context)
             
             # 根据步骤类型执行不同的逻辑
             if step.type == "code_node":
@@ -811,7 +1134,8 @@ class PipelineRunner:
                         step=step,
                         inputs=step_inputs,
                         variant_config=variant_config,
-                        start_time=step_start_time
+                        start_time=step_start_time,
+                        step_plan=step_plan
                     )
                     
                     return StepResult(
@@ -825,7 +1149,10 @@ class PipelineRunner:
                     )
                 else:
                     # 执行单个 Agent/Flow
-                    flow_name, model_override = self._resolve_step_config(step, variant_config)
+                    if step_plan is not None:
+                        flow_name, model_override = step_plan.flow_name, step_plan.model_override
+                    else:
+                        flow_name, model_override = self._resolve_step_config(step, variant_config)
                     
                     logger.debug(f"执行步骤 '{step.id}': agent={step.agent}, flow={flow_name}")
                     
@@ -854,8 +1181,15 @@ class PipelineRunner:
                     message=f"不支持的步骤类型: {step.type}",
                     suggestion="支持的步骤类型: agent_flow, code_node, batch_aggregator"
                 )
+        
+        except ExecutionCancelled:
+            logger.info(f"步骤 '{step.id}' 已取消")
+            return self._cancelled_step_result(step, time.time() - step_start_time, started=True)
             
         except Exception as e:
+            if self._is_cancelled():
+                # 取消导致的下游异常（如包装后的错误）同样按取消处理
+                return self._cancelled_step_result(step, time.time() - step_start_time, started=True)
             execution_time = time.time() - step_start_time
             error_msg = f"步骤执行失败: {str(e)}"
             
@@ -881,31 +1215,25 @@ class PipelineRunner:
         
         return self.config.variants[variant]
     
-    def _resolve_input_mapping(self, input_mapping: Dict[str, str]) -> Dict[str, Any]:
+    def _resolve_input_mapping(self, input_mapping: Dict[str, str],
+                               context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         解析输入映射，将映射源转换为实际值
         
         Args:
             input_mapping: 输入映射配置 {参数名: 映射源}
+            context: 样本执行上下文（默认使用 self.context）
             
         Returns:
             解析后的输入参数字典
         """
-        resolved_inputs = {}
-        
-        for param_name, source in input_mapping.items():
-            if source in self.context:
-                # 从上下文中获取值（包括前序步骤输出和testset字段）
-                resolved_inputs[param_name] = self.context[source]
-            elif source in self.context.get("testset_fields", {}):
-                # 从testset字段中获取值
-                resolved_inputs[param_name] = self.context["testset_fields"][source]
-            else:
-                # 如果找不到映射源，使用空字符串作为默认值
-                logger.warning(f"输入映射源 '{source}' 未找到，使用空字符串作为默认值")
-                resolved_inputs[param_name] = ""
+        if context is None:
+            context = self.context
         
-        return resolved_inputs
+        return {
+            param_name: InputBinding(param=param_name, source=source).resolve(context)
+            for param_name, source in input_mapping.items()
+        }
     
     def _resolve_step_config(self, step: StepConfig, variant_config: Optional[VariantConfig]) -> Tuple[str, Optional[str]]:
         """
@@ -918,25 +1246,34 @@ class PipelineRunner:
         Returns:
             (flow_name, model_override) 元组
         """
-        flow_name = step.flow
-        model_override = step.model_override
-        
-        # 应用变体覆盖
-        if variant_config and step.id in variant_config.overrides:
-            override = variant_config.overrides[step.id]
-            if override.flow:
-                flow_name = override.flow
-            if override.model:
-                model_override = override.model
-        
-        # 应用 baseline 配置
-        if variant_config is None and self.config.baseline and step.id in self.config.baseline.steps:
-            baseline_step = self.config.baseline.steps[step.id]
-            flow_name = baseline_step.flow
-            if baseline_step.model:
-                model_override = baseline_step.model
-        
-        return flow_name, model_override
+        return resolve_step_flow(self.config, step, variant_config)
+    
+    def _prepare_flow_vars(self, agent_id: str, flow_name: str, inputs: Dict[str, Any],
+                           model_override: Optional[str] = None) -> Dict[str, Any]:
+        """
+        校验 Agent/Flow 存在，并构造传给 chains 的变量表
+        
+        Returns:
+            extra_vars（包含模型覆盖）
+        """
+        # 验证 agent 存在
+        agent = load_agent(agent_id)
+        
+        # 验证 flow 存在
+        flow_exists = agent.has_flow(flow_name)
+        if not flow_exists:
+            available_flows = [f.name for f in agent.flows]
+            raise create_config_error(
+                message=f"Agent '{agent_id}' 中不存在 flow '{flow_name}'",
+                suggestion=f"可用的 flows: {', '.join(available_flows)}"
+            )
+        
+        # 准备额外变量，包含模型覆盖
+        extra_vars = inputs.copy()
+        if model_override:
+            # 注意：模型覆盖需要在 chains.py 中支持
+            extra_vars["_model_override"] = model_override
+        return extra_vars
     
     def _execute_agent_flow(self, agent_id: str, flow_name: str, inputs: Dict[str, Any], model_override: Optional[str] = None) -> Tuple[str, Dict[str, int], Optional[Dict[str, Any]]]:
         """
@@ -952,32 +1289,21 @@ class PipelineRunner:
             (输出内容, token使用统计, parser统计) 元组
         """
         try:
-            # 验证 agent 存在
-            agent = load_agent(agent_id)
-            
-            # 验证 flow 存在
-            flow_exists = any(flow.name == flow_name for flow in agent.flows)
-            if not flow_exists:
-                available_flows = [f.name for f in agent.flows]
-                raise create_config_error(
-                    message=f"Agent '{agent_id}' 中不存在 flow '{flow_name}'",
-                    suggestion=f"可用的 flows: {', '.join(available_flows)}"
-                )
-            
-            # 准备额外变量，包含模型覆盖
-            extra_vars = inputs.copy()
-            if model_override:
-                # 注意：模型覆盖需要在 chains.py 中支持
-                extra_vars["_model_override"] = model_override
+            extra_vars = self._prepare_flow_vars(agent_id, flow_name, inputs, model_override)
             
-            # 执行 flow
+            # 执行 flow（仅在设置了取消令牌时传递，未设置时保持原有调用方式）
+            cancel_kwargs = {"cancel_token": self.cancel_token} if self.cancel_token is not None else {}
             output_content, token_usage, parser_stats = run_flow_with_tokens(
                 flow_name=flow_name,
                 extra_vars=extra_vars,
-                agent_id=agent_id
+                agent_id=agent_id,
+                **cancel_kwargs
             )
             
             return output_content, token_usage, parser_stats
+        
+        except ExecutionCancelled:
+            raise
             
         except Exception as e:
             raise create_execution_error(
@@ -1032,7 +1358,8 @@ class PipelineRunner:
                     file_path=code_file_path,
                     language=code_config.language,
                     inputs=inputs,
-                    timeout=code_config.timeout
+                    timeout=code_config.timeout,
+                    cancel_token=self.cancel_token
                 )
             else:
                 # 执行内联代码
@@ -1042,9 +1369,13 @@ class PipelineRunner:
                     code=code_config.code,
                     language=code_config.language,
                     inputs=inputs,
-                    timeout=code_config.timeout
+                    timeout=code_config.timeout,
+                    cancel_token=self.cancel_token
                 )
             
+            if result.cancelled:
+                raise ExecutionCancelled(self.cancel_token.reason if self.cancel_token else None)
+            
             # 检查执行结果
             if not result.success:
                 error_details = []
@@ -1069,6 +1400,9 @@ class PipelineRunner:
             logger.debug(f"代码节点执行成功，耗时 {execution_time:.2f}秒")
             
             return result.output, execution_time
+        
+        except ExecutionCancelled:
+            raise
             
         except Exception as e:
             # 如果是我们自己抛出的错误，直接传递
@@ -1180,7 +1514,8 @@ class PipelineRunner:
         step: StepConfig, 
         inputs: Dict[str, Any], 
         variant_config: Optional[VariantConfig],
-        start_time: float
+        start_time: float,
+        step_plan: Optional[StepPlan] = None
     ) -> Tuple[List[Any], Dict[str, int], Optional[Dict[str, Any]], float]:
         """
         执行批量 Agent/Flow 步骤
@@ -1190,6 +1525,7 @@ class PipelineRunner:
             inputs: 输入数据
             variant_config: 变体配置
             start_time: 步骤开始时间
+            step_plan: 步骤执行计划（可选，提供时直接使用预解析的 flow/模型）
             
         Returns:
             (批量输出列表, 总token使用量, 聚合parser统计, 执行时间) 元组
@@ -1199,38 +1535,18 @@ class PipelineRunner:
         """
         try:
             # 解析步骤配置
-            flow_name, model_override = self._resolve_step_config(step, variant_config)
-            
-            # 获取批量数据
-            # 批量数据应该是一个列表，每个元素是一个输入字典
-            batch_data = []
-            
-            # 检查inputs中是否有列表类型的数据
-            for param_name, value in inputs.items():
-                if isinstance(value, list):
-                    # 找到列表数据，为每个元素创建输入字典
-                    for item in value:
-                        item_inputs = {}
-                        # 将当前item作为该参数的值
-                        item_inputs[param_name] = item
-                        # 添加其他非列表参数
-                        for other_param, other_value in inputs.items():
-                            if other_param != param_name and not isinstance(other_value, list):
-                                item_inputs[other_param] = other_value
-                        batch_data.append(item_inputs)
-                    break
+            if step_plan is not None:
+                flow_name, model_override = step_plan.flow_name, step_plan.model_override
+            else:
+                flow_name, model_override = self._resolve_step_config(step, variant_config)
             
-            # 如果没有找到列表数据，将整个inputs作为单个批次项
-            if not batch_data:
-                batch_data = [inputs]
+            batch_data = self._split_batch_inputs(inputs)
             
             logger.info(f"批量执行步骤 '{step.id}': {len(batch_data)} 个items, batch_size={step.batch_size}, concurrent={step.concurrent}")
             
             # 分批处理
             batch_size = step.batch_size or 10
-            all_results = []
-            total_token_usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
-            all_parser_stats = []
+            item_results = []
             
             # 将数据分成批次
             batches = [batch_data[i:i + batch_size] for i in range(0, len(batch_data), batch_size)]
@@ -1238,6 +1554,9 @@ class PipelineRunner:
             logger.info(f"将 {len(batch_data)} 个items分成 {len(batches)} 个批次")
             
             for batch_index, batch in enumerate(batches):
+                if self.cancel_token is not None:
+                    self.cancel_token.raise_if_cancelled()
+                
                 logger.debug(f"处理批次 {batch_index + 1}/{len(batches)}, 包含 {len(batch)} 个items")
                 
                 if step.concurrent:
@@ -1258,36 +1577,21 @@ class PipelineRunner:
                         model_override=model_override
                     )
                 
-                # 收集结果
-                for result in batch_results:
-                    all_results.append(result["output"])
-                    
-                    # 累加token使用量
-                    if "token_usage" in result:
-                        for key in total_token_usage:
-                            total_token_usage[key] += result["token_usage"].get(key, 0)
-                    
-                    # 收集parser统计
-                    if "parser_stats" in result and result["parser_stats"]:
-                        all_parser_stats.append(result["parser_stats"])
-            
-            # 聚合parser统计
-            aggregated_parser_stats = None
-            if all_parser_stats:
-                aggregated_parser_stats = {
-                    "success_count": sum(s.get("success_count", 0) for s in all_parser_stats),
-                    "failure_count": sum(s.get("failure_count", 0) for s in all_parser_stats),
-                    "total_retry_count": sum(s.get("total_retry_count", 0) for s in all_parser_stats)
-                }
-                total_attempts = aggregated_parser_stats["success_count"] + aggregated_parser_stats["failure_count"]
-                if total_attempts > 0:
-                    aggregated_parser_stats["success_rate"] = aggregated_parser_stats["success_count"] / total_attempts
-                    aggregated_parser_stats["average_retries"] = aggregated_parser_stats["total_retry_count"] / total_attempts
+                item_results.extend(batch_results)
+            
+            # 最后一个批次中被取消的 item 不应作为部分结果返回
+            if self.cancel_token is not None:
+                self.cancel_token.raise_if_cancelled()
+            
+            all_results, total_token_usage, aggregated_parser_stats = self._merge_batch_results(item_results)
             
             execution_time = time.time() - start_time
             logger.info(f"批量执行步骤 '{step.id}' 完成，处理了 {len(all_results)} 个items，耗时 {execution_time:.2f}秒")
             
             return all_results, total_token_usage, aggregated_parser_stats, execution_time
+        
+        except ExecutionCancelled:
+            raise
             
         except Exception as e:
             # 如果是我们自己抛出的错误，直接传递
@@ -1301,6 +1605,77 @@ class PipelineRunner:
                 step_id=step.id
             ) from e
     
+    def _split_batch_inputs(self, inputs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        将批量步骤的输入拆分为逐项输入
+        
+        第一个列表类型的参数按元素展开，其他非列表参数复制到每一项；
+        没有列表参数时整个 inputs 作为单个批次项。
+        """
+        batch_data = []
+        
+        # 检查inputs中是否有列表类型的数据
+        for param_name, value in inputs.items():
+            if isinstance(value, list):
+                # 找到列表数据，为每个元素创建输入字典
+                for item in value:
+                    item_inputs = {}
+                    # 将当前item作为该参数的值
+                    item_inputs[param_name] = item
+                    # 添加其他非列表参数
+                    for other_param, other_value in inputs.items():
+                        if other_param != param_name and not isinstance(other_value, list):
+                            item_inputs[other_param] = other_value
+                    batch_data.append(item_inputs)
+                break
+        
+        # 如果没有找到列表数据，将整个inputs作为单个批次项
+        if not batch_data:
+            batch_data = [inputs]
+        
+        return batch_data
+    
+    def _merge_batch_results(
+        self,
+        item_results: List[Dict[str, Any]]
+    ) -> Tuple[List[Any], Dict[str, int], Optional[Dict[str, Any]]]:
+        """
+        合并批量items的结果
+        
+        Returns:
+            (输出列表, 总token使用量, 聚合parser统计)
+        """
+        all_results = []
+        total_token_usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+        all_parser_stats = []
+        
+        for result in item_results:
+            all_results.append(result["output"])
+            
+            # 累加token使用量
+            if "token_usage" in result:
+                for key in total_token_usage:
+                    total_token_usage[key] += result["token_usage"].get(key, 0)
+            
+            # 收集parser统计
+            if "parser_stats" in result and result["parser_stats"]:
+                all_parser_stats.append(result["parser_stats"])
+        
+        # 聚合parser统计
+        aggregated_parser_stats = None
+        if all_parser_stats:
+            aggregated_parser_stats = {
+                "success_count": sum(s.get("success_count", 0) for s in all_parser_stats),
+                "failure_count": sum(s.get("failure_count", 0) for s in all_parser_stats),
+                "total_retry_count": sum(s.get("total_retry_count", 0) for s in all_parser_stats)
+            }
+            total_attempts = aggregated_parser_stats["success_count"] + aggregated_parser_stats["failure_count"]
+            if total_attempts > 0:
+                aggregated_parser_stats["success_rate"] = aggregated_parser_stats["success_count"] / total_attempts
+                aggregated_parser_stats["average_retries"] = aggregated_parser_stats["total_retry_count"] / total_attempts
+        
+        return all_results, total_token_usage, aggregated_parser_stats
+    
     def _execute_batch_concurrent(
         self,
         agent_id: str,
@@ -1337,9 +1712,10 @@ class PipelineRunner:
             tasks.append(task)
         
         # 使用并发执行器执行
-        task_results = self.concurrent_executor.execute_concurrent(
+        task_results = self._create_step_executor(max_workers).execute_concurrent(
             tasks=tasks,
-            progress_callback=None
+            progress_callback=None,
+            cancel_token=self.cancel_token
         )
         
         # 收集结果
@@ -1385,6 +1761,8 @@ class PipelineRunner:
         """
         results = []
         for i, item_inputs in enumerate(batch_items):
+            if self.cancel_token is not None:
+                self.cancel_token.raise_if_cancelled()
             try:
                 output_content, token_usage, parser_stats = self._execute_agent_flow(
                     agent_id=agent_id,
@@ -1397,6 +1775,8 @@ class PipelineRunner:
                     "token_usage": token_usage,
                     "parser_stats": parser_stats
                 })
+            except ExecutionCancelled:
+                raise
             except Exception as e:
                 # 批量执行中的单个item失败，记录错误但继续
                 logger.warning(f"批量item {i} 执行失败: {str(e)}")
@@ -1430,13 +1810,16 @@ class PipelineRunner:
         """
         return self._execute_agent_flow(agent_id, flow_name, inputs, model_override)
     
-    def _collect_final_outputs(self) -> Dict[str, Any]:
+    def _collect_final_outputs(self, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """收集最终输出"""
+        if context is None:
+            context = self.context
+        
         final_outputs = {}
         
         for output_spec in self.config.outputs:
-            if output_spec.key in self.context:
-                final_outputs[output_spec.key] = self.context[output_spec.key]
+            if output_spec.key in context:
+                final_outputs[output_spec.key] = context[output_spec.key]
             else:
                 logger.warning(f"输出键 '{output_spec.key}' 在上下文中未找到")
                 final_outputs[output_spec.key] = ""
@@ -1505,7 +1888,7 @@ class PipelineRunner:
             for step in self.config.steps:
                 try:
                     agent = load_agent(step.agent)
-                    flow_exists = any(flow.name == step.flow for flow in agent.flows)
+                    flow_exists = agent.has_flow(step.flow)
                     if not flow_exists:
                         errors.append(f"步骤 '{step.id}' 引用的 flow '{step.flow}' 在 agent '{step.agent}' 中不存在")
                 except Exception as e:
@@ -1524,7 +1907,7 @@ class PipelineRunner:
                     if pipeline_step:
                         try:
                             agent = load_agent(pipeline_step.agent)
-                            flow_exists = any(flow.name == baseline_step.flow for flow in agent.flows)
+                            flow_exists = agent.has_flow(baseline_step.flow)
                             if not flow_exists:
                                 errors.append(f"Baseline 步骤 '{step_id}' 引用的 flow '{baseline_step.flow}' 在 agent '{pipeline_step.agent}' 中不存在")
                         except Exception as e:
@@ -1544,7 +1927,7 @@ class PipelineRunner:
                         if pipeline_step:
                             try:
                                 agent = load_agent(pipeline_step.agent)
-                                flow_exists = any(flow.name == override.flow for flow in agent.flows)
+                                flow_exists = agent.has_flow(override.flow)
                                 if not flow_exists:
                                     errors.append(f"变体 '{variant_name}' 步骤 '{step_id}' 引用的 flow '{override.flow}' 在 agent '{pipeline_step.agent}' 中不存在")
                             except Exception as e:
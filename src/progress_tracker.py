@@ -371,7 +371,8 @@ class PipelineProgressTracker(ProgressTracker):
             failed=failed
         )
     
-    def complete_sample(self, sample_index: int, sample_id: str, failed: bool = False):
+    def complete_sample(self, sample_index: int, sample_id: str, failed: bool = False,
+                        completed: Optional[int] = None):
         """
         完成样本处理
         
@@ -379,12 +380,13 @@ class PipelineProgressTracker(ProgressTracker):
             sample_index: 样本索引
             sample_id: 样本ID
             failed: 是否失败
+            completed: 已完成样本数（样本并发执行时传入，默认 sample_index + 1）
         """
         current_item = f"样本 {sample_id} ({sample_index + 1}/{self.stats.total_items})"
         current_step = "完成" if not failed else "失败"
         
         self.update(
-            completed=sample_index + 1,
+            completed=sample_index + 1 if completed is None else completed,
             current_item=current_item,
             current_step=current_step,
             failed=failed
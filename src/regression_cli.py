@@ -27,6 +27,7 @@ from .baseline_manager import load_agent_baseline, load_pipeline_baseline
 from .data_manager import get_agent_runs_dir, get_pipeline_runs_dir
 from .testset_filter import filter_samples_by_tags
 from .run_eval import load_test_cases
+from .llm_cache import configure_llm_cache, describe_llm_cache
 
 app = typer.Typer(help="回归测试工具")
 console = Console()
@@ -44,6 +45,11 @@ def run_regression_test(
     exclude_tags: str = typer.Option("", help="排除指定标签的样本，多个标签用逗号分隔"),
     threshold: float = typer.Option(0.1, help="回归检测阈值（分数下降超过此值视为回归）"),
     output: str = typer.Option("", help="输出报告文件路径（可选）"),
+    cache: Optional[bool] = typer.Option(
+        None,
+        "--cache/--no-cache",
+        help="启用/禁用 LLM 响应缓存（data/cache/），默认读取环境变量 LLM_CACHE",
+    ),
 ):
     """
     执行回归测试
@@ -60,6 +66,9 @@ def run_regression_test(
         console.print("[red]错误：不能同时指定 --agent 和 --pipeline 参数[/]")
         raise typer.Exit(1)
     
+    if cache is not None:
+        configure_llm_cache(cache)
+    
     # 显示回归测试开始信息
     console.rule("[bold blue]回归测试开始[/bold blue]")
     
@@ -247,6 +256,10 @@ def run_regression_test(
         
         show_regression_results(regression_result, threshold)
         
+        cache_summary = describe_llm_cache()
+        if cache_summary:
+            console.print(f"\n[dim]{cache_summary}[/]")
+        
         # 保存报告
         if output:
             save_regression_report(regression_result, Path(output))
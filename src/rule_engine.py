@@ -4,26 +4,18 @@
 """
 from __future__ import annotations
 
+import json
 import re
-from typing import Dict, Any, List, Callable
-
-
-def approx_token_count(text: str) -> int:
-    """简单估算 token 数量"""
-    if not text:
-        return 0
-    # 粗略估算：中文每字 1 token，英文按空格分词
-    chinese_chars = len(re.findall(r'[\u4e00-\u9fff]', text))
-    english_words = len(re.findall(r'\b[a-zA-Z]+\b', text))
-    other_chars = len(text) - chinese_chars - english_words
-    return chinese_chars + english_words + max(0, other_chars // 4)
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Callable, Iterable, Optional, Sequence
 
+from .tokenizer import approx_token_count, count_tokens, get_token_counter
 
 # 规则处理函数：返回 True 表示违反规则
 def handle_max_tokens(rule: Dict[str, Any], value: str) -> bool:
-    """处理最大 token 数规则"""
+    """处理最大 token 数规则（可选 model 参数决定 tiktoken 编码）"""
     max_tokens = rule.get("max_tokens", 0)
-    return approx_token_count(value) > max_tokens
+    return count_tokens(value, rule.get("model")) > max_tokens
 
 
 def handle_max_chars(rule: Dict[str, Any], value: str) -> bool:
@@ -193,16 +185,275 @@ def apply_rules(rules: List[Dict[str, Any]], value: str) -> Dict[str, Any]:
     Returns:
         dict: 包含 rule_pass 和 rule_violations 的结果
     """
-    violations = []
+    return compile_rules(rules).evaluate(value)
+
+
+class KeywordMatcher:
+    """
+    多关键词匹配器：一次扫描找出文本中出现的所有关键词组
+    
+    所有关键词合并为一个按长度降序的前瞻交替正则，在每个位置尝试一次；
+    同一位置只会命中最长的关键词，因此每个关键词还会继承以它为前缀的更短关键词的组。
+    """
     
-    for rule in rules:
-        if apply_rule(rule, value):
-            violations.append(rule.get("id", "unknown"))
+    def __init__(self, groups: Dict[int, Sequence[str]]):
+        """
+        Args:
+            groups: 组 id -> 关键词列表；文本包含其中任一关键词即视为该组命中
+        """
+        self.always: set = {gid for gid, kws in groups.items() if any(kw == "" for kw in kws)}
+        keyword_groups: Dict[str, set] = {}
+        for gid, kws in groups.items():
+            for kw in kws:
+                if kw:
+                    keyword_groups.setdefault(kw, set()).add(gid)
+        
+        # 命中较长关键词的位置同样包含其所有前缀关键词
+        self._groups_of: Dict[str, frozenset] = {}
+        for kw in keyword_groups:
+            gids = set()
+            for other, other_gids in keyword_groups.items():
+                if kw.startswith(other):
+                    gids |= other_gids
+            self._groups_of[kw] = frozenset(gids)
+        
+        self.group_count = len(groups)
+        self._pattern: Optional[re.Pattern] = None
+        if keyword_groups:
+            alternation = "|".join(re.escape(kw) for kw in sorted(keyword_groups, key=len, reverse=True))
+            self._pattern = re.compile(f"(?=({alternation}))")
     
-    return {
-        "rule_pass": 0 if violations else 1,
-        "rule_violations": ",".join(violations)
-    }
+    def match(self, text: str) -> set:
+        """返回命中的组 id 集合"""
+        found = set(self.always)
+        if self._pattern is None:
+            return found
+        for m in self._pattern.finditer(text):
+            found |= self._groups_of[m.group(1)]
+            if len(found) == self.group_count:
+                break
+        return found
+
+
+class _TextView:
+    """单个待检查值的惰性派生量，供同一规则集中的多条规则共享"""
+    
+    __slots__ = ("value", "_lower", "_stripped", "_token_counts", "_hits", "_hits_lower")
+    
+    def __init__(self, value: str, token_counts: Optional[Dict[Optional[str], int]] = None):
+        self.value = value
+        self._lower = None
+        self._stripped = None
+        self._token_counts = token_counts if token_counts is not None else {}
+        self._hits = None
+        self._hits_lower = None
+    
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.value.lower()
+        return self._lower
+    
+    @property
+    def stripped(self) -> str:
+        if self._stripped is None:
+            self._stripped = self.value.strip()
+        return self._stripped
+    
+    def token_count(self, model: Optional[str] = None) -> int:
+        count = self._token_counts.get(model)
+        if count is None:
+            count = count_tokens(self.value, model)
+            self._token_counts[model] = count
+        return count
+
+
+class CompiledRuleSet:
+    """
+    预编译的规则集
+    
+    构建时完成正则编译、关键词归一化与合并，对每个值只做一次 token 统计与关键词扫描；
+    批量评估时 token 数按列批量编码。
+    结果与逐条调用 apply_rule 完全一致。
+    """
+    
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = list(rules)
+        self._token_models: set = set()
+        self._keyword_groups: Dict[int, List[str]] = {}
+        self._keyword_groups_lower: Dict[int, List[str]] = {}
+        self._checks: List[Callable[[_TextView], bool]] = [
+            self._compile(index, rule) for index, rule in enumerate(self.rules)
+        ]
+        self._rule_ids = [rule.get("id", "unknown") for rule in self.rules]
+        self._matcher = KeywordMatcher(self._keyword_groups) if self._keyword_groups else None
+        self._matcher_lower = KeywordMatcher(self._keyword_groups_lower) if self._keyword_groups_lower else None
+    
+    def _compile(self, index: int, rule: Dict[str, Any]) -> Callable[[_TextView], bool]:
+        """把规则编译为检查函数：返回 True 表示违反规则"""
+        kind = rule.get("kind")
+        ignore_case = rule.get("ignore_case", False)
+        
+        if kind == "max_tokens":
+            max_tokens = rule.get("max_tokens", 0)
+            model = rule.get("model")
+            self._token_models.add(model)
+            return lambda t: t.token_count(model) > max_tokens
+        
+        if kind == "max_chars":
+            max_chars = rule.get("max_chars", 0)
+            return lambda t: len(t.value) > max_chars
+        
+        if kind == "non_empty":
+            return lambda t: not t.stripped
+        
+        if kind == "allowed_values":
+            allowed = rule.get("allowed_values", [])
+            try:
+                allowed = frozenset(allowed)
+            except TypeError:
+                pass
+            if rule.get("trim", True):
+                return lambda t: t.stripped not in allowed
+            return lambda t: t.value not in allowed
+        
+        if kind == "contains_any":
+            keywords = rule.get("keywords", [])
+            if isinstance(keywords, list) and all(isinstance(kw, str) for kw in keywords):
+                if ignore_case:
+                    self._keyword_groups_lower[index] = [kw.lower() for kw in keywords]
+                    return lambda t: index not in self._hits(t, lower=True)
+                self._keyword_groups[index] = list(keywords)
+                return lambda t: index not in self._hits(t, lower=False)
+        
+        if kind == "regex_match":
+            try:
+                pattern = re.compile(rule.get("pattern", ""), re.IGNORECASE if ignore_case else 0)
+            except (re.error, TypeError):
+                # 正则表达式错误时，认为违反规则
+                return lambda t: True
+            return lambda t: not pattern.search(t.value)
+        
+        if kind in ("starts_with", "ends_with"):
+            affix = rule.get("prefix" if kind == "starts_with" else "suffix", "")
+            if isinstance(affix, str):
+                if ignore_case:
+                    affix = affix.lower()
+                if kind == "starts_with":
+                    return lambda t: not (t.lower if ignore_case else t.value).startswith(affix)
+                return lambda t: not (t.lower if ignore_case else t.value).endswith(affix)
+        
+        # 未知规则类型或无法预编译的配置，退回逐条处理
+        return lambda t: apply_rule(rule, t.value)
+    
+    def _hits(self, text: _TextView, lower: bool) -> set:
+        if lower:
+            if text._hits_lower is None:
+                text._hits_lower = self._matcher_lower.match(text.lower)
+            return text._hits_lower
+        if text._hits is None:
+            text._hits = self._matcher.match(text.value)
+        return text._hits
+    
+    def violations(self, value: str, token_counts: Optional[Dict[Optional[str], int]] = None) -> List[str]:
+        """返回违反的规则 id 列表（按规则顺序）"""
+        text = _TextView(value, token_counts)
+        violated = []
+        for rule_id, check in zip(self._rule_ids, self._checks):
+            try:
+                failed = check(text)
+            except Exception:
+                # 规则执行出错，认为违反规则
+                failed = True
+            if failed:
+                violated.append(rule_id)
+        return violated
+    
+    def evaluate(self, value: str, token_counts: Optional[Dict[Optional[str], int]] = None) -> Dict[str, Any]:
+        """对单个值应用规则集，返回格式与 apply_rules 相同"""
+        violations = self.violations(value, token_counts)
+        return {
+            "rule_pass": 0 if violations else 1,
+            "rule_violations": ",".join(violations)
+        }
+    
+    def evaluate_many(
+        self,
+        values: Iterable[str],
+        workers: int = 1,
+        chunk_size: int = 2000,
+    ) -> List[Dict[str, Any]]:
+        """
+        对一列值批量应用规则集
+        
+        Args:
+            values: 待检查的值
+            workers: 进程数；大于 1 且数据量超过 PARALLEL_MIN_ROWS 时使用进程池
+            chunk_size: 每个进程任务处理的行数
+        
+        Returns:
+            与 values 顺序一致的结果列表
+        """
+        values = list(values)
+        if workers <= 1 or len(values) < PARALLEL_MIN_ROWS:
+            return self._evaluate_batch(values)
+        
+        chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_rule_worker, initargs=(self.rules,)
+        ) as executor:
+            results: List[Dict[str, Any]] = []
+            for chunk_result in executor.map(_evaluate_chunk, chunks):
+                results.extend(chunk_result)
+        return results
+    
+    def _evaluate_batch(self, values: List[str]) -> List[Dict[str, Any]]:
+        """max_tokens 规则需要的 token 数先整列批量编码，再逐行评估"""
+        counter = get_token_counter()
+        column_counts = {model: counter.count_many(values, model) for model in self._token_models}
+        return [
+            self.evaluate(value, {model: counts[i] for model, counts in column_counts.items()})
+            for i, value in enumerate(values)
+        ]
+
+
+# 低于该行数时进程池的启动开销大于收益
+PARALLEL_MIN_ROWS = 5000
+
+_worker_rule_set: Optional[CompiledRuleSet] = None
+
+
+def _init_rule_worker(rules: List[Dict[str, Any]]) -> None:
+    global _worker_rule_set
+    _worker_rule_set = CompiledRuleSet(rules)
+
+
+def _evaluate_chunk(values: List[str]) -> List[Dict[str, Any]]:
+    return _worker_rule_set._evaluate_batch(values)
+
+
+_compiled_cache: Dict[str, CompiledRuleSet] = {}
+_COMPILED_CACHE_SIZE = 64
+
+
+def compile_rules(rules: List[Dict[str, Any]]) -> CompiledRuleSet:
+    """
+    获取规则列表对应的预编译规则集
+    
+    按规则内容缓存，同一 agent 配置只编译一次。
+    """
+    try:
+        key = json.dumps(rules, sort_keys=True, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return CompiledRuleSet(rules)
+    
+    compiled = _compiled_cache.get(key)
+    if compiled is None:
+        if len(_compiled_cache) >= _COMPILED_CACHE_SIZE:
+            _compiled_cache.pop(next(iter(_compiled_cache)))
+        compiled = CompiledRuleSet(rules)
+        _compiled_cache[key] = compiled
+    return compiled
 
 
 def get_rule_info() -> Dict[str, Dict[str, Any]]:
@@ -211,7 +462,7 @@ def get_rule_info() -> Dict[str, Dict[str, Any]]:
         "max_tokens": {
             "description": "限制最大 token 数量",
             "required_params": ["max_tokens"],
-            "optional_params": [],
+            "optional_params": ["model"],
             "example": {
                 "id": "max_tokens_200",
                 "kind": "max_tokens",
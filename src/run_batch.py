@@ -4,13 +4,14 @@ from __future__ import annotations
 import csv
 import json
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import typer
 from rich.console import Console
 from rich.table import Table
 
 from .chains import run_flow_with_tokens
+from .llm_cache import configure_llm_cache, get_llm_cache
 from .paths import (
     DATA_DIR, agent_testset_dir, agent_runs_dir,
     default_batch_outfile, ensure_agent_dirs
@@ -54,6 +55,11 @@ def run(
     limit: int = typer.Option(0, help="最多运行多少条（0=全部）"),
     include_tags: str = typer.Option("", help="只包含指定标签的样本，多个标签用逗号分隔"),
     exclude_tags: str = typer.Option("", help="排除指定标签的样本，多个标签用逗号分隔"),
+    cache: Optional[bool] = typer.Option(
+        None,
+        "--cache/--no-cache",
+        help="启用/禁用 LLM 响应缓存（data/cache/），默认读取环境变量 LLM_CACHE",
+    ),
 ):
     """
     批量跑测试集：读取 JSONL -> 调用模型 -> 写入 CSV
@@ -61,6 +67,9 @@ def run(
     JSONL 每行是一个变量字典，可以包含除 `id/expected` 外任意字段。
     模板未用到的字段会被忽略，缺失字段将按 Prompt 配置的 defaults 或空字符串兜底。
     """
+    if cache is not None:
+        configure_llm_cache(cache)
+    
     # 处理 agent 配置
     agent_cfg = None
     if agent:
@@ -154,7 +163,7 @@ def run(
         cases = cases[:limit]
 
     rows: List[Dict[str, Any]] = []
-    total_tokens = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    total_tokens = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "cache_hit": 0}
     
     for idx, case in enumerate(cases, start=1):
         _id = case.get("id", idx)
@@ -210,6 +219,9 @@ def run(
     token_table.add_row("输入 Tokens", f"{total_tokens['input_tokens']:,}", f"{avg_input_tokens:.1f}")
     token_table.add_row("输出 Tokens", f"{total_tokens['output_tokens']:,}", f"{avg_output_tokens:.1f}")
     token_table.add_row("总 Tokens", f"{total_tokens['total_tokens']:,}", f"{avg_total_tokens:.1f}")
+    if get_llm_cache() is not None:
+        hit_rate = total_tokens["cache_hit"] / len(rows) if rows else 0
+        token_table.add_row("缓存命中", f"{total_tokens['cache_hit']:,}", f"{hit_rate:.1%}")
     
     console.print(token_table)
 
@@ -4,7 +4,8 @@ from __future__ import annotations
 import csv
 import json
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
 import typer
@@ -12,14 +13,16 @@ from rich.console import Console
 from rich.table import Table
 
 from .chains import run_flow_with_tokens
+from .llm_cache import configure_llm_cache, describe_llm_cache, get_llm_cache
 from .paths import (
     DATA_DIR, agent_testset_dir, agent_runs_dir, agent_evals_dir,
     default_compare_outfile, default_batch_outfile, ensure_agent_dirs,
     timestamp_str
 )
 from .agent_registry import load_agent, list_available_agents
-from .eval_llm_judge import build_judge_chain, judge_one
-from .rule_engine import apply_rules as apply_rules_engine
+from .eval_llm_judge import build_judge_chain, flatten_judge_result
+from .judge_engine import EvalRowWriter, JudgeEngine, JudgeResult, JudgeTask
+from .rule_engine import compile_rules
 from .testset_filter import filter_samples_by_tags
 from .pipeline_config import load_pipeline_config, list_available_pipelines
 from .pipeline_eval import PipelineEvaluator
@@ -87,30 +90,24 @@ def apply_rules_to_outputs(agent_cfg, rows: List[Dict[str, Any]], flow_list: Lis
                     row[f"rule_violations__{flow_name}"] = ""
         return rows
     
-    # 应用规则评估
-    result_rows = []
-    for row in rows:
-        result = dict(row)
-        
-        if len(flow_list) == 1:
-            # 单flow模式
-            output_text = (row.get("output") or "").strip()
-            rule_result = apply_rules_engine(rules, output_text)
+    # 应用规则评估：规则集只编译一次，按列批量评估
+    compiled = compile_rules(rules)
+    result_rows = [dict(row) for row in rows]
+    
+    if len(flow_list) == 1:
+        # 单flow模式
+        values = [(row.get("output") or "").strip() for row in rows]
+        for result, rule_result in zip(result_rows, compiled.evaluate_many(values)):
             result.update(rule_result)
-        else:
-            # 多flow对比模式
-            for flow_name in flow_list:
-                output_col = f"output__{flow_name}"
-                output_text = (row.get(output_col) or "").strip()
-                
-                # 创建临时行用于规则评估
-                temp_row = {"output": output_text}
-                rule_result = apply_rules_engine(rules, output_text)
-                
+    else:
+        # 多flow对比模式
+        for flow_name in flow_list:
+            output_col = f"output__{flow_name}"
+            values = [(row.get(output_col) or "").strip() for row in rows]
+            
+            for result, rule_result in zip(result_rows, compiled.evaluate_many(values)):
                 result[f"rule_pass__{flow_name}"] = rule_result["rule_pass"]
                 result[f"rule_violations__{flow_name}"] = rule_result["rule_violations"]
-        
-        result_rows.append(result)
     
     return result_rows
 
@@ -167,6 +164,114 @@ def print_rule_stats(rows: List[Dict[str, Any]], flow_list: List[str], console:
         console.print(rule_table)
 
 
+def _record_flow_result(
+    row: Dict[str, Any],
+    flow_name: str,
+    output: Any,
+    token_info: Dict[str, int],
+    single_flow: bool,
+) -> None:
+    """把单个 flow 的输出和 token 信息写入结果行"""
+    if single_flow:
+        # 单flow模式，直接用output列名
+        row["output"] = output
+        row["input_tokens"] = token_info.get("input_tokens", 0)
+        row["output_tokens"] = token_info.get("output_tokens", 0)
+        row["total_tokens"] = token_info.get("total_tokens", 0)
+    else:
+        # 多flow对比模式，用带前缀的列名
+        row[f"output__{flow_name}"] = output
+        row[f"input_tokens__{flow_name}"] = token_info.get("input_tokens", 0)
+        row[f"output_tokens__{flow_name}"] = token_info.get("output_tokens", 0)
+        row[f"total_tokens__{flow_name}"] = token_info.get("total_tokens", 0)
+
+
+def execute_cases(
+    cases: List[Dict[str, Any]],
+    flow_list: List[str],
+    agent_id: str,
+    concurrency: int = 1,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, int]]]:
+    """
+    对每个 case 运行每个 flow
+    
+    concurrency > 1 时把所有 (case, flow) 组合提交到线程池并发执行，
+    完成一个打印一行进度；结果行顺序与 flow 列顺序始终与顺序执行一致。
+    
+    Returns:
+        (结果行列表, 每个 flow 的 token 统计)
+    """
+    single_flow = len(flow_list) == 1
+    flow_token_stats = {
+        flow: {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "cache_hit": 0}
+        for flow in flow_list
+    }
+    rows: List[Dict[str, Any]] = []
+    variables_list: List[Dict[str, Any]] = []
+    for idx, case in enumerate(cases, start=1):
+        variables = {k: v for k, v in case.items() if k != "id"}
+        variables_list.append(variables)
+        rows.append({"id": case.get("id", idx), **variables})
+    
+    def accumulate(flow_name: str, token_info: Dict[str, int]) -> None:
+        for key in flow_token_stats[flow_name]:
+            flow_token_stats[flow_name][key] += token_info.get(key, 0)
+    
+    if concurrency <= 1:
+        for idx, (row, variables) in enumerate(zip(rows, variables_list), start=1):
+            console.print(f"\n[{idx}/{len(cases)}] id={row['id']}")
+            
+            # 执行每个flow
+            for flow_name in flow_list:
+                console.print(f"  -> Running flow: [cyan]{flow_name}[/cyan]")
+                output, token_info, _parser_stats = run_flow_with_tokens(
+                    flow_name, extra_vars=dict(variables), agent_id=agent_id
+                )
+                _record_flow_result(row, flow_name, output, token_info, single_flow)
+                accumulate(flow_name, token_info)
+                
+                # 显示预览
+                output_preview = output[:150] + "..." if len(output) > 150 else output
+                console.print(f"     Output: {output_preview}")
+                console.print(f"     Tokens: {token_info.get('total_tokens', 0)}")
+        return rows, flow_token_stats
+    
+    # 并发模式：先收集结果，最后按 flow 顺序写入结果行
+    total = len(rows) * len(flow_list)
+    results: Dict[Tuple[int, str], Tuple[Any, Dict[str, int]]] = {}
+    console.print(f"[bold]并发执行[/]: {total} 个 (case, flow) 组合，并发数 {concurrency}")
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(
+                run_flow_with_tokens, flow_name, extra_vars=dict(variables), agent_id=agent_id
+            ): (case_idx, flow_name)
+            for case_idx, variables in enumerate(variables_list)
+            for flow_name in flow_list
+        }
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                case_idx, flow_name = futures[future]
+                output, token_info, _parser_stats = future.result()
+                results[(case_idx, flow_name)] = (output, token_info)
+                accumulate(flow_name, token_info)
+                console.print(
+                    f"[{done}/{total}] id={rows[case_idx]['id']} flow=[cyan]{flow_name}[/cyan] "
+                    f"tokens={token_info.get('total_tokens', 0)}"
+                )
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    
+    for case_idx, row in enumerate(rows):
+        for flow_name in flow_list:
+            output, token_info = results[(case_idx, flow_name)]
+            _record_flow_result(row, flow_name, output, token_info, single_flow)
+    
+    return rows, flow_token_stats
+
+
 @app.callback(invoke_without_command=True)
 def run_eval(
     agent: str = typer.Option("", help="agent id，对应 agents/{agent}.yaml"),
@@ -210,6 +315,22 @@ def run_eval(
     limit: int = typer.Option(0, help="最多运行多少条（0=全部）"),
     include_tags: str = typer.Option("", help="只包含指定标签的样本，多个标签用逗号分隔"),
     exclude_tags: str = typer.Option("", help="排除指定标签的样本，多个标签用逗号分隔"),
+    cache: Optional[bool] = typer.Option(
+        None,
+        "--cache/--no-cache",
+        help="启用/禁用 LLM 响应缓存（data/cache/），默认读取环境变量 LLM_CACHE",
+    ),
+    concurrency: int = typer.Option(
+        1,
+        "--concurrency",
+        "-c",
+        help="Agent 模式下同时执行的 (case, flow) 数量及 judge 调用数量（1=顺序执行）",
+    ),
+    pairwise: bool = typer.Option(
+        False,
+        "--pairwise",
+        help="多 flow 对比时，同一条样本的所有 flow 输出在一次 judge 调用中评估",
+    ),
 ):
     """
     统一的评估执行工具：支持 Agent 和 Pipeline 两种模式
@@ -217,6 +338,7 @@ def run_eval(
     Agent 模式：
     - 批量运行单个或多个 flow 并可选择进行规则评估和 LLM judge 评估
     - 使用 --agent 参数指定 agent
+    - 使用 --concurrency 并发执行所有 (case, flow) 组合，结果行顺序不变
     
     Pipeline 模式：
     - 执行多步骤 pipeline 并支持变体比较
@@ -232,6 +354,9 @@ def run_eval(
     if judge:
         rules = True  # judge模式自动启用规则评估
     
+    if cache is not None:
+        configure_llm_cache(cache)
+    
     # 确定运行模式
     if pipeline and agent:
         console.print("[red]错误：不能同时指定 --agent 和 --pipeline 参数[/]")
@@ -378,46 +503,8 @@ def run_eval(
     # 执行阶段
     console.rule("[bold green]执行阶段[/bold green]")
     
-    rows: List[Dict[str, Any]] = []
-    flow_token_stats = {flow: {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0} for flow in flow_list}
-    
-    for idx, case in enumerate(cases, start=1):
-        _id = case.get("id", idx)
-        variables = {k: v for k, v in case.items() if k != "id"}
-
-        console.print(f"\n[{idx}/{len(cases)}] id={_id}")
-
-        row: Dict[str, Any] = {"id": _id, **variables}
-
-        # 执行每个flow
-        for flow_name in flow_list:
-            console.print(f"  -> Running flow: [cyan]{flow_name}[/cyan]")
-            output, token_info, _parser_stats = run_flow_with_tokens(flow_name, extra_vars=variables, agent_id=agent_cfg.id)
-            
-            # 保存结果
-            if len(flow_list) == 1:
-                # 单flow模式，直接用output列名
-                row["output"] = output
-                row["input_tokens"] = token_info.get("input_tokens", 0)
-                row["output_tokens"] = token_info.get("output_tokens", 0)
-                row["total_tokens"] = token_info.get("total_tokens", 0)
-            else:
-                # 多flow对比模式，用带前缀的列名
-                row[f"output__{flow_name}"] = output
-                row[f"input_tokens__{flow_name}"] = token_info.get("input_tokens", 0)
-                row[f"output_tokens__{flow_name}"] = token_info.get("output_tokens", 0)
-                row[f"total_tokens__{flow_name}"] = token_info.get("total_tokens", 0)
-            
-            # 累计统计
-            for key in flow_token_stats[flow_name]:
-                flow_token_stats[flow_name][key] += token_info.get(key, 0)
-            
-            # 显示预览
-            output_preview = output[:150] + "..." if len(output) > 150 else output
-            console.print(f"     Output: {output_preview}")
-            console.print(f"     Tokens: {token_info.get('total_tokens', 0)}")
-
-        rows.append(row)
+    rows, flow_token_stats = execute_cases(cases, flow_list, agent_cfg.id, concurrency)
+    cache_enabled = get_llm_cache() is not None
 
     # 规则评估阶段
     if rules:
@@ -462,6 +549,9 @@ def run_eval(
         console.print(f"总输入 tokens: {stats['input_tokens']:,} (平均: {avg_input:.1f})")
         console.print(f"总输出 tokens: {stats['output_tokens']:,} (平均: {avg_output:.1f})")
         console.print(f"总计 tokens: {stats['total_tokens']:,} (平均: {avg_total:.1f})")
+        if cache_enabled:
+            hit_rate = stats["cache_hit"] / len(rows) if rows else 0
+            console.print(f"缓存命中: {stats['cache_hit']:,} (命中率: {hit_rate:.1%})")
     else:
         # 多flow对比统计
         token_table = Table(title="Token Usage Comparison")
@@ -469,18 +559,23 @@ def run_eval(
         token_table.add_column("平均输入", justify="right")
         token_table.add_column("平均输出", justify="right") 
         token_table.add_column("平均总计", justify="right")
+        if cache_enabled:
+            token_table.add_column("缓存命中率", justify="right")
         
         for flow_name in flow_list:
             stats = flow_token_stats[flow_name]
             avg_input = stats["input_tokens"] / len(rows) if rows else 0
             avg_output = stats["output_tokens"] / len(rows) if rows else 0
             avg_total = stats["total_tokens"] / len(rows) if rows else 0
-            token_table.add_row(
+            cells = [
                 flow_name,
                 f"{avg_input:.1f}",
                 f"{avg_output:.1f}",
                 f"{avg_total:.1f}"
-            )
+            ]
+            if cache_enabled:
+                cells.append(f"{stats['cache_hit'] / len(rows) if rows else 0:.1%}")
+            token_table.add_row(*cells)
         console.print(token_table)
 
     # Judge评估阶段
@@ -495,26 +590,31 @@ def run_eval(
         eval_cfg = agent_cfg.evaluation or {}
         judge_agent_id = eval_cfg.get("judge_agent_id", "judge_default")
         judge_flow = eval_cfg.get("judge_flow", "judge_v1")
+        compare_flow = (
+            eval_cfg.get("judge_compare_flow", "judge_compare_v1")
+            if pairwise and len(flow_list) > 1 else None
+        )
         
         try:
             judge_agent_cfg = load_agent(judge_agent_id)
             console.print(f"[bold]Judge Agent[/]: {judge_agent_cfg.name} ({judge_agent_id})")
             console.print(f"[bold]Judge Flow[/]: {judge_flow}")
+            if compare_flow:
+                console.print(f"[bold]Compare Flow[/]: {compare_flow}")
         except FileNotFoundError:
             console.print(f"[red]Judge Agent 不存在: {judge_agent_id}[/red]")
             console.print("[yellow]跳过judge评估，仅保存执行结果。[/]")
             return
 
-        # 构建judge chain
-        judge_chain = build_judge_chain(
+        # 构建judge配置
+        judge_config = build_judge_chain(
             task_agent_cfg=agent_cfg,
             judge_agent_cfg=judge_agent_cfg,
             judge_flow_name=judge_flow,
         )
 
         # 执行judge评估
-        eval_rows: List[Dict[str, Any]] = []
-        judge_total_tokens = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+        judge_total_tokens = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "cache_hit": 0}
         
         # 确定要评估的输出列
         if len(flow_list) == 1:
@@ -524,9 +624,8 @@ def run_eval(
             output_cols = [f"output__{flow}" for flow in flow_list]
             flow_names = flow_list
 
-        for idx, row in enumerate(rows, start=1):
-            console.print(f"[{idx}/{len(rows)}] Judge评估 id={row.get('id')}")
-            
+        tasks: List[JudgeTask] = []
+        for row in rows:
             case_base = {
                 "id": row.get("id"),
                 "input": row.get("input", ""),
@@ -536,65 +635,41 @@ def run_eval(
             
             for col, flow_name in zip(output_cols, flow_names):
                 output = row.get(col, "")
-                if not output:
-                    continue
-                
-                console.print(f"  -> judging flow: [cyan]{flow_name}[/cyan]")
-                judge_data, token_info = judge_one(
-                    task_agent_cfg=agent_cfg,
-                    flow_name=flow_name,
-                    case=case_base,
-                    output=output,
-                    judge_chain=judge_chain,
-                )
-                
+                if output:
+                    tasks.append(JudgeTask(case=case_base, flow_name=flow_name, output=output))
+
+        engine = JudgeEngine(
+            agent_cfg, judge_config, judge_flow, max_workers=concurrency, compare_flow_name=compare_flow
+        )
+        eval_out_path = agent_evals_dir(agent_cfg.id) / "llm" / f"{out_path.stem}.judge.csv"
+
+        with EvalRowWriter(eval_out_path) as writer:
+            def on_result(done: int, result: JudgeResult) -> None:
+                token_info = result.token_info
                 # 累计token统计
                 for key in judge_total_tokens:
                     judge_total_tokens[key] += token_info.get(key, 0)
                 
-                console.print(f"    score: {judge_data.get('overall_score')}, tokens: {token_info.get('total_tokens', 0)}")
-                
-                # 构建评估结果行
-                flat: Dict[str, Any] = {
-                    "id": case_base["id"],
-                    "flow": flow_name,
-                    "overall_score": judge_data.get("overall_score"),
-                    "overall_comment": judge_data.get("overall_comment", ""),
-                    "judge_input_tokens": token_info.get("input_tokens", 0),
-                    "judge_output_tokens": token_info.get("output_tokens", 0),
-                    "judge_total_tokens": token_info.get("total_tokens", 0),
-                }
-                
-                # 展开详细评估结果
-                for idx_check, check in enumerate(judge_data.get("must_have_check", [])):
-                    flat[f"must_have_{idx_check+1}__satisfied"] = check.get("satisfied")
-                    flat[f"must_have_{idx_check+1}__score"] = check.get("score")
-                    flat[f"must_have_{idx_check+1}__comment"] = check.get("comment", "")
-                
-                for idx_check, check in enumerate(judge_data.get("nice_to_have_check", [])):
-                    flat[f"nice_to_have_{idx_check+1}__satisfied"] = check.get("satisfied")
-                    flat[f"nice_to_have_{idx_check+1}__score"] = check.get("score")
-                    flat[f"nice_to_have_{idx_check+1}__comment"] = check.get("comment", "")
-                
-                # summary_quality_check 检查结果展开（如果存在）
-                for idx_check, check in enumerate(judge_data.get("summary_quality_check", [])):
-                    aspect = check.get("aspect", f"quality_{idx_check+1}")
-                    flat[f"quality__{aspect}__satisfied"] = check.get("satisfied")
-                    flat[f"quality__{aspect}__score"] = check.get("score")
-                    flat[f"quality__{aspect}__comment"] = check.get("comment", "")
-                
-                eval_rows.append(flat)
+                console.print(
+                    f"[{done}/{len(tasks)}] Judge评估 id={result.task.case.get('id')} "
+                    f"flow=[cyan]{result.task.flow_name}[/cyan] "
+                    f"score: {result.data.get('overall_score')}, tokens: {token_info.get('total_tokens', 0)}"
+                )
+                writer.write(
+                    result.index,
+                    flatten_judge_result(
+                        result.task.case["id"],
+                        result.task.flow_name,
+                        result.data,
+                        token_info,
+                        include_diagnostics=False,
+                    ),
+                )
+            
+            engine.run(tasks, on_result=on_result)
 
+        eval_rows = writer.rows
         if eval_rows:
-            # 保存judge结果到新文件
-            eval_out_path = agent_evals_dir(agent_cfg.id) / "llm" / f"{out_path.stem}.judge.csv"
-            
-            eval_fieldnames = sorted(eval_rows[0].keys(), key=lambda x: (x not in ["id", "flow"], x))
-            with open(eval_out_path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=eval_fieldnames)
-                writer.writeheader()
-                writer.writerows(eval_rows)
-            
             console.print(f"[green]Judge评估完成！结果已写入：[/] {eval_out_path}")
             
             # 显示judge token统计
@@ -602,6 +677,10 @@ def run_eval(
             console.print(f"  输入 tokens: {judge_total_tokens['input_tokens']:,}")
             console.print(f"  输出 tokens: {judge_total_tokens['output_tokens']:,}")
             console.print(f"  总计 tokens: {judge_total_tokens['total_tokens']:,}")
+            if cache_enabled:
+                console.print(f"  缓存命中: {judge_total_tokens['cache_hit']:,} / {len(eval_rows)}")
+            if engine.compare_calls:
+                console.print(f"  对比评估: {engine.compare_calls} 次调用，回退 {engine.compare_fallbacks} 次")
 
     # 最终预览
     console.rule("[bold blue]结果预览[/bold blue]")
@@ -1031,6 +1110,10 @@ def run_pipeline_eval(
     save_pipeline_results(all_results, out_path, variant_list)
     console.print(f"[green]Pipeline 评估完成！结果已写入：[/] {out_path}")
     
+    cache_summary = describe_llm_cache()
+    if cache_summary:
+        console.print(f"[dim]{cache_summary}[/]")
+    
     # 显示结果预览
     console.rule("[bold blue]结果预览[/bold blue]")
     show_pipeline_results_preview(all_results, variant_list)
@@ -0,0 +1,211 @@
+# src/tokenizer.py
+"""
+Token 计数服务 - 进程内共享的 tiktoken 封装
+
+- 按模型惰性加载编码器，无法识别的模型使用 cl100k_base
+- 按内容缓存计数结果（LRU），同一段文本只编码一次
+- 批量计数走 encode_batch
+- tiktoken 不可用（未安装或无法下载编码文件）时退回启发式估算
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# 中文字符与英文单词一次扫描完成：第 1 组命中为中文字符，否则为英文单词
+_TOKEN_PATTERN = re.compile(r'([\u4e00-\u9fff])|\b[a-zA-Z]+\b')
+
+# 短文本直接作为缓存键，长文本使用摘要
+_INLINE_KEY_CHARS = 256
+
+
+def approx_token_count(text: str) -> int:
+    """简单估算 token 数量"""
+    if not text:
+        return 0
+    # 粗略估算：中文每字 1 token，英文按空格分词
+    matches = _TOKEN_PATTERN.findall(text)
+    chinese_chars = sum(1 for m in matches if m)
+    english_words = len(matches) - chinese_chars
+    other_chars = len(text) - chinese_chars - english_words
+    return chinese_chars + english_words + max(0, other_chars // 4)
+
+
+class TokenCounter:
+    """
+    带缓存的 token 计数器
+
+    线程安全。编码器按模型名缓存；加载失败的结果同样缓存，避免反复尝试下载。
+    """
+
+    def __init__(self, cache_size: int = 50_000):
+        """
+        Args:
+            cache_size: 最多缓存的计数结果条数
+        """
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._encodings: Dict[str, Any] = {}
+        self._counts: "OrderedDict[tuple, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_encoding(self, model: Optional[str] = None) -> Any:
+        """获取模型对应的 tiktoken 编码，无法获取时返回 None"""
+        if not TIKTOKEN_AVAILABLE:
+            return None
+        key = model or DEFAULT_ENCODING
+        with self._lock:
+            if key in self._encodings:
+                return self._encodings[key]
+
+        encoding = None
+        if model:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except Exception:
+                encoding = None
+        if encoding is None:
+            try:
+                encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+            except Exception:
+                encoding = None
+
+        with self._lock:
+            self._encodings[key] = encoding
+        return encoding
+
+    def _cache_key(self, encoding: Any, text: str) -> tuple:
+        name = getattr(encoding, "name", None) if encoding is not None else "approx"
+        if len(text) <= _INLINE_KEY_CHARS:
+            return (name, text)
+        return (name, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+
+    def _lookup(self, key: tuple) -> Optional[int]:
+        with self._lock:
+            count = self._counts.get(key)
+            if count is None:
+                self.misses += 1
+                return None
+            self._counts.move_to_end(key)
+            self.hits += 1
+            return count
+
+    def _store(self, key: tuple, count: int) -> None:
+        with self._lock:
+            self._counts[key] = count
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.cache_size:
+                self._counts.popitem(last=False)
+
+    @staticmethod
+    def _encode_count(encoding: Any, text: str) -> int:
+        if encoding is not None:
+            try:
+                return len(encoding.encode(text, disallowed_special=()))
+            except Exception:
+                pass
+        return approx_token_count(text)
+
+    def count(self, text: str, model: Optional[str] = None) -> int:
+        """
+        计算文本的 token 数
+
+        Args:
+            text: 文本
+            model: 模型名称，决定使用的编码；为空时使用 cl100k_base
+        """
+        if not text:
+            return 0
+        encoding = self.get_encoding(model)
+        key = self._cache_key(encoding, text)
+        count = self._lookup(key)
+        if count is None:
+            count = self._encode_count(encoding, text)
+            self._store(key, count)
+        return count
+
+    def count_many(self, texts: Sequence[str], model: Optional[str] = None) -> List[int]:
+        """批量计算 token 数，未命中缓存的文本一次性批量编码"""
+        encoding = self.get_encoding(model)
+        counts: List[Optional[int]] = [None] * len(texts)
+        pending: Dict[tuple, List[int]] = {}
+        for i, text in enumerate(texts):
+            if not text:
+                counts[i] = 0
+                continue
+            key = self._cache_key(encoding, text)
+            if key in pending:
+                pending[key].append(i)
+                continue
+            count = self._lookup(key)
+            if count is None:
+                pending[key] = [i]
+            else:
+                counts[i] = count
+
+        if pending:
+            keys = list(pending)
+            missing = [texts[pending[key][0]] for key in keys]
+            encoded: Optional[List[int]] = None
+            if encoding is not None:
+                try:
+                    encoded = [len(tokens) for tokens in encoding.encode_batch(missing, disallowed_special=())]
+                except Exception:
+                    encoded = None
+            if encoded is None:
+                encoded = [self._encode_count(encoding, text) for text in missing]
+            for key, count in zip(keys, encoded):
+                self._store(key, count)
+                for i in pending[key]:
+                    counts[i] = count
+
+        return counts
+
+    def clear(self) -> None:
+        """清空计数缓存（保留已加载的编码器）"""
+        with self._lock:
+            self._counts.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._counts),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total > 0 else 0.0,
+                "encodings": {k: getattr(v, "name", None) for k, v in self._encodings.items()},
+            }
+
+
+_counter: Optional[TokenCounter] = None
+_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> TokenCounter:
+    """获取全局 token 计数器"""
+    global _counter
+    with _counter_lock:
+        if _counter is None:
+            _counter = TokenCounter()
+        return _counter
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """使用全局计数器计算文本的 token 数"""
+    return get_token_counter().count(text, model)
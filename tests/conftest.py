@@ -62,6 +62,14 @@ def _set_default_model_env(monkeypatch):
     monkeypatch.setenv("OPENAI_MODEL_NAME", "test-model")
 
 
+@pytest.fixture(autouse=True)
+def _fresh_agent_reference_index():
+    """每个测试前清空共享的 agent 引用索引，避免 patch 的加载结果跨测试残留"""
+    from src.pipeline_config import get_agent_reference_index
+    get_agent_reference_index().invalidate()
+    yield
+
+
 @pytest.fixture
 def temp_dir():
     """创建临时目录"""
@@ -0,0 +1,125 @@
+# tests/test_agent_cache.py
+"""
+load_agent 配置缓存单元测试
+
+测试内容：
+- 重复加载返回同一对象且不重复解析
+- agent.yaml 修改或删除后缓存失效
+- registry 重新加载只失效发生变化的 agent
+- AgentConfig.has_flow
+"""
+
+import os
+
+import pytest
+import yaml
+
+from src import agent_registry
+from src.agent_registry import (
+    AgentConfig,
+    AgentFlow,
+    get_agent_cache_stats,
+    invalidate_agent_cache,
+    load_agent,
+)
+
+
+AGENT_ID = "cache_test_agent"
+
+
+def write_agent(agent_dir, flows, mtime=None):
+    path = agent_dir / "agent.yaml"
+    path.write_text(yaml.safe_dump({
+        "id": AGENT_ID,
+        "name": "Cache Test",
+        "flows": [{"name": f, "file": f"{f}.yaml"} for f in flows],
+    }), encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def agent_dir(tmp_path, monkeypatch):
+    """临时 agent 目录（不在 registry 中，走文件系统查找）"""
+    root = tmp_path / "agents"
+    (root / AGENT_ID).mkdir(parents=True)
+    monkeypatch.setattr(agent_registry, "AGENT_DIRS", [root])
+    invalidate_agent_cache()
+    yield root / AGENT_ID
+    invalidate_agent_cache()
+
+
+class TestLoadAgentCache:
+    """测试 load_agent 缓存"""
+
+    def test_repeated_load_returns_cached_config(self, agent_dir, monkeypatch):
+        """测试重复加载只解析一次"""
+        write_agent(agent_dir, ["f1"])
+        calls = []
+        original = agent_registry._parse_agent_config
+        monkeypatch.setattr(agent_registry, "_parse_agent_config",
+                            lambda *args: calls.append(args) or original(*args))
+
+        first = load_agent(AGENT_ID)
+        second = load_agent(AGENT_ID)
+
+        assert first is second
+        assert len(calls) == 1
+        assert get_agent_cache_stats()["hits"] >= 1
+
+    def test_file_change_invalidates(self, agent_dir):
+        """测试 agent.yaml 修改后重新解析"""
+        write_agent(agent_dir, ["f1"], mtime=1_000_000)
+        first = load_agent(AGENT_ID)
+
+        write_agent(agent_dir, ["f1", "f2"], mtime=2_000_000)
+        second = load_agent(AGENT_ID)
+
+        assert second is not first
+        assert second.has_flow("f2")
+
+    def test_deleted_file_raises(self, agent_dir):
+        """测试文件删除后不再返回旧配置"""
+        path = write_agent(agent_dir, ["f1"])
+        load_agent(AGENT_ID)
+
+        path.unlink()
+        agent_dir.rmdir()
+
+        with pytest.raises(FileNotFoundError):
+            load_agent(AGENT_ID)
+
+    def test_registry_reload_invalidates_changed_agents(self, agent_dir):
+        """测试 registry 重新加载只失效发生变化的 agent"""
+        from src.agent_registry_v2 import ReloadEvent
+        from datetime import datetime
+
+        write_agent(agent_dir, ["f1"])
+        first = load_agent(AGENT_ID)
+
+        agent_registry.reload_registry()
+        assert load_agent(AGENT_ID) is first
+
+        agent_registry._on_registry_reload(ReloadEvent(timestamp=datetime.now(), success=True, changed=[AGENT_ID]))
+        assert load_agent(AGENT_ID) is not first
+
+    def test_explicit_invalidate(self, agent_dir):
+        """测试按 agent 清除缓存"""
+        write_agent(agent_dir, ["f1"])
+        first = load_agent(AGENT_ID)
+
+        invalidate_agent_cache(AGENT_ID)
+
+        assert load_agent(AGENT_ID) is not first
+
+
+def test_has_flow():
+    """测试 flow 名称索引"""
+    config = AgentConfig(id="a", name="A", description="", business_goal="", expectations={},
+                         default_testset="", extra_testsets=[],
+                         flows=[AgentFlow("f1", "f1.yaml"), AgentFlow("f2", "f2.yaml")], evaluation={})
+
+    assert config.has_flow("f2")
+    assert not config.has_flow("f3")
+    assert config.flow_names == frozenset({"f1", "f2"})
@@ -500,6 +500,205 @@ class TestAgentRegistry:
         assert "hot_reload_enabled" in stats
 
 
+class TestAgentIndex:
+    """Test indexed queries against a brute-force reference"""
+    
+    @pytest.fixture
+    def random_registry(self, tmp_path):
+        """Create a registry with randomly generated agents"""
+        import random
+        rng = random.Random(0)
+        words = ["Memory", "summary", "Judge", "chat", "记忆", "总结", "ab", "test"]
+        agents = {}
+        for i in range(200):
+            agents[f"agent_{i}"] = {
+                "name": " ".join(rng.choice(words) for _ in range(2)) + f" {i % 7}",
+                "category": rng.choice(["test", "production", "example"]),
+                "environment": rng.choice(["test", "production", "demo"]),
+                "owner": rng.choice(["team-a", "team-b", "team-c"]),
+                "version": "1.0.0",
+                "location": f"agents/agent_{i}",
+                "deprecated": rng.random() < 0.2,
+                "status": rng.choice(["active", "experimental"]),
+                "description": rng.choice([None, " ".join(rng.choice(words) for _ in range(4))]),
+                "tags": rng.sample(["a", "b", "c", "Prod"], rng.randint(0, 3)),
+            }
+        config_path = tmp_path / "agent_registry.yaml"
+        with open(config_path, "w", encoding="utf-8") as f:
+            yaml.dump({"version": "1.0", "agents": agents}, f, allow_unicode=True)
+        return AgentRegistry(config_path=config_path)
+    
+    @staticmethod
+    def reference(registry, query=None, case_sensitive=False, include_deprecated=True, tags=None, **filters):
+        results = []
+        for agent in registry._agents.values():
+            if not include_deprecated and agent.deprecated:
+                continue
+            if any(getattr(agent, key) != value for key, value in filters.items() if value):
+                continue
+            if tags and not set(tags) <= set(agent.tags):
+                continue
+            if query:
+                values = [agent.id, agent.name, agent.description or ""] + list(agent.tags)
+                if not case_sensitive:
+                    values = [v.lower() for v in values]
+                if not any((query if case_sensitive else query.lower()) in v for v in values):
+                    continue
+            results.append(agent)
+        return sorted(results, key=lambda a: a.name)
+    
+    @pytest.mark.parametrize("query", ["mem", "MEMORY", "记忆", "ab", "a", "agent_1", "Judge chat", "zzz"])
+    @pytest.mark.parametrize("case_sensitive", [False, True])
+    def test_search_matches_reference(self, random_registry, query, case_sensitive):
+        """Test indexed search returns the same agents as a linear scan"""
+        result = random_registry.search_agents(query, case_sensitive=case_sensitive)
+        
+        assert result == self.reference(random_registry, query, case_sensitive)
+    
+    @pytest.mark.parametrize("filters", [
+        {"category": "test"},
+        {"category": "production", "environment": "demo", "include_deprecated": False},
+        {"owner": "team-b", "tags": ["a", "b"]},
+        {"status": "experimental", "query": "sum", "tags": ["Prod"]},
+        {"category": "missing"},
+        {},
+    ])
+    def test_query_agents_and_filters(self, random_registry, filters):
+        """Test AND-combined filters return sorted results"""
+        assert random_registry.query_agents(**filters) == self.reference(random_registry, **filters)
+    
+    def test_index_updates_after_changes(self, random_registry):
+        """Test the index reflects register/update/remove"""
+        metadata = AgentMetadata(
+            id="new_agent", name="Zebra", category="test", environment="test",
+            owner="team-z", version="1.0.0", location=Path("agents/new_agent"),
+            deprecated=False, tags=["fresh"],
+        )
+        random_registry.register_agent("new_agent", metadata)
+        assert random_registry.get_agents_by_tag("fresh") == [metadata]
+        assert random_registry.search_agents("zebra") == [metadata]
+        
+        metadata.owner = "team-y"
+        random_registry.update_agent("new_agent", metadata)
+        assert random_registry.get_agents_by_owner("team-z") == []
+        assert random_registry.get_agents_by_owner("team-y") == [metadata]
+        
+        random_registry.remove_agent("new_agent")
+        assert random_registry.search_agents("zebra") == []
+        assert "fresh" not in random_registry.all_tags
+
+
+class TestIncrementalReload:
+    """Test diff-based reload and event coalescing"""
+    
+    @staticmethod
+    def agent_entry(name, **extra):
+        return {
+            "name": name,
+            "category": "test",
+            "environment": "test",
+            "owner": "test-team",
+            "version": "1.0.0",
+            "location": f"agents/{name}",
+            "deprecated": False,
+            **extra,
+        }
+    
+    @staticmethod
+    def write(path, agents):
+        with open(path, "w") as f:
+            yaml.dump({"version": "1.0", "agents": agents}, f)
+    
+    def test_reload_reuses_unchanged_agents(self, tmp_path):
+        """Test only changed entries are rebuilt and reported"""
+        path = tmp_path / "agent_registry.yaml"
+        self.write(path, {"a": self.agent_entry("a"), "b": self.agent_entry("b"), "c": self.agent_entry("c")})
+        registry = AgentRegistry(config_path=path)
+        a, b = registry.get_agent("a"), registry.get_agent("b")
+        
+        self.write(path, {"a": self.agent_entry("a"), "b": self.agent_entry("b", version="2.0.0"),
+                          "d": self.agent_entry("d")})
+        diff = registry.reload_registry()
+        
+        assert (diff.added, diff.changed, diff.removed) == (["d"], ["b"], ["c"])
+        assert registry.get_agent("a") is a
+        assert registry.get_agent("b") is not b
+        assert registry.get_agent("b").version == "2.0.0"
+        assert registry.search_agents("d")[0].id == "d"
+    
+    def test_unchanged_file_reports_no_changes(self, tmp_path):
+        """Test reloading an unchanged file reports no changes"""
+        path = tmp_path / "agent_registry.yaml"
+        self.write(path, {"a": self.agent_entry("a")})
+        registry = AgentRegistry(config_path=path)
+        
+        assert not registry.reload_registry().has_changes
+    
+    def test_generation_bumps_on_every_agent_map_change(self, tmp_path):
+        """Test reloads and in-memory edits advance the generation counter"""
+        path = tmp_path / "agent_registry.yaml"
+        self.write(path, {"a": self.agent_entry("a"), "b": self.agent_entry("b")})
+        registry = AgentRegistry(config_path=path)
+        generation = registry.generation
+        
+        registry.reload_registry()
+        assert registry.generation == generation
+        
+        registry.remove_agent("b")
+        assert registry.generation == generation + 1
+        
+        registry.reload_registry()
+        assert registry.generation == generation + 2
+        
+    def test_reload_restores_in_memory_edits(self, tmp_path):
+        """Test in-memory edits are replaced by the file contents on reload"""
+        path = tmp_path / "agent_registry.yaml"
+        self.write(path, {"a": self.agent_entry("a"), "b": self.agent_entry("b")})
+        registry = AgentRegistry(config_path=path)
+        
+        registry.remove_agent("b")
+        edited = registry.get_agent("a")
+        edited.owner = "someone-else"
+        registry.update_agent("a", edited)
+        
+        diff = registry.reload_registry()
+        
+        assert (diff.added, diff.changed) == (["b"], ["a"])
+        assert registry.get_agent("a").owner == "test-team"
+    
+    def test_failed_reload_keeps_previous_registry(self, tmp_path):
+        """Test a broken config leaves the loaded agents untouched"""
+        path = tmp_path / "agent_registry.yaml"
+        self.write(path, {"a": self.agent_entry("a")})
+        registry = AgentRegistry(config_path=path)
+        agents = registry._agents
+        
+        self.write(path, {"a": self.agent_entry("a"), "bad": {"name": "bad"}})
+        with pytest.raises(ValueError):
+            registry.reload_registry()
+        
+        assert registry._agents is agents
+    
+    def test_events_are_coalesced(self, tmp_path):
+        """Test a burst of file events results in a single reload"""
+        import time
+        from types import SimpleNamespace
+        from src.agent_registry_v2 import RegistryFileHandler
+        
+        path = tmp_path / "agent_registry.yaml"
+        reloads = []
+        handler = RegistryFileHandler(SimpleNamespace(_trigger_reload=lambda: reloads.append(1)), path,
+                                      debounce=0.05)
+        event = SimpleNamespace(is_directory=False, src_path=str(path))
+        
+        for _ in range(5):
+            handler.on_modified(event)
+        handler.on_modified(SimpleNamespace(is_directory=False, src_path=str(tmp_path / "other.yaml")))
+        time.sleep(0.3)
+        
+        assert reloads == [1]
+
+
 class TestHotReload:
     """Test hot reload functionality"""
     
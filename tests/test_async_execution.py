@@ -0,0 +1,188 @@
+"""
+Tests for Native Async Execution
+
+This module tests the ExecutionManager's execute_*_async methods, which await
+agents and pipelines directly on the event loop, and the asyncio execution
+backend of the async execution endpoint.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.app import app
+from src.api.execution_manager import ExecutionManager, get_execution_manager
+from src.api.models import ExecutionStatus, ExecutionType
+from src.api.scheduler import ExecutionScheduler
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def manager():
+    scheduler = ExecutionScheduler()
+    yield ExecutionManager(scheduler=scheduler)
+    scheduler.shutdown()
+
+
+class TestExecuteAgentAsync:
+    """Test native agent executions."""
+
+    def test_completes_on_event_loop(self, manager):
+        """The agent is awaited on the calling thread, not a scheduler worker."""
+        threads = []
+
+        async def execute(agent_id, flow_id, inputs, model_override):
+            threads.append(threading.current_thread())
+            await asyncio.sleep(0.01)
+            return {"output": inputs["text"].upper()}
+
+        manager._aexecute_agent = execute
+        manager.create_execution("exec_native", ExecutionType.AGENT, "agent", {"text": "hi"}, {})
+
+        run(manager.execute_agent_async("exec_native", "agent", {"text": "hi"}, {}))
+
+        status = manager.get_execution_status("exec_native")
+        assert status.status == ExecutionStatus.COMPLETED
+        assert status.outputs == {"output": "HI"}
+        assert status.progress.percentage == 100.0
+        assert threads == [threading.main_thread()]
+        assert not manager._cancel_tokens
+
+    def test_failure_recorded(self, manager):
+        async def execute(*args):
+            raise RuntimeError("boom")
+
+        manager._aexecute_agent = execute
+        manager.create_execution("exec_fail", ExecutionType.AGENT, "agent", {}, {})
+
+        run(manager.execute_agent_async("exec_fail", "agent", {}, {}))
+
+        status = manager.get_execution_status("exec_fail")
+        assert status.status == ExecutionStatus.FAILED
+        assert status.error.message == "boom"
+        assert status.error.details == {"agent_id": "agent"}
+
+    def test_cancel_stops_awaiting(self, manager):
+        """Cancelling a running native execution cancels the awaiting task."""
+        async def execute(*args):
+            await asyncio.sleep(30)
+
+        manager._aexecute_agent = execute
+        manager.create_execution("exec_cancel", ExecutionType.AGENT, "agent", {}, {})
+
+        async def scenario():
+            task = asyncio.create_task(manager.execute_agent_async("exec_cancel", "agent", {}, {}))
+            await asyncio.sleep(0.05)
+            await asyncio.get_running_loop().run_in_executor(None, manager.cancel_execution, "exec_cancel")
+            await asyncio.wait_for(task, timeout=2)
+
+        start = time.time()
+        run(scenario())
+
+        status = manager.get_execution_status("exec_cancel")
+        assert time.time() - start < 2
+        assert status.status == ExecutionStatus.CANCELLED
+        assert status.cancellation_latency_ms is not None
+        assert not manager._cancel_tokens
+
+    def test_many_concurrent_executions(self, manager):
+        """Hundreds of executions wait on their LLM calls concurrently on one loop."""
+        async def execute(agent_id, flow_id, inputs, model_override):
+            await asyncio.sleep(0.2)
+            return {"output": inputs["i"]}
+
+        manager._aexecute_agent = execute
+        ids = [f"exec_{i}" for i in range(500)]
+        for i, execution_id in enumerate(ids):
+            manager.create_execution(execution_id, ExecutionType.AGENT, "agent", {"i": i}, {})
+
+        async def scenario():
+            await asyncio.gather(*(
+                manager.execute_agent_async(execution_id, "agent", {"i": i}, {})
+                for i, execution_id in enumerate(ids)
+            ))
+
+        start = time.time()
+        run(scenario())
+
+        assert time.time() - start < 3
+        assert [manager.get_execution_status(e).outputs["output"] for e in ids] == list(range(500))
+
+
+def test_execute_pipeline_async(manager, sample_pipeline_config, mock_load_agent, monkeypatch):
+    """Pipelines run with AsyncPipelineRunner and report step progress."""
+    async def arun_flow(flow_name, extra_vars, agent_id):
+        return f"{flow_name}-out", {"total_tokens": 3}, None
+
+    monkeypatch.setattr("src.async_pipeline_runner.arun_flow_with_tokens", arun_flow)
+    monkeypatch.setattr(manager, "_load_pipeline", lambda pipeline_id: sample_pipeline_config)
+    manager.create_execution("exec_pipe", ExecutionType.PIPELINE, "test_pipeline", {}, {})
+
+    async def scenario():
+        subscription = manager.events.subscribe("exec_pipe", after=0)
+        await manager.execute_pipeline_async("exec_pipe", "test_pipeline", {}, {})
+        events = []
+        while not subscription.done:
+            events.append(await subscription.next(timeout=1))
+        return events
+
+    events = run(scenario())
+
+    status = manager.get_execution_status("exec_pipe")
+    assert status.status == ExecutionStatus.COMPLETED
+    assert status.outputs == {"step2_output": "baseline_flow2-out"}
+    assert [e.type for e in events] == ["started", "progress", "progress", "progress", "completed"]
+    assert events[2].data["progress"]["current_step_name"] == "step2"
+
+
+def test_threaded_pipeline_matches_native(manager, sample_pipeline_config, mock_load_agent, monkeypatch):
+    """The scheduler-thread pipeline path stores the same outputs as the native one."""
+    async def arun_flow(flow_name, extra_vars, agent_id):
+        return f"{flow_name}-out", {"total_tokens": 3}, None
+
+    monkeypatch.setattr("src.async_pipeline_runner.arun_flow_with_tokens", arun_flow)
+    monkeypatch.setattr("src.pipeline_runner.run_flow_with_tokens",
+                        lambda flow_name, extra_vars, agent_id, **kwargs: (f"{flow_name}-out", {"total_tokens": 3}, None))
+    monkeypatch.setattr(manager, "_load_pipeline", lambda pipeline_id: sample_pipeline_config)
+    for execution_id in ("exec_thread", "exec_native"):
+        manager.create_execution(execution_id, ExecutionType.PIPELINE, "test_pipeline", {}, {})
+
+    manager.submit_pipeline("exec_thread", "test_pipeline", {}, {}).result(timeout=5)
+    run(manager.execute_pipeline_async("exec_native", "test_pipeline", {}, {}))
+
+    threaded = manager.get_execution_status("exec_thread")
+    native = manager.get_execution_status("exec_native")
+    assert threaded.status == native.status == ExecutionStatus.COMPLETED
+    assert threaded.outputs == native.outputs
+
+
+def test_endpoint_with_asyncio_backend(monkeypatch):
+    """With native_async the endpoint starts executions on the app's event loop."""
+    manager = get_execution_manager()
+    monkeypatch.setattr(manager, "native_async", True)
+
+    async def execute(agent_id, flow_id, inputs, model_override):
+        return {"output": "native"}
+
+    monkeypatch.setattr(manager, "_aexecute_agent", execute)
+
+    with TestClient(app) as client:
+        response = client.post("/api/v1/executions", json={"type": "agent", "target_id": "agent", "inputs": {}})
+        assert response.status_code == 202
+        execution_id = response.json()["execution_id"]
+
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            status = client.get(f"/api/v1/executions/{execution_id}").json()
+            if status["status"] == "completed":
+                break
+            time.sleep(0.02)
+
+    assert status["status"] == "completed"
+    assert status["outputs"] == {"output": "native"}
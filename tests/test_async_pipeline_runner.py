@@ -0,0 +1,241 @@
+# tests/test_async_pipeline_runner.py
+"""
+AsyncPipelineRunner 单元测试
+
+测试内容：
+- 与同步 PipelineRunner 的结果一致
+- 步骤按依赖调度、并发数受 max_workers 限制
+- 必需依赖失败时跳过下游步骤，必需步骤失败后不再执行新的步骤
+- 批量步骤的 item 并发上限
+- 大量样本在单个事件循环上并发执行
+- 取消令牌中止正在执行的步骤
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from src.async_pipeline_runner import AsyncPipelineRunner
+from src.cancellation import CancellationToken
+from src.models import PipelineConfig, StepConfig
+from src.pipeline_runner import PipelineRunner
+
+
+TOKENS = {"input_tokens": 1, "output_tokens": 1, "total_tokens": 2}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class FakeFlows:
+    """记录并发度的异步 flow"""
+
+    def __init__(self, delay: float = 0.0, fail: tuple = ()):
+        self.delay = delay
+        self.fail = fail
+        self.running = 0
+        self.max_running = 0
+        self.calls = []
+
+    async def __call__(self, flow_name, extra_vars, agent_id):
+        self.calls.append(flow_name)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        if flow_name in self.fail:
+            raise RuntimeError(f"{flow_name} failed")
+        return f"{flow_name}<{extra_vars.get('text', '')}>", dict(TOKENS), None
+
+
+@pytest.fixture
+def fake_flows(monkeypatch, mock_load_agent):
+    flows = FakeFlows()
+    monkeypatch.setattr("src.async_pipeline_runner.arun_flow_with_tokens", flows)
+    return flows
+
+
+def fan_in_pipeline(branches: int = 3) -> PipelineConfig:
+    """多个独立步骤汇总到一个步骤"""
+    steps = [
+        StepConfig(
+            id=f"branch{i}",
+            type="agent_flow",
+            agent="test_agent",
+            flow="test_flow",
+            input_mapping={"text": "input_text"},
+            output_key=f"branch{i}_output",
+        )
+        for i in range(branches)
+    ]
+    steps.append(StepConfig(
+        id="merge",
+        type="agent_flow",
+        agent="test_agent",
+        flow="test_flow2",
+        input_mapping={"text": "branch0_output", **{f"b{i}": f"branch{i}_output" for i in range(1, branches)}},
+        output_key="merged",
+    ))
+    return PipelineConfig(
+        id="fan_in",
+        name="汇总",
+        inputs=[{"name": "input_text", "desc": "输入文本"}],
+        steps=steps,
+        outputs=[{"key": "merged", "label": "输出"}],
+    )
+
+
+class TestAsyncPipelineRunner:
+    """测试 AsyncPipelineRunner"""
+
+    def test_matches_sync_runner(self, sample_pipeline_config, sample_testset, fake_flows, monkeypatch):
+        """异步执行的输出、token 统计与同步执行一致"""
+        def run_flow(flow_name, extra_vars, agent_id):
+            return f"{flow_name}<{extra_vars.get('text', '')}>", dict(TOKENS), None
+
+        monkeypatch.setattr("src.pipeline_runner.run_flow_with_tokens", run_flow)
+
+        sync_results = PipelineRunner(sample_pipeline_config).execute(sample_testset, use_progress_tracker=False)
+        async_results = run(AsyncPipelineRunner(sample_pipeline_config).aexecute(sample_testset))
+
+        for sync_result, async_result in zip(sync_results, async_results):
+            assert async_result.error is None
+            assert async_result.sample_id == sync_result.sample_id
+            assert async_result.final_outputs == sync_result.final_outputs
+            assert async_result.total_token_usage == sync_result.total_token_usage
+            assert async_result.critical_path == ["step1", "step2"]
+
+    def test_steps_bounded_by_max_workers(self, fake_flows):
+        """独立步骤并发执行（不超过 max_workers），汇总步骤在所有依赖完成后执行"""
+        fake_flows.delay = 0.05
+        runner = AsyncPipelineRunner(fan_in_pipeline(3), max_workers=2)
+        progress = []
+
+        result = run(runner.aexecute_sample(
+            {"id": "s1", "input_text": "hi"},
+            on_progress=lambda done, total, step_id: progress.append((done, total, step_id)),
+        ))
+
+        assert result.error is None
+        assert fake_flows.max_running == 2
+        assert fake_flows.calls[-1] == "test_flow2"
+        assert result.final_outputs["merged"].endswith("<test_flow<hi>>")
+        assert progress[-1] == (4, 4, "merge")
+
+    def test_failed_dependency_skips_downstream(self, sample_pipeline_config, fake_flows):
+        """必需依赖失败时下游步骤被跳过，样本标记为失败"""
+        fake_flows.fail = ("baseline_flow",)
+
+        result = run(AsyncPipelineRunner(sample_pipeline_config).aexecute_sample({"id": "s1", "input_text": "x"}))
+
+        steps = {step.step_id: step for step in result.step_results}
+        assert "baseline_flow failed" in steps["step1"].error
+        assert steps["step2"].error == "必需的依赖步骤失败，跳过执行"
+        assert "step1" in result.error
+        assert fake_flows.calls == ["baseline_flow"]
+
+    def test_required_failure_skips_through_optional_and_aborts(self, fake_flows):
+        """跳过经过可选步骤继续传播；必需步骤失败后等待执行的步骤不再执行"""
+        fake_flows.fail = ("bad",)
+
+        def step(step_id, text_key, **kwargs):
+            return StepConfig(id=step_id, type="agent_flow", agent="test_agent", flow=step_id,
+                              input_mapping={"text": text_key}, output_key=f"{step_id}_out", **kwargs)
+
+        config = PipelineConfig(
+            id="abort",
+            name="中止",
+            inputs=[{"name": "input_text", "desc": "输入文本"}],
+            steps=[
+                step("bad", "input_text"),
+                step("child", "bad_out", required=False),
+                step("grandchild", "child_out"),
+                step("other", "input_text"),
+            ],
+            outputs=[{"key": "grandchild_out", "label": "输出"}],
+        )
+
+        result = run(AsyncPipelineRunner(config, max_workers=1).aexecute_sample({"id": "s1", "input_text": "x"}))
+
+        steps = {step.step_id: step for step in result.step_results}
+        assert fake_flows.calls == ["bad"]
+        assert "'bad'" in result.error
+        assert steps["grandchild"].error == "依赖的步骤被跳过，跳过执行"
+        assert all(steps[s].skipped for s in ("child", "grandchild", "other"))
+
+    def test_batch_items_bounded_by_step_max_workers(self, fake_flows):
+        """批量步骤的 items 按 step.max_workers 并发，输出顺序与输入一致"""
+        fake_flows.delay = 0.02
+        config = PipelineConfig(
+            id="batch",
+            name="批量",
+            inputs=[{"name": "items", "desc": "列表"}],
+            steps=[StepConfig(
+                id="each",
+                type="agent_flow",
+                agent="test_agent",
+                flow="test_flow",
+                input_mapping={"text": "items"},
+                output_key="results",
+                batch_mode=True,
+                batch_size=10,
+                concurrent=True,
+                max_workers=3,
+            )],
+            outputs=[{"key": "results", "label": "结果"}],
+        )
+        items = [f"item{i}" for i in range(12)]
+
+        result = run(AsyncPipelineRunner(config).aexecute_sample({"id": "s1", "items": items}))
+
+        assert result.error is None
+        assert result.final_outputs["results"] == [f"test_flow<{item}>" for item in items]
+        assert result.total_token_usage["total_tokens"] == 2 * len(items)
+        assert fake_flows.max_running == 3
+
+    def test_many_samples_share_one_event_loop(self, sample_pipeline_config, fake_flows, monkeypatch):
+        """大量样本的模型调用在同一个事件循环上并发等待，线程数只受默认线程池上限约束"""
+        fake_flows.delay = 0.2
+        samples = [{"id": f"s{i}", "input_text": str(i)} for i in range(300)]
+        threads_before = threading.active_count()
+        peak_threads = 0
+
+        async def counting_flows(flow_name, extra_vars, agent_id):
+            nonlocal peak_threads
+            peak_threads = max(peak_threads, threading.active_count())
+            return await fake_flows(flow_name, extra_vars, agent_id)
+
+        monkeypatch.setattr("src.async_pipeline_runner.arun_flow_with_tokens", counting_flows)
+
+        start = time.time()
+        results = run(AsyncPipelineRunner(sample_pipeline_config, sample_concurrency=300).aexecute(samples))
+
+        # 两个串行步骤，每步 0.2 秒
+        assert time.time() - start < 2.0
+        assert fake_flows.max_running == 300
+        assert [r.sample_id for r in results] == [s["id"] for s in samples]
+        assert all(r.error is None for r in results)
+        assert peak_threads <= threads_before + min(32, (os.cpu_count() or 1) + 4)
+
+    def test_cancel_token_aborts_running_step(self, sample_pipeline_config, fake_flows):
+        """取消后正在等待模型的步骤立即中止，下游步骤被跳过"""
+        fake_flows.delay = 10
+        runner = AsyncPipelineRunner(sample_pipeline_config)
+        token = CancellationToken()
+        runner.set_cancel_token(token)
+        threading.Timer(0.1, token.cancel, ("test",)).start()
+
+        start = time.time()
+        result = run(runner.aexecute_sample({"id": "s1", "input_text": "x"}))
+
+        assert time.time() - start < 2
+        assert "取消" in result.error
+        steps = {step.step_id: step for step in result.step_results}
+        assert "中止" in steps["step1"].error
+        assert "跳过" in steps["step2"].error
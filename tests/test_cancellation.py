@@ -0,0 +1,270 @@
+# tests/test_cancellation.py
+"""
+协作式取消测试
+
+测试 CancellationToken 本身，以及它在 CodeExecutor、ConcurrentExecutor、
+LLMGovernor、PipelineRunner 和 API ExecutionManager 中的传递效果。
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.api.execution_manager import ExecutionManager
+from src.api.models import ExecutionStatus, ExecutionType
+from src.api.scheduler import ExecutionScheduler
+from src.cancellation import CancellationToken, ExecutionCancelled
+from src.code_executor import CodeExecutor
+from src.concurrent_executor import ConcurrentExecutor, Task
+from src.llm_governor import LLMGovernor
+from src.models import CodeNodeConfig, InputSpec, OutputSpec, PipelineConfig, StepConfig
+from src.pipeline_runner import PipelineRunner
+
+
+SLOW_PYTHON = """
+import time
+
+def transform(inputs):
+    time.sleep(30)
+    return {"done": True}
+"""
+
+
+def cancel_later(token, delay=0.3):
+    timer = threading.Timer(delay, token.cancel, ("test",))
+    timer.start()
+    return timer
+
+
+class TestCancellationToken:
+    """测试 CancellationToken"""
+
+    def test_callbacks_run_once(self):
+        """cancel() 只生效一次；取消后注册的回调立即执行，注销的回调不执行"""
+        token = CancellationToken()
+        calls = []
+        token.register(lambda: calls.append("a"))
+        unregister = token.register(lambda: calls.append("b"))
+        unregister()
+
+        assert token.cancel("stop")
+        assert not token.cancel("again")
+        token.register(lambda: calls.append("late"))
+
+        assert calls == ["a", "late"]
+        assert token.reason == "stop"
+        with pytest.raises(ExecutionCancelled):
+            token.raise_if_cancelled()
+
+    def test_run_returns_result(self):
+        token = CancellationToken()
+        assert token.run(lambda: 42) == 42
+        with pytest.raises(ValueError):
+            token.run(lambda: int("x"))
+
+    def test_run_stops_waiting_on_cancel(self):
+        """阻塞调用在取消后立即返回，不等待其结束"""
+        token = CancellationToken()
+        release = threading.Event()
+        cancel_later(token, 0.1)
+
+        start = time.time()
+        with pytest.raises(ExecutionCancelled):
+            token.run(lambda: release.wait(10))
+        release.set()
+
+        assert time.time() - start < 2
+
+    def test_run_uses_bounded_pool(self):
+        """被放弃的调用在有界线程池中结束，排队中的调用取消后不再执行"""
+        pool = ThreadPoolExecutor(max_workers=2)
+        release = threading.Event()
+        started = []
+
+        def blocking():
+            started.append(1)
+            release.wait(10)
+
+        try:
+            for _ in range(5):
+                token = CancellationToken()
+                cancel_later(token, 0.05)
+                with pytest.raises(ExecutionCancelled):
+                    token.run(blocking, pool)
+            assert len(started) == 2
+        finally:
+            release.set()
+            pool.shutdown(wait=True)
+        assert len(started) == 2
+
+
+class TestCodeExecutorCancellation:
+    """测试代码节点取消"""
+
+    @pytest.mark.parametrize("use_worker_pool", [True, False])
+    def test_cancel_kills_running_code(self, use_worker_pool):
+        token = CancellationToken()
+        executor = CodeExecutor(use_worker_pool=use_worker_pool)
+        cancel_later(token, 0.5)
+
+        start = time.time()
+        result = executor.execute_python(SLOW_PYTHON, {}, timeout=20, cancel_token=token)
+
+        assert time.time() - start < 10
+        assert result.cancelled and not result.success and not result.timeout
+
+    def test_cancelled_before_start(self):
+        token = CancellationToken()
+        token.cancel()
+
+        result = CodeExecutor().execute(SLOW_PYTHON, "python", {}, cancel_token=token)
+
+        assert result.cancelled
+        assert result.execution_time == 0.0
+
+
+class TestConcurrentExecutorCancellation:
+    """测试 ConcurrentExecutor 取消"""
+
+    def test_pending_tasks_skipped(self):
+        token = CancellationToken()
+        started = []
+
+        def work(i):
+            started.append(i)
+            if i == 0:
+                token.cancel()
+            return i
+
+        tasks = [Task(id=f"t{i}", func=work, args=(i,)) for i in range(5)]
+        results = ConcurrentExecutor(max_workers=1).execute_concurrent(tasks, cancel_token=token)
+
+        assert started == [0]
+        assert results[0].success
+        assert all(r.skipped and r.error_type == "ExecutionCancelled" for r in results[1:])
+
+    def test_dependent_tasks_skipped(self):
+        token = CancellationToken()
+        tasks = [
+            Task(id="a", func=token.cancel),
+            Task(id="b", func=lambda: "b", dependencies=["a"]),
+        ]
+        executor = ConcurrentExecutor(max_workers=2)
+
+        results = executor.execute_with_dependencies(tasks, cancel_token=token)
+
+        assert results[0].success
+        assert results[1].skipped
+        assert executor.get_error_summary().skipped_tasks == ["b"]
+
+
+def test_governor_acquire_interrupted():
+    """排队等待槽位时取消会立即抛出 ExecutionCancelled"""
+    governor = LLMGovernor(max_in_flight=1)
+    governor.acquire("m")
+    token = CancellationToken()
+    cancel_later(token, 0.1)
+
+    start = time.time()
+    with pytest.raises(ExecutionCancelled):
+        governor.invoke("m", lambda: "never", cancel_token=token)
+
+    assert time.time() - start < 2
+    assert governor.get_stats()["in_flight"] == 1
+
+
+def test_governor_slot_released_after_cancel():
+    """模型请求进行中被取消时立即归还槽位，不等待请求结束"""
+    governor = LLMGovernor(max_in_flight=1)
+    token = CancellationToken()
+    release = threading.Event()
+    cancel_later(token, 0.1)
+
+    start = time.time()
+    try:
+        with pytest.raises(ExecutionCancelled):
+            governor.invoke("m", lambda: release.wait(10), cancel_token=token)
+        assert time.time() - start < 2
+
+        assert governor.get_stats()["in_flight"] == 0
+        assert governor.invoke("m", lambda: "next") == "next"
+    finally:
+        release.set()
+
+
+def make_pipeline():
+    return PipelineConfig(
+        id="cancel_pipeline",
+        name="取消测试",
+        inputs=[InputSpec(name="value", desc="输入")],
+        steps=[
+            StepConfig(
+                id="slow",
+                type="code_node",
+                code_config=CodeNodeConfig(language="python", code=SLOW_PYTHON, timeout=20),
+                input_mapping={"value": "value"},
+                output_key="slow_output",
+            ),
+            StepConfig(
+                id="after",
+                type="code_node",
+                code_config=CodeNodeConfig(
+                    language="python",
+                    code="def transform(inputs):\n    return inputs\n",
+                    timeout=5,
+                ),
+                input_mapping={"data": "slow_output"},
+                output_key="after_output",
+            ),
+        ],
+        outputs=[OutputSpec(key="after_output", label="输出")],
+    )
+
+
+@pytest.mark.parametrize("enable_concurrent", [True, False])
+def test_pipeline_cancel_aborts_and_skips(enable_concurrent):
+    """取消后正在执行的步骤被中止，依赖它的步骤被跳过"""
+    runner = PipelineRunner(make_pipeline(), enable_concurrent=enable_concurrent)
+    token = CancellationToken()
+    runner.set_cancel_token(token)
+    cancel_later(token, 0.5)
+
+    start = time.time()
+    result = runner.execute_sample({"id": "s1", "value": 1})
+
+    assert time.time() - start < 10
+    assert "取消" in result.error
+    steps = {step.step_id: step for step in result.step_results}
+    assert "中止" in steps["slow"].error
+    assert "跳过" in steps["after"].error
+
+
+def test_manager_records_cancellation_latency():
+    """取消运行中的执行会通知其令牌，并记录从请求取消到工作停止的耗时"""
+    scheduler = ExecutionScheduler()
+    manager = ExecutionManager(scheduler=scheduler)
+    started = threading.Event()
+
+    def execute(agent_id, flow_id, inputs, model_override, cancel_token):
+        started.set()
+        cancel_token.wait(5)
+        time.sleep(0.05)
+        cancel_token.raise_if_cancelled()
+        return {"output": "not cancelled"}
+
+    manager._execute_agent_sync = execute
+    manager.create_execution("exec_cancel", ExecutionType.AGENT, "agent", {}, {})
+    job = manager.submit_agent("exec_cancel", "agent", {}, {})
+    assert started.wait(5)
+
+    manager.cancel_execution("exec_cancel")
+    job.result(timeout=5)
+
+    status = manager.get_execution_status("exec_cancel")
+    assert status.status == ExecutionStatus.CANCELLED
+    assert status.outputs is None
+    assert 40 <= status.cancellation_latency_ms < 5000
+    assert not manager._cancel_tokens
+    scheduler.shutdown()
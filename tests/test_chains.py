@@ -0,0 +1,324 @@
+# tests/test_chains.py
+"""
+chains 模块单元测试
+
+测试 compiled flow 缓存，包括：
+- 缓存命中与未命中统计
+- flow 文件修改后的失效与重新编译
+- LRU 淘汰
+- run_flow_with_tokens 的输出与 token 统计
+- 发送前的 Prompt 长度检查
+- arun_flow_with_tokens 通过 ainvoke 调用模型
+"""
+
+import asyncio
+import os
+import threading
+
+import pytest
+import yaml
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+import src.chains as chains
+from src.chains import CompiledFlowCache, arun_flow_with_tokens, run_flow, run_flow_with_tokens
+from src.llm_governor import LLMGovernor, set_llm_governor
+
+
+class FakeLLM:
+    """记录调用次数的假 LLM 工厂"""
+
+    def __init__(self, content: str = "hello"):
+        self.content = content
+        self.build_count = 0
+        self.invoke_count = 0
+        self.ainvoke_count = 0
+        self._lock = threading.Lock()
+
+    def _message(self):
+        return AIMessage(
+            content=self.content,
+            usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+        )
+
+    def build(self, flow_cfg, model_override=None):
+        self.build_count += 1
+
+        def _invoke(prompt_value):
+            with self._lock:
+                self.invoke_count += 1
+            return self._message()
+
+        async def _ainvoke(prompt_value):
+            self.ainvoke_count += 1
+            await asyncio.sleep(0.05)
+            return self._message()
+
+        return RunnableLambda(_invoke, afunc=_ainvoke)
+
+
+def _write_flow(path, **extra):
+    cfg = {
+        "system_prompt": "你是助手",
+        "user_template": "{input}",
+    }
+    cfg.update(extra)
+    path.write_text(yaml.safe_dump(cfg, allow_unicode=True), encoding="utf-8")
+
+
+@pytest.fixture
+def flow_env(tmp_path, monkeypatch):
+    """使用临时 prompts 目录和假 LLM 的测试环境"""
+    fake_llm = FakeLLM()
+    monkeypatch.setattr(chains, "PROMPT_DIR", tmp_path)
+    monkeypatch.setattr(chains, "build_llm", fake_llm.build)
+    monkeypatch.setattr(chains, "_compiled_flow_cache", CompiledFlowCache())
+    _write_flow(tmp_path / "demo_v1.yaml")
+    return tmp_path, fake_llm
+
+
+class TestCompiledFlowCache:
+    """测试 CompiledFlowCache"""
+
+    def test_second_call_hits_cache(self, flow_env):
+        """测试重复调用复用编译结果"""
+        _, fake_llm = flow_env
+        cache = chains.get_compiled_flow_cache()
+
+        first = cache.get("demo_v1")
+        second = cache.get("demo_v1")
+
+        assert first is second
+        assert fake_llm.build_count == 1
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert first.input_variables == ["input"]
+
+    def test_model_override_is_part_of_key(self, flow_env):
+        """测试不同模型覆盖分别缓存"""
+        _, fake_llm = flow_env
+        cache = chains.get_compiled_flow_cache()
+
+        cache.get("demo_v1")
+        cache.get("demo_v1", model_override="other-model")
+
+        assert fake_llm.build_count == 2
+        assert len(cache) == 2
+
+    def test_file_change_invalidates_entry(self, flow_env):
+        """测试 flow 文件修改后重新编译"""
+        prompt_dir, _ = flow_env
+        cache = chains.get_compiled_flow_cache()
+
+        first = cache.get("demo_v1")
+        flow_path = prompt_dir / "demo_v1.yaml"
+        _write_flow(flow_path, user_template="新模板 {text}")
+        stat = flow_path.stat()
+        os.utime(flow_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        second = cache.get("demo_v1")
+
+        assert second is not first
+        assert second.input_variables == ["text"]
+        assert cache.get_stats()["invalidations"] == 1
+
+    def test_lru_eviction(self, flow_env):
+        """测试超过容量时淘汰最久未使用的条目"""
+        prompt_dir, _ = flow_env
+        cache = CompiledFlowCache(max_size=2)
+        for name in ("a_v1", "b_v1", "c_v1"):
+            _write_flow(prompt_dir / f"{name}.yaml")
+
+        cache.get("a_v1")
+        cache.get("b_v1")
+        cache.get("a_v1")  # a 成为最近使用
+        cache.get("c_v1")  # 淘汰 b
+
+        assert cache.get_stats()["evictions"] == 1
+        cache.get("a_v1")
+        assert cache.get_stats()["hits"] == 2
+        cache.get("b_v1")
+        assert cache.get_stats()["misses"] == 4
+
+    def test_invalidate_by_flow(self, flow_env):
+        """测试按 flow 手动失效"""
+        cache = chains.get_compiled_flow_cache()
+        cache.get("demo_v1")
+
+        assert cache.invalidate(flow_name="demo_v1") == 1
+        assert len(cache) == 0
+
+
+class TestRunFlowWithCache:
+    """测试 run_flow / run_flow_with_tokens 使用缓存"""
+
+    def test_run_flow_with_tokens_reuses_compiled_flow(self, flow_env):
+        """测试多次调用只编译一次且结果正确"""
+        _, fake_llm = flow_env
+
+        for _ in range(3):
+            output, token_info, parser_stats = run_flow_with_tokens(
+                "demo_v1", extra_vars={"input": "你好"}
+            )
+            assert output == "hello"
+            assert token_info["total_tokens"] == 15
+            assert parser_stats is None
+
+        assert fake_llm.build_count == 1
+        assert chains.get_compiled_flow_cache().get_stats()["hits"] == 2
+
+    def test_run_flow_pops_model_override(self, flow_env):
+        """测试 _model_override 不会作为模板变量传递"""
+        extra_vars = {"input": "你好", "_model_override": "m2"}
+
+        assert run_flow("demo_v1", extra_vars=extra_vars) == "hello"
+        assert "_model_override" not in extra_vars
+
+
+class TestSingleInvocationWithParser:
+    """测试配置 output_parser 时只调用一次 LLM"""
+
+    def test_json_parser_single_invocation(self, flow_env):
+        """测试 JSON parser 路径只发送一次模型请求且保留 token 统计"""
+        prompt_dir, fake_llm = flow_env
+        fake_llm.content = '{"score": 8, "comment": "ok"}'
+        _write_flow(
+            prompt_dir / "judge_v1.yaml",
+            output_parser={"type": "json", "retry_on_error": False},
+        )
+
+        output, token_info, parser_stats = run_flow_with_tokens(
+            "judge_v1", extra_vars={"input": "x"}
+        )
+
+        assert output == {"score": 8, "comment": "ok"}
+        assert token_info == {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+        assert parser_stats is None
+        assert fake_llm.invoke_count == 1
+
+    def test_retry_parser_stats_scoped_to_call(self, flow_env):
+        """测试 RetryOutputParser 统计信息只反映本次调用"""
+        prompt_dir, fake_llm = flow_env
+        fake_llm.content = '{"score": 8}'
+        _write_flow(
+            prompt_dir / "judge_v2.yaml",
+            output_parser={"type": "json", "retry_on_error": True, "max_retries": 2},
+        )
+
+        for _ in range(2):
+            output, _, parser_stats = run_flow_with_tokens("judge_v2", extra_vars={"input": "x"})
+            assert output == {"score": 8}
+            assert parser_stats["success_count"] == 1
+            assert parser_stats["failure_count"] == 0
+
+        assert fake_llm.invoke_count == 2
+
+    def test_parse_failure_raises_after_single_invocation(self, flow_env):
+        """测试解析失败时不会重复请求模型"""
+        prompt_dir, fake_llm = flow_env
+        fake_llm.content = "not json"
+        _write_flow(
+            prompt_dir / "judge_v3.yaml",
+            output_parser={"type": "json", "retry_on_error": True, "max_retries": 2},
+        )
+
+        with pytest.raises(Exception):
+            run_flow_with_tokens("judge_v3", extra_vars={"input": "x"})
+
+        assert fake_llm.invoke_count == 1
+
+
+class TestPromptPreflight:
+    """测试发送前的 Prompt 长度检查"""
+
+    def test_over_length_prompt_not_sent(self, flow_env):
+        """测试超过 max_prompt_tokens 的请求在发送前被拒绝"""
+        prompt_dir, fake_llm = flow_env
+        _write_flow(prompt_dir / "short_v1.yaml", max_prompt_tokens=20)
+
+        with pytest.raises(chains.PromptTooLongError):
+            run_flow_with_tokens("short_v1", extra_vars={"input": "很长的输入" * 50})
+
+        assert fake_llm.invoke_count == 0
+
+    def test_env_limit_and_flow_override(self, flow_env, monkeypatch):
+        """测试环境变量上限生效且 flow 配置优先"""
+        prompt_dir, fake_llm = flow_env
+        monkeypatch.setenv("LLM_MAX_PROMPT_TOKENS", "5")
+        _write_flow(prompt_dir / "roomy_v1.yaml", max_prompt_tokens=10_000)
+
+        with pytest.raises(chains.PromptTooLongError):
+            run_flow_with_tokens("demo_v1", extra_vars={"input": "hello " * 50})
+        output, _, _ = run_flow_with_tokens("roomy_v1", extra_vars={"input": "hello " * 50})
+
+        assert output == "hello"
+        assert fake_llm.invoke_count == 1
+
+
+class TestAsyncRunFlow:
+    """测试 arun_flow_with_tokens"""
+
+    def test_matches_sync_result(self, flow_env):
+        """测试异步接口通过 ainvoke 调用模型，返回值与同步接口一致"""
+        _, fake_llm = flow_env
+
+        result = asyncio.run(arun_flow_with_tokens("demo_v1", input_text="hi"))
+
+        assert result == run_flow_with_tokens("demo_v1", input_text="hi")
+        assert fake_llm.ainvoke_count == 1
+        assert fake_llm.invoke_count == 1
+
+    def test_parser_applied(self, flow_env):
+        """测试异步接口同样应用 output_parser"""
+        prompt_dir, fake_llm = flow_env
+        fake_llm.content = '{"score": 8}'
+        _write_flow(prompt_dir / "judge_v1.yaml", output_parser={"type": "json", "retry_on_error": False})
+
+        output, token_info, _ = asyncio.run(arun_flow_with_tokens("judge_v1", extra_vars={"input": "x"}))
+
+        assert output == {"score": 8}
+        assert token_info["total_tokens"] == 15
+
+    def test_blocking_preparation_off_event_loop(self, flow_env, monkeypatch):
+        """测试 flow 编译、缓存查找和 token 计数不在事件循环线程中执行"""
+        threads = []
+        prepare = chains._prepare_llm_call
+
+        def recording_prepare(compiled, resolved_vars):
+            threads.append(threading.current_thread())
+            return prepare(compiled, resolved_vars)
+
+        monkeypatch.setattr(chains, "_prepare_llm_call", recording_prepare)
+
+        asyncio.run(arun_flow_with_tokens("demo_v1", input_text="hi"))
+
+        assert threads and threading.main_thread() not in threads
+
+    def test_concurrent_calls_limited_by_governor(self, flow_env):
+        """测试并发的异步调用在调度器的 in-flight 上限内执行"""
+        _, fake_llm = flow_env
+        set_llm_governor(LLMGovernor(max_in_flight=4))
+
+        async def scenario():
+            return await asyncio.gather(*(
+                arun_flow_with_tokens("demo_v1", input_text=str(i)) for i in range(20)
+            ))
+
+        try:
+            results = asyncio.run(scenario())
+        finally:
+            set_llm_governor(None)
+
+        assert len(results) == 20
+        assert fake_llm.ainvoke_count == 20
+
+
+def test_build_llm_leaves_retries_to_governor(monkeypatch):
+    """SDK 自带重试被关闭，限流重试只由 LLMGovernor 执行"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
+
+    llm = chains.build_llm({"temperature": 0})
+
+    assert llm.max_retries == 0
@@ -0,0 +1,75 @@
+# tests/test_cli_startup.py
+"""
+CLI 启动性能测试
+
+测试内容：
+- 导入入口模块不加载子命令模块及 langchain / pandas
+- -X importtime 统计的入口模块导入耗时在预算内
+- 子命令按需加载后可正常执行
+"""
+
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# 入口模块（含 typer / click）累计导入耗时上限（微秒），留有较大余量避免 CI 抖动
+IMPORT_BUDGET_US = 800_000
+
+HEAVY_MODULES = ["langchain_core", "langchain_openai", "pandas", "src.run_batch", "src.run_eval", "src.chains"]
+
+
+def run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT_DIR, capture_output=True, text=True, timeout=120,
+    )
+
+
+def test_entry_point_does_not_import_subcommands():
+    """测试导入入口模块时不加载重量级依赖"""
+    code = (
+        "import sys, src.__main__; "
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    result = run_python("-c", code)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_entry_point_import_time_budget():
+    """测试入口模块导入耗时不超过预算"""
+    result = run_python("-X", "importtime", "-c", "import src.__main__")
+
+    assert result.returncode == 0, result.stderr
+    match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| src\.__main__$", result.stderr, re.MULTILINE)
+    assert match, result.stderr[-2000:]
+    assert int(match.group(1)) < IMPORT_BUDGET_US
+
+
+def test_version_and_help_without_subcommand_imports():
+    """测试 --version / --help 可直接响应，帮助中列出全部子命令"""
+    from src.__main__ import LAZY_COMMANDS, app
+
+    runner = CliRunner()
+    version = runner.invoke(app, ["--version"])
+    help_result = runner.invoke(app, ["--help"])
+
+    assert version.exit_code == 0 and "Prompt Lab" in version.output
+    assert help_result.exit_code == 0
+    for name in LAZY_COMMANDS:
+        assert name in help_result.output
+
+
+def test_subcommand_loaded_on_demand():
+    """测试子命令在调用时加载，结构与直接注册一致"""
+    from src.__main__ import app
+
+    result = CliRunner().invoke(app, ["agents", "--help"])
+
+    assert result.exit_code == 0
+    assert "list" in result.output and "search" in result.output
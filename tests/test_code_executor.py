@@ -7,12 +7,19 @@ Tests the core functionality of code execution including:
 - Input/output handling
 - Timeout control
 - Error handling
+- Warm worker pool reuse, recycling and isolation between calls
+- Length-prefixed stdin/stdout protocol for fresh processes
 """
 
+import os
 import pytest
 import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from src.code_executor import CodeExecutor, ExecutionResult
+from src import code_executor
+from src.code_executor import CodeExecutor, CodeWorkerPool, ExecutionResult, get_worker_pool
 
 
 class TestCodeExecutor:
@@ -435,3 +442,310 @@ def transform(inputs):
         assert result.success
         assert result.execution_time > 0.1  # Should take at least 100ms
         assert result.execution_time < 5.0  # Should not timeout
+
+
+class TestCodeWorkerPool:
+    """Test suite for the warm worker pool used by CodeExecutor"""
+    
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.executor = CodeExecutor(default_timeout=5)
+    
+    def test_python_worker_reused_across_calls(self):
+        """Test that repeated calls are served by the same warm worker"""
+        code = """
+import os
+
+def transform(inputs):
+    return {"pid": os.getpid(), "value": inputs["value"] + 1}
+"""
+        first = self.executor.execute_python(code, {"value": 1}, timeout=5)
+        second = self.executor.execute_python(code, {"value": 2}, timeout=5)
+        
+        assert first.success and second.success
+        assert first.output["value"] == 2
+        assert second.output["value"] == 3
+        assert first.output["pid"] == second.output["pid"]
+    
+    def test_python_worker_does_not_leak_definitions(self):
+        """Test that each call starts from a fresh namespace"""
+        with_transform = """
+def transform(inputs):
+    return {"from": "transform"}
+"""
+        without_function = "x = 1"
+        
+        assert self.executor.execute_python(with_transform, {}, timeout=5).output == {"from": "transform"}
+        assert self.executor.execute_python(without_function, {"a": 1}, timeout=5).output == {"a": 1}
+    
+    def test_python_worker_restores_process_state(self):
+        """Test that cwd, environment and sys.path changes do not reach later calls"""
+        mutate = """
+import os, sys
+
+def transform(inputs):
+    os.chdir(inputs["dir"])
+    os.environ["CODE_NODE_LEAK"] = "1"
+    sys.path.append("/code-node-leak")
+    return {"pid": os.getpid()}
+"""
+        check = """
+import os, sys
+
+def transform(inputs):
+    return {
+        "pid": os.getpid(),
+        "cwd": os.getcwd(),
+        "env": "CODE_NODE_LEAK" in os.environ,
+        "path": "/code-node-leak" in sys.path,
+    }
+"""
+        first = self.executor.execute_python(mutate, {"dir": tempfile.gettempdir()}, timeout=5)
+        second = self.executor.execute_python(check, {}, timeout=5)
+        
+        assert first.output["pid"] == second.output["pid"]
+        assert second.output["cwd"] == os.getcwd()
+        assert not second.output["env"] and not second.output["path"]
+    
+    @pytest.mark.parametrize("code", [
+        "import builtins\nbuiltins.len = lambda x: 42\n",
+        "import threading, time\nthreading.Thread(target=time.sleep, args=(2,), daemon=True).start()\n",
+    ])
+    def test_python_worker_recycled_after_unrestorable_change(self, code):
+        """Test that patched builtins or lingering threads retire the worker"""
+        pid_code = "import os\n\ndef transform(inputs):\n    return {'pid': os.getpid(), 'len': len([1])}\n"
+        first = self.executor.execute_python(code + pid_code, {}, timeout=5)
+        second = self.executor.execute_python(pid_code, {}, timeout=5)
+        
+        assert first.success and second.success
+        assert first.output["pid"] != second.output["pid"]
+        assert second.output["len"] == 1
+    
+    def test_python_worker_recycled_after_timeout(self):
+        """Test that a timed-out worker is killed and later calls still succeed"""
+        slow_code = """
+import time
+
+def transform(inputs):
+    time.sleep(10)
+    return {}
+"""
+        result = self.executor.execute_python(slow_code, {}, timeout=1)
+        assert not result.success
+        assert result.timeout
+        
+        result = self.executor.execute_python(
+            "def transform(inputs):\n    return {'ok': True}\n", {}, timeout=5
+        )
+        assert result.success
+        assert result.output == {"ok": True}
+    
+    def test_python_worker_crash_reported(self):
+        """Test that a worker exiting mid-request produces a failed result"""
+        code = """
+import os
+
+def transform(inputs):
+    os._exit(3)
+"""
+        result = self.executor.execute_python(code, {}, timeout=5)
+        
+        assert not result.success
+        assert result.exit_code == 3
+    
+    def test_non_json_inputs_fall_back_to_fresh_process(self):
+        """Test that inputs the pipe protocol cannot carry still execute"""
+        code = """
+def transform(inputs):
+    return {"count": len(inputs["values"])}
+"""
+        result = self.executor.execute_python(code, {"values": {1, 2, 3}}, timeout=5)
+        
+        assert result.success
+        assert result.output == {"count": 3}
+    
+    @pytest.mark.parametrize("use_worker_pool", [True, False])
+    def test_python_inputs_keep_types_json_would_change(self, use_worker_pool):
+        """Test that int keys and tuples reach user code unchanged on both execution paths"""
+        executor = CodeExecutor(default_timeout=5, use_worker_pool=use_worker_pool)
+        code = """
+def transform(inputs):
+    return {
+        "key_type": type(next(iter(inputs["mapping"]))).__name__,
+        "pair_type": type(inputs["pair"]).__name__,
+        "nested_type": type(inputs["nested"][0]).__name__,
+    }
+"""
+        inputs = {"mapping": {1: "a"}, "pair": (1, 2), "nested": [(3, 4)]}
+        result = executor.execute_python(code, inputs, timeout=5)
+        
+        assert result.success
+        assert result.output == {"key_type": "int", "pair_type": "tuple", "nested_type": "tuple"}
+    
+    def test_javascript_worker_reused_across_calls(self):
+        """Test that Node.js workers are reused across calls"""
+        code = "module.exports = (inputs) => ({ pid: process.pid, value: inputs.value * 2 });"
+        
+        first = self.executor.execute_javascript(code, {"value": 2}, timeout=5)
+        second = self.executor.execute_javascript(code, {"value": 3}, timeout=5)
+        
+        assert first.success and second.success
+        assert second.output["value"] == 6
+        assert first.output["pid"] == second.output["pid"]
+    
+    def test_javascript_worker_module_locals(self):
+        """Test that __dirname/__filename match the one-process-per-call path and env changes are undone"""
+        code = "process.env.CODE_NODE_LEAK = '1'; module.exports = () => ({ dir: __dirname, file: __filename });"
+        check = "module.exports = () => ({ leak: process.env.CODE_NODE_LEAK || null });"
+        
+        pooled = self.executor.execute_javascript(code, {}, timeout=5)
+        fresh = CodeExecutor(default_timeout=5, use_worker_pool=False).execute_javascript(code, {}, timeout=5)
+        
+        assert pooled.success and fresh.success
+        assert pooled.output == fresh.output
+        assert self.executor.execute_javascript(check, {}, timeout=5).output == {"leak": None}
+    
+    def test_worker_pool_disabled(self):
+        """Test that use_worker_pool=False spawns a fresh interpreter per call"""
+        executor = CodeExecutor(default_timeout=5, use_worker_pool=False)
+        code = """
+import os
+
+def transform(inputs):
+    return {"pid": os.getpid()}
+"""
+        first = executor.execute_python(code, {}, timeout=5)
+        second = executor.execute_python(code, {}, timeout=5)
+        
+        assert first.success and second.success
+        assert first.output["pid"] != second.output["pid"]
+    
+    def test_pool_stats(self):
+        """Test that pool statistics reflect spawned workers"""
+        self.executor.execute_python("def transform(inputs):\n    return {}\n", {}, timeout=5)
+        stats = get_worker_pool("python").get_stats()
+        
+        assert stats["language"] == "python"
+        assert stats["spawned"] >= 1
+        assert stats["workers"] <= stats["max_workers"]
+    
+    def test_acquire_does_not_wait_past_timeout(self):
+        """Test that a full pool hands out nothing instead of blocking"""
+        pool = CodeWorkerPool("python", max_workers=1)
+        try:
+            worker = pool.acquire(timeout=0)
+            assert worker is not None
+            
+            start = time.time()
+            assert pool.acquire(timeout=0.2) is None
+            assert time.time() - start < 1
+            
+            pool.ensure_capacity(2)
+            second = pool.acquire(timeout=0)
+            assert second is not None
+            pool.release(second)
+            pool.release(worker)
+        finally:
+            pool.shutdown()
+    
+    def test_pool_grows_to_requested_concurrency(self):
+        """Test that executors expecting more concurrency raise the shared limit"""
+        max_workers = get_worker_pool("python").get_stats()["max_workers"]
+        executor = CodeExecutor(default_timeout=5, max_workers=max_workers + 1)
+        executor.execute_python("def transform(inputs):\n    return {}\n", {}, timeout=5)
+        
+        assert get_worker_pool("python").get_stats()["max_workers"] == max_workers + 1
+    
+    def test_concurrent_calls_beyond_pool_size_run_in_parallel(self):
+        """Test that calls finding every worker busy are not serialized and keep their timeout"""
+        code = "import time\n\ndef transform(inputs):\n    time.sleep(inputs['delay'])\n    return {}\n"
+        calls = get_worker_pool("python").get_stats()["max_workers"] + 2
+        
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=calls) as pool:
+            results = list(pool.map(
+                lambda _: self.executor.execute_python(code, {"delay": 1}, timeout=5), range(calls)
+            ))
+        assert all(r.success for r in results)
+        assert time.time() - start < 3
+        
+        with ThreadPoolExecutor(max_workers=calls) as pool:
+            results = list(pool.map(
+                lambda _: self.executor.execute_python(code, {"delay": 10}, timeout=1), range(calls)
+            ))
+        assert all(r.timeout for r in results)
+        assert max(r.execution_time for r in results) < 1.5
+
+
+class TestFreshProcessProtocol:
+    """Test suite for the stdin/stdout protocol used without the worker pool"""
+    
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.executor = CodeExecutor(default_timeout=5, use_worker_pool=False)
+    
+    def test_python_print_does_not_corrupt_output(self):
+        """Test that user prints go to stderr instead of the result stream"""
+        code = """
+print("loading")
+
+def transform(inputs):
+    print("transforming")
+    return {"flag": inputs["flag"], "missing": None}
+"""
+        result = self.executor.execute_python(code, {"flag": True}, timeout=5)
+        
+        assert result.success
+        assert result.output == {"flag": True, "missing": None}
+        assert "transforming" in result.stderr
+    
+    def test_javascript_console_log_does_not_corrupt_output(self):
+        """Test that console.log output goes to stderr"""
+        code = """
+console.log("loading");
+module.exports = (inputs) => ({ doubled: inputs.value * 2 });
+"""
+        result = self.executor.execute_javascript(code, {"value": 4}, timeout=5)
+        
+        assert result.success
+        assert result.output == {"doubled": 8}
+        assert "loading" in result.stderr
+    
+    def test_wrapped_program_is_cached_per_code(self):
+        """Test that the wrapped program does not depend on the inputs"""
+        code = "def transform(inputs):\n    return inputs\n"
+        
+        first = self.executor._get_program(code, "python")
+        second = self.executor._get_program(code, "python")
+        
+        assert first == second
+        source = first.read_text()
+        assert self.executor.execute_python(code, {"a": 1}, timeout=5).output == {"a": 1}
+        assert self.executor.execute_python(code, {"b": 2}, timeout=5).output == {"b": 2}
+        assert first.read_text() == source
+    
+    @pytest.mark.parametrize("language,code", [
+        ("python", "def aggregate(items):\n    return {'count': len(items)}\n"),
+        ("javascript", "module.exports = (inputs) => ({ count: inputs.items.length });"),
+    ])
+    def test_large_inputs_use_temp_file(self, monkeypatch, language, code):
+        """Test that large inputs are handed over through a temp file"""
+        monkeypatch.setattr(code_executor, "LARGE_INPUT_BYTES", 16)
+        inputs = {"items": [{"value": i} for i in range(100)]}
+        
+        result = self.executor.execute(code, language, inputs, timeout=5)
+        
+        assert result.success
+        assert result.output == {"count": 100}
+        assert not list(code_executor._get_scratch_dir().glob("*.json"))
+    
+    def test_missing_result_reported(self):
+        """Test that exiting before producing a result is reported as a parse failure"""
+        code = """
+import sys
+sys.exit(0)
+"""
+        result = self.executor.execute_python(code, {}, timeout=5)
+        
+        assert not result.success
+        assert "Failed to parse output as JSON" in result.error
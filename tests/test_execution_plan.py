@@ -0,0 +1,101 @@
+# tests/test_execution_plan.py
+"""
+ExecutionPlan 单元测试
+"""
+
+import pytest
+from unittest.mock import patch
+
+from src.execution_plan import ExecutionPlan, InputBinding
+from src.pipeline_runner import PipelineRunner
+
+
+class TestExecutionPlan:
+    """测试 ExecutionPlan 构建"""
+
+    def test_build_resolves_dependencies_and_bindings(self, sample_pipeline_config):
+        """测试依赖边、下游步骤和输入绑定的解析"""
+        plan = ExecutionPlan.build(sample_pipeline_config)
+
+        assert plan.topological_order == ("step1", "step2")
+        assert plan.steps["step1"].dependencies == ()
+        assert plan.steps["step1"].dependents == ("step2",)
+        assert plan.steps["step2"].dependencies == ("step1",)
+
+        binding = plan.steps["step2"].input_bindings[0]
+        assert binding == InputBinding(param="text", source="step1_output", producer="step1")
+        assert plan.steps["step1"].input_bindings[0].producer is None
+
+    def test_build_resolves_flow_per_variant(self, sample_pipeline_config):
+        """测试按变体解析 flow"""
+        baseline_plan = ExecutionPlan.build(sample_pipeline_config)
+        variant_plan = ExecutionPlan.build(
+            sample_pipeline_config,
+            variant="variant1",
+            variant_config=sample_pipeline_config.variants["variant1"]
+        )
+
+        assert baseline_plan.steps["step1"].flow_name == "baseline_flow"
+        assert variant_plan.steps["step1"].flow_name == "variant_flow"
+        assert variant_plan.steps["step2"].flow_name == "test_flow2"
+
+    def test_build_does_not_mutate_step_config(self, sample_pipeline_config):
+        """测试构建执行计划不修改步骤配置"""
+        ExecutionPlan.build(sample_pipeline_config)
+        ExecutionPlan.build(sample_pipeline_config)
+
+        assert sample_pipeline_config.steps[1].depends_on == []
+
+    def test_plan_is_read_only(self, sample_pipeline_config):
+        """测试执行计划不可修改"""
+        plan = ExecutionPlan.build(sample_pipeline_config)
+
+        with pytest.raises(TypeError):
+            plan.steps["step3"] = plan.steps["step1"]
+        with pytest.raises(Exception):
+            plan.variant = "other"
+
+    def test_resolve_inputs(self, sample_pipeline_config):
+        """测试从上下文解析输入"""
+        plan = ExecutionPlan.build(sample_pipeline_config)
+        context = {"testset_fields": {"input_text": "原始输入"}, "step1_output": "步骤1输出"}
+
+        assert plan.steps["step1"].resolve_inputs(context) == {"text": "原始输入"}
+        assert plan.steps["step2"].resolve_inputs(context) == {"text": "步骤1输出"}
+        assert plan.steps["step2"].resolve_inputs({}) == {"text": ""}
+
+
+class TestRunnerExecutionPlanCache:
+    """测试 PipelineRunner 复用执行计划"""
+
+    def test_plan_built_once_per_variant(self, sample_pipeline_config, sample_testset,
+                                         mock_load_agent, mock_run_flow_with_tokens):
+        """测试多个样本共享同一个执行计划"""
+        runner = PipelineRunner(sample_pipeline_config)
+
+        with patch.object(runner.dependency_analyzer, "analyze_dependencies",
+                          wraps=runner.dependency_analyzer.analyze_dependencies) as analyze:
+            runner.execute(sample_testset, use_progress_tracker=False)
+            runner.execute(sample_testset, variant="variant1", use_progress_tracker=False)
+            runner.execute(sample_testset, use_progress_tracker=False)
+
+        assert analyze.call_count == 2
+        assert runner.get_execution_plan("baseline") is runner.get_execution_plan("baseline")
+        assert runner.get_execution_plan("variant1").steps["step1"].flow_name == "variant_flow"
+
+    def test_batch_step_uses_plan_flow(self, sample_pipeline_config):
+        """测试同步批量步骤直接使用执行计划中的 flow/模型，不再逐样本解析"""
+        step = sample_pipeline_config.steps[0]
+        step.batch_mode = True
+        step.concurrent = False
+        runner = PipelineRunner(sample_pipeline_config)
+        step_plan = runner.get_execution_plan("variant1").steps[step.id]
+
+        with patch.object(runner, "_resolve_step_config", side_effect=AssertionError("resolved per sample")), \
+             patch.object(runner, "_execute_batch_sequential", return_value=[]) as sequential:
+            result = runner.execute_step(step, sample_pipeline_config.variants["variant1"],
+                                         {"input_text": ["a", "b"]}, step_plan)
+
+        assert result.success
+        assert sequential.call_args.kwargs["flow_name"] == "variant_flow"
+        assert sequential.call_args.kwargs["model_override"] == step_plan.model_override
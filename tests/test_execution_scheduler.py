@@ -0,0 +1,151 @@
+"""
+Tests for the Execution Scheduler
+
+This module tests the per-type worker pools, bounded priority queues and
+queue metrics used for background executions.
+"""
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.app import app
+from src.api.execution_manager import ExecutionManager
+from src.api.models import ExecutionPriority, ExecutionStatus, ExecutionType
+from src.api.scheduler import ExecutionScheduler, QueueFullError
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = ExecutionScheduler(
+        workers={ExecutionType.AGENT: 1, ExecutionType.PIPELINE: 1},
+        queue_sizes={ExecutionType.AGENT: 3, ExecutionType.PIPELINE: 3},
+    )
+    yield scheduler
+    scheduler.shutdown(wait=False)
+
+
+def block_lane(scheduler, execution_type):
+    """Occupy the lane's only worker until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait(5)
+
+    future = scheduler.submit(execution_type, "blocker", blocker)
+    assert started.wait(5)
+    return release, future
+
+
+class TestExecutionScheduler:
+    """Test ExecutionScheduler."""
+
+    def test_priority_order_within_lane(self, scheduler):
+        """Higher priority jobs run first; equal priorities run in submission order."""
+        release, _ = block_lane(scheduler, ExecutionType.AGENT)
+        order = []
+        futures = [
+            scheduler.submit(ExecutionType.AGENT, name, order.append, name, priority=priority)
+            for name, priority in [
+                ("low", ExecutionPriority.LOW),
+                ("normal", ExecutionPriority.NORMAL),
+                ("high", ExecutionPriority.HIGH),
+            ]
+        ]
+
+        assert scheduler.queue_info(ExecutionType.AGENT, "high")["position"] == 1
+        assert scheduler.queue_info(ExecutionType.AGENT, "low")["position"] == 3
+
+        release.set()
+        for future in futures:
+            future.result(timeout=5)
+        assert order == ["high", "normal", "low"]
+
+    def test_full_queue_rejected(self, scheduler):
+        """Submitting to a full lane raises QueueFullError."""
+        release, _ = block_lane(scheduler, ExecutionType.AGENT)
+        for i in range(3):
+            scheduler.submit(ExecutionType.AGENT, f"job{i}", lambda: None)
+
+        with pytest.raises(QueueFullError):
+            scheduler.submit(ExecutionType.AGENT, "overflow", lambda: None)
+
+        # Cancelling a queued job frees its slot
+        assert scheduler.cancel(ExecutionType.AGENT, "job0")
+        scheduler.submit(ExecutionType.AGENT, "retry", lambda: None)
+
+        stats = scheduler.stats()[ExecutionType.AGENT]
+        assert (stats.queued, stats.running, stats.rejected) == (3, 1, 1)
+        release.set()
+
+    def test_lanes_are_isolated(self, scheduler):
+        """A busy pipeline lane does not delay agent executions."""
+        release, pipeline_future = block_lane(scheduler, ExecutionType.PIPELINE)
+
+        result = scheduler.submit(ExecutionType.AGENT, "agent", lambda: "done").result(timeout=5)
+
+        assert result == "done"
+        assert not pipeline_future.done()
+        release.set()
+
+
+class TestExecutionManagerQueue:
+    """Test ExecutionManager integration with the scheduler."""
+
+    def test_status_includes_queue_info(self, scheduler):
+        """Queued executions report position and depth; started ones report wait time."""
+        manager = ExecutionManager(scheduler=scheduler)
+        release, _ = block_lane(scheduler, ExecutionType.AGENT)
+        manager._execute_agent_sync = lambda *args: {"output": "ok"}
+
+        manager.create_execution("exec_q", ExecutionType.AGENT, "agent", {"text": "hi"}, {},
+                                 priority=ExecutionPriority.HIGH)
+        job = manager.submit_agent("exec_q", "agent", {"text": "hi"}, {})
+
+        queued = manager.get_execution_status("exec_q")
+        assert queued.status == ExecutionStatus.PENDING
+        assert (queued.queue.position, queued.queue.depth, queued.queue.workers) == (1, 1, 1)
+        assert queued.queue.priority == ExecutionPriority.HIGH
+
+        time.sleep(0.02)
+        release.set()
+        job.result(timeout=5)
+
+        done = manager.get_execution_status("exec_q")
+        assert done.status == ExecutionStatus.COMPLETED
+        assert done.queue.position is None
+        assert done.queue.wait_time_ms >= 10
+
+    def test_cancel_removes_queued_execution(self, scheduler):
+        """Cancelling a queued execution removes it from the queue."""
+        manager = ExecutionManager(scheduler=scheduler)
+        release, _ = block_lane(scheduler, ExecutionType.AGENT)
+        manager.create_execution("exec_c", ExecutionType.AGENT, "agent", {}, {})
+        job = manager.submit_agent("exec_c", "agent", {}, {})
+
+        manager.cancel_execution("exec_c")
+
+        assert job.cancelled()
+        assert scheduler.stats()[ExecutionType.AGENT].queued == 0
+        release.set()
+
+    def test_api_returns_429_when_queue_full(self, scheduler, monkeypatch):
+        """POST /executions returns 429 and keeps no record when the lane is full."""
+        from src.api.routes import executions
+
+        manager = ExecutionManager(scheduler=scheduler)
+        monkeypatch.setattr(executions, "get_execution_manager", lambda: manager)
+        release, _ = block_lane(scheduler, ExecutionType.PIPELINE)
+        client = TestClient(app)
+        body = {"type": "pipeline", "target_id": "p", "inputs": {}, "priority": "low"}
+
+        accepted = [client.post("/api/v1/executions", json=body) for _ in range(3)]
+        rejected = client.post("/api/v1/executions", json=body)
+
+        assert [r.status_code for r in accepted] == [202, 202, 202]
+        assert rejected.status_code == 429
+        assert len(manager.executions) == 3
+        release.set()
@@ -0,0 +1,175 @@
+"""
+Tests for the Execution Store
+
+This module tests the in-memory and SQLite execution stores: CRUD,
+conditional updates, filtered listing, TTL eviction and sharing a SQLite
+store between processes.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.api.execution_manager import ExecutionManager
+from src.api.execution_store import (
+    ExecutionRecord,
+    InMemoryExecutionStore,
+    SQLiteExecutionStore,
+    create_execution_store
+)
+from src.api.models import ExecutionStatus, ExecutionType, ProgressInfo
+from src.api.scheduler import ExecutionScheduler
+
+
+def make_record(execution_id, execution_type=ExecutionType.AGENT, target_id="agent", created_at=None):
+    return ExecutionRecord(
+        execution_id=execution_id,
+        type=execution_type,
+        target_id=target_id,
+        status=ExecutionStatus.PENDING,
+        inputs={"text": "你好"},
+        config={},
+        created_at=created_at or datetime.now(),
+    )
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = create_execution_store(request.param, path=tmp_path / "executions.db", ttl_seconds=3600)
+    yield store
+    if isinstance(store, SQLiteExecutionStore):
+        store.close()
+
+
+class TestExecutionStore:
+    """Tests run against every store backend."""
+
+    def test_create_get_delete(self, store):
+        """Records round-trip; duplicate IDs are rejected."""
+        store.create(make_record("exec_1"))
+
+        record = store.get("exec_1")
+        assert record.execution_id == "exec_1"
+        assert record.inputs == {"text": "你好"}
+        assert "exec_1" in store and len(store) == 1
+
+        with pytest.raises(ValueError):
+            store.create(make_record("exec_1"))
+
+        assert store.delete("exec_1")
+        assert store.get("exec_1") is None
+
+    def test_conditional_update(self, store):
+        """Updates with only_if are skipped when the status does not match."""
+        store.create(make_record("exec_1"))
+
+        assert store.update("exec_1", only_if=(ExecutionStatus.PENDING,),
+                            status=ExecutionStatus.CANCELLED, completed_at=datetime.now())
+        assert not store.update("exec_1", only_if=(ExecutionStatus.RUNNING,),
+                                status=ExecutionStatus.COMPLETED, outputs={"result": "late"})
+        assert not store.update("missing", status=ExecutionStatus.RUNNING)
+
+        record = store.get("exec_1")
+        assert record.status == ExecutionStatus.CANCELLED
+        assert record.outputs is None
+
+    def test_outputs_and_progress(self, store):
+        """Outputs and progress are stored and returned by get."""
+        store.create(make_record("exec_1"))
+        store.update("exec_1", status=ExecutionStatus.COMPLETED, completed_at=datetime.now(),
+                     outputs={"result": "x" * 10_000},
+                     progress=ProgressInfo(current_step=1, total_steps=1, percentage=100.0))
+
+        record = store.get("exec_1")
+        assert record.outputs == {"result": "x" * 10_000}
+        assert record.progress.percentage == 100.0
+
+    def test_list_filters_and_sort(self, store):
+        """Listing filters by status/type/target and sorts by timestamp."""
+        base = datetime(2024, 1, 1)
+        for i, (execution_type, target_id) in enumerate([
+            (ExecutionType.AGENT, "a"),
+            (ExecutionType.PIPELINE, "p"),
+            (ExecutionType.AGENT, "b"),
+        ]):
+            store.create(make_record(f"exec_{i}", execution_type, target_id, base + timedelta(seconds=i)))
+        store.update("exec_2", status=ExecutionStatus.RUNNING)
+
+        assert [r.execution_id for r in store.list()] == ["exec_2", "exec_1", "exec_0"]
+        assert [r.execution_id for r in store.list(sort_order="asc")] == ["exec_0", "exec_1", "exec_2"]
+        assert [r.execution_id for r in store.list(execution_type=ExecutionType.AGENT)] == ["exec_2", "exec_0"]
+        assert [r.execution_id for r in store.list(status=ExecutionStatus.RUNNING)] == ["exec_2"]
+        assert [r.execution_id for r in store.list(target_id="p")] == ["exec_1"]
+
+    def test_ttl_eviction(self, store):
+        """Finished records older than the TTL are evicted; active ones are kept."""
+        old = datetime.now() - timedelta(hours=2)
+        store.create(make_record("old_done"))
+        store.update("old_done", status=ExecutionStatus.COMPLETED, completed_at=old)
+        store.create(make_record("old_failed"))
+        store.update("old_failed", status=ExecutionStatus.FAILED, failed_at=old)
+        store.create(make_record("recent_done"))
+        store.update("recent_done", status=ExecutionStatus.COMPLETED, completed_at=datetime.now())
+        store.create(make_record("old_pending", created_at=old))
+
+        assert store.evict_expired() == 2
+        assert sorted(r.execution_id for r in store.list()) == ["old_pending", "recent_done"]
+
+
+class TestSQLiteExecutionStore:
+    """SQLite-specific behaviour."""
+
+    def test_shared_between_connections(self, tmp_path):
+        """Two stores on the same file (e.g. two API workers) see each other's records."""
+        path = tmp_path / "executions.db"
+        worker_a = SQLiteExecutionStore(path)
+        worker_b = SQLiteExecutionStore(path)
+
+        worker_a.create(make_record("exec_1"))
+        assert worker_b.update("exec_1", only_if=(ExecutionStatus.PENDING,),
+                               status=ExecutionStatus.CANCELLED, completed_at=datetime.now())
+
+        assert worker_a.get("exec_1").status == ExecutionStatus.CANCELLED
+        assert worker_a._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        worker_a.close()
+        worker_b.close()
+
+    def test_list_omits_outputs(self, tmp_path):
+        """Listing does not load outputs."""
+        store = SQLiteExecutionStore(tmp_path / "executions.db")
+        store.create(make_record("exec_1"))
+        store.update("exec_1", outputs={"result": "big"})
+
+        assert store.list()[0].outputs is None
+        assert store.get("exec_1").outputs == {"result": "big"}
+        store.close()
+
+    def test_manager_with_sqlite_store(self, tmp_path):
+        """ExecutionManager runs executions and reports status through the SQLite store."""
+        scheduler = ExecutionScheduler()
+        manager = ExecutionManager(scheduler=scheduler, store=SQLiteExecutionStore(tmp_path / "executions.db"))
+        manager._execute_agent_sync = lambda *args: {"output": "ok"}
+
+        manager.create_execution("exec_1", ExecutionType.AGENT, "agent", {"text": "hi"}, {})
+        manager.submit_agent("exec_1", "agent", {"text": "hi"}, {}).result(timeout=5)
+
+        status = manager.get_execution_status("exec_1")
+        assert status.status == ExecutionStatus.COMPLETED
+        assert status.outputs == {"output": "ok"}
+        assert status.progress.percentage == 100.0
+        assert status.queue.wait_time_ms is not None
+        scheduler.shutdown()
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        create_execution_store("redis")
+
+
+def test_memory_store_returns_live_records():
+    """The in-memory store hands out the stored objects themselves."""
+    store = InMemoryExecutionStore()
+    record = make_record("exec_1")
+    store.create(record)
+
+    assert store.get("exec_1") is record
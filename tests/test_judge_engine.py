@@ -0,0 +1,243 @@
+# tests/test_judge_engine.py
+"""
+Judge 评估引擎单元测试
+
+测试内容：
+- 静态前缀变量只构建一次、每个样本只渲染一次
+- 并发评估结果与任务顺序一致
+- 对比模式合并调用、token 分摊与解析失败回退（失败调用的 token 计入结果）
+- 提示词前缀顺序检查
+- 流式 CSV 写入与最终排序
+"""
+
+import csv
+import random
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from src import judge_engine
+from src.eval_llm_judge import split_token_info
+from src.judge_engine import EvalRowWriter, JudgeEngine, JudgeTask, find_prefix_breaks
+
+
+def make_agent():
+    return SimpleNamespace(
+        id="demo",
+        name="Demo",
+        description="desc",
+        business_goal="goal",
+        expectations={"must_have": ["a", "b"], "nice_to_have": ["c"]},
+        evaluation={},
+    )
+
+
+JUDGE_CONFIG = {"min_score": 0, "max_score": 10, "model_name": "judge-model", "flow_cfg": {}}
+
+
+def make_tasks(n_cases=4, flows=("f1", "f2")):
+    tasks = []
+    for i in range(n_cases):
+        case = {"id": f"c{i}", "input": f"in {i}", "context": "", "expected": ""}
+        for flow in flows:
+            tasks.append(JudgeTask(case=case, flow_name=flow, output=f"{flow} out {i}"))
+    return tasks
+
+
+class TestJudgeEngine:
+    """测试 JudgeEngine"""
+
+    def test_shared_prefix_and_single_render(self):
+        """测试静态变量复用且每个样本只渲染一次"""
+        calls = []
+
+        def fake_run_flow(flow_name, extra_vars=None, agent_id=None):
+            calls.append(extra_vars)
+            return {"overall_score": 8, "must_have_check": [], "overall_comment": "ok"}, {"total_tokens": 3}, None
+
+        tasks = make_tasks(n_cases=3)
+        with patch("src.eval_llm_judge.run_flow_with_tokens", side_effect=fake_run_flow), \
+             patch.object(judge_engine, "render_case_for_judge", wraps=judge_engine.render_case_for_judge) as render:
+            results = JudgeEngine(make_agent(), JUDGE_CONFIG, "judge_v1").run(tasks)
+
+        assert render.call_count == 3
+        assert len(calls) == 6
+        assert all(c["business_goal"] == "goal" and c["must_have"] == "a\nb" for c in calls)
+        assert calls[0]["_model_override"] == "judge-model"
+        assert [r.data["overall_score"] for r in results] == [8] * 6
+
+    def test_concurrent_results_in_task_order(self):
+        """测试并发执行时结果与回调数量正确、返回顺序与任务一致"""
+        lock = threading.Lock()
+        active = 0
+        peak = 0
+
+        def fake_judge_one(**kwargs):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(random.uniform(0.01, 0.03))
+            with lock:
+                active -= 1
+            return {"overall_score": kwargs["output"]}, {"total_tokens": 1}
+
+        tasks = make_tasks(n_cases=5)
+        done_counts = []
+        with patch.object(judge_engine, "judge_one", side_effect=fake_judge_one):
+            results = JudgeEngine(make_agent(), JUDGE_CONFIG, "judge_v1", max_workers=3).run(
+                tasks, on_result=lambda done, result: done_counts.append(done)
+            )
+
+        assert [r.data["overall_score"] for r in results] == [t.output for t in tasks]
+        assert [r.index for r in results] == list(range(len(tasks)))
+        assert done_counts == list(range(1, len(tasks) + 1))
+        assert 1 < peak <= 3
+
+
+def _check(score):
+    return {"overall_score": score, "must_have_check": [{"item": "a", "satisfied": True, "score": score}],
+            "overall_comment": "ok"}
+
+
+class TestPairwiseJudge:
+    """测试对比评估模式"""
+
+    def test_one_call_per_case(self):
+        """测试同一样本的所有 flow 在一次调用中评估，token 平均分摊"""
+        calls = []
+
+        def fake_run_flow(flow_name, extra_vars=None, agent_id=None):
+            calls.append((flow_name, extra_vars))
+            results = [{"flow": f, **_check(i)} for i, f in enumerate(["f1", "f2", "f3"])]
+            return {"derived_criteria": [{"name": "x"}], "results": results}, \
+                {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15, "cache_hit": 1}, None
+
+        tasks = make_tasks(n_cases=2, flows=("f1", "f2", "f3"))
+        with patch("src.eval_llm_judge.run_flow_with_tokens", side_effect=fake_run_flow), \
+             patch.object(judge_engine, "load_flow_config", return_value={}):
+            engine = JudgeEngine(make_agent(), JUDGE_CONFIG, "judge_v1", max_workers=2,
+                                 compare_flow_name="judge_compare_v1")
+            results = engine.run(tasks)
+
+        assert [name for name, _ in calls] == ["judge_compare_v1"] * 2
+        assert "----- flow: f2 -----" in calls[0][1]["outputs_rendered"]
+        assert calls[0][1]["flow_count"] == 3
+        assert [r.data["overall_score"] for r in results] == [0, 1, 2] * 2
+        assert all(r.compared for r in results)
+        assert results[0].data["derived_criteria"] == [{"name": "x"}]
+        assert sum(r.token_info["total_tokens"] for r in results[:3]) == 15
+        assert all(r.token_info["cache_hit"] == 1 for r in results)
+        assert (engine.compare_calls, engine.compare_fallbacks) == (2, 0)
+
+    def test_fallback_on_missing_flow(self):
+        """测试对比结果缺少 flow 时回退到逐个 flow 评估"""
+        calls = []
+
+        def fake_run_flow(flow_name, extra_vars=None, agent_id=None):
+            calls.append(flow_name)
+            if flow_name == "judge_compare_v1":
+                return {"results": [{"flow": "f1", **_check(9)}]}, {"total_tokens": 4}, None
+            return _check(7), {"total_tokens": 2}, None
+
+        tasks = make_tasks(n_cases=1)
+        with patch("src.eval_llm_judge.run_flow_with_tokens", side_effect=fake_run_flow), \
+             patch.object(judge_engine, "load_flow_config", return_value={}):
+            engine = JudgeEngine(make_agent(), JUDGE_CONFIG, "judge_v1", compare_flow_name="judge_compare_v1")
+            results = engine.run(tasks)
+
+        assert calls == ["judge_compare_v1", "judge_v1", "judge_v1"]
+        assert [r.data["overall_score"] for r in results] == [7, 7]
+        assert not any(r.compared for r in results)
+        assert engine.compare_fallbacks == 1
+        # 失败的对比调用消耗的 4 个 token 分摊到逐个评估的结果中
+        assert [r.token_info["total_tokens"] for r in results] == [4, 4]
+
+    def test_fallback_when_compare_call_fails(self):
+        """测试对比调用本身失败时回退，且没有虚构 token 用量"""
+        def fake_run_flow(flow_name, extra_vars=None, agent_id=None):
+            if flow_name == "judge_compare_v1":
+                raise RuntimeError("connection reset")
+            return _check(6), {"total_tokens": 2}, None
+
+        with patch("src.eval_llm_judge.run_flow_with_tokens", side_effect=fake_run_flow), \
+             patch.object(judge_engine, "load_flow_config", return_value={}):
+            engine = JudgeEngine(make_agent(), JUDGE_CONFIG, "judge_v1", compare_flow_name="judge_compare_v1")
+            results = engine.run(make_tasks(n_cases=1))
+
+        assert [r.data["overall_score"] for r in results] == [6, 6]
+        assert [r.token_info["total_tokens"] for r in results] == [2, 2]
+
+    def test_single_flow_case_uses_regular_judge(self):
+        """测试只有一个 flow 输出的样本不走对比评估"""
+        with patch("src.eval_llm_judge.run_flow_with_tokens",
+                   return_value=(_check(5), {"total_tokens": 1}, None)) as run_flow, \
+             patch.object(judge_engine, "load_flow_config", return_value={}):
+            engine = JudgeEngine(make_agent(), JUDGE_CONFIG, "judge_v1", compare_flow_name="judge_compare_v1")
+            engine.run(make_tasks(n_cases=2, flows=("f1",)))
+
+        assert [c.kwargs["flow_name"] for c in run_flow.call_args_list] == ["judge_v1", "judge_v1"]
+        assert engine.compare_calls == 0
+
+
+def test_split_token_info():
+    """测试 token 分摊总和不变"""
+    shares = split_token_info({"total_tokens": 10, "cache_hit": 1}, 3)
+
+    assert [s["total_tokens"] for s in shares] == [4, 3, 3]
+    assert [s["cache_hit"] for s in shares] == [1, 1, 1]
+
+
+def test_compare_prompt_has_stable_prefix():
+    """测试内置对比评估提示词的静态部分位于样本之前"""
+    from src.chains import load_flow_config
+
+    assert find_prefix_breaks(load_flow_config("judge_compare_v1", agent_id="judge_default")) == []
+
+
+def test_find_prefix_breaks():
+    """测试静态变量出现在样本内容之后时被识别"""
+    stable = {
+        "system_prompt": "score {min_score}~{max_score} {{{{\"a\": 1}}}}",
+        "user_template": "{business_goal}\n{must_have}\n{case_rendered}\n{output}",
+    }
+    unstable = {
+        "system_prompt": "score",
+        "user_template": "{case_rendered}\n{business_goal}\n{output}",
+    }
+
+    assert find_prefix_breaks(stable) == []
+    assert find_prefix_breaks(unstable) == ["business_goal"]
+
+
+class TestEvalRowWriter:
+    """测试 EvalRowWriter"""
+
+    def test_streams_rows_and_sorts_on_close(self, tmp_path):
+        """测试行按到达顺序落盘，关闭后按任务顺序整理并合并新列"""
+        path = tmp_path / "out" / "eval.csv"
+        writer = EvalRowWriter(path)
+
+        writer.write(1, {"id": "b", "flow": "f", "overall_score": 2})
+        with open(path, encoding="utf-8") as f:
+            assert [r["id"] for r in csv.DictReader(f)] == ["b"]
+
+        writer.write(0, {"id": "a", "flow": "f", "overall_score": 1, "must_have_1__score": 5})
+        writer.close()
+
+        with open(path, encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+        assert reader.fieldnames[:2] == ["flow", "id"]
+        assert [r["id"] for r in rows] == ["a", "b"]
+        assert rows[0]["must_have_1__score"] == "5"
+        assert [r["id"] for r in writer.rows] == ["a", "b"]
+
+    def test_no_file_without_rows(self, tmp_path):
+        """测试没有结果时不创建文件"""
+        path = tmp_path / "eval.csv"
+        with EvalRowWriter(path):
+            pass
+
+        assert not path.exists()
@@ -0,0 +1,147 @@
+# tests/test_llm_cache.py
+"""
+LLM 响应缓存单元测试
+
+测试内容：
+- 缓存键只取决于消息、模型、temperature 和 parser 配置
+- 读写、TTL 过期与 LRU 淘汰
+- run_flow_with_tokens 的读穿/写穿与命中统计
+"""
+
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+import src.chains as chains
+from src.chains import run_flow_with_tokens
+from src.llm_cache import LLMResponseCache, configure_llm_cache, make_cache_key
+
+from tests.test_chains import _write_flow, flow_env  # noqa: F401
+
+
+def _message(content="hello"):
+    return AIMessage(
+        content=content,
+        usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+    )
+
+
+class TestCacheKey:
+    """测试 make_cache_key"""
+
+    def test_same_inputs_same_key(self):
+        messages = [SystemMessage(content="sys"), HumanMessage(content="hi")]
+
+        assert make_cache_key(messages, "m", 0.0) == make_cache_key(list(messages), "m", 0.0)
+
+    def test_key_depends_on_all_parts(self):
+        messages = [HumanMessage(content="hi")]
+        base = make_cache_key(messages, "m", 0.0, {"type": "json"})
+
+        assert make_cache_key([HumanMessage(content="hey")], "m", 0.0, {"type": "json"}) != base
+        assert make_cache_key(messages, "m2", 0.0, {"type": "json"}) != base
+        assert make_cache_key(messages, "m", 0.7, {"type": "json"}) != base
+        assert make_cache_key(messages, "m", 0.0, None) != base
+
+
+class TestLLMResponseCache:
+    """测试 LLMResponseCache"""
+
+    def test_round_trip(self, tmp_path):
+        cache = LLMResponseCache(tmp_path / "cache.sqlite")
+
+        assert cache.get("k") is None
+        cache.put("k", _message("cached"), model="m")
+        hit = cache.get("k")
+
+        assert hit.content == "cached"
+        assert hit.usage_metadata["total_tokens"] == 15
+        assert hit.response_metadata["cache_hit"] is True
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(0.5)
+
+    def test_persists_across_instances(self, tmp_path):
+        path = tmp_path / "cache.sqlite"
+        LLMResponseCache(path).put("k", _message())
+
+        assert LLMResponseCache(path).get("k") is not None
+
+    def test_ttl_expiry(self, tmp_path):
+        cache = LLMResponseCache(tmp_path / "cache.sqlite", ttl_seconds=0.05)
+        cache.put("k", _message())
+        time.sleep(0.1)
+
+        assert cache.get("k") is None
+        assert cache.get_stats()["size"] == 0
+
+    def test_lru_eviction(self, tmp_path):
+        cache = LLMResponseCache(tmp_path / "cache.sqlite", max_entries=2)
+        cache.put("a", _message())
+        time.sleep(0.01)
+        cache.put("b", _message())
+        time.sleep(0.01)
+        cache.get("a")  # a 成为最近访问
+        time.sleep(0.01)
+        cache.put("c", _message())  # 淘汰 b
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.get_stats()["evictions"] == 1
+
+
+@pytest.fixture
+def enabled_cache(tmp_path):
+    cache = configure_llm_cache(True, path=tmp_path / "responses.sqlite")
+    yield cache
+    configure_llm_cache(False)
+
+
+class TestRunFlowWithCache:
+    """测试 chains 的缓存读穿/写穿"""
+
+    def test_second_call_served_from_cache(self, flow_env, enabled_cache):
+        _, fake_llm = flow_env
+
+        first = run_flow_with_tokens("demo_v1", extra_vars={"input": "你好"})
+        second = run_flow_with_tokens("demo_v1", extra_vars={"input": "你好"})
+
+        assert fake_llm.invoke_count == 1
+        assert first[0] == second[0] == "hello"
+        assert "cache_hit" not in first[1]
+        assert second[1]["cache_hit"] == 1
+        assert second[1]["total_tokens"] == 15
+
+    def test_different_input_misses(self, flow_env, enabled_cache):
+        _, fake_llm = flow_env
+
+        run_flow_with_tokens("demo_v1", extra_vars={"input": "a"})
+        run_flow_with_tokens("demo_v1", extra_vars={"input": "b"})
+
+        assert fake_llm.invoke_count == 2
+
+    def test_parse_failure_not_cached(self, flow_env, enabled_cache):
+        prompt_dir, fake_llm = flow_env
+        fake_llm.content = "not json"
+        _write_flow(
+            prompt_dir / "judge_v1.yaml",
+            output_parser={"type": "json", "retry_on_error": False},
+        )
+
+        for _ in range(2):
+            with pytest.raises(Exception):
+                run_flow_with_tokens("judge_v1", extra_vars={"input": "x"})
+
+        assert fake_llm.invoke_count == 2
+        assert enabled_cache.get_stats()["size"] == 0
+
+    def test_disabled_by_default(self, flow_env):
+        _, fake_llm = flow_env
+
+        run_flow_with_tokens("demo_v1", extra_vars={"input": "你好"})
+        run_flow_with_tokens("demo_v1", extra_vars={"input": "你好"})
+
+        assert fake_llm.invoke_count == 2
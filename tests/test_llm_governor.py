@@ -0,0 +1,262 @@
+# tests/test_llm_governor.py
+"""
+LLM 调度器单元测试
+
+测试内容：
+- 令牌桶的等待时间与补充
+- 全局 in-flight 上限
+- 限流错误的 AIMD 减速与重试
+- 排队等待指标
+- 协程方式的 aacquire/ainvoke
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.llm_governor import (
+    LLMGovernor,
+    ModelLimits,
+    TokenBucket,
+    is_throttling_error,
+)
+
+
+class RateLimitError(Exception):
+    """模拟 openai.RateLimitError"""
+
+
+class TestTokenBucket:
+    """测试 TokenBucket"""
+
+    def test_unlimited_never_waits(self):
+        """测试未配置上限时不等待"""
+        bucket = TokenBucket(None, now=0.0)
+
+        assert bucket.unlimited
+        assert bucket.wait_time(10_000, now=0.0) == 0.0
+
+    def test_wait_until_refilled(self):
+        """测试配额用完后按速率补充"""
+        bucket = TokenBucket(60, now=0.0)  # 每秒补充 1 个
+
+        bucket.consume(60, now=0.0)
+
+        assert bucket.wait_time(1, now=0.0) == pytest.approx(1.0)
+        assert bucket.wait_time(1, now=1.0) == 0.0
+
+    def test_oversized_request_capped_to_capacity(self):
+        """测试超过容量的请求不会永远等待"""
+        bucket = TokenBucket(100, now=0.0)
+
+        assert bucket.wait_time(1_000, now=0.0) == 0.0
+
+    def test_refund_after_overestimate(self):
+        """测试实际用量小于估算时退还令牌"""
+        bucket = TokenBucket(100, now=0.0)
+        bucket.consume(80, now=0.0)
+        bucket.consume(-30, now=0.0)
+
+        assert bucket.tokens == pytest.approx(50)
+
+
+class TestLLMGovernor:
+    """测试 LLMGovernor"""
+
+    def test_invoke_returns_result_and_records_metrics(self):
+        """测试正常调用返回结果并记录指标"""
+        governor = LLMGovernor(max_in_flight=2)
+
+        assert governor.invoke("m", lambda: "ok") == "ok"
+
+        stats = governor.get_stats()
+        assert stats["in_flight"] == 0
+        assert stats["models"]["m"]["requests"] == 1
+        assert stats["models"]["m"]["throttled"] == 0
+
+    def test_global_in_flight_limit(self):
+        """测试全局并发上限约束所有模型"""
+        governor = LLMGovernor(max_in_flight=2)
+        lock = threading.Lock()
+        active = 0
+        peak = 0
+
+        def call():
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+
+        threads = [
+            threading.Thread(target=governor.invoke, args=(f"model-{i % 3}", call))
+            for i in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert peak == 2
+        assert governor.get_stats()["in_flight"] == 0
+
+    def test_throttling_halves_concurrency_and_retries(self):
+        """测试遇到 429 时并发上限减半并在退避后重试"""
+        governor = LLMGovernor(max_in_flight=8, base_backoff=0.01, max_backoff=0.02)
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RateLimitError("Error code: 429 - rate limit exceeded")
+            return "ok"
+
+        assert governor.invoke("m", flaky) == "ok"
+
+        stats = governor.get_stats()["models"]["m"]
+        assert len(calls) == 2
+        assert stats["throttled"] == 1
+        assert stats["retries"] == 1
+        assert stats["concurrency_limit"] < 8
+
+    def test_retries_exhausted(self):
+        """测试超过最大重试次数后抛出原异常"""
+        governor = LLMGovernor(max_retries=1, base_backoff=0.01, max_backoff=0.01)
+
+        def always_throttled():
+            raise RateLimitError("rate limit")
+
+        with pytest.raises(RateLimitError):
+            governor.invoke("m", always_throttled)
+
+        assert governor.get_stats()["models"]["m"]["throttled"] == 2
+
+    def test_other_errors_not_retried(self):
+        """测试非限流错误直接抛出且不减速"""
+        governor = LLMGovernor(max_in_flight=4)
+
+        def broken():
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            governor.invoke("m", broken)
+
+        stats = governor.get_stats()["models"]["m"]
+        assert stats["throttled"] == 0
+        assert stats["concurrency_limit"] == 4
+
+    def test_rpm_limit_delays_requests(self):
+        """测试 RPM 限制会让超出配额的请求排队"""
+        governor = LLMGovernor()
+        governor.configure_model("m", rpm=600)  # 每 0.1 秒补充一个请求
+        for _ in range(600):
+            governor.acquire("m")
+            governor.release("m")
+
+        waited = governor.acquire("m")
+        governor.release("m")
+
+        assert waited > 0.05
+        assert governor.get_stats()["models"]["m"]["max_wait"] == pytest.approx(waited)
+
+    def test_token_estimate_only_with_tpm(self):
+        """测试只有配置 TPM 时才需要估算 token"""
+        governor = LLMGovernor(default_limits=ModelLimits(tpm=None))
+        governor.configure_model("limited", tpm=1000)
+
+        assert not governor.needs_token_estimate("free")
+        assert governor.needs_token_estimate("limited")
+
+
+class TestAsyncGovernor:
+    """测试 aacquire/ainvoke"""
+
+    def test_aacquire_woken_by_release_from_thread(self):
+        """测试协程等待的槽位被其他线程归还后立即获得"""
+        governor = LLMGovernor(max_in_flight=1)
+        governor.acquire("m")
+        threading.Timer(0.1, governor.release, ("m",)).start()
+
+        waited = asyncio.run(asyncio.wait_for(governor.aacquire("m"), timeout=2))
+
+        assert 0.05 < waited < 1
+        assert governor.get_stats()["in_flight"] == 1
+
+    def test_ainvoke_shares_limit_with_sync_callers(self):
+        """测试协程调用与线程调用共享 in-flight 上限"""
+        governor = LLMGovernor(max_in_flight=2)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            peak = max(peak, governor.get_stats()["in_flight"])
+            await asyncio.sleep(0.02)
+            return "ok"
+
+        async def scenario():
+            return await asyncio.gather(*(governor.ainvoke("m", call) for _ in range(10)))
+
+        assert asyncio.run(scenario()) == ["ok"] * 10
+        assert peak == 2
+        assert governor.get_stats()["in_flight"] == 0
+
+    def test_ainvoke_retries_throttling(self):
+        """测试协程调用遇到限流时退避重试"""
+        governor = LLMGovernor(base_backoff=0.01, max_backoff=0.02)
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise RateLimitError("429")
+            return "ok"
+
+        assert asyncio.run(governor.ainvoke("m", call)) == "ok"
+        assert governor.get_stats()["models"]["m"]["retries"] == 2
+
+    def test_cancelled_task_releases_slot(self):
+        """测试 Task 被取消时归还槽位，排队中的协程不残留等待者"""
+        governor = LLMGovernor(max_in_flight=1)
+
+        async def scenario():
+            running = asyncio.create_task(governor.ainvoke("m", lambda: asyncio.sleep(10)))
+            queued = asyncio.create_task(governor.aacquire("m"))
+            await asyncio.sleep(0.05)
+            queued.cancel()
+            running.cancel()
+            await asyncio.gather(running, queued, return_exceptions=True)
+
+        asyncio.run(scenario())
+
+        assert governor.get_stats()["in_flight"] == 0
+        assert not governor._async_waiters
+
+
+def test_is_throttling_error():
+    """测试限流与超时错误识别"""
+    assert is_throttling_error(RateLimitError("x"))
+    assert is_throttling_error(TimeoutError())
+    assert not is_throttling_error(ValueError("invalid json"))
+
+
+def test_is_throttling_error_ignores_message_digits():
+    """测试只根据状态码识别 429，错误消息中恰好包含 429 不算限流"""
+    class StatusError(Exception):
+        def __init__(self, message, status_code):
+            super().__init__(message)
+            self.status_code = status_code
+
+    class Response:
+        status_code = 429
+
+    wrapped = Exception("upstream error")
+    wrapped.response = Response()
+
+    assert is_throttling_error(StatusError("Too Many Requests", 429))
+    assert is_throttling_error(wrapped)
+    assert not is_throttling_error(StatusError("prompt uses 4290 tokens", 400))
+    assert not is_throttling_error(Exception("request id req_4291a: rate limit on this key"))
@@ -0,0 +1,107 @@
+# tests/test_pipeline_catalog.py
+"""
+Pipeline 目录服务与配置解析缓存单元测试
+
+测试内容：
+- 未修改的配置文件不重复读取
+- 新增、修改、删除后清单同步更新
+- 查找优先级与 find_pipeline_config_file 一致
+- load_pipeline_config 按内容哈希缓存解析结果，返回独立对象
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+import yaml
+
+from src import pipeline_config
+from src.pipeline_catalog import PipelineCatalog
+
+
+def write_pipeline(path, name, steps=1, mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.safe_dump({
+        "id": path.stem if path.name != "pipeline.yaml" else path.parent.name,
+        "name": name,
+        "description": f"{name} desc",
+        "steps": [
+            {"id": f"s{i}", "type": "agent_flow", "agent": "a", "flow": "f", "output_key": f"o{i}"}
+            for i in range(steps)
+        ],
+    }, allow_unicode=True), encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def pipeline_dirs(tmp_path, monkeypatch):
+    dirs = [tmp_path / "pipelines", tmp_path / "examples"]
+    for d in dirs:
+        d.mkdir()
+    monkeypatch.setattr(pipeline_config, "PIPELINE_DIRS", dirs)
+    return dirs
+
+
+class TestPipelineCatalog:
+    """测试 PipelineCatalog"""
+
+    def test_unchanged_files_not_reread(self, pipeline_dirs):
+        """测试只重新读取变化的配置文件"""
+        write_pipeline(pipeline_dirs[0] / "p1.yaml", "One", mtime=1_000_000)
+        write_pipeline(pipeline_dirs[0] / "p2" / "pipeline.yaml", "Two", mtime=1_000_000)
+        catalog = PipelineCatalog()
+
+        assert [e.pipeline_id for e in catalog.list()] == ["p1", "p2"]
+        assert catalog.reads == 2
+        catalog.list()
+        assert catalog.reads == 2
+
+        write_pipeline(pipeline_dirs[0] / "p1.yaml", "One v2", steps=3, mtime=2_000_000)
+        entry = catalog.get("p1")
+        assert (entry.name, entry.steps_count) == ("One v2", 3)
+        assert catalog.reads == 3
+
+        (pipeline_dirs[0] / "p1.yaml").unlink()
+        assert catalog.ids() == ["p2"]
+
+    def test_lookup_precedence(self, pipeline_dirs):
+        """测试多目录和同目录内的查找优先级"""
+        write_pipeline(pipeline_dirs[0] / "p" / "pipeline.yaml", "Dir")
+        write_pipeline(pipeline_dirs[0] / "p.yaml", "File")
+        write_pipeline(pipeline_dirs[1] / "p.yaml", "Example")
+
+        assert PipelineCatalog().get("p").name == "File"
+
+    def test_search_and_broken_file(self, pipeline_dirs):
+        """测试搜索与无法解析的配置文件"""
+        write_pipeline(pipeline_dirs[0] / "summary.yaml", "文档总结")
+        (pipeline_dirs[0] / "broken.yaml").write_text("a: [", encoding="utf-8")
+        catalog = PipelineCatalog()
+
+        assert [e.pipeline_id for e in catalog.list(search="总结")] == ["summary"]
+        broken = catalog.get("broken")
+        assert broken.name == "broken" and broken.error
+
+
+class TestParsedConfigCache:
+    """测试 load_pipeline_config 解析缓存"""
+
+    def test_parse_cached_by_content(self, pipeline_dirs):
+        """测试内容不变时不重复解析，且每次返回独立对象"""
+        pipeline_config.clear_pipeline_config_cache()
+        write_pipeline(pipeline_dirs[0] / "p.yaml", "Cached")
+
+        with patch.object(pipeline_config.PipelineValidator, "validate_references", return_value=[]), \
+             patch.object(pipeline_config, "_parse_pipeline_config",
+                          wraps=pipeline_config._parse_pipeline_config) as parse:
+            first = pipeline_config.load_pipeline_config("p")
+            first.name = "mutated"
+            second = pipeline_config.load_pipeline_config("p")
+
+            write_pipeline(pipeline_dirs[0] / "p.yaml", "Changed")
+            third = pipeline_config.load_pipeline_config("p")
+
+        assert parse.call_count == 2
+        assert second.name == "Cached"
+        assert third.name == "Changed"
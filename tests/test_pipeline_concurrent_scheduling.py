@@ -4,9 +4,10 @@
 
 验证 PipelineRunner 的并发执行调度实现，包括：
 - 依赖关系分析
-- 并发组调度
+- 就绪队列调度（依赖满足即执行）
 - 同步点等待
 - 最大并发数控制
+- 关键路径记录
 """
 
 import pytest
@@ -548,6 +549,107 @@ class TestPipelineConcurrentScheduling:
         assert all(step.success for step in result.step_results)
         assert result.error is None
 
+    @patch('src.pipeline_runner.load_agent')
+    @patch('src.pipeline_runner.run_flow_with_tokens')
+    def test_ready_step_does_not_wait_for_unrelated_slow_step(self, mock_run_flow, mock_load_agent):
+        """测试步骤在依赖完成后立即执行，不等待同层的慢步骤"""
+        mock_agent = Mock()
+        mock_agent.flows = []
+        for name in ("fast", "slow", "after_fast"):
+            flow = Mock()
+            flow.name = name
+            mock_agent.flows.append(flow)
+        mock_load_agent.return_value = mock_agent
+        
+        start_times = {}
+        
+        def mock_flow_execution(*args, **kwargs):
+            flow_name = kwargs.get('flow_name', 'unknown')
+            start_times[flow_name] = time.time()
+            time.sleep({"fast": 0.02, "slow": 0.3, "after_fast": 0.02}[flow_name])
+            return f"output_{flow_name}", {"total_tokens": 10}, None
+        
+        mock_run_flow.side_effect = mock_flow_execution
+        
+        # fast 和 slow 互相独立，after_fast 只依赖 fast
+        config = PipelineConfig(
+            id="test_pipeline",
+            name="Test Pipeline",
+            steps=[
+                StepConfig(id="fast", type="agent_flow", agent="test_agent", flow="fast",
+                           input_mapping={"input": "text"}, output_key="fast_out"),
+                StepConfig(id="slow", type="agent_flow", agent="test_agent", flow="slow",
+                           input_mapping={"input": "text"}, output_key="slow_out"),
+                StepConfig(id="after_fast", type="agent_flow", agent="test_agent", flow="after_fast",
+                           input_mapping={"input": "fast_out"}, output_key="after_fast_out")
+            ],
+            outputs=[OutputSpec(key="after_fast_out"), OutputSpec(key="slow_out")]
+        )
+        
+        runner = PipelineRunner(config, enable_concurrent=True, max_workers=4)
+        result = runner.execute_sample({"id": "test_sample", "text": "test input"})
+        
+        assert result.error is None
+        assert [r.step_id for r in result.step_results] == ["fast", "slow", "after_fast"]
+        # after_fast 应该在 slow 完成之前开始
+        assert start_times["after_fast"] < start_times["slow"] + 0.2
+        # 关键路径是耗时最长的依赖链
+        assert result.critical_path == ["slow"]
+        assert result.critical_path_time == pytest.approx(
+            result.step_results[1].execution_time
+        )
+        assert set(result.step_timings) == {"fast", "slow", "after_fast"}
+        assert "critical_path" in result.to_dict()
+    
+    @patch('src.pipeline_runner.load_agent')
+    @patch('src.pipeline_runner.run_flow_with_tokens')
+    def test_skip_propagates_and_aborts_after_required_failure(self, mock_run_flow, mock_load_agent):
+        """测试必需步骤失败时跳过沿依赖链传播（包括经过可选步骤），且不再提交新的步骤"""
+        mock_agent = Mock()
+        mock_agent.flows = []
+        for name in ("bad", "child", "grandchild", "other"):
+            flow = Mock()
+            flow.name = name
+            mock_agent.flows.append(flow)
+        mock_load_agent.return_value = mock_agent
+        
+        def mock_flow_execution(*args, **kwargs):
+            flow_name = kwargs.get('flow_name', 'unknown')
+            if flow_name == "bad":
+                raise Exception("模拟失败")
+            return f"output_{flow_name}", {"total_tokens": 10}, None
+        
+        mock_run_flow.side_effect = mock_flow_execution
+        
+        config = PipelineConfig(
+            id="test_pipeline",
+            name="Test Pipeline",
+            steps=[
+                StepConfig(id="bad", type="agent_flow", agent="test_agent", flow="bad",
+                           input_mapping={"input": "text"}, output_key="bad_out"),
+                StepConfig(id="child", type="agent_flow", agent="test_agent", flow="child",
+                           input_mapping={"input": "bad_out"}, output_key="child_out", required=False),
+                StepConfig(id="grandchild", type="agent_flow", agent="test_agent", flow="grandchild",
+                           input_mapping={"input": "child_out"}, output_key="grandchild_out"),
+                StepConfig(id="other", type="agent_flow", agent="test_agent", flow="other",
+                           input_mapping={"input": "text"}, output_key="other_out")
+            ],
+            outputs=[OutputSpec(key="grandchild_out")]
+        )
+        
+        # 单个 worker：other 排在 bad 之后，bad 失败时尚未开始
+        runner = PipelineRunner(config, enable_concurrent=True, max_workers=1)
+        result = runner.execute_sample({"id": "test_sample", "text": "test input"})
+        
+        assert "'bad'" in result.error
+        executed = [call.kwargs.get('flow_name') for call in mock_run_flow.call_args_list]
+        assert executed == ["bad"]
+        step_results = {r.step_id: r for r in result.step_results}
+        assert not step_results["bad"].skipped
+        assert step_results["child"].error == "必需的依赖步骤失败，跳过执行"
+        assert step_results["grandchild"].error == "依赖的步骤被跳过，跳过执行"
+        assert "'bad'" in step_results["other"].error
+        assert all(step_results[s].skipped for s in ("child", "grandchild", "other"))
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
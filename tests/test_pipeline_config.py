@@ -9,7 +9,7 @@ from pathlib import Path
 from unittest.mock import Mock, patch, mock_open
 
 from src.pipeline_config import (
-    PipelineValidator, validate_yaml_schema, load_pipeline_config,
+    AgentReferenceIndex, PipelineValidator, validate_yaml_schema, load_pipeline_config,
     find_pipeline_config_file, list_available_pipelines, save_pipeline_config,
     validate_pipeline_config_file, get_pipeline_summary, PipelineConfigError
 )
@@ -17,6 +17,78 @@ from src.models import PipelineConfig
 from src.error_handler import ConfigError
 
 
+def make_agent(*flow_names):
+    agent = Mock()
+    agent.flows = []
+    for flow_name in flow_names:
+        flow = Mock()
+        flow.name = flow_name
+        agent.flows.append(flow)
+    return agent
+
+
+class TestAgentReferenceIndex:
+    """测试 AgentReferenceIndex"""
+    
+    FLOWS = ("test_flow", "test_flow2", "baseline_flow", "baseline_flow2", "variant_flow")
+    
+    def test_only_referenced_agents_are_loaded(self, sample_pipeline_config):
+        """测试验证只加载 pipeline 引用的 agent，且多个验证器共享索引"""
+        with patch('src.pipeline_config.list_available_agents') as mock_list_agents, \
+             patch('src.pipeline_config.load_agent') as mock_load_agent:
+            mock_list_agents.return_value = ["test_agent", "other1", "other2"]
+            mock_load_agent.return_value = make_agent(*self.FLOWS)
+            
+            index = AgentReferenceIndex()
+            for _ in range(3):
+                validator = PipelineValidator(index)
+                with patch.object(validator, '_resolve_testset_path', return_value=Path(__file__)):
+                    assert validator.validate_references(sample_pipeline_config) == []
+        
+        assert mock_list_agents.call_count == 1
+        assert {c.args[0] for c in mock_load_agent.call_args_list} == {"test_agent"}
+    
+    def test_flows_follow_reloaded_agent(self):
+        """测试 agent 配置重新加载后 flow 集合随之更新"""
+        agents = {"a": make_agent("f1")}
+        with patch('src.pipeline_config.list_available_agents', return_value=["a"]), \
+             patch('src.pipeline_config.load_agent', side_effect=lambda agent_id: agents[agent_id]):
+            index = AgentReferenceIndex()
+            assert index.flows("a") == {"f1"}
+            
+            agents["a"] = make_agent("f1", "f2")
+            assert index.flows("a") == {"f1", "f2"}
+    
+    def test_agent_ids_follow_registry_generation(self):
+        """测试 registry 代数变化后 agent 列表重建，未变化时复用"""
+        registry = Mock(generation=1)
+        with patch('src.pipeline_config.agent_registry.get_registry', return_value=registry), \
+             patch('src.pipeline_config.list_available_agents') as mock_list_agents:
+            mock_list_agents.return_value = ["a"]
+            index = AgentReferenceIndex()
+            assert index.agent_ids == {"a"}
+            assert index.agent_ids == {"a"}
+            assert mock_list_agents.call_count == 1
+            
+            mock_list_agents.return_value = ["a", "b"]
+            registry.generation = 2
+            assert index.agent_ids == {"a", "b"}
+            assert mock_list_agents.call_count == 2
+            
+            mock_list_agents.return_value = ["c"]
+            index.invalidate()
+            assert index.agent_ids == {"c"}
+    
+    def test_load_failure_gives_empty_flows(self):
+        """测试 agent 加载失败时 flow 集合为空"""
+        with patch('src.pipeline_config.list_available_agents', return_value=["a"]), \
+             patch('src.pipeline_config.load_agent', side_effect=ValueError("broken")):
+            validator = PipelineValidator(AgentReferenceIndex())
+            
+            assert validator.available_agents == {"a"}
+            assert validator.agent_flows["a"] == set()
+
+
 class TestPipelineValidator:
     """测试 PipelineValidator 类"""
     
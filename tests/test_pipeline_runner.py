@@ -435,4 +435,81 @@ class TestProgressPrinter:
         # 测试完成进度
         printer(10, 10, "完成")
         # 完成时应该有换行
-        assert mock_print.call_count == 2
\ No newline at end of file
+        assert mock_print.call_count == 2
+
+class TestSampleConcurrency:
+    """测试样本级并发执行"""
+    
+    def test_concurrent_samples_preserve_order(self, sample_pipeline_config, sample_testset,
+                                               mock_load_agent, monkeypatch):
+        """测试样本并发执行时结果顺序与输入一致"""
+        delays = {"这是测试输入1": 0.05, "这是测试输入2": 0.0, "这是回归测试输入": 0.02}
+        
+        def _run_flow(flow_name, extra_vars, agent_id):
+            text = extra_vars.get("text", "")
+            time.sleep(delays.get(text, 0.0))
+            return f"{flow_name}:{text}", {"input_tokens": 1, "output_tokens": 1, "total_tokens": 2}, None
+        
+        monkeypatch.setattr("src.pipeline_runner.run_flow_with_tokens", _run_flow)
+        
+        runner = PipelineRunner(sample_pipeline_config, sample_concurrency=3)
+        results = runner.execute(sample_testset, use_progress_tracker=False)
+        
+        assert [r.sample_id for r in results] == [s["id"] for s in sample_testset]
+    
+    def test_concurrent_samples_use_isolated_context(self, sample_pipeline_config, sample_testset,
+                                                     mock_load_agent, monkeypatch):
+        """测试并发样本之间的步骤输出互不覆盖"""
+        barrier = __import__("threading").Barrier(len(sample_testset), timeout=5)
+        
+        def _run_flow(flow_name, extra_vars, agent_id):
+            text = extra_vars.get("text", "")
+            if flow_name == "baseline_flow":
+                # 所有样本同时完成第一步，确保上下文确实被并发写入
+                barrier.wait()
+            return f"{flow_name}<{text}>", {"input_tokens": 1, "output_tokens": 1, "total_tokens": 2}, None
+        
+        monkeypatch.setattr("src.pipeline_runner.run_flow_with_tokens", _run_flow)
+        for step in sample_pipeline_config.steps:
+            step.input_mapping = {"text": "step1_output" if step.id == "step2" else "input_text"}
+        
+        runner = PipelineRunner(sample_pipeline_config, enable_concurrent=False)
+        results = runner.execute(sample_testset, use_progress_tracker=False, sample_concurrency=3)
+        
+        for sample, result in zip(sample_testset, results):
+            assert result.error is None
+            assert result.final_outputs["step2_output"] == (
+                f"baseline_flow2<baseline_flow<{sample['input_text']}>>"
+            )
+    
+    def test_concurrent_progress_callback_reaches_total(self, sample_pipeline_config, sample_testset,
+                                                        mock_load_agent, mock_run_flow_with_tokens):
+        """测试并发模式下进度回调按完成数递增"""
+        runner = PipelineRunner(sample_pipeline_config, sample_concurrency=2)
+        progress_calls = []
+        runner.set_progress_callback(lambda current, total, message: progress_calls.append(current))
+        
+        runner.execute(sample_testset, use_progress_tracker=False)
+        
+        assert progress_calls == sorted(progress_calls)
+        assert progress_calls[-1] == len(sample_testset)
+    
+    def test_concurrent_checkpoint_updates_in_order(self, sample_pipeline_config, sample_testset,
+                                                    mock_load_agent, mock_run_flow_with_tokens):
+        """测试并发模式下检查点按样本顺序更新"""
+        from src.checkpoint_manager import ResumableExecutor
+        
+        checkpoint_manager = Mock()
+        checkpoint_manager.find_resumable_checkpoint.return_value = None
+        checkpoint_manager.create_checkpoint.return_value = "ckpt"
+        
+        runner = PipelineRunner(sample_pipeline_config)
+        executor = ResumableExecutor(runner, checkpoint_manager)
+        results = executor.execute_with_resume(sample_testset, sample_concurrency=3)
+        
+        indices = [
+            call.kwargs["completed_sample_index"]
+            for call in checkpoint_manager.update_checkpoint.call_args_list
+        ]
+        assert indices == [0, 1, 2]
+        assert [r.sample_id for r in results] == [s["id"] for s in sample_testset]
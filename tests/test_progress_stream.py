@@ -0,0 +1,155 @@
+"""
+Tests for Progress Streaming
+
+This module tests the per-execution pub/sub channels and the push-based
+WebSocket and Server-Sent Events endpoints built on them.
+"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.app import app
+from src.api.execution_manager import get_execution_manager
+from src.api.models import ExecutionType
+from src.api.progress_stream import ProgressBroker
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestProgressBroker:
+    """Test ProgressBroker."""
+
+    def test_publish_and_subscribe(self):
+        """Subscribers receive events published after they subscribe, in order."""
+        broker = ProgressBroker()
+        broker.open("exec_1")
+
+        async def scenario():
+            subscription = broker.subscribe("exec_1")
+            assert subscription.needs_snapshot and subscription.snapshot_seq == 0
+            broker.publish("exec_1", "started", status="running")
+            broker.publish("exec_1", "completed", status="completed")
+            events = [await subscription.next(timeout=1), await subscription.next(timeout=1)]
+            assert subscription.done
+            return events
+
+        events = run(scenario())
+        assert [(e.seq, e.type) for e in events] == [(1, "started"), (2, "completed")]
+
+    def test_resume_from_sequence(self):
+        """Resuming replays only newer events, including after the channel closed."""
+        broker = ProgressBroker()
+        broker.open("exec_1")
+        for event_type in ["started", "progress", "progress", "completed"]:
+            broker.publish("exec_1", event_type)
+
+        async def scenario():
+            subscription = broker.subscribe("exec_1", after=2)
+            assert not subscription.needs_snapshot
+            events = []
+            while not subscription.done:
+                events.append(await subscription.next(timeout=1))
+            return events
+
+        assert [e.seq for e in run(scenario())] == [3, 4]
+
+    def test_resume_beyond_history_needs_snapshot(self):
+        """A resume point that fell out of the history falls back to a snapshot."""
+        broker = ProgressBroker(history_size=2)
+        broker.open("exec_1")
+        for _ in range(5):
+            broker.publish("exec_1", "progress")
+
+        async def scenario():
+            return broker.subscribe("exec_1", after=1)
+
+        subscription = run(scenario())
+        assert subscription.needs_snapshot and subscription.snapshot_seq == 5
+
+    def test_publish_from_worker_thread(self):
+        """Events published from another thread wake the subscriber."""
+        broker = ProgressBroker()
+        broker.open("exec_1")
+
+        async def scenario():
+            subscription = broker.subscribe("exec_1")
+            threading.Timer(0.05, broker.publish, ("exec_1", "progress"), {"percentage": 50.0}).start()
+            return await subscription.next(timeout=2)
+
+        event = run(scenario())
+        assert event.type == "progress" and event.data == {"percentage": 50.0}
+
+    def test_closed_channels_are_bounded(self):
+        """Only the most recent finished channels are retained."""
+        broker = ProgressBroker(retain_closed=2)
+        for i in range(3):
+            broker.open(f"exec_{i}")
+            broker.publish(f"exec_{i}", "completed")
+
+        assert not broker.has_channel("exec_0")
+        assert broker.has_channel("exec_1") and broker.has_channel("exec_2")
+        assert broker.publish("exec_2", "progress") is None
+
+
+class TestStreamingEndpoints:
+    """Test the WebSocket and SSE endpoints."""
+
+    @pytest.fixture
+    def manager(self):
+        manager = get_execution_manager()
+        manager.executions.clear()
+        yield manager
+        manager.executions.clear()
+
+    def test_websocket_pushes_updates(self, manager, monkeypatch):
+        """Started, progress and completed messages are pushed with sequence numbers."""
+        release = threading.Event()
+
+        def execute(*args):
+            release.wait(5)
+            return {"output": "ok"}
+
+        monkeypatch.setattr(manager, "_execute_agent_sync", execute)
+        manager.create_execution("exec_ws_push", ExecutionType.AGENT, "agent", {}, {})
+        job = manager.submit_agent("exec_ws_push", "agent", {}, {})
+
+        with TestClient(app).websocket_connect("/api/v1/executions/exec_ws_push/progress/ws") as websocket:
+            first = websocket.receive_json()
+            assert first["type"] == "status"
+            release.set()
+            messages = [first]
+            while messages[-1]["type"] != "completed":
+                messages.append(websocket.receive_json())
+
+        job.result(timeout=5)
+        assert messages[-1]["outputs"] == {"output": "ok"}
+        seqs = [m["seq"] for m in messages[1:]]
+        assert seqs == sorted(seqs) and len(set(seqs)) == len(seqs)
+
+    def test_sse_stream_resume(self, manager, monkeypatch):
+        """The SSE endpoint replays events after Last-Event-ID and ends with the final event."""
+        monkeypatch.setattr(manager, "_execute_agent_sync", lambda *args: {"output": "done"})
+        manager.create_execution("exec_sse", ExecutionType.AGENT, "agent", {}, {})
+        manager.submit_agent("exec_sse", "agent", {}, {}).result(timeout=5)
+
+        client = TestClient(app)
+        full = client.get("/api/v1/executions/exec_sse/events", params={"after": 0})
+        resumed = client.get("/api/v1/executions/exec_sse/events", headers={"Last-Event-ID": "2"})
+
+        assert full.status_code == 200
+        assert full.headers["content-type"].startswith("text/event-stream")
+        events = [line[len("event: "):] for line in full.text.splitlines() if line.startswith("event: ")]
+        assert events == ["started", "progress", "progress", "completed"]
+        data = [json.loads(line[len("data: "):]) for line in resumed.text.splitlines() if line.startswith("data: ")]
+        assert [d["seq"] for d in data] == [3, 4]
+        assert data[-1]["outputs"] == {"output": "done"}
+
+    def test_sse_not_found(self, manager):
+        response = TestClient(app).get("/api/v1/executions/exec_missing/events")
+        assert response.status_code == 404
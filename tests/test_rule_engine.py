@@ -0,0 +1,112 @@
+# tests/test_rule_engine.py
+"""
+规则引擎单元测试
+
+测试内容：
+- 预编译规则集与逐条 apply_rule 的结果一致
+- 多关键词匹配器（重叠、前缀、忽略大小写）
+- 批量评估与进程池评估
+- 规则集编译缓存
+"""
+
+import random
+
+import pytest
+
+from src import rule_engine
+from src.rule_engine import (
+    CompiledRuleSet,
+    KeywordMatcher,
+    apply_rule,
+    apply_rules,
+    approx_token_count,
+    compile_rules,
+)
+
+
+RULES = [
+    {"id": "not_empty", "kind": "non_empty", "target": "output"},
+    {"id": "max_tokens_8", "kind": "max_tokens", "target": "output", "max_tokens": 8},
+    {"id": "max_chars_30", "kind": "max_chars", "target": "output", "max_chars": 30},
+    {"id": "binary", "kind": "allowed_values", "target": "output", "allowed_values": ["0", "1"]},
+    {"id": "kw", "kind": "contains_any", "target": "output", "keywords": ["用户", "ab", "b"]},
+    {"id": "kw_ic", "kind": "contains_any", "target": "output", "keywords": ["Hello", "HELL"], "ignore_case": True},
+    {"id": "kw_empty", "kind": "contains_any", "target": "output", "keywords": []},
+    {"id": "no_json", "kind": "regex_match", "target": "output", "pattern": "^[^{]*$"},
+    {"id": "bad_regex", "kind": "regex_match", "target": "output", "pattern": "(unclosed"},
+    {"id": "prefix", "kind": "starts_with", "target": "output", "prefix": "总结", "ignore_case": True},
+    {"id": "suffix", "kind": "ends_with", "target": "output", "suffix": "。"},
+    {"id": "bad_limit", "kind": "max_tokens", "target": "output", "max_tokens": None},
+    {"id": "unknown", "kind": "no_such_kind", "target": "output"},
+]
+
+
+def random_text(rng):
+    alphabet = ["a", "b", "用", "户", "总结", "。", " ", "{", "Hello", "hell", "0", "1", "\n", "word"]
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+
+
+def reference(rules, value):
+    violations = [rule.get("id", "unknown") for rule in rules if apply_rule(rule, value)]
+    return {"rule_pass": 0 if violations else 1, "rule_violations": ",".join(violations)}
+
+
+class TestCompiledRuleSet:
+    """测试 CompiledRuleSet"""
+
+    def test_matches_per_rule_handlers(self):
+        """测试随机文本上与逐条处理结果一致"""
+        rng = random.Random(0)
+        compiled = CompiledRuleSet(RULES)
+
+        for _ in range(2000):
+            value = random_text(rng)
+            assert compiled.evaluate(value) == reference(RULES, value), value
+
+    def test_overlapping_keywords(self):
+        """测试重叠与前缀关键词都能被识别"""
+        matcher = KeywordMatcher({0: ["ab"], 1: ["b"], 2: ["a"], 3: ["zz"]})
+
+        assert matcher.match("ab") == {0, 1, 2}
+        assert matcher.match("xx") == set()
+
+    def test_empty_keyword_always_matches(self):
+        """测试空关键词与 `"" in text` 语义一致"""
+        matcher = KeywordMatcher({0: [""], 1: ["x"]})
+
+        assert matcher.match("") == {0}
+
+    def test_evaluate_many_keeps_order(self):
+        """测试批量评估结果顺序与输入一致"""
+        values = ["1", "", "{json}", "总结：用户满意。"]
+        compiled = CompiledRuleSet(RULES)
+
+        assert compiled.evaluate_many(values) == [reference(RULES, v) for v in values]
+
+    def test_evaluate_many_with_processes(self, monkeypatch):
+        """测试进程池批量评估结果一致"""
+        monkeypatch.setattr(rule_engine, "PARALLEL_MIN_ROWS", 10)
+        rng = random.Random(1)
+        values = [random_text(rng) for _ in range(50)]
+        compiled = CompiledRuleSet(RULES)
+
+        assert compiled.evaluate_many(values, workers=2, chunk_size=7) == [reference(RULES, v) for v in values]
+
+
+def test_compile_rules_cached():
+    """测试相同规则只编译一次"""
+    rules = [{"id": "r", "kind": "max_chars", "target": "output", "max_chars": 3}]
+
+    assert compile_rules(rules) is compile_rules([dict(rules[0])])
+    assert apply_rules(rules, "abcd") == {"rule_pass": 0, "rule_violations": "r"}
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("", 0),
+    ("你好 world", 4),
+    ("中abc", 1),
+    ("hello, world! 123", 5),
+])
+def test_approx_token_count(text, expected):
+    """测试 token 估算（单次扫描）"""
+    assert approx_token_count(text) == expected
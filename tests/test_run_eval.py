@@ -0,0 +1,86 @@
+# tests/test_run_eval.py
+"""
+run_eval 执行阶段单元测试
+
+测试内容：
+- 顺序与并发执行结果一致（行顺序、列名）
+- 每个 flow 的 token 统计
+- 并发执行时的实际并发度
+- 出错时异常向上抛出
+"""
+
+import random
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src import run_eval
+
+
+CASES = [{"id": f"c{i}", "text": f"input {i}"} for i in range(6)]
+
+
+def fake_run_flow(flow_name, extra_vars=None, agent_id=None):
+    time.sleep(random.uniform(0, 0.02))
+    output = f"{flow_name}:{extra_vars['text']}"
+    return output, {"input_tokens": 2, "output_tokens": 3, "total_tokens": 5, "cache_hit": 0}, {}
+
+
+class TestExecuteCases:
+    """测试 execute_cases"""
+
+    @pytest.mark.parametrize("flows", [["f1"], ["f1", "f2"]])
+    def test_concurrent_matches_sequential(self, flows):
+        """测试并发执行的结果行与顺序执行完全一致"""
+        with patch.object(run_eval, "run_flow_with_tokens", side_effect=fake_run_flow):
+            seq_rows, seq_stats = run_eval.execute_cases(CASES, flows, "agent", concurrency=1)
+            par_rows, par_stats = run_eval.execute_cases(CASES, flows, "agent", concurrency=4)
+
+        assert par_rows == seq_rows
+        assert [list(row) for row in par_rows] == [list(row) for row in seq_rows]
+        assert par_stats == seq_stats
+        assert [row["id"] for row in par_rows] == [case["id"] for case in CASES]
+
+    def test_multi_flow_columns_and_token_stats(self):
+        """测试多 flow 模式的列名与 token 汇总"""
+        with patch.object(run_eval, "run_flow_with_tokens", side_effect=fake_run_flow):
+            rows, stats = run_eval.execute_cases(CASES, ["f1", "f2"], "agent", concurrency=3)
+
+        assert rows[0]["output__f1"] == "f1:input 0"
+        assert rows[0]["total_tokens__f2"] == 5
+        assert stats["f1"]["total_tokens"] == 5 * len(CASES)
+        assert stats["f2"]["input_tokens"] == 2 * len(CASES)
+
+    def test_concurrency_is_bounded(self):
+        """测试同时执行的 (case, flow) 数量不超过 concurrency"""
+        lock = threading.Lock()
+        active = 0
+        peak = 0
+
+        def tracking_run_flow(flow_name, extra_vars=None, agent_id=None):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.03)
+            with lock:
+                active -= 1
+            return "ok", {"total_tokens": 1}, {}
+
+        with patch.object(run_eval, "run_flow_with_tokens", side_effect=tracking_run_flow):
+            run_eval.execute_cases(CASES, ["f1", "f2"], "agent", concurrency=3)
+
+        assert 1 < peak <= 3
+
+    def test_error_propagates(self):
+        """测试某个组合失败时异常向上抛出"""
+        def failing_run_flow(flow_name, extra_vars=None, agent_id=None):
+            if extra_vars["text"] == "input 2":
+                raise RuntimeError("boom")
+            return "ok", {}, {}
+
+        with patch.object(run_eval, "run_flow_with_tokens", side_effect=failing_run_flow):
+            with pytest.raises(RuntimeError, match="boom"):
+                run_eval.execute_cases(CASES, ["f1"], "agent", concurrency=2)
@@ -0,0 +1,110 @@
+# tests/test_tokenizer.py
+"""
+Token 计数服务单元测试
+
+测试内容：
+- 计数结果按内容缓存
+- 批量计数与逐条计数一致，且只编码未命中的文本
+- 编码器按模型惰性加载，加载失败时退回启发式估算
+"""
+
+import pytest
+
+from src import tokenizer
+from src.tokenizer import TokenCounter, approx_token_count
+
+
+class FakeEncoding:
+    """按空格切分的假编码器，记录编码次数"""
+
+    name = "fake"
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, text, disallowed_special=()):
+        self.encoded.append(text)
+        return text.split()
+
+    def encode_batch(self, texts, disallowed_special=()):
+        self.encoded.extend(texts)
+        return [text.split() for text in texts]
+
+
+@pytest.fixture
+def fake_encoding(monkeypatch):
+    encoding = FakeEncoding()
+    monkeypatch.setattr(TokenCounter, "get_encoding", lambda self, model=None: encoding)
+    return encoding
+
+
+class TestTokenCounter:
+    """测试 TokenCounter"""
+
+    def test_counts_are_memoized(self, fake_encoding):
+        """测试相同文本只编码一次"""
+        counter = TokenCounter()
+        long_text = "word " * 200
+
+        assert counter.count("a b c") == 3
+        assert counter.count("a b c") == 3
+        assert counter.count(long_text) == 200
+        assert counter.count(long_text) == 200
+
+        assert fake_encoding.encoded == ["a b c", long_text]
+        assert counter.get_stats()["hits"] == 2
+
+    def test_count_many_encodes_only_misses(self, fake_encoding):
+        """测试批量计数只编码未命中且去重后的文本"""
+        counter = TokenCounter()
+        counter.count("x y")
+
+        counts = counter.count_many(["x y", "p q r", "", "p q r"])
+
+        assert counts == [2, 3, 0, 3]
+        assert fake_encoding.encoded == ["x y", "p q r"]
+
+    def test_lru_bound(self, fake_encoding):
+        """测试缓存条数上限"""
+        counter = TokenCounter(cache_size=2)
+        for text in ["a", "b", "c"]:
+            counter.count(text)
+
+        assert counter.get_stats()["size"] == 2
+
+    def test_fallback_without_encoding(self, monkeypatch):
+        """测试无法加载编码器时使用启发式估算"""
+        monkeypatch.setattr(TokenCounter, "get_encoding", lambda self, model=None: None)
+        counter = TokenCounter()
+        text = "你好 world"
+
+        assert counter.count(text) == approx_token_count(text)
+        assert counter.count_many([text]) == [approx_token_count(text)]
+
+    def test_encoding_loaded_once_per_model(self, monkeypatch):
+        """测试编码器按模型缓存，失败结果同样缓存"""
+        calls = []
+
+        class FakeTiktoken:
+            @staticmethod
+            def encoding_for_model(model):
+                calls.append(model)
+                raise KeyError(model)
+
+            @staticmethod
+            def get_encoding(name):
+                calls.append(name)
+                raise ConnectionError("offline")
+
+        monkeypatch.setattr(tokenizer, "TIKTOKEN_AVAILABLE", True)
+        monkeypatch.setattr(tokenizer, "tiktoken", FakeTiktoken, raising=False)
+        counter = TokenCounter()
+
+        assert counter.get_encoding("m") is None
+        assert counter.get_encoding("m") is None
+        assert calls == ["m", "cl100k_base"]
+
+
+def test_count_tokens_positive():
+    """测试全局计数器对非空文本返回正数"""
+    assert tokenizer.count_tokens("hello world, this is a prompt", "unknown-model") > 0